@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""as-of(시점) 조회 공용 계층 — '날짜 d 이하 마지막 유효값'을 정렬 배열 + 이진탐색으로
+
+배경: 같은 질문을 곳마다 다르게 풀어 옴.
+  PIT TTM EPS (daily_runner._pit_trailing_eps·_vm_trailing_eps, gap_sleeve.pit_trailing_eps,
+    research/vm_canonical_bt._pit_te) — 공시 리스트를 앞에서부터 선형 순회.
+  DB 값 (_live_ntm_current·_below_pe_live·_live_pe·_fwdper_gap_display·dollar_volume 조회 등) —
+    종목마다 'WHERE ticker=? AND date<=? ORDER BY date DESC LIMIT 1' 쿼리 1회.
+방식:
+  pit_value(records, date): [(날짜, 값)] 오름차순 리스트 → bisect O(log n). date None = 마지막(라이브).
+  AsOfPanel(panel): ntm_panel(memmap 날짜×종목) 위 as-of.
+    날짜 → searchsorted로 행 i (미래 행은 원천 배제 = look-ahead 없음).
+    유효성 마스크의 '마지막 유효 행 번호' 행렬(np.maximum.accumulate)을 필드 조합별 1회 만들어 두고
+    [i, 종목] 조회 → 종목 수만큼 O(1). 유효 = NOT NULL(NaN 아님), positive 필드는 > 0.
+    asof(date, fields, tickers, require=None):
+      require 없음 → 필드마다 각자 마지막 유효값 (구 'AND x IS NOT NULL ORDER BY date DESC LIMIT 1' 필드별).
+      require=(필드…) → require가 모두 유효한 마지막 '행'에서 fields를 함께 (구 한 쿼리로 여러 컬럼 읽기 —
+        값이 NULL이면 None).
+  asof_sql(conn, …): 같은 계약의 SQL 경로 (패널 없음·숫자 아닌 필드).
+범위: 패널 = 본 DB(ntm_screening 최근 구간 — cold_store 이후 15개월). 더 과거 as-of는 asof_sql(이력 연결).
+"""
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from operator import itemgetter
+
+import numpy as np
+
+_FIRST = itemgetter(0)
+
+
+def pit_value(records, date=None):
+    """records: [(날짜, 값)] 날짜 오름차순 → date 이하 마지막 값 (없으면 None). date None = 마지막 값."""
+    if not records:
+        return None
+    if date is None:
+        return records[-1][1]
+    i = bisect_right(records, date, key=_FIRST)
+    return records[i - 1][1] if i else None
+
+
+def _cutoff(date, max_age_days):
+    return (datetime.strptime(date, '%Y-%m-%d') - timedelta(days=max_age_days)).strftime('%Y-%m-%d')
+
+
+class AsOfPanel:
+    """NtmPanel 위 as-of 조회. 마지막-유효-행 행렬은 (필드 조합, positive)별로 1회 계산해 보관."""
+
+    def __init__(self, panel):
+        self.panel = panel
+        self.dates = np.asarray(panel.dates)
+        self._last = {}
+
+    def covers(self, fields):
+        have = set(self.panel.fields)
+        return all(f in have for f in fields)
+
+    def row(self, date=None, inclusive=True):
+        """date 이하(inclusive=False면 미만) 마지막 패널 행 번호 (-1 = 없음)."""
+        if date is None:
+            return len(self.dates) - 1
+        return int(np.searchsorted(self.dates, date, side='right' if inclusive else 'left')) - 1
+
+    def last_valid(self, fields, positive=()):
+        """(날짜 × 종목) int32 — 각 행 이하에서 fields가 모두 유효한 마지막 행 (-1 = 없음)."""
+        key = (tuple(fields), tuple(sorted(set(positive) & set(fields))))
+        out = self._last.get(key)
+        if out is None:
+            valid = None
+            for f in fields:
+                a = self.panel.field(f)
+                with np.errstate(invalid='ignore'):
+                    v = (a > 0) if f in positive else ~np.isnan(a)
+                valid = v if valid is None else (valid & v)
+            rows = np.arange(valid.shape[0], dtype=np.int32)[:, None]
+            out = np.where(valid, rows, np.int32(-1))
+            np.maximum.accumulate(out, axis=0, out=out)
+            self._last[key] = out
+        return out
+
+    def asof(self, date, fields, tickers=None, inclusive=True, require=None, positive=(), max_age_days=None):
+        """{ticker: {field: 값}} — 계약은 모듈 docstring. 패널에 없는 종목은 결과에서 빠짐."""
+        pn = self.panel
+        i = self.row(date, inclusive)
+        if i < 0:
+            return {}
+        if tickers is None:
+            names = list(pn.tickers)
+            cols = np.arange(len(names))
+        else:
+            names = [t for t in tickers if t in pn.ticker_index]
+            cols = np.array([pn.ticker_index[t] for t in names], dtype=np.intp)
+        if not names:
+            return {}
+        cut = _cutoff(date, max_age_days) if (max_age_days is not None and date) else None
+        out = {}
+        if require:
+            last = self.last_valid(require, positive)[i, cols]
+            ok = last >= 0
+            if cut is not None:
+                ok &= self.dates[np.maximum(last, 0)] >= cut
+            for f in fields:
+                vals = pn.field(f)[np.maximum(last, 0), cols]
+                for j in np.flatnonzero(ok):
+                    v = vals[j]
+                    out.setdefault(names[j], {})[f] = None if v != v else float(v)
+            return out
+        for f in fields:
+            last = self.last_valid((f,), positive)[i, cols]
+            ok = last >= 0
+            if cut is not None:
+                ok &= self.dates[np.maximum(last, 0)] >= cut
+            vals = pn.field(f)[np.maximum(last, 0), cols]
+            for j in np.flatnonzero(ok):
+                out.setdefault(names[j], {})[f] = float(vals[j])
+        return out
+
+
+def _valid_sql(f, positive):
+    return f'{f} > 0' if f in positive else f'{f} IS NOT NULL'
+
+
+def asof_sql(conn, date, fields, tickers, inclusive=True, require=None, positive=(), max_age_days=None):
+    """AsOfPanel.asof와 같은 계약의 SQL 경로 — 종목(·필드)마다 ORDER BY date DESC LIMIT 1 (인덱스 탐색)."""
+    date_sql, params = '', []
+    if date is not None:
+        date_sql = f' AND date {"<=" if inclusive else "<"} ?'
+        params.append(date)
+        if max_age_days is not None:
+            date_sql += ' AND date >= ?'
+            params.append(_cutoff(date, max_age_days))
+    out = {}
+    for tk in tickers:
+        if require:
+            r = conn.execute(
+                f'SELECT {", ".join(fields)} FROM ntm_screening WHERE ticker=?'
+                f'{"".join(" AND " + _valid_sql(f, positive) for f in require)}{date_sql} '
+                f'ORDER BY date DESC LIMIT 1', (tk, *params)).fetchone()
+            if r:
+                out[tk] = dict(zip(fields, r))
+            continue
+        for f in fields:
+            r = conn.execute(
+                f'SELECT {f} FROM ntm_screening WHERE ticker=? AND {_valid_sql(f, positive)}{date_sql} '
+                f'ORDER BY date DESC LIMIT 1', (tk, *params)).fetchone()
+            if r:
+                out.setdefault(tk, {})[f] = r[0]
+    return out
@@ -7,7 +7,6 @@ EPS Momentum Backtest Framework
 - 부족하면 현황만 출력하고 종료
 """
 
-import sqlite3
 import sys
 import io
 from datetime import datetime, timedelta
@@ -24,6 +23,8 @@ if sys.platform == 'win32':
 
 PROJECT_ROOT = Path(__file__).parent
 DB_PATH = PROJECT_ROOT / 'eps_momentum_data.db'
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # repo 루트 (cold_store)
+from cold_store import open_history  # 콜드 파티션(오래된 달) 포함 전 이력 — 없으면 그냥 읽기 전용
 
 # 테스트 변수
 VERIFY_DAYS_LIST = [2, 3, 5, 7]
@@ -33,7 +34,7 @@ MIN_DATA_DAYS = 30  # 최소 데이터 일수
 
 def load_backtest_data():
     """DB에서 part2_rank 있는 전체 데이터 로드"""
-    conn = sqlite3.connect(DB_PATH)
+    conn = open_history(DB_PATH)
     df = pd.read_sql_query(
         """SELECT date, ticker, part2_rank, price, adj_score, adj_gap
         FROM ntm_screening
@@ -47,7 +48,7 @@ def load_backtest_data():
 
 def get_data_summary():
     """DB 데이터 현황 요약"""
-    conn = sqlite3.connect(DB_PATH)
+    conn = open_history(DB_PATH)
     cursor = conn.cursor()
 
     cursor.execute('SELECT COUNT(DISTINCT date) FROM ntm_screening WHERE part2_rank IS NOT NULL')
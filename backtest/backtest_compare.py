@@ -18,13 +18,14 @@ Usage:
   - VIX 국면별 포지션: 추가 검증 중
 """
 import math
-import sqlite3
 import sys
 from collections import defaultdict
 from pathlib import Path
 
 sys.stdout.reconfigure(encoding='utf-8')
 DB_PATH = Path(__file__).parent.parent / 'eps_momentum_data.db'
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # repo 루트 (cold_store)
+from cold_store import open_history  # 콜드 파티션(오래된 달) 포함 전 이력 — 없으면 그냥 읽기 전용
 
 
 # ── 공통 유틸 ──
@@ -100,7 +101,7 @@ def load_data():
     Returns:
         dict with keys: all_dates, gap_dates, gap_by_date, daily_data, all_prices
     """
-    conn = sqlite3.connect(DB_PATH)
+    conn = open_history(DB_PATH)
     cursor = conn.cursor()
 
     all_dates = [r[0] for r in cursor.execute(
@@ -1,12 +1,15 @@
 """전략 비교 백테스트: raw adj_gap vs w_gap × threshold vs rank-based"""
-import sqlite3, sys, numpy as np
+import sys, numpy as np
+from pathlib import Path
 sys.stdout.reconfigure(encoding='utf-8')
 
 DB = 'eps_momentum_data.db'
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # repo 루트 (cold_store)
+from cold_store import open_history  # 콜드 파티션(오래된 달) 포함 전 이력 — 없으면 그냥 읽기 전용
 
 
 def load_data():
-    conn = sqlite3.connect(DB)
+    conn = open_history(DB)
     c = conn.cursor()
     dates = [r[0] for r in c.execute(
         'SELECT DISTINCT date FROM ntm_screening WHERE part2_rank IS NOT NULL ORDER BY date'
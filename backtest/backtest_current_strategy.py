@@ -5,13 +5,14 @@
 - 이탈: part2_rank > 15 / min_seg < -2% / -10% 손절
 - 최대 3종목, 동일 비중
 """
-import sqlite3
 import sys
 from collections import defaultdict
 from pathlib import Path
 
 sys.stdout.reconfigure(encoding='utf-8')
 DB_PATH = Path(__file__).parent.parent / 'eps_momentum_data.db'
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # repo 루트 (cold_store)
+from cold_store import open_history  # 콜드 파티션(오래된 달) 포함 전 이력 — 없으면 그냥 읽기 전용
 
 
 def calc_min_seg(nc, n7, n30, n60, n90):
@@ -59,7 +60,7 @@ def compute_w_gap(cursor, date_str, all_dates):
 
 
 def main():
-    conn = sqlite3.connect(DB_PATH)
+    conn = open_history(DB_PATH)
     cursor = conn.cursor()
 
     all_dates = [r[0] for r in cursor.execute(
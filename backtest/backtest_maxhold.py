@@ -1,11 +1,13 @@
 """Top5 진입 + Top30 이탈 + 최대 보유 제한 비교"""
 import sys
+from pathlib import Path
 sys.stdout.reconfigure(encoding='utf-8')
-import sqlite3
 from collections import defaultdict
 
 DB = 'eps_momentum_data.db'
-conn = sqlite3.connect(DB)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # repo 루트 (cold_store)
+from cold_store import open_history  # 콜드 파티션(오래된 달) 포함 전 이력 — 없으면 그냥 읽기 전용
+conn = open_history(DB)
 c = conn.cursor()
 c.execute('''
     SELECT date, ticker, part2_rank, price
@@ -1,8 +1,11 @@
-import sys, sqlite3, copy
+import sys, copy
+from pathlib import Path
 import numpy as np
 sys.stdout.reconfigure(encoding="utf-8")
 
 DB = r"C:\dev\claude-code\eps-momentum-us\eps_momentum_data.db"
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # repo 루트 (cold_store)
+from cold_store import open_history  # 콜드 파티션(오래된 달) 포함 전 이력 — 없으면 그냥 읽기 전용
 
 def get_eligible(cur, date):
     cur.execute("""SELECT ticker, adj_gap, rev_growth, price, ma60, adj_score,
@@ -50,7 +53,7 @@ def fp4(v, w=20):
     s = "+" if v >= 0 else ""
     return f"{s}{v:.4%}".rjust(w)
 
-conn = sqlite3.connect(DB)
+conn = open_history(DB)
 cur = conn.cursor()
 cur.execute("SELECT DISTINCT date FROM ntm_screening ORDER BY date")
 dates = [r[0] for r in cur.fetchall()]
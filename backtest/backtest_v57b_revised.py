@@ -6,16 +6,18 @@
 - v55 현행: Top3/Top7 rank exit, min_seg<-2% exit
 """
 import sys
-import sqlite3
+from pathlib import Path
 import numpy as np
 
 sys.stdout.reconfigure(encoding='utf-8')
 
 DB = 'eps_momentum_data.db'
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # repo 루트 (cold_store)
+from cold_store import open_history  # 콜드 파티션(오래된 달) 포함 전 이력 — 없으면 그냥 읽기 전용
 
 
 def load_data():
-    conn = sqlite3.connect(DB)
+    conn = open_history(DB)
     c = conn.cursor()
 
     dates = [r[0] for r in c.execute(
@@ -1,12 +1,15 @@
 """wTop3/wTop15 최종 백테스트 — 전체 DB 날짜, 매매 상세 로그"""
-import sqlite3, sys, numpy as np
+import sys, numpy as np
+from pathlib import Path
 sys.stdout.reconfigure(encoding='utf-8')
 
 DB = 'eps_momentum_data.db'
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # repo 루트 (cold_store)
+from cold_store import open_history  # 콜드 파티션(오래된 달) 포함 전 이력 — 없으면 그냥 읽기 전용
 
 
 def load_data():
-    conn = sqlite3.connect(DB)
+    conn = open_history(DB)
     c = conn.cursor()
     # part2_rank 있는 날짜 (거래일)
     trade_dates = [r[0] for r in c.execute(
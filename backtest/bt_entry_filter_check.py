@@ -4,10 +4,13 @@
 A. 기존 v55 (진입 필터 없음, 이탈만 min_seg<-2%)
 B. 진입 시에도 min_seg<-2% 스킵 (논리적 일관성)
 """
-import sqlite3, sys
+import sys
+from pathlib import Path
 sys.stdout.reconfigure(encoding='utf-8')
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # repo 루트 (cold_store)
+from cold_store import open_history  # 콜드 파티션(오래된 달) 포함 전 이력 — 없으면 그냥 읽기 전용
 
-conn = sqlite3.connect('eps_momentum_data.db')
+conn = open_history('eps_momentum_data.db')
 c = conn.cursor()
 
 dates = [d[0] for d in c.execute(
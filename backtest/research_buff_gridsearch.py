@@ -16,13 +16,15 @@
   D. 복합 스코어: w_gap × α + indicator × β
   E. 다중 지표 결합
 """
-import sqlite3
 import sys
+from pathlib import Path
 import itertools
 from collections import defaultdict
 
 sys.stdout.reconfigure(encoding='utf-8')
 DB_PATH = 'eps_momentum_data.db'
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # repo 루트 (cold_store)
+from cold_store import open_history  # 콜드 파티션(오래된 달) 포함 전 이력 — 없으면 그냥 읽기 전용
 
 
 def calc_min_seg_and_segs(nc, n7, n30, n60, n90):
@@ -63,7 +65,7 @@ def compute_w_gap(cursor, date_str, all_dates):
 
 
 def load_data():
-    conn = sqlite3.connect(DB_PATH)
+    conn = open_history(DB_PATH)
     c = conn.cursor()
 
     dates = [r[0] for r in c.execute(
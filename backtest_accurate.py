@@ -7,7 +7,6 @@
   - conviction 변형은 monkey-patch로 처리
 """
 import sqlite3
-import shutil
 import os
 import sys
 import json
@@ -19,6 +18,7 @@ DB_ORIGINAL = 'eps_momentum_data.db'
 
 sys.path.insert(0, '.')
 import daily_runner as dr
+from cold_store import copy_history, open_history
 
 # ticker → industry 매핑 (cache에서 로드)
 with open('ticker_info_cache.json', encoding='utf-8') as f:
@@ -161,7 +161,7 @@ def regenerate_part2_ranks(test_db_path, conviction_fn):
 def verify_sim_accuracy(test_db_path, original_db_path):
     """두 DB의 part2_rank 일치 검증"""
     conn1 = sqlite3.connect(test_db_path)
-    conn2 = sqlite3.connect(original_db_path)
+    conn2 = open_history(original_db_path)
     c1, c2 = conn1.cursor(), conn2.cursor()
 
     dates = [r[0] for r in c1.execute(
@@ -223,7 +223,7 @@ def main():
     test_db = 'eps_test.db'
     if os.path.exists(test_db):
         os.remove(test_db)
-    shutil.copy(DB_ORIGINAL, test_db)
+    copy_history(DB_ORIGINAL, test_db)  # 콜드 파티션까지 복원한 자기완결 사본
     print(f"\n[1] DB 복사본 생성: {test_db}")
 
     print("\n[2] Base conviction (현재)으로 part2_rank 재생성...")
@@ -13,30 +13,41 @@ DB_PATH = 'eps_momentum_data.db'
 def load_data(db_path=DB_PATH):
     """DB 로드"""
     conn = sqlite3.connect(db_path)
+    # 콜드 파티션(cold_store — 오래된 달)이 있으면 ATTACH → 같은 SQL로 전 이력
+    from cold_store import attach_cold
+    attach_cold(conn)
     cursor = conn.cursor()
     dates = [r[0] for r in cursor.execute(
         'SELECT DISTINCT date FROM ntm_screening WHERE part2_rank IS NOT NULL ORDER BY date'
     ).fetchall()]
+    # min_seg: ntm_signals.min_seg_legacy(구 재유도 정의 — 과거 창만 가드) 조인 + ±100 clip, 신호 행 없으면 재유도
+    from ntm_signals import has_signals
+    sig = has_signals(conn)
+    sql = ('SELECT n.ticker, n.part2_rank, n.price, n.composite_rank, '
+           'n.ntm_current, n.ntm_7d, n.ntm_30d, n.ntm_60d, n.ntm_90d, '
+           'n.rev_up30, n.num_analysts, n.ma60, n.ma120, ' + ('s.min_seg_legacy' if sig else 'NULL') +
+           ' FROM ntm_screening n' +
+           (' LEFT JOIN ntm_signals s ON s.date = n.date AND s.ticker = n.ticker' if sig else '') +
+           ' WHERE n.date=? AND n.composite_rank IS NOT NULL')
     data = {}
     for d in dates:
-        rows = cursor.execute('''
-            SELECT ticker, part2_rank, price, composite_rank,
-                   ntm_current, ntm_7d, ntm_30d, ntm_60d, ntm_90d,
-                   rev_up30, num_analysts, ma60, ma120
-            FROM ntm_screening WHERE date=? AND composite_rank IS NOT NULL
-        ''', (d,)).fetchall()
+        rows = cursor.execute(sql, (d,)).fetchall()
         data[d] = {}
         for r in rows:
             tk = r[0]
             nc, n7, n30, n60, n90 = (float(x) if x else 0 for x in r[4:9])
-            segs = []
-            for a, b in [(nc, n7), (n7, n30), (n30, n60), (n60, n90)]:
-                if b and abs(b) > 0.01:
-                    segs.append((a - b) / abs(b) * 100)
-                else:
-                    segs.append(0)
-            segs = [max(-100, min(100, s)) for s in segs]
-            min_seg = min(segs) if segs else 0
+            min_seg = r[13]
+            if min_seg is not None:
+                min_seg = max(-100, min(100, min_seg))   # 구간별 cap 후 min = min 후 clip
+            else:
+                segs = []
+                for a, b in [(nc, n7), (n7, n30), (n30, n60), (n60, n90)]:
+                    if b and abs(b) > 0.01:
+                        segs.append((a - b) / abs(b) * 100)
+                    else:
+                        segs.append(0)
+                segs = [max(-100, min(100, s)) for s in segs]
+                min_seg = min(segs) if segs else 0
             data[d][tk] = {
                 'p2': r[1], 'price': r[2], 'comp_rank': r[3],
                 'ntm_current': nc, 'ntm_90d': n90,
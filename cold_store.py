@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+"""ntm_screening 콜드 스토리지 — 오래된 달은 연도별 SQLite(ntm_cold/ntm_YYYY.db)로 이동, 필요할 때만 ATTACH
+
+배경: 본 DB(eps_momentum_data.db)는 매일 git 커밋 → 이력이 쌓일수록 파일·push·전 이력 스캔
+  ('SELECT DISTINCT date' 등)이 같이 커짐. 라이브 경로가 보는 건 최근 ~1년.
+방식:
+  archive_cold(conn): 최신 날짜 기준 keep_months(기본 15개월 — 1년 + 여유) 이전 '달 단위'를 연도 파일로
+    INSERT → 본 DB에서 DELETE (한 트랜잭션, 커밋은 호출측). 파일 축소는 호출측 VACUUM.
+    대상 = ntm_screening + ntm_signals(파생 신호 — 같은 날짜 분할). 본 DB 컬럼이 늘면 콜드 테이블에도 추가.
+    새 파티션은 ntm_dict 정수 키 인코딩({table}_enc WITHOUT ROWID + 같은 이름 호환 뷰) — 복사 행 수가
+    본 DB와 다르면(사전 누락 등) 그 연도 이동 전체 rollback.
+    마감된 연도 파일은 이후 안 바뀜 → git은 새 달이 들어가는 당해 파일만 다시 올림.
+  attach_cold(conn, since): since 연도 이후 콜드 파일을 읽기 전용 ATTACH + 같은 이름의 TEMP VIEW
+    (ntm_screening = main ∪ cold_YYYY …) → 호출측 SQL 무변경으로 전 이력 조회 (temp가 main보다 먼저 해석).
+    ntm_signals(조인 오른쪽 전용)는 TEMP 테이블로 물질화 — 뷰면 LEFT JOIN마다 전체 재물질화.
+    뷰는 쓰기 불가 — 백테스트·replay 전용 연결에만 (open_history).
+    콜드 쪽은 본 DB 첫 날짜 이전 행만 — 복원된 복사본(copy_history)이 같은 ntm_cold/ 옆에 있어도 중복 없음.
+  needs_cold(conn, since): 콜드 파일이 있고 since가 본 DB 첫 날짜보다 앞설 때만 True → 라이브 경로는 본 DB만.
+  전 이력 소비처 규약 (이동이 켜지면 본 DB만 여는 코드는 오래된 달을 조용히 잃음):
+    읽기 → open_history(db_path) (콜드 파일 없으면 그냥 읽기 전용 연결 — 무조건 써도 됨)
+    복사 후 재작성(BT 재순위·replay 하네스) → copy_history(src, dst) (본 DB 백업 + 콜드 복원 = 자기완결 사본)
+    전환됨: bt_engine · backtest/*.py · backtest_accurate · track_performance · daily_runner._history_connect.
+    recompute_ranks(본 DB 직접 재작성)는 콜드 파일이 있으면 거부 — 먼저 --restore.
+    research/* 하네스(sqlite3.connect 직접 수백 개)는 미전환 → 그 전까지 이동은 기본 꺼짐.
+옵트인: COLD_ARCHIVE=1일 때만 이동 (기본 꺼짐 — 위 미전환 소비처가 남아 있는 동안).
+  이미 이동한 달은 설정과 무관하게 ATTACH로 읽힘. 복원(전부 본 DB로): python cold_store.py --restore
+콜드 디렉터리 = 본 DB 파일 옆 ntm_cold/ (테스트·복사본 DB도 자기 옆 파일만 봄).
+CLI: python cold_store.py [--db PATH] [--keep-months N] [--restore] [--status]
+"""
+import os
+import re
+import sqlite3
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+DB_PATH = PROJECT_ROOT / 'eps_momentum_data.db'
+COLD_DIRNAME = 'ntm_cold'   # 본 DB 옆 디렉터리 (git 커밋 대상)
+COLD_TABLES = ('ntm_screening', 'ntm_signals')
+# 조인 오른쪽으로만 쓰이는 좁은 테이블 — 이력 연결에서 TEMP 테이블(PK)로 물질화.
+#   UNION ALL 뷰는 LEFT JOIN 오른쪽에 오면 쿼리마다 전체를 다시 물질화(bt_engine 날짜 루프 0.2s → 110s+).
+MATERIALIZE_TABLES = ('ntm_signals',)
+KEEP_MONTHS = int(os.environ.get('COLD_KEEP_MONTHS', '15'))
+
+_YEAR_FILE = re.compile(r'^ntm_(\d{4})\.db$')
+
+
+def cold_dir(conn, root=None):
+    """콜드 디렉터리 — 지정 없으면 연결의 본 DB 파일 옆 ntm_cold/."""
+    if root is not None:
+        return Path(root)
+    main_file = conn.execute('PRAGMA database_list').fetchone()[2]
+    return Path(main_file).resolve().parent / COLD_DIRNAME if main_file else None
+
+
+def cold_files(root):
+    """{연도: 경로} — 콜드 파티션 목록."""
+    if root is None or not Path(root).is_dir():
+        return {}
+    out = {}
+    for p in Path(root).iterdir():
+        m = _YEAR_FILE.match(p.name)
+        if m:
+            out[m.group(1)] = p
+    return dict(sorted(out.items()))
+
+
+def cutoff_date(conn, keep_months=KEEP_MONTHS):
+    """이 날짜(달 첫날) 이전이 콜드 대상. 최신 날짜 기준 (historical 재실행에도 결정적)."""
+    last = conn.execute('SELECT MAX(date) FROM main.ntm_screening').fetchone()[0]
+    if not last:
+        return None
+    y, m = int(last[:4]), int(last[5:7])
+    k = y * 12 + (m - 1) - keep_months
+    return f'{k // 12:04d}-{k % 12 + 1:02d}-01'
+
+
+def _main_tables(conn):
+    return {r[0]: r[1] for r in conn.execute(
+        "SELECT name, sql FROM main.sqlite_master WHERE type='table'") if r[0] in COLD_TABLES}
+
+
+def _columns(conn, schema, table):
+    return [r[1] for r in conn.execute(f'PRAGMA {schema}.table_info({table})')]
+
+
+def _ensure_cold_table(conn, schema, table):
+    """콜드 테이블 생성 또는 빠진 컬럼 추가. Returns: 정수 키 인코딩 여부.
+
+    새 파티션 = 항상 ntm_dict 인코딩({table}_enc + 호환 뷰). 인코딩 이전에 만든 TEXT 파티션은 그 형식 그대로 추가.
+    """
+    from ntm_dict import add_encoded_columns, create_encoded, is_encoded
+    col_types = [(r[1], r[2]) for r in conn.execute(f'PRAGMA main.table_info({table})')]
+    if is_encoded(conn, schema, table):
+        add_encoded_columns(conn, schema, table, col_types)
+        return True
+    have = _columns(conn, schema, table)
+    if not have:
+        create_encoded(conn, schema, table, col_types)
+        return True
+    for col, col_type in col_types:
+        if col not in have:
+            conn.execute(f'ALTER TABLE {schema}.{table} ADD COLUMN {col} {col_type}')
+    return False
+
+
+def archive_cold(conn, keep_months=KEEP_MONTHS, root=None, log=None):
+    """cutoff 이전 행을 연도 파일로 이동. Returns: 이동한 ntm_screening 행 수."""
+    cutoff = cutoff_date(conn, keep_months)
+    if cutoff is None:
+        return 0
+    years = [r[0] for r in conn.execute(
+        'SELECT DISTINCT substr(date, 1, 4) FROM main.ntm_screening WHERE date < ? ORDER BY 1', (cutoff,))]
+    if not years:
+        return 0
+    if conn.in_transaction:
+        conn.commit()  # ATTACH는 트랜잭션 밖에서만
+    root = cold_dir(conn, root)
+    root.mkdir(parents=True, exist_ok=True)
+    from ntm_dict import insert_encoded, sync_dict
+    tables = _main_tables(conn)
+    moved = 0
+    for year in years:
+        conn.execute('ATTACH DATABASE ? AS cold', (str(root / f'ntm_{year}.db'),))
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            lo, hi = f'{year}-01-01', min(cutoff, f'{int(year) + 1}-01-01')
+            sync_dict(conn, tables=tuple(tables))
+            for table in tables:
+                encoded = _ensure_cold_table(conn, 'cold', table)
+                cols = _columns(conn, 'main', table)
+                where = 'date >= ? AND date < ?'
+                if encoded:
+                    n = insert_encoded(conn, 'cold', table, cols, 'n.date >= ? AND n.date < ?', (lo, hi))
+                else:
+                    n = conn.execute(
+                        f'INSERT OR REPLACE INTO cold.{table} ({", ".join(cols)}) SELECT {", ".join(cols)} '
+                        f'FROM main.{table} WHERE {where}', (lo, hi)).rowcount
+                if n != conn.execute(f'SELECT COUNT(*) FROM main.{table} WHERE {where}', (lo, hi)).fetchone()[0]:
+                    raise RuntimeError(f'{table} {year} 콜드 복사 행 수 불일치 — 이동 취소')
+                conn.execute(f'DELETE FROM main.{table} WHERE {where}', (lo, hi))
+                if table == 'ntm_screening':
+                    moved += n
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            conn.execute('DETACH DATABASE cold')
+    if log and moved:
+        log(f"  콜드 이동: {moved}행 (< {cutoff}) → {root.name}/ntm_{{{','.join(years)}}}.db")
+    return moved
+
+
+def needs_cold(conn, since=None, root=None):
+    """since(없으면 전 이력)부터 읽으려면 콜드 파티션이 필요한가."""
+    files = cold_files(cold_dir(conn, root))
+    if not files:
+        return False
+    if since is None:
+        return True
+    first = conn.execute('SELECT MIN(date) FROM main.ntm_screening').fetchone()[0]
+    return first is None or since < first
+
+
+def attach_cold(conn, since=None, root=None):
+    """콜드 파일 ATTACH + TEMP VIEW로 main 테이블 이름 가림. Returns: 붙인 연도 리스트.
+
+    읽기 전용 연결(mode=ro)이면 붙인 파일도 읽기 전용으로 열림.
+    """
+    files = {y: p for y, p in cold_files(cold_dir(conn, root)).items() if since is None or y >= since[:4]}
+    if not files:
+        return []
+    for year, path in files.items():
+        conn.execute('ATTACH DATABASE ? AS ?', (str(path), f'cold_{year}'))
+    tables = _main_tables(conn)
+    # 콜드 = 본 DB 첫 날짜 이전만 (이동분은 항상 그 앞 — 복원된 사본이면 전부 걸러져 중복 없음)
+    first = conn.execute('SELECT MIN(date) FROM main.ntm_screening').fetchone()[0] or '9999'
+    for table in tables:
+        cols = _columns(conn, 'main', table)
+        parts = [f'SELECT {", ".join(cols)} FROM main.{table}']
+        for year in files:
+            have = set(_columns(conn, f'cold_{year}', table))
+            if not have:
+                continue
+            sel = ', '.join(c if c in have else f'NULL AS {c}' for c in cols)
+            parts.append(f"SELECT {sel} FROM cold_{year}.{table} WHERE date < '{first}'")
+        if table in MATERIALIZE_TABLES:
+            types = ', '.join(f'{r[1]} {r[2]}' for r in conn.execute(f'PRAGMA main.table_info({table})'))
+            conn.execute(f'CREATE TEMP TABLE {table} ({types}, PRIMARY KEY (date, ticker))')
+            conn.execute(f'INSERT INTO temp.{table} ' + ' UNION ALL '.join(parts))
+        else:
+            conn.execute(f'CREATE TEMP VIEW {table} AS ' + ' UNION ALL '.join(parts))
+    return list(files)
+
+
+def open_history(db_path=DB_PATH, since=None, root=None):
+    """전 이력 읽기 전용 연결 (콜드 ATTACH) — 백테스트·전 기간 replay용. 호출측 close().
+
+    콜드 파일이 없으면 ATTACH 없이 그냥 읽기 전용 연결 → 전 이력 리더는 조건 없이 이걸로 엶.
+    """
+    from db_access import open_connection
+    conn = open_connection(db_path, readonly=True)
+    attach_cold(conn, since, root)
+    return conn
+
+
+def copy_history(src=DB_PATH, dst=None, root=None):
+    """전 이력 자기완결 사본 — src 백업(WAL 포함) + 콜드 파티션 복원. 쓰기 가능. Returns: dst.
+
+    shutil.copy 사본은 옆에 ntm_cold/가 없거나(다른 디렉터리) 본 DB 행만 있어 이동한 달이 빠짐 →
+    복사 후 part2_rank 등을 다시 쓰는 하네스는 이걸로.
+    """
+    src_conn = sqlite3.connect(src)
+    dst_conn = sqlite3.connect(dst)
+    try:
+        root = cold_dir(src_conn, root)
+        src_conn.backup(dst_conn)
+        restore_cold(dst_conn, root)
+    finally:
+        dst_conn.close()
+        src_conn.close()
+    return dst
+
+
+def restore_cold(conn, root=None, log=None):
+    """콜드 파티션 전부를 본 DB로 되돌림 (파일은 호출측 삭제). Returns: 복원 행 수."""
+    if conn.in_transaction:
+        conn.commit()
+    tables = _main_tables(conn)
+    n = 0
+    for year, path in cold_files(cold_dir(conn, root)).items():
+        conn.execute('ATTACH DATABASE ? AS cold', (str(path),))
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for table in tables:
+                have = set(_columns(conn, 'cold', table))
+                cols = [c for c in _columns(conn, 'main', table) if c in have]
+                if not cols:
+                    continue
+                c = conn.execute(f'INSERT OR IGNORE INTO main.{table} ({", ".join(cols)}) '
+                                 f'SELECT {", ".join(cols)} FROM cold.{table}').rowcount
+                if table == 'ntm_screening':
+                    n += c
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            conn.execute('DETACH DATABASE cold')
+    if log:
+        log(f"  콜드 복원: {n}행")
+    return n
+
+
+def main(argv=None):
+    import argparse
+    ap = argparse.ArgumentParser(description='ntm_screening 콜드 스토리지 (이동 / --restore / --status)')
+    ap.add_argument('--db', default=str(DB_PATH))
+    ap.add_argument('--keep-months', type=int, default=KEEP_MONTHS)
+    ap.add_argument('--restore', action='store_true')
+    ap.add_argument('--status', action='store_true')
+    args = ap.parse_args(argv)
+    if not os.path.exists(args.db):
+        print(f"DB 없음: {args.db}")
+        return 2
+    conn = sqlite3.connect(args.db)
+    if args.status:
+        first, last = conn.execute('SELECT MIN(date), MAX(date) FROM ntm_screening').fetchone()
+        print(f'본 DB: {first} ~ {last} (콜드 기준 < {cutoff_date(conn, args.keep_months)})')
+        for year, path in cold_files(cold_dir(conn)).items():
+            c = sqlite3.connect(path)
+            lo, hi, cnt = c.execute('SELECT MIN(date), MAX(date), COUNT(*) FROM ntm_screening').fetchone()
+            c.close()
+            print(f'  {path.name}: {lo} ~ {hi} · {cnt}행 · {path.stat().st_size / 1e6:.1f} MB')
+    elif args.restore:
+        restore_cold(conn, log=print)
+    else:
+        n = archive_cold(conn, args.keep_months, log=print)
+        if n:
+            conn.execute('VACUUM')
+        print(f'{n}행 이동')
+    conn.close()
+    return 0
+
+
+if __name__ == '__main__':
+    import sys
+    sys.exit(main())
@@ -30,6 +30,11 @@ import socket
 import warnings
 warnings.filterwarnings('ignore')
 
+# DB 연결 (db_access): 스레드별 공유 연결 + WAL/pragma. 읽기 전용 경로는 readonly=True(file:...?mode=ro).
+#   호출측은 구 sqlite3.connect처럼 열고 close() — 실제 연결은 프로세스 종료 시 체크포인트 후 닫힘.
+from db_access import connect as db_connect, open_connection as open_db_connection, write_txn
+from db_access import checkpoint as db_checkpoint
+
 # yfinance 등 외부 HTTP 호출 전역 timeout (초) — GA hang 방지
 socket.setdefaulttimeout(60)
 
@@ -42,6 +47,8 @@ if sys.platform == 'win32':
 PROJECT_ROOT = Path(__file__).parent
 DB_PATH = PROJECT_ROOT / 'eps_momentum_data.db'
 CONFIG_PATH = PROJECT_ROOT / 'config.json'
+# EPS 수집 체크포인트 (eps_fetch.FetchCheckpoint, 마켓 날짜 키 — git 미추적, GH Actions는 cache로 보존)
+EPS_CHECKPOINT_PATH = PROJECT_ROOT / 'data_cache' / 'eps_fetch_checkpoint.db'
 
 # 원자재/광업 제외 대상 — 금값·원자재 가격에 연동되는 업종
 # EPS 모멘텀이 구조적 성장이 아닌 commodity 가격 패스스루이므로 제외
@@ -127,98 +134,21 @@ def log(message, level="INFO"):
 # ============================================================
 
 def init_ntm_database():
-    """ntm_screening 테이블 생성"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS ntm_screening (
-            date        TEXT,
-            ticker      TEXT,
-            rank        INTEGER,
-            score       REAL,
-            ntm_current REAL,
-            ntm_7d      REAL,
-            ntm_30d     REAL,
-            ntm_60d     REAL,
-            ntm_90d     REAL,
-            is_turnaround INTEGER DEFAULT 0,
-            adj_score   REAL,
-            adj_gap     REAL,
-            price       REAL,
-            ma60        REAL,
-            part2_rank  INTEGER,
-            PRIMARY KEY (date, ticker)
-        )
-    ''')
-
-    # 기존 DB 마이그레이션: 새 컬럼 추가
-    for col, col_type in [('adj_score', 'REAL'), ('adj_gap', 'REAL'),
-                          ('price', 'REAL'), ('ma60', 'REAL'), ('ma120', 'REAL'), ('part2_rank', 'INTEGER'),
-                          ('rev_up30', 'INTEGER'), ('rev_down30', 'INTEGER'), ('num_analysts', 'INTEGER'),
-                          ('high30', 'REAL'), ('vol_ratio', 'REAL')]:
-        try:
-            cursor.execute(f'ALTER TABLE ntm_screening ADD COLUMN {col} {col_type}')
-        except sqlite3.OperationalError:
-            pass  # 이미 존재
+    """ntm_screening 등 스키마 보장 — db_migrations 버전 확인 1회 (미적용 마이그레이션만 실행)"""
+    conn = db_connect(DB_PATH)
 
-    # composite_rank: 당일 composite 순위 (가중순위 계산 원본)
-    try:
-        cursor.execute('ALTER TABLE ntm_screening ADD COLUMN composite_rank INTEGER')
-    except sqlite3.OperationalError:
-        pass
+    # 구: ALTER TABLE ADD COLUMN ~30회 try/except 매 실행 → schema_version 기반 1회 적용.
+    #   스키마 변경은 db_migrations.MIGRATIONS에 추가. 상태: python db_migrations.py --status
+    from db_migrations import ensure_schema
+    ensure_schema(conn, log)
 
-    # v54: eps_chg_weighted (EPS 품질 보정용)
+    # 관리 인덱스 (db_indexes): (ticker, date) + part2/composite/dv 부분 인덱스 + 가격 패널 커버링.
+    #   종목 축 조회·'rank IS NOT NULL' 필터의 전 테이블 스캔 → 인덱스 탐색. 감사: python db_indexes.py
     try:
-        cursor.execute('ALTER TABLE ntm_screening ADD COLUMN eps_chg_weighted REAL')
-    except sqlite3.OperationalError:
-        pass
-
-    # v33: 재무 품질 + rev_growth 컬럼
-    for col, col_type in [('rev_growth', 'REAL'),
-                          ('market_cap', 'REAL'), ('free_cashflow', 'REAL'),
-                          ('roe', 'REAL'), ('debt_to_equity', 'REAL'),
-                          ('operating_margin', 'REAL'), ('gross_margin', 'REAL'),
-                          ('current_ratio', 'REAL'), ('total_debt', 'REAL'),
-                          ('total_cash', 'REAL'), ('ev', 'REAL'),
-                          ('ebitda', 'REAL'), ('beta', 'REAL')]:
-        try:
-            cursor.execute(f'ALTER TABLE ntm_screening ADD COLUMN {col} {col_type}')
-        except sqlite3.OperationalError:
-            pass
-
-    # 기존 eps_snapshots 테이블 삭제
-    cursor.execute('DROP TABLE IF EXISTS eps_snapshots')
-
-    # Forward Test 트래커: 포트폴리오 이력 테이블
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS portfolio_log (
-            date        TEXT,
-            ticker      TEXT,
-            action      TEXT,
-            price       REAL,
-            weight      REAL,
-            entry_date  TEXT,
-            entry_price REAL,
-            exit_price  REAL,
-            return_pct  REAL,
-            PRIMARY KEY (date, ticker)
-        )
-    ''')
-
-    # AI 분석 저장 테이블 (대시보드용)
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS ai_analysis (
-            date           TEXT NOT NULL,
-            analysis_type  TEXT NOT NULL,
-            ticker         TEXT DEFAULT '__ALL__',
-            content        TEXT NOT NULL,
-            created_at     TEXT DEFAULT CURRENT_TIMESTAMP,
-            PRIMARY KEY (date, analysis_type, ticker)
-        )
-    ''')
-
-    conn.commit()
+        from db_indexes import ensure_indexes
+        ensure_indexes(conn, log)
+    except Exception as e:
+        log(f"인덱스 동기화 실패(무시): {e}", "WARN")
     conn.close()
     log("NTM 데이터베이스 초기화 완료")
 
@@ -333,11 +263,10 @@ def load_historical_results_df(target_date):
 
     Returns: pd.DataFrame (run_ntm_collection 반환 결과와 동일 컬럼)
     """
-    import sqlite3
     import pandas as pd
     import json
 
-    conn = sqlite3.connect(DB_PATH)
+    conn = db_connect(DB_PATH, readonly=True)
     df = pd.read_sql_query(
         'SELECT * FROM ntm_screening WHERE date=? AND composite_rank IS NOT NULL',
         conn, params=(target_date,)
@@ -425,7 +354,7 @@ def run_ntm_collection(config):
     최적화:
     - 가격 데이터: yf.download() 일괄 다운로드 (내장 스레딩)
     - 종목 정보: JSON 캐시 (shortName, industry)
-    - EPS 데이터: 순차 처리 (yfinance 스레딩 비호환)
+    - EPS 데이터: eps_fetch 적응형 엔진 (토큰버킷 + AIMD, 429 시 자동 감속)
 
     v83.1 (2026-05-24): HISTORICAL MODE — MARKET_DATE가 실제 오늘과 다르면
     yfinance fetch SKIP + DB의 historical row로 results_df 재구성.
@@ -479,7 +408,7 @@ def run_ntm_collection(config):
 
     from eps_momentum_system import (
         INDICES, INDUSTRY_MAP,
-        calculate_ntm_eps, calculate_ntm_score, calculate_eps_change_90d,
+        calculate_ntm_score, calculate_eps_change_90d,
         get_trend_lights,
     )
 
@@ -569,13 +498,12 @@ def run_ntm_collection(config):
 
     # Step 3: EPS 데이터 병렬 수집 (지수 심볼 제외)
     eps_tickers = [t for t in all_tickers if not t.startswith('^')]
-    from concurrent.futures import ThreadPoolExecutor, as_completed
 
-    # 전일 Top 30 로드 — 수집 실패 시 우선 재시도 + carry-forward 대상
+    # 전일 Top 30 로드 — 우선 수집(티어 1) + carry-forward 대상
     _prev_top30 = set()
     _prev_date = None
     try:
-        _conn_tmp = sqlite3.connect(DB_PATH)
+        _conn_tmp = db_connect(DB_PATH, readonly=True)
         _prev_date = _conn_tmp.execute(
             "SELECT MAX(date) FROM ntm_screening WHERE date < ? AND part2_rank IS NOT NULL",
             (today_str,)
@@ -594,6 +522,7 @@ def run_ntm_collection(config):
     # MU 5/28 사고 — 5/27 cr=67로 Top 30 밖 → _prev_top30 미포함 → fetch 실패 시 우선 재시도 X
     # → MU MISSING → daily_runner.py:3404 자연 매도 발동.
     # _replay_holdings로 실 보유 종목 fetch + _prev_top30 union.
+    _held_tickers = set()
     try:
         _held_tickers = set(_replay_holdings(today_str))
         if _held_tickers:
@@ -604,112 +533,73 @@ def run_ntm_collection(config):
     except Exception as _e:
         log(f"_replay_holdings 우선 재시도 union 실패: {_e}", "WARN")
 
-    def _prefetch_eps(ticker):
-        """워커: NTM EPS + 애널리스트 수집 (HTTP 1회 — eps_trend만)
-        .info는 fetch_revenue_growth()에서 별도 수집하므로 여기서 생략.
-        """
-        try:
-            stock = yf.Ticker(ticker)
-            ntm = calculate_ntm_eps(stock, today)
-            if ntm is None:
-                return ticker, {'ntm': None}
-
-            # _earnings_trend (calculate_ntm_eps 내부에서 이미 로드 → 캐시 히트)
-            raw_trend = None
-            try:
-                raw_trend = stock._analysis._earnings_trend
-            except Exception:
-                pass
-
-            return ticker, {'ntm': ntm, 'raw_trend': raw_trend}
-        except Exception as e:
-            return ticker, {'error': str(e)}
-
-    log(f"NTM EPS 병렬 수집 중 (2스레드, {len(eps_tickers)}종목)...")
-    _t_eps = __import__('time').time()
-    _prefetched = {}
-    BATCH_SIZE = 30
-    for batch_start in range(0, len(eps_tickers), BATCH_SIZE):
-        batch = eps_tickers[batch_start:batch_start + BATCH_SIZE]
-        with ThreadPoolExecutor(max_workers=2) as executor:
-            futures = {executor.submit(_prefetch_eps, t): t for t in batch}
-            for future in as_completed(futures):
-                result = future.result()
-                _prefetched[result[0]] = result[1]
-        done_count = batch_start + len(batch)
-        if done_count % 200 < BATCH_SIZE:
-            log(f"  수집: {done_count}/{len(eps_tickers)}")
-        if batch_start + BATCH_SIZE < len(eps_tickers):
-            __import__('time').sleep(1.5)
-    # 에러 종목 재시도 (10초 대기 후, rate limit 해소)
-    error_tickers = [t for t, d in _prefetched.items() if 'error' in d]
-    if error_tickers:
-        log(f"EPS 재시도: {len(error_tickers)}종목 (10초 대기 후)")
-        __import__('time').sleep(10)
-        for batch_start in range(0, len(error_tickers), BATCH_SIZE):
-            batch = error_tickers[batch_start:batch_start + BATCH_SIZE]
-            with ThreadPoolExecutor(max_workers=2) as executor:
-                futures = {executor.submit(_prefetch_eps, t): t for t in batch}
-                for future in as_completed(futures):
-                    t, data = future.result()
-                    if 'error' not in data:
-                        _prefetched[t] = data
-            if batch_start + BATCH_SIZE < len(error_tickers):
-                __import__('time').sleep(1.5)
-        retry_ok = sum(1 for t in error_tickers if 'error' not in _prefetched[t])
-        log(f"  재시도 복구: {retry_ok}/{len(error_tickers)}")
-
-    # 전일 Top 20 우선 재시도 — 에러 또는 데이터없음 모두 대상, 최대 3회
-    if _prev_top30:
-        _top20_failed = [t for t in _prev_top30
-                         if t in _prefetched and ('error' in _prefetched[t] or _prefetched[t].get('ntm') is None)]
-        if _top20_failed:
-            for _retry_round in range(1, 4):
-                __import__('time').sleep(5)
-                _still_bad = []
-                with ThreadPoolExecutor(max_workers=2) as executor:
-                    futures = {executor.submit(_prefetch_eps, t): t for t in _top20_failed}
-                    for future in as_completed(futures):
-                        t, data = future.result()
-                        if 'error' not in data and data.get('ntm') is not None:
-                            _prefetched[t] = data
-                        else:
-                            _still_bad.append(t)
-                if not _still_bad:
-                    log(f"  Top20 우선 재시도 {_retry_round}회차: {len(_top20_failed)}종목 전체 복구")
-                    break
-                _top20_failed = _still_bad
-            else:
-                if _still_bad:
-                    log(f"  Top20 우선 재시도 3회 실패: {','.join(sorted(_still_bad))}", "WARN")
-
-    log(f"EPS 수집 완료: {len(_prefetched)}종목, {__import__('time').time() - _t_eps:.0f}초")
-
-    # Step 3b: DB 적재 + 스코어링 (순차, SQLite 안전)
-    conn = sqlite3.connect(DB_PATH)
+    # 수집 엔진 (eps_fetch): 단일 큐 + 토큰버킷 + AIMD — 깨끗하면 가속, 429면 감속·쿨다운.
+    #   구 30종목 배치·2스레드·sleep(1.5) 고정 + 별도 에러 재시도 패스(10초 대기)를 대체.
+    #   실패 종목은 엔진 큐 안에서 재시도(max_attempts).
+    # 우선순위 스케줄 (구 '전일 Top 20 우선 재시도' 3회×sleep(5) 루프 대체):
+    #   티어 0 = 시스템 보유, 티어 1 = 전일 Top30(carry-forward 후보) → rate 예산이 신선할 때 먼저 수집.
+    #   우선 종목은 에러·데이터없음(ntm None) 모두 엔진 안에서 지연 재투입(최대 4회) — 유니버스는 계속 흐름.
+    from eps_fetch import (YFinanceTransport, engine_from_env, run_pipeline,
+                           FetchCheckpoint, checkpointed_stream)
+    _eps_transport = YFinanceTransport(today)
+    _eps_priority = {t: 1 for t in _prev_top30}
+    _eps_priority.update({t: 0 for t in _held_tickers})
+
+    # Step 3a: 가격 피처 패널 (price_panel) — hist_all 전체 프레임 1회 NumPy 처리.
+    #   구 종목 루프 안 rolling(60/120)·거래량 평균·룩백 argmin ×4 (~1,300×10회 pandas 호출) 대체.
+    #   종목 루프와 carry-forward 경로가 같은 패널을 공유.
+    from price_panel import price_feature_rows
+    _price_feats = price_feature_rows(hist_all, today, eps_tickers) if hist_all is not None else {}
+
+    # Step 3b: 수집 → 스코어링 → DB 적재 파이프라인
+    conn = db_connect(DB_PATH)
     cursor = conn.cursor()
 
+    # v119 high30용 DB 가격 창 (price_panel.PriceWindow): 오늘 이전 1년 창을 쿼리 1회로 적재 →
+    #   종목별 마지막 29개 유효 가격 최고값. 구 종목별 'LIMIT 29' 쿼리(메인+carry-forward)와 동일 값.
+    from price_panel import PriceWindow
+    _db_high29 = dict(PriceWindow(conn, today_str, 252, inclusive=False, fields=('price',))
+                      .high_last_valid(29))
+
     results = []
     turnaround = []
     no_data = []
     errors = []
     cache_updated = False
-
-    for i, ticker in enumerate(eps_tickers):
-        if (i + 1) % 200 == 0:
-            log(f"  처리: {i+1}/{len(eps_tickers)} (메인: {len(results)}, 턴어라운드: {len(turnaround)})")
-            conn.commit()
-
-        data = _prefetched.get(ticker, {})
+    # carry-forward 행 — rank 확정 후 ntm_store로 기록 (메인 행은 파이프라인 기록 단계가 배치 upsert)
+    _day_rows = {}
+    _day_sigs = {}   # carry-forward 행의 파생 신호 (ntm_signals, 같은 커밋)
+    _n_scored = [0]
+
+    # PIT earningsTrend 아카이브 (pit_archive): 이미 받은 raw_trend ~90필드를 스코어 단계에서 평탄화해 모음
+    #   → 파이프라인 종료 후 {PIT_ARCHIVE_DIR}/{날짜}.parquet 1회 기록 (추가 HTTP 0, ntm_screening 스키마 불변).
+    #   PIT_ARCHIVE_DISABLE=1 = 워크플로우가 pit-archive 브랜치를 못 붙였을 때 설정 (기록 안 함 — 커밋 단계가 실패로 표시).
+    _pit = None
+    if os.environ.get('PIT_ARCHIVE_DISABLE') != '1':
+        from pit_archive import PitArchiveWriter
+        _pit = PitArchiveWriter(today_str)
+
+    def _score_ticker(ticker, data):
+        """스코어 단계: 수집 결과 1건 → results/turnaround 행 + DB 행 (ticker, row). 실패는 None."""
+        nonlocal cache_updated
+        _n_scored[0] += 1
+        if _n_scored[0] % 200 == 0:
+            log(f"  처리: {_n_scored[0]}/{len(eps_tickers)} (메인: {len(results)}, 턴어라운드: {len(turnaround)})")
 
         if 'error' in data:
             errors.append((ticker, data['error']))
-            continue
+            return None
+
+        if _pit is not None:
+            try:
+                _pit.add(ticker, data.get('raw_trend'))
+            except Exception as e:
+                log(f"  PIT 아카이브 평탄화 실패 {ticker}: {e}", "WARN")
 
         ntm = data.get('ntm')
         if ntm is None:
             no_data.append(ticker)
-            continue
+            return None
 
         try:
             # Score 계산
@@ -737,21 +627,6 @@ def run_ntm_collection(config):
                         rev_down30 = max(rev_down30, down_val)
                         num_analysts = max(num_analysts, na_val)
 
-            # DB 적재 (기본 데이터 — price/ma60/adj_gap은 후속 UPDATE로 추가)
-            # INSERT ON CONFLICT: 기존 part2_rank 보존
-            cursor.execute('''
-                INSERT INTO ntm_screening
-                (date, ticker, rank, score, ntm_current, ntm_7d, ntm_30d, ntm_60d, ntm_90d, is_turnaround)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ON CONFLICT(date, ticker) DO UPDATE SET
-                    rank=excluded.rank, score=excluded.score,
-                    ntm_current=excluded.ntm_current, ntm_7d=excluded.ntm_7d,
-                    ntm_30d=excluded.ntm_30d, ntm_60d=excluded.ntm_60d,
-                    ntm_90d=excluded.ntm_90d, is_turnaround=excluded.is_turnaround
-            ''', (today_str, ticker, 0, score,
-                  ntm['current'], ntm['7d'], ntm['30d'], ntm['60d'], ntm['90d'],
-                  1 if is_turnaround else 0))
-
             # 종목 정보 (캐시 우선, 미스면 플레이스홀더 — fetch_revenue_growth에서 갱신)
             if ticker in ticker_cache:
                 short_name = ticker_cache[ticker]['shortName']
@@ -772,46 +647,28 @@ def run_ntm_collection(config):
             ma60_val = None
             ma120_val = None
             vol_ratio_val = None  # 당일 거래량 / 직전 20일 평균 (개미털기 유예 판별용, forward-only)
+            high30_val = None
 
             try:
-                if hist_all is not None:
-                    hist = hist_all['Close'][ticker].dropna()
-                    # vol_ratio: 당일 거래량 서지 (저볼륨<1.0x 이탈=개미털기 후보)
-                    try:
-                        _vser = hist_all['Volume'][ticker].dropna()
-                        if len(_vser) >= 21:
-                            _vavg = _vser.iloc[-21:-1].mean()
-                            if _vavg and _vavg > 0:
-                                vol_ratio_val = float(_vser.iloc[-1] / _vavg)
-                    except Exception:
-                        pass
-                else:
-                    hist = pd.Series(dtype=float)
+                feat = _price_feats.get(ticker)
+                if feat is not None:
+                    vol_ratio_val = feat['vol_ratio']  # 당일 거래량 서지 (저볼륨<1.0x 이탈=개미털기 후보)
 
-                if len(hist) >= 60:
-                    p_now = hist.iloc[-1]
+                if feat is not None and feat['n_obs'] >= 60:
+                    p_now = feat['price']
                     current_price = float(p_now)
-                    ma60_val = float(hist.rolling(window=60).mean().iloc[-1])
-                    if len(hist) >= 120:
-                        ma120_val = float(hist.rolling(window=120).mean().iloc[-1])
+                    ma60_val = feat['ma60']
+                    ma120_val = feat['ma120']
                     # v119 (2026-06-11): high30 = DB 누적 가격 기반 결정적 계산.
                     # 기존 hist.tail(30)은 fetch 시점마다 30거래일 윈도우가 밀려 경계종목(VRT 등)이
                     # 실행마다 dd_30_25 제외/통과가 흔들림(비결정적). DB 과거가격은 고정 → 결정적 + BT 정합.
-                    _dbpx = [r[0] for r in cursor.execute(
-                        "SELECT price FROM ntm_screening WHERE ticker=? AND date<? AND price IS NOT NULL ORDER BY date DESC LIMIT 29",
-                        (ticker, today_str)).fetchall()]
-                    if len(_dbpx) >= 29:
-                        high30_val = max(_dbpx + [current_price])
+                    if ticker in _db_high29:
+                        high30_val = max(_db_high29[ticker], current_price)
                     else:
-                        high30_val = float(hist.tail(30).max()) if len(hist) >= 30 else None  # cold start fallback
-                    hist_dt = hist.index.tz_localize(None) if hist.index.tz else hist.index
+                        high30_val = feat['high30_hist']  # cold start fallback
 
-                    # 각 시점의 주가 찾기
-                    prices = {}
-                    for days, key in [(7, '7d'), (30, '30d'), (60, '60d'), (90, '90d')]:
-                        target = today - timedelta(days=days)
-                        idx = (hist_dt - target).map(lambda x: abs(x.days)).argmin()
-                        prices[key] = hist.iloc[idx]
+                    # 각 시점의 주가 (가격 패널 룩백)
+                    prices = {key: feat[f'px_{key}'] for key in ('7d', '30d', '60d', '90d')}
 
                     # 90일 주가변화율 (내부용)
                     price_chg = (p_now - prices['90d']) / prices['90d'] * 100
@@ -916,26 +773,87 @@ def run_ntm_collection(config):
                 'high30': high30_val,
             }
 
-            # DB에 파생 데이터 업데이트
-            cursor.execute('''
-                UPDATE ntm_screening
-                SET adj_score=?, adj_gap=?, price=?, ma60=?, ma120=?,
-                    rev_up30=?, rev_down30=?, num_analysts=?, eps_chg_weighted=?, high30=?, vol_ratio=?
-                WHERE date=? AND ticker=?
-            ''', (adj_score, adj_gap, current_price, ma60_val, ma120_val,
-                  rev_up30, rev_down30, num_analysts, eps_chg_weighted, high30_val, vol_ratio_val,
-                  today_str, ticker))
+            # DB 행 (upsert: 기존 part2_rank 등 나머지 컬럼 보존, rank는 정렬 후 일괄 UPDATE)
+            _db_row = {
+                'rank': 0, 'score': score,
+                'ntm_current': ntm['current'], 'ntm_7d': ntm['7d'], 'ntm_30d': ntm['30d'],
+                'ntm_60d': ntm['60d'], 'ntm_90d': ntm['90d'],
+                'is_turnaround': 1 if is_turnaround else 0,
+                'adj_score': adj_score, 'adj_gap': adj_gap, 'price': current_price,
+                'ma60': ma60_val, 'ma120': ma120_val,
+                'rev_up30': rev_up30, 'rev_down30': rev_down30, 'num_analysts': num_analysts,
+                'eps_chg_weighted': eps_chg_weighted, 'high30': high30_val, 'vol_ratio': vol_ratio_val,
+            }
+            # 파생 신호 (ntm_signals) — 같은 배치·같은 커밋으로 기록
+            _sig_row = signal_row(seg1, seg2, seg3, seg4, direction, fwd_pe_now, fwd_pe_chg,
+                                  ntm=(ntm['current'], ntm['7d'], ntm['30d'], ntm['60d'], ntm['90d']))
 
             if is_turnaround:
                 turnaround.append(row)
             else:
                 results.append(row)
+            return ticker, (_db_row, _sig_row)
 
         except Exception as e:
             errors.append((ticker, str(e)))
-            continue
+            return None
 
-    conn.commit()
+    # 파이프라인 (eps_fetch.run_pipeline): 엔진이 확정한 결과가 곧바로 스코어 스레드 → 기록 스레드로 흐름.
+    #   구: 전 종목 수집(재시도 포함) 완료까지 배리어 → 그 뒤 스코어링·DB 적재 → CPU/SQLite가 네트워크 대기와 안 겹침.
+    #   현: 유계 큐(256)로 연결된 3단 — 벽시계 ≈ 네트워크 시간, raw_trend는 스코어 직후 버려져 전량 상주 X.
+    #   기록 단계는 자기 연결로 200행 배치 upsert + 커밋.
+    from ntm_store import upsert_screening, update_screening
+    from ntm_signals import signal_row, upsert_signals
+    _wconn = open_db_connection(DB_PATH, check_same_thread=False)  # 기록 스레드 전용
+
+    def _write_rows(rows):
+        # ntm_screening 행 + 파생 신호(fwd_pe_chg·seg·min_seg·direction)를 한 트랜잭션으로
+        _wcur = _wconn.cursor()
+        upsert_screening(_wcur, today_str, {tk: r[0] for tk, r in rows})
+        upsert_signals(_wcur, today_str, {tk: r[1] for tk, r in rows})
+        _wconn.commit()
+
+    log(f"NTM EPS 수집 중 (적응형 엔진, {len(eps_tickers)}종목 · 우선 {len(_eps_priority)}종목)...")
+    _t_eps = __import__('time').time()
+    _engine = engine_from_env(_eps_transport, log=log)
+    # 체크포인트 (마켓 날짜 키): 건강성 미달 30분 재수집·크래시 재실행 시 성공분은 재사용하고
+    #   누락·실패·데이터없음 종목만 다시 fetch → 429 나는 날 야후 부하를 그대로 반감.
+    _ckpt = None
+    try:
+        _ckpt = FetchCheckpoint(EPS_CHECKPOINT_PATH, today_str)
+    except Exception as _e:
+        log(f"  수집 체크포인트 열기 실패(무시, 전 종목 fetch): {_e}", "WARN")
+    try:
+        run_pipeline(checkpointed_stream(_engine, eps_tickers, _ckpt, log=log,
+                                         priority=_eps_priority,
+                                         is_valid=lambda d: d.get('ntm') is not None),
+                     _score_ticker, _write_rows)
+    finally:
+        _wconn.close()
+        if _ckpt is not None:
+            _ckpt.close()
+    _es = _engine.stats
+    log(f"  엔진: 요청 {_es['requests']} · 재시도 {_es['retried']} · 429 {_es['throttled']}건"
+        f"(감속 {_es['throttle_events']}회) · 최고 {_es['peak_rate']:.1f} req/s · 에러 {_es['errors']}")
+    if _es['priority']:
+        log(f"  우선 {_es['priority']}종목 {_es['priority_elapsed']:.0f}초 내 확정")
+    if _es['priority_failed']:
+        log(f"  우선 종목 {len(_es['priority_failed'])}개 최종 실패(carry-forward 대상): "
+            f"{','.join(_es['priority_failed'])}", "WARN")
+
+    log(f"EPS 수집·스코어·적재 완료: {_n_scored[0]}종목, {__import__('time').time() - _t_eps:.0f}초")
+    if _pit is not None:
+        try:
+            _pit_path, _pit_n = _pit.flush()
+            if _pit_path is not None:
+                log(f"  PIT 아카이브: {_pit_n}종목 → {_pit_path.name} ({_pit_path.stat().st_size / 1e6:.2f} MB)")
+        except Exception as e:
+            log(f"  PIT 아카이브 기록 실패(무시): {e}", "WARN")
+        _pit = None
+    # 완료 순서 → 유니버스 순서 (구 순차 루프와 같은 입력 순서 = 동점 정렬 결정성)
+    _order = {t: i for i, t in enumerate(eps_tickers)}
+    results.sort(key=lambda r: _order[r['ticker']])
+    turnaround.sort(key=lambda r: _order[r['ticker']])
 
     # ── carry-forward: 전일 Top30 수집 실패 종목 → 전일 EPS + 오늘 가격으로 row 삽입 ──
     _cf_inserted = []
@@ -944,8 +862,7 @@ def run_ntm_collection(config):
         _cf_candidates = [t for t in _prev_top30
                           if t in set(eps_tickers) and t not in _processed]
         if _cf_candidates:
-            conn_cf = sqlite3.connect(DB_PATH)
-            cur_cf = conn_cf.cursor()
+            cur_cf = cursor
             for ticker in _cf_candidates:
                 try:
                     # 1) 전일 DB row 로드
@@ -961,34 +878,20 @@ def run_ntm_collection(config):
                     ntm = {'current': prev[0], '7d': prev[1], '30d': prev[2],
                            '60d': prev[3], '90d': prev[4]}
 
-                    # 2) 오늘 가격 (hist_all 배치 다운로드에서)
-                    try:
-                        hist = hist_all['Close'][ticker].dropna()
-                    except (KeyError, TypeError):
+                    # 2) 오늘 가격 (가격 패널 — hist_all 배치 다운로드 기반)
+                    feat = _price_feats.get(ticker)
+                    if feat is None or feat['n_obs'] < 60:
                         continue  # 가격 없으면 skip
-                    if len(hist) < 60:
-                        continue
 
-                    p_now = float(hist.iloc[-1])
-                    ma60_val = float(hist.rolling(window=60).mean().iloc[-1])
-                    ma120_val = float(hist.rolling(window=120).mean().iloc[-1]) if len(hist) >= 120 else None
-                    vol_ratio_val = None  # 거래량 서지 (개미털기 유예 판별용, forward-only)
-                    try:
-                        _vser = hist_all['Volume'][ticker].dropna()
-                        if len(_vser) >= 21:
-                            _vavg = _vser.iloc[-21:-1].mean()
-                            if _vavg and _vavg > 0:
-                                vol_ratio_val = float(_vser.iloc[-1] / _vavg)
-                    except Exception:
-                        pass
+                    p_now = float(feat['price'])
+                    ma60_val = feat['ma60']
+                    ma120_val = feat['ma120']
+                    vol_ratio_val = feat['vol_ratio']  # 거래량 서지 (개미털기 유예 판별용, forward-only)
                     # v119 (2026-06-11): high30 = DB 누적 가격 기반 결정적 계산 (carry-forward 경로)
-                    _dbpx = [r[0] for r in cur_cf.execute(
-                        "SELECT price FROM ntm_screening WHERE ticker=? AND date<? AND price IS NOT NULL ORDER BY date DESC LIMIT 29",
-                        (ticker, today_str)).fetchall()]
-                    if len(_dbpx) >= 29:
-                        high30_val = max(_dbpx + [p_now])
+                    if ticker in _db_high29:
+                        high30_val = max(_db_high29[ticker], p_now)
                     else:
-                        high30_val = float(hist.tail(30).max()) if len(hist) >= 30 else None  # cold start fallback
+                        high30_val = feat['high30_hist']  # cold start fallback
 
                     # 3) 스코어 재계산 (전일 EPS 기반)
                     score, seg1, seg2, seg3, seg4, is_turnaround, adj_score, direction = calculate_ntm_score(ntm)
@@ -1002,12 +905,7 @@ def run_ntm_collection(config):
                     nc = ntm['current']
                     if nc > 0:
                         fwd_pe_now = p_now / nc
-                    hist_dt = hist.index.tz_localize(None) if hist.index.tz else hist.index
-                    prices = {}
-                    for days, key in [(7, '7d'), (30, '30d'), (60, '60d'), (90, '90d')]:
-                        target = today - timedelta(days=days)
-                        idx = (hist_dt - target).map(lambda x: abs(x.days)).argmin()
-                        prices[key] = hist.iloc[idx]
+                    prices = {key: feat[f'px_{key}'] for key in ('7d', '30d', '60d', '90d')}
 
                     weights_pe = {'7d': 0.30, '30d': 0.10, '60d': 0.10, '90d': 0.50}  # v80.10 long-tail
                     weighted_sum = 0.0
@@ -1041,28 +939,19 @@ def run_ntm_collection(config):
                     if adj_gap is None:
                         continue  # adj_gap 없으면 순위 의미 없음
 
-                    # 5) DB 삽입
-                    cur_cf.execute('''
-                        INSERT INTO ntm_screening
-                        (date, ticker, rank, score, ntm_current, ntm_7d, ntm_30d, ntm_60d, ntm_90d, is_turnaround)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        ON CONFLICT(date, ticker) DO UPDATE SET
-                            rank=excluded.rank, score=excluded.score,
-                            ntm_current=excluded.ntm_current, ntm_7d=excluded.ntm_7d,
-                            ntm_30d=excluded.ntm_30d, ntm_60d=excluded.ntm_60d,
-                            ntm_90d=excluded.ntm_90d, is_turnaround=excluded.is_turnaround
-                    ''', (today_str, ticker, 0, score,
-                          ntm['current'], ntm['7d'], ntm['30d'], ntm['60d'], ntm['90d'],
-                          1 if is_turnaround else 0))
-
-                    cur_cf.execute('''
-                        UPDATE ntm_screening
-                        SET adj_score=?, adj_gap=?, price=?, ma60=?, ma120=?,
-                            rev_up30=?, rev_down30=?, num_analysts=?, high30=?, vol_ratio=?
-                        WHERE date=? AND ticker=?
-                    ''', (adj_score, adj_gap, p_now, ma60_val, ma120_val,
-                          prev[5], prev[6], prev[7], high30_val, vol_ratio_val,
-                          today_str, ticker))
+                    # 5) DB 행 (eps_chg_weighted는 구 경로와 같이 미기록)
+                    _day_rows[ticker] = {
+                        'rank': 0, 'score': score,
+                        'ntm_current': ntm['current'], 'ntm_7d': ntm['7d'], 'ntm_30d': ntm['30d'],
+                        'ntm_60d': ntm['60d'], 'ntm_90d': ntm['90d'],
+                        'is_turnaround': 1 if is_turnaround else 0,
+                        'adj_score': adj_score, 'adj_gap': adj_gap, 'price': p_now,
+                        'ma60': ma60_val, 'ma120': ma120_val,
+                        'rev_up30': prev[5], 'rev_down30': prev[6], 'num_analysts': prev[7],
+                        'high30': high30_val, 'vol_ratio': vol_ratio_val,
+                    }
+                    _day_sigs[ticker] = signal_row(seg1, seg2, seg3, seg4, direction, fwd_pe_now, fwd_pe_chg,
+                                                   ntm=(ntm['current'], ntm['7d'], ntm['30d'], ntm['60d'], ntm['90d']))
 
                     # 6) results 리스트에 추가
                     if ticker in ticker_cache:
@@ -1093,8 +982,6 @@ def run_ntm_collection(config):
                     log(f"  carry-forward {ticker} 실패: {e}", "WARN")
                     continue
 
-            conn_cf.commit()
-            conn_cf.close()
             if _cf_inserted:
                 log(f"carry-forward 삽입: {','.join(sorted(_cf_inserted))} ({len(_cf_inserted)}종목, 전일 EPS + 오늘 가격)")
 
@@ -1109,18 +996,20 @@ def run_ntm_collection(config):
     if not results_df.empty:
         results_df = results_df.sort_values('adj_score', ascending=False).reset_index(drop=True)
         results_df['rank'] = results_df.index + 1
-
-        for _, row in results_df.iterrows():
-            cursor.execute(
-                'UPDATE ntm_screening SET rank = ? WHERE date = ? AND ticker = ?',
-                (int(row['rank']), today_str, row['ticker'])
-            )
+        _ranks = {tk: {'rank': int(rk)} for tk, rk in zip(results_df['ticker'], results_df['rank'])}
+        for tk, rk in _ranks.items():
+            if tk in _day_rows:  # carry-forward 행은 upsert에 rank 포함
+                _day_rows[tk]['rank'] = rk['rank']
 
     # 턴어라운드: score 순 정렬
     turnaround_df = pd.DataFrame(turnaround)
     if not turnaround_df.empty:
         turnaround_df = turnaround_df.sort_values('score', ascending=False).reset_index(drop=True)
 
+    upsert_screening(cursor, today_str, _day_rows)
+    upsert_signals(cursor, today_str, _day_sigs)
+    if not results_df.empty:
+        update_screening(cursor, today_str, {tk: v for tk, v in _ranks.items() if tk not in _day_rows})
     conn.commit()
     conn.close()
 
@@ -1178,18 +1067,16 @@ def _validate_collection_health(stats, min_collected=900, max_error_rate=0.15, m
 def fetch_revenue_growth(df, today_str):
     """전체 종목 매출 성장률 + 재무 품질 수집 (v33)
 
-    1) 전체 종목 yfinance .info → rev_growth + 12개 재무 지표 DB 저장
+    1) 전체 종목 quote 배치 + quoteSummary(.info 호환) → rev_growth + 12개 재무 지표 DB 저장
     2) composite score용 rev_growth를 dataframe에 매핑
     10스레드 병렬 수집으로 ~3분 → ~30초 단축.
     """
     import yfinance as yf
-    from concurrent.futures import ThreadPoolExecutor, as_completed
-    import time as _time
 
     # 전날 Top 30 종목 로드 — 이 종목만 earnings_history 추가 수집
     _eh_priority = set()
     try:
-        conn_tmp = sqlite3.connect(DB_PATH)
+        conn_tmp = db_connect(DB_PATH, readonly=True)
         rows = conn_tmp.execute(
             "SELECT ticker FROM ntm_screening WHERE part2_rank IS NOT NULL AND date = (SELECT MAX(date) FROM ntm_screening WHERE date < ? AND part2_rank IS NOT NULL)",
             (today_str,)
@@ -1201,76 +1088,150 @@ def fetch_revenue_growth(df, today_str):
     except Exception:
         pass
 
-    def _fetch_one(ticker):
-        """단일 종목 .info 수집 (+ 우선 종목은 earnings_history도)
-        v71.2: rev_growth/OM 의심 시 quarterly_income_stmt로 즉시 교정"""
-        try:
-            stock = yf.Ticker(ticker)
-            info = stock.info
-            # 우선 종목만 earnings_history 추가 수집 (전체 ~30종목뿐, rate limit 영향 미미)
-            if ticker in _eh_priority:
-                try:
-                    eh = stock.earnings_history
-                    if eh is not None and len(eh) > 0:
-                        surps = eh['surprisePercent'].dropna().tolist()
-                        if surps:
-                            info['_earnings_surp'] = surps[-1]
-                except Exception:
-                    pass
-            # v71.2: .info rev_growth/OM이 의심스러우면 income_stmt로 즉시 교정
-            rg = info.get('revenueGrowth')
-            om = info.get('operatingMargins')
-            need_verify = (rg is not None and rg < 0.10) or (om is not None and om < 0.05)
-            if need_verify:
-                try:
-                    qi = stock.quarterly_income_stmt
-                    if qi is not None and not qi.empty and 'Total Revenue' in qi.index:
-                        rev = qi.loc['Total Revenue'].dropna().sort_index(ascending=False)
-                        # rev_growth 교정: YoY 비교
-                        if rg is not None and rg < 0.10 and len(rev) >= 5:
-                            recent_q, yoy_q = rev.iloc[0], rev.iloc[4]
-                            if yoy_q > 0 and recent_q > 0:
-                                real_rg = (recent_q - yoy_q) / yoy_q
-                                if real_rg >= 0.10:
-                                    info['revenueGrowth'] = real_rg
-                                    info['_rg_verified'] = True
-                        # OM 교정: 최근 분기 기준
-                        if 'Operating Income' in qi.index and len(rev) > 0:
-                            op_inc = qi.loc['Operating Income'].dropna().sort_index(ascending=False)
-                            if len(op_inc) > 0:
-                                real_om = float(op_inc.iloc[0]) / float(rev.iloc[0])
-                                if om is not None and abs(real_om - om) > 0.01:
-                                    info['operatingMargins'] = real_om
-                                    info['_om_verified'] = True
-                except Exception:
-                    pass
-            return ticker, info
-        except Exception:
-            return ticker, None
+    def _fetch_extra(ticker, info):
+        """종목별 추가 수집 (우선 종목 earnings_history + v71.2 rev_growth/OM 의심 시 income_stmt 교정)
+        info는 fundamentals_fetch가 채운 .info 호환 dict — 제자리 수정.
+        회전 갱신에서 재무(financialData)를 안 받은 종목은 직전값이 이미 교정본이라 건너뜀."""
+        if _modules is not None and 'financialData' not in _modules.get(ticker, ()):
+            return
+        stock = yf.Ticker(ticker)
+        # 우선 종목만 earnings_history 추가 수집 (전체 ~30종목뿐, rate limit 영향 미미)
+        if ticker in _eh_priority:
+            try:
+                eh = stock.earnings_history
+                if eh is not None and len(eh) > 0:
+                    surps = eh['surprisePercent'].dropna().tolist()
+                    if surps:
+                        info['_earnings_surp'] = surps[-1]
+            except Exception:
+                pass
+        # v71.2: .info rev_growth/OM이 의심스러우면 income_stmt로 즉시 교정
+        rg = info.get('revenueGrowth')
+        om = info.get('operatingMargins')
+        need_verify = (rg is not None and rg < 0.10) or (om is not None and om < 0.05)
+        if need_verify:
+            try:
+                qi = stock.quarterly_income_stmt
+                if qi is not None and not qi.empty and 'Total Revenue' in qi.index:
+                    rev = qi.loc['Total Revenue'].dropna().sort_index(ascending=False)
+                    # rev_growth 교정: YoY 비교
+                    if rg is not None and rg < 0.10 and len(rev) >= 5:
+                        recent_q, yoy_q = rev.iloc[0], rev.iloc[4]
+                        if yoy_q > 0 and recent_q > 0:
+                            real_rg = (recent_q - yoy_q) / yoy_q
+                            if real_rg >= 0.10:
+                                info['revenueGrowth'] = real_rg
+                                info['_rg_verified'] = True
+                    # OM 교정: 최근 분기 기준
+                    if 'Operating Income' in qi.index and len(rev) > 0:
+                        op_inc = qi.loc['Operating Income'].dropna().sort_index(ascending=False)
+                        if len(op_inc) > 0:
+                            real_om = float(op_inc.iloc[0]) / float(rev.iloc[0])
+                            if om is not None and abs(real_om - om) > 0.01:
+                                info['operatingMargins'] = real_om
+                                info['_om_verified'] = True
+            except Exception:
+                pass
 
     tickers = list(df['ticker'].unique())
-    log(f"매출+품질 수집 시작: {len(tickers)}종목 (5스레드, 배치 50)")
+    log(f"매출+품질 수집 시작: {len(tickers)}종목 (quote 배치 + 종목별 quoteSummary 회전 갱신)")
+
+    # 펀더멘털 수집 (fundamentals_fetch): 구 종목별 .info(HTTP 2회) × 5스레드·배치 50 대체.
+    #   marketCap/earningsTimestamp/shortName 등은 100종목/요청 quote 배치(매일 전 종목),
+    #   재무 필드만 종목별 quoteSummary. 교정·어닝서프는 _fetch_extra로 해당 종목만.
+    #   quote 배치가 실패하면 fetch_fundamentals가 종목별 .info로 자동 폴백.
+    from fundamentals_fetch import fetch_fundamentals, YahooFundamentals
+    _src = YahooFundamentals()
+    _quotes = {}
+    try:
+        _quotes = _src.quotes(tickers, log)
+    except Exception as e:
+        log(f"  quote 배치 실패 → 종목별 .info 폴백: {e}", "WARN")
+
+    # 회전 갱신 (refresh_schedule): 마진·ROE·FCF 등은 분기 공시라 매일 전 종목을 다시 받을 필요 없음.
+    #   그룹별 마지막 수집일을 refresh_state에 두고 하루 예산(기본 20%)만 — 오래된 순, 어닝 발표 전후(-5~+1일)·
+    #   전일 Top30 우선. 나이 ≥ 상한(기본 7일)·미수집은 예산 무관 전부 → 모든 값의 나이 ≤ 7일 보장.
+    #   업종(assetProfile)은 별도 그룹(상한 30일, 예산 5%, 플레이스홀더 우선) — 안 받는 날은 모듈에서 제외.
+    #   나머지 종목은 저장된 직전값 + 오늘 quote. quote 배치 실패(.info 폴백)면 전 종목.
+    _modules = None
+    _cached = {}
+    _sched = None
+    _sconn = None
+    if _quotes:
+        try:
+            from refresh_schedule import RefreshScheduler, utc_date
+            _sconn = db_connect(DB_PATH)
+            _sched = {
+                'fundamentals': RefreshScheduler(
+                    _sconn, 'fundamentals', today_str,
+                    max_age_days=int(os.environ.get('FUNDAMENTALS_MAX_AGE_DAYS', '7')),
+                    budget=float(os.environ.get('FUNDAMENTALS_REFRESH_BUDGET', '0.2'))),
+                'profile': RefreshScheduler(_sconn, 'profile', today_str, max_age_days=30, budget=0.05),
+            }
+            _today_d = datetime.strptime(today_str, '%Y-%m-%d').date()
+            _event = []
+            for t in tickers:
+                q = _quotes.get(t) or {}
+                ets = q.get('earningsTimestampStart') or q.get('earningsTimestamp')
+                if isinstance(ets, (int, float)) and ets > 0:
+                    if -5 <= (utc_date(ets) - _today_d).days <= 1:
+                        _event.append(t)
+            _fund_plan, _fund_why = _sched['fundamentals'].plan(
+                tickers, priority=sorted(_eh_priority) + _event)
+            _tcache = {}
+            try:
+                with open(PROJECT_ROOT / 'ticker_info_cache.json', 'r', encoding='utf-8') as f:
+                    _tcache = json.load(f)
+            except Exception:
+                pass
+            _placeholder = [t for t in tickers if _tcache.get(t, {}).get('industry') in (None, '기타')]
+            # 업종은 플레이스홀더 다음으로 오늘 재무 요청 종목에 얹음(추가 요청 0)
+            _prof_plan, _ = _sched['profile'].plan(tickers, priority=_placeholder + _fund_plan)
+            _modules = {t: ('financialData', 'defaultKeyStatistics') for t in _fund_plan}
+            for t in _prof_plan:
+                _modules[t] = _modules.get(t, ()) + ('assetProfile',)
+            for grp in ('profile', 'fundamentals'):
+                for t, payload in _sched[grp].load(tickers).items():
+                    _cached.setdefault(t, {}).update(payload)
+            log(f"  회전 갱신: 재무 {len(_fund_plan)}종목 (상한도달·미수집 {_fund_why['due']} · "
+                f"우선 {_fund_why['priority']} · 오래된순 {_fund_why['stalest']}) · 업종 {len(_prof_plan)}종목 · "
+                f"직전값 유지 {len(tickers) - len(_modules)}종목")
+        except Exception as e:
+            log(f"  회전 갱신 계획 실패 → 전 종목 수집: {e}", "WARN")
+            _modules, _cached, _sched = None, {}, None
 
-    # 배치 병렬 수집 (rate limit 방지)
-    BATCH_SIZE = 50
-    results = {}
-    for batch_start in range(0, len(tickers), BATCH_SIZE):
-        batch = tickers[batch_start:batch_start + BATCH_SIZE]
-        with ThreadPoolExecutor(max_workers=5) as executor:
-            futures = {executor.submit(_fetch_one, t): t for t in batch}
-            for future in as_completed(futures):
-                ticker, info = future.result()
-                results[ticker] = info
-        done = batch_start + len(batch)
-        if done % 200 < BATCH_SIZE:
-            log(f"  수집 진행: {done}/{len(tickers)}")
-        if batch_start + BATCH_SIZE < len(tickers):
-            __import__('time').sleep(0.5)
+    results, _fetched, _fstats = fetch_fundamentals(tickers, extra=_fetch_extra, log=log, source=_src,
+                                                    quotes=_quotes, modules=_modules, cached=_cached)
+    if _fstats['batched']:
+        log(f"  quote 배치 {_src.n_requests - _fstats['per_ticker_requests']}회({_fstats['quotes']}종목) + "
+            f"종목별 quoteSummary {_fstats['per_ticker_requests']}회 (429 {_fstats['throttled']}건)")
+
+    # 회전 갱신 기록: 실제로 받은 그룹만 오늘 날짜로 (payload = 교정 반영된 info 값)
+    if _sched is not None:
+        try:
+            _group_modules = {'fundamentals': ('financialData', 'defaultKeyStatistics'),
+                              'profile': ('assetProfile',)}
+            for grp, gmods in _group_modules.items():
+                rec = {}
+                for t, mods in _fetched.items():
+                    if not set(gmods) & set(_modules.get(t, ())):
+                        continue
+                    info = results.get(t) or {}
+                    keys = {k for m in gmods for k in mods.get(m, {})}
+                    if grp == 'fundamentals':
+                        keys.add('_earnings_surp')
+                    rec[t] = {k: info[k] for k in keys if k in info}
+                _sched[grp].record(rec)
+            _sconn.commit()
+        except Exception as e:
+            log(f"  회전 갱신 기록 실패(무시): {e}", "WARN")
+    if _sconn is not None:
+        _sconn.close()
 
     # DB 일괄 저장
     rev_map = {}
     earnings_map = {}  # {ticker: datetime.date} — 어닝 날짜 (.info에서 추출)
-    conn = sqlite3.connect(DB_PATH)
+    conn = db_connect(DB_PATH)
     cursor = conn.cursor()
     saved = 0
 
@@ -1340,7 +1301,7 @@ def fetch_revenue_growth(df, today_str):
     failed_tickers = [t for t in tickers if rev_map.get(t) is None
                       or om_map.get(t) is None or gm_map.get(t) is None]
     if failed_tickers:
-        conn2 = sqlite3.connect(DB_PATH)
+        conn2 = db_connect(DB_PATH)
         cur2 = conn2.cursor()
         filled_rev = filled_om = filled_gm = 0
         for t in failed_tickers:
@@ -1490,7 +1451,7 @@ def get_part2_candidates(df, top_n=None, return_counts=False):
         filtered = filtered[filtered['rev_growth'].notna()].copy()
 
         # 매출 성장 10% 미만 → 제외 (사이클/기저효과 방지)
-        # 주: .info 오류는 _fetch_one()에서 income_stmt로 즉시 교정 (v71.2)
+        # 주: .info 오류는 _fetch_extra()에서 income_stmt로 즉시 교정 (v71.2)
         low_rev = filtered[filtered['rev_growth'] < 0.10]
         if len(low_rev) > 0:
             log(f"매출 성장 부족(<10%) 제외: {', '.join(low_rev['ticker'].tolist())}")
@@ -1614,7 +1575,7 @@ def log_portfolio_trades(selected, today_str):
     selected = [{'ticker', 'weight', ...}, ...] — 오늘 포트폴리오 종목
     어제 포트폴리오와 비교하여 enter/hold/exit 판별
     """
-    conn = sqlite3.connect(DB_PATH)
+    conn = db_connect(DB_PATH)
     cursor = conn.cursor()
 
     # 어제 포트폴리오 (hold 또는 enter인 종목)
@@ -1680,7 +1641,7 @@ def get_forward_test_summary(today_str):
 
     Returns: dict or None
     """
-    conn = sqlite3.connect(DB_PATH)
+    conn = db_connect(DB_PATH, readonly=True)
     c = conn.cursor()
 
     # 날짜 목록
@@ -1760,6 +1721,7 @@ def get_forward_test_summary(today_str):
 
 GRACE_DAYS = 20  # 개미털기 유예 윈도우 (영업일). BT _bt_targeted_grace: 10/20/40 동급
 _GRACE_TICKERS = set()  # 매 run save_part2_ranks에서 갱신 — MA120 아래지만 유예 유지 종목
+_P2_SCORES = None  # 매 run save_part2_ranks가 순위에 쓴 part2_score.Part2Scores — 같은 run의 표시 점수가 재사용
 
 
 def compute_grace_tickers(cursor, today_str):
@@ -1821,7 +1783,7 @@ def save_part2_ranks(results_df, today_str):
     # 개미털기 유예 산출 (이번 run 전체 get_part2_candidates에 적용 — 전역)
     global _GRACE_TICKERS
     try:
-        _gconn = sqlite3.connect(DB_PATH)
+        _gconn = db_connect(DB_PATH, readonly=True)
         _GRACE_TICKERS = compute_grace_tickers(_gconn.cursor(), today_str)
         _gconn.close()
     except Exception as e:
@@ -1836,76 +1798,68 @@ def save_part2_ranks(results_df, today_str):
         log("Part 2 후보 0개 — part2_rank 저장 스킵")
         return []
 
-    # min_seg < -2% 제외 — 매도 신호 종목은 순위 부여 전에 걸러냄
-    def _calc_min_seg(row):
-        segs = [float(row.get(c) or 0) for c in ('seg1', 'seg2', 'seg3', 'seg4')]
-        return min(segs) if segs else 0
-    all_candidates = all_candidates[all_candidates.apply(_calc_min_seg, axis=1) >= -2].copy()
+    # min_seg < -2% 제외 — 매도 신호 종목은 순위 부여 전에 걸러냄 (열 배열, part2_score.min_seg)
+    from part2_score import MIN_SEG_CUT, Part2Scores, frame_conviction, min_seg
+    all_candidates = all_candidates[min_seg(all_candidates) >= MIN_SEG_CUT].copy()
 
     # 1. 오늘의 composite 순위 (1~N, 당일 conviction adj_gap 오름차순, v71)
     all_candidates = all_candidates.reset_index(drop=True)
-    # conviction 적용: adj_gap × (1 + max(rev_up/N, eps_floor) + rev_bonus) (v75)
-    def _conv_gap(row):
-        ag = float(row.get('adj_gap') or 0)
-        up = float(row.get('rev_up30') or 0)
-        na = float(row.get('num_analysts') or 0)
-        nc = float(row.get('ntm_cur') or 0)  # results_df는 'ntm_cur' 키
-        n90 = float(row.get('ntm_90d') or 0)
-        rg = row.get('rev_growth')
-        rg = float(rg) if rg is not None else None
-        return _apply_conviction(ag, up, na, nc, n90, rev_growth=rg)
-    all_candidates['_conv_gap'] = all_candidates.apply(_conv_gap, axis=1)
+    # conviction 적용: adj_gap × (1 + max(rev_up/N, eps_floor) + rev_bonus) (v75) — 열 배열 한 번에
+    all_candidates['_conv_gap'] = frame_conviction(all_candidates)
     all_candidates = all_candidates.sort_values('_conv_gap', ascending=True).reset_index(drop=True)
-    composite_ranks = {row['ticker']: i + 1 for i, (_, row) in enumerate(all_candidates.iterrows())}
-
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    # composite_rank 저장 (모든 eligible 종목)
-    cursor.execute('UPDATE ntm_screening SET composite_rank=NULL WHERE date=?', (today_str,))
-    for ticker, crank in composite_ranks.items():
-        cursor.execute(
-            'UPDATE ntm_screening SET composite_rank=? WHERE date=? AND ticker=?',
-            (crank, today_str, ticker)
-        )
+    composite_ranks = {tk: i + 1 for i, tk in enumerate(all_candidates['ticker'])}
 
-    # 2. w_gap(3일 가중 z-score) 기준 Top 30 → part2_rank
-    #    v73 percentile rank 시도 → 40일 백테스트에서 -8.6%p 열세로 롤백
-    #    이유: conviction 배율(_apply_conviction)이 만든 magnitude 신호를
-    #         percentile은 압축해서 버림 (자기모순). z-score는 magnitude 보존.
-    eligible_tickers = list(composite_ranks.keys())
-    wgap_map = _compute_w_gap_map(cursor, today_str, eligible_tickers)
-    sorted_by_wgap = sorted(eligible_tickers, key=lambda tk: wgap_map.get(tk, 0), reverse=True)
-    top30 = sorted_by_wgap[:30]
-
-    # part2_rank 저장 (Top 30만)
-    cursor.execute('UPDATE ntm_screening SET part2_rank=NULL WHERE date=?', (today_str,))
-    top30_tickers = []
-    for rank, ticker in enumerate(top30, 1):
-        cursor.execute(
-            'UPDATE ntm_screening SET part2_rank=? WHERE date=? AND ticker=?',
-            (rank, today_str, ticker)
-        )
-        top30_tickers.append(ticker)
-
-    conn.commit()
-    conn.close()
-    log(f"Part 2 rank 저장: {len(top30_tickers)}개 종목 (w_gap Top 30, eligible {len(composite_ranks)}개)")
-    # v117 (2026-06-09): dollar_volume_30d 업데이트 — 시장 주도주 필터용
+    # v117 (2026-06-09): dollar_volume_30d — 시장 주도주 필터용
     # dv 파이프라인 수리 (2026-07-04): top30만 기록 → 오늘 행 전체(전종목)로 확장.
     #   순위 밖 초유동성 종목(MU $56.6B/일)이 dv=None → $1B 필터에 '데이터없음'으로
     #   영영 차단되던 구멍 봉합. 현행 매매 로직은 랭크 종목 dv만 소비 → 행동변화 0.
+    # 계산(폴백 네트워크 포함)은 쓰기 트랜잭션 전에 끝내고, 기록은 part2_rank와 같은 배치로.
     try:
-        _c_dv = sqlite3.connect(DB_PATH)
+        _c_dv = db_connect(DB_PATH, readonly=True)
         _dv_targets = [r[0] for r in _c_dv.execute(
             'SELECT ticker FROM ntm_screening WHERE date=?', (today_str,))]
         _c_dv.close()
     except Exception:
         _dv_targets = []
     try:
-        update_dollar_volumes(today_str, _dv_targets or top30_tickers)
+        dv_map = compute_dollar_volumes(today_str, _dv_targets or list(composite_ranks))
     except Exception as _e:
-        log(f"dollar_volume 업데이트 실패: {_e}", "WARN")
+        dv_map = {}
+        log(f"dollar_volume 계산 실패: {_e}", "WARN")
+
+    from ntm_store import update_screening
+    global _P2_SCORES
+    _P2_SCORES = None
+    # 쓰기 트랜잭션 1개 (db_access.write_txn): composite_rank → w_gap 조회 → part2_rank/dv, 예외 시 전부 rollback
+    with write_txn(DB_PATH) as conn:
+        cursor = conn.cursor()
+
+        # composite_rank 저장 (모든 eligible 종목) — 같은 트랜잭션의 _compute_w_gap_map이 오늘 cr을 읽으므로 먼저
+        update_screening(cursor, today_str, {tk: {'composite_rank': cr} for tk, cr in composite_ranks.items()},
+                         reset=('composite_rank',))
+
+        # 2. w_gap(3일 가중 z-score) 기준 Top 30 → part2_rank
+        #    v73 percentile rank 시도 → 40일 백테스트에서 -8.6%p 열세로 롤백
+        #    이유: conviction 배율(_apply_conviction)이 만든 magnitude 신호를
+        #         percentile은 압축해서 버림 (자기모순). z-score는 magnitude 보존.
+        eligible_tickers = list(composite_ranks.keys())
+        scores = Part2Scores(cursor, today_str)
+        wgap_map = scores.weighted(eligible_tickers)
+        sorted_by_wgap = sorted(eligible_tickers, key=lambda tk: wgap_map.get(tk, 0), reverse=True)
+        top30 = sorted_by_wgap[:30]
+
+        # part2_rank (Top 30만) + dollar_volume_30d — 부분 컬럼 한 배치로
+        top30_tickers = list(top30)
+        _vals = {tk: {'dollar_volume_30d': dv} for tk, dv in dv_map.items()}
+        for rank, ticker in enumerate(top30_tickers, 1):
+            _vals.setdefault(ticker, {})['part2_rank'] = rank
+        update_screening(cursor, today_str, _vals, reset=('part2_rank',))
+
+    # 커밋 후에만 공유 — 표시 점수(_build_score_100_map)가 같은 입력으로 다시 계산하지 않게.
+    #   오늘 part2_rank 기록은 점수 입력이 아님(오늘 = composite_rank 기준) → 기록 후에도 유효.
+    _P2_SCORES = scores
+    log(f"Part 2 rank 저장: {len(top30_tickers)}개 종목 (w_gap Top 30, eligible {len(composite_ranks)}개)")
+    log(f"dollar_volume_30d 업데이트: {len(dv_map)}/{len(_dv_targets or composite_ranks)} 종목")
     return top30_tickers
 
 
@@ -1914,89 +1868,89 @@ def save_part2_ranks(results_df, today_str):
 _HIST_ALL_DV = {'df': None}
 
 
-def update_dollar_volumes(today_str, ticker_list):
-    """직전 30일 거래대금 평균($M)을 ntm_screening.dollar_volume_30d에 기록.
+def compute_dollar_volumes(today_str, ticker_list):
+    """직전 30일 거래대금 평균($M) 계산 → {ticker: dv}. 기록은 호출측(update_screening 배치).
 
     v117 (2026-06-09): cr Top 30만 기록 → 순위 밖 종목은 dv=None으로 남아 $1B 필터가
       초유동성 대형주(MU $56.6B/일)를 '데이터없음'으로 영영 차단하는 구멍이 있었음.
     2026-07-04 수리: 오늘 행 전체(전종목)로 확장. _HIST_ALL_DV(수집 시 이미 받은 전종목
       1y 히스토리) 재사용 = 추가 API 0회. 캐시에 없는 종목만 yfinance 폴백 fetch.
       캐시 Close는 auto_adjust 조정가라 구버전(raw Close) 대비 배당 수준(<1%) 오차 —
-      $1B 임계 필터 용도에 무해. 매일 cron save_part2_ranks 끝에 자동 호출.
+      $1B 임계 필터 용도에 무해. 매일 cron save_part2_ranks에서 part2_rank와 함께 기록.
     """
+    dv_map = {}
+    if not ticker_list:
+        return dv_map
+    import pandas as pd
+    remainder = list(ticker_list)
+    hist = _HIST_ALL_DV.get('df')
+    if hist is not None and not getattr(hist, 'empty', True) and isinstance(hist.columns, pd.MultiIndex):
+        lv0 = hist.columns.get_level_values(0)
+        if 'Close' in lv0 and 'Volume' in lv0:
+            close_all, vol_all = hist['Close'], hist['Volume']
+            cutoff = pd.to_datetime(today_str)
+            remainder = []
+            for tk in ticker_list:
+                try:
+                    if tk not in close_all.columns or tk not in vol_all.columns:
+                        remainder.append(tk)
+                        continue
+                    dv_M = (close_all[tk] * vol_all[tk]).dropna() / 1e6
+                    dv_M = dv_M[dv_M.index < cutoff]  # 오늘 이전 영업일만 (point-in-time)
+                    if len(dv_M) < 5:
+                        remainder.append(tk)
+                        continue
+                    avg_dv = float(dv_M.tail(30).mean())
+                    if pd.isna(avg_dv):
+                        remainder.append(tk)
+                        continue
+                    dv_map[tk] = avg_dv
+                except Exception:
+                    remainder.append(tk)
+    if remainder:
+        try:
+            import yfinance as yf
+            from datetime import datetime, timedelta
+            # 직전 45영업일 fetch (30일 평균 + buffer). threads=2: burst 429 방지 (L529 참고)
+            end_d = (datetime.strptime(today_str, '%Y-%m-%d') + timedelta(days=2)).strftime('%Y-%m-%d')
+            start_d = (datetime.strptime(today_str, '%Y-%m-%d') - timedelta(days=60)).strftime('%Y-%m-%d')
+            data = yf.download(' '.join(remainder), start=start_d, end=end_d,
+                              auto_adjust=False, progress=False, threads=2, group_by='ticker')
+            for tk in remainder:
+                try:
+                    if isinstance(data.columns, pd.MultiIndex):
+                        df = data[tk] if tk in data.columns.get_level_values(0) else None
+                    else:
+                        df = data
+                    if df is None or df.empty:
+                        continue
+                    # 오늘 이전 영업일만 (point-in-time)
+                    df = df[df.index < pd.to_datetime(today_str)]
+                    if len(df) < 5:
+                        continue
+                    dv_M = (df['Volume'] * df['Close']) / 1e6
+                    avg_dv = float(dv_M.tail(30).mean())
+                    if pd.isna(avg_dv):
+                        continue
+                    dv_map[tk] = avg_dv
+                except Exception:
+                    pass
+        except Exception as e:
+            log(f"dv 폴백 fetch 오류: {e}", "WARN")
+    return dv_map
+
+
+def update_dollar_volumes(today_str, ticker_list):
+    """compute_dollar_volumes → ntm_screening.dollar_volume_30d 일괄 기록 (단독 호출용)."""
     if not ticker_list:
         return
     try:
-        import pandas as pd
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        updated = 0
-        remainder = list(ticker_list)
-        hist = _HIST_ALL_DV.get('df')
-        if hist is not None and not getattr(hist, 'empty', True) and isinstance(hist.columns, pd.MultiIndex):
-            lv0 = hist.columns.get_level_values(0)
-            if 'Close' in lv0 and 'Volume' in lv0:
-                close_all, vol_all = hist['Close'], hist['Volume']
-                cutoff = pd.to_datetime(today_str)
-                remainder = []
-                for tk in ticker_list:
-                    try:
-                        if tk not in close_all.columns or tk not in vol_all.columns:
-                            remainder.append(tk)
-                            continue
-                        dv_M = (close_all[tk] * vol_all[tk]).dropna() / 1e6
-                        dv_M = dv_M[dv_M.index < cutoff]  # 오늘 이전 영업일만 (point-in-time)
-                        if len(dv_M) < 5:
-                            remainder.append(tk)
-                            continue
-                        avg_dv = float(dv_M.tail(30).mean())
-                        if pd.isna(avg_dv):
-                            remainder.append(tk)
-                            continue
-                        cursor.execute(
-                            'UPDATE ntm_screening SET dollar_volume_30d=? WHERE date=? AND ticker=?',
-                            (avg_dv, today_str, tk)
-                        )
-                        updated += 1
-                    except Exception:
-                        remainder.append(tk)
-        if remainder:
-            try:
-                import yfinance as yf
-                from datetime import datetime, timedelta
-                # 직전 45영업일 fetch (30일 평균 + buffer). threads=2: burst 429 방지 (L529 참고)
-                end_d = (datetime.strptime(today_str, '%Y-%m-%d') + timedelta(days=2)).strftime('%Y-%m-%d')
-                start_d = (datetime.strptime(today_str, '%Y-%m-%d') - timedelta(days=60)).strftime('%Y-%m-%d')
-                data = yf.download(' '.join(remainder), start=start_d, end=end_d,
-                                  auto_adjust=False, progress=False, threads=2, group_by='ticker')
-                for tk in remainder:
-                    try:
-                        if isinstance(data.columns, pd.MultiIndex):
-                            df = data[tk] if tk in data.columns.get_level_values(0) else None
-                        else:
-                            df = data
-                        if df is None or df.empty:
-                            continue
-                        # 오늘 이전 영업일만 (point-in-time)
-                        df = df[df.index < pd.to_datetime(today_str)]
-                        if len(df) < 5:
-                            continue
-                        dv_M = (df['Volume'] * df['Close']) / 1e6
-                        avg_dv = float(dv_M.tail(30).mean())
-                        if pd.isna(avg_dv):
-                            continue
-                        cursor.execute(
-                            'UPDATE ntm_screening SET dollar_volume_30d=? WHERE date=? AND ticker=?',
-                            (avg_dv, today_str, tk)
-                        )
-                        updated += 1
-                    except Exception:
-                        pass
-            except Exception as e:
-                log(f"dv 폴백 fetch 오류: {e}", "WARN")
-        conn.commit()
-        conn.close()
-        log(f"dollar_volume_30d 업데이트: {updated}/{len(ticker_list)} 종목")
+        from ntm_store import update_screening
+        dv_map = compute_dollar_volumes(today_str, ticker_list)
+        with write_txn(DB_PATH) as conn:
+            update_screening(conn.cursor(), today_str,
+                             {tk: {'dollar_volume_30d': dv} for tk, dv in dv_map.items()})
+        log(f"dollar_volume_30d 업데이트: {len(dv_map)}/{len(ticker_list)} 종목")
     except Exception as e:
         log(f"update_dollar_volumes 오류: {e}", "WARN")
 
@@ -2017,69 +1971,20 @@ def _apply_conviction(adj_gap, rev_up, num_analysts, ntm_current=None, ntm_90d=N
     채택 이유: 미래 환경 변화(매출 30% 경계 종목 / NTM 200%+ 폭증) 대비 robust
 
     이전 (v75): cliff 30% / cap 1.0 — 6시작일 BT 검증됐으나 미래 환경 변동성 취약
+    식은 part2_score.conviction (열 배열 버전) 하나 — 여기는 스칼라 호출용 래퍼.
     """
-    ratio = 0
-    if num_analysts and num_analysts > 0 and rev_up is not None:
-        ratio = rev_up / num_analysts
-    eps_floor = 0
-    if ntm_current is not None and ntm_90d is not None and ntm_90d and abs(ntm_90d) > 0.01:
-        eps_floor = min(abs((ntm_current - ntm_90d) / ntm_90d), 3.0)  # X2: 1.0 → 3.0
-    base_conviction = max(ratio, eps_floor)
-
-    # v80.9 X2: rev_growth 비례 (cliff 제거)
-    if rev_growth is not None:
-        rev_bonus = min(min(rev_growth, 0.5) * 0.6, 0.3)
-    else:
-        rev_bonus = 0.0
-
-    conviction = base_conviction + rev_bonus
-    return adj_gap * (1 + conviction)
+    from part2_score import conviction
+    return float(conviction(*([v] for v in (adj_gap, rev_up, num_analysts, ntm_current, ntm_90d,
+                                             rev_growth)))[0])
 
 
 def _compute_w_gap_map(cursor, today_str, tickers):
     """w_gap(3일 가중 conviction adj_gap) 계산 — T0×0.5 + T1×0.3 + T2×0.2
 
     v71: adj_gap × (1 + rev_up30/num_analysts) conviction 배율 적용
+    계산은 part2_score.Part2Scores (conviction·일별 z-score·가중을 열 배열로 한 번에).
     Returns: {ticker: float(w_gap)}
     """
-    dates = _get_recent_dates(cursor, 'composite_rank', today_str, 3)
-    dates = sorted(dates)  # 오래된 순
-
-    import numpy as np
-    MISSING_PENALTY = 30  # 빈 날 최종 폴백
-
-    score_by_date = {}
-    for d in dates:
-        rows = cursor.execute(
-            'SELECT ticker, adj_gap, rev_up30, num_analysts, ntm_current, ntm_90d, '
-            'rev_growth FROM ntm_screening WHERE date=? AND composite_rank IS NOT NULL',
-            (d,)
-        ).fetchall()
-        conv_gaps = {}
-        for r in rows:
-            tk = r[0]
-            conv_gaps[tk] = _apply_conviction(r[1], r[2], r[3], r[4], r[5], rev_growth=r[6])
-
-        vals = list(conv_gaps.values())
-        if len(vals) >= 2:
-            mean_v = np.mean(vals)
-            std_v = np.std(vals)
-            if std_v > 0:
-                score_by_date[d] = {
-                    tk: max(30.0, 65 + (-(v - mean_v) / std_v) * 15)
-                    for tk, v in conv_gaps.items()
-                }
-            else:
-                score_by_date[d] = {tk: 65 for tk in conv_gaps}
-        else:
-            score_by_date[d] = {tk: 65 for tk in conv_gaps}
-
-    weights = [0.2, 0.3, 0.5]  # T-2, T-1, T0 (오래된순)
-    if len(dates) == 2:
-        weights = [0.4, 0.6]
-    elif len(dates) == 1:
-        weights = [1.0]
-
     # v80.1 (2026-04-24): "빈 날" 기준을 composite_rank → part2_rank로 변경.
     # 이전(cr 기준): 그 날 eligible이면 실제 z-score 사용.
     #   → 궤적 표시("⏳"인 종목의 T-2는 "-")와 w_gap 계산 기준 불일치.
@@ -2090,28 +1995,8 @@ def _compute_w_gap_map(cursor, today_str, tickers):
     #   T-0은 이 함수 실행 시점에 p2_rank가 아직 NULL이라 cr 기준 유지.
     # 영향 검증: 최근 30거래일 BT에서 ✅ 진입 3종목 변경 0건, Top 8 순위만
     #   ⏳/🆕 종목이 뒤로 밀림. 실거래 영향 없음.
-    p2_by_date = {}
-    for d in dates:
-        rows = cursor.execute(
-            'SELECT ticker FROM ntm_screening WHERE date=? AND part2_rank IS NOT NULL', (d,)
-        ).fetchall()
-        p2_by_date[d] = {r[0] for r in rows}
-
-    result = {}
-    for tk in tickers:
-        wg = 0
-        for i, d in enumerate(dates):
-            is_today = (d == today_str)
-            if not is_today and tk not in p2_by_date.get(d, set()):
-                # 과거 날짜에 당시 Top 30 밖이었으면 빈 날 penalty
-                score = MISSING_PENALTY
-            else:
-                score = score_by_date.get(d, {}).get(tk)
-                if score is None:
-                    score = MISSING_PENALTY
-            wg += score * weights[i]
-        result[tk] = wg
-    return result
+    from part2_score import Part2Scores
+    return Part2Scores(cursor, today_str).weighted(tickers)
 
 
 def _compute_weighted_rank_map(cursor, today_str, tickers):
@@ -2163,7 +2048,7 @@ def _compute_weighted_rank_map(cursor, today_str, tickers):
 
 def is_cold_start():
     """DB에 part2_rank 데이터가 3일 미만이면 True (채널 전송 제어용)"""
-    conn = sqlite3.connect(DB_PATH)
+    conn = db_connect(DB_PATH, readonly=True)
     cursor = conn.cursor()
     cursor.execute('SELECT COUNT(DISTINCT date) FROM ntm_screening WHERE part2_rank IS NOT NULL')
     count = cursor.fetchone()[0]
@@ -2186,54 +2071,37 @@ def _get_recent_dates(cursor, rank_col='part2_rank', today_str=None, limit=3):
     return [r[0] for r in cursor.fetchall()]
 
 
+_RANK_HISTORY = None   # ((연결 id, data_version, today_str), RankHistory)
+
+
+def _rank_history(today_str=None):
+    """최근 순위 이력 패널 (rank_history.RankHistory) — 메시지 조립 함수들이 공유, DB가 바뀌었을 때만 재로드.
+
+    변경 감지 = 읽기 전용 공유 연결의 PRAGMA data_version (_asof_view와 동일) → save_part2_ranks 커밋 뒤
+    첫 호출에서 쿼리 1회, 이후 3일 상태·궤적·가중 순위·변동 태그·어제 대비·연속 일수는 메모리에서.
+    """
+    global _RANK_HISTORY
+    conn = db_connect(DB_PATH, readonly=True)
+    try:
+        key = (id(conn), conn.execute('PRAGMA data_version').fetchone()[0], today_str)
+        if _RANK_HISTORY is None or _RANK_HISTORY[0] != key:
+            from rank_history import RankHistory
+            _RANK_HISTORY = (key, RankHistory(conn, today_str))
+    finally:
+        conn.close()
+    return _RANK_HISTORY[1]
+
+
 def get_3day_status(today_tickers, today_str=None):
     """3일 연속 Top 30 진입 여부 판별 → {ticker: '✅' or '⏳' or '🆕'}
     ✅ = 3일 연속 Top 30 (L3 동결 시 유지 대상)
     ⏳ = 2일 연속 Top 30
     🆕 = 오늘만 Top 30
     """
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    dates = _get_recent_dates(cursor, 'part2_rank', today_str, 3)
-
-    if len(dates) < 2:
-        conn.close()
-        log(f"3일 교집합: DB {len(dates)}일뿐 — 전부 🆕 처리 (cold start)")
-        return {t: '🆕' for t in today_tickers}
-
-    placeholders = ','.join('?' * len(dates))
-
-    # 3일 모두 Top 30 (part2_rank 존재)
-    verified_3d = set()
-    if len(dates) >= 3:
-        cursor.execute(f'''
-            SELECT ticker FROM ntm_screening
-            WHERE date IN ({placeholders}) AND part2_rank IS NOT NULL
-            GROUP BY ticker HAVING COUNT(DISTINCT date) = 3
-        ''', dates)
-        verified_3d = {r[0] for r in cursor.fetchall()}
-
-    # 최근 2일 모두 Top 30
-    dates_2d = dates[:2]
-    ph2 = ','.join('?' * len(dates_2d))
-    cursor.execute(f'''
-        SELECT ticker FROM ntm_screening
-        WHERE date IN ({ph2}) AND part2_rank IS NOT NULL
-        GROUP BY ticker HAVING COUNT(DISTINCT date) = 2
-    ''', dates_2d)
-    verified_2d = {r[0] for r in cursor.fetchall()}
-
-    conn.close()
-
-    status = {}
-    for t in today_tickers:
-        if t in verified_3d:
-            status[t] = '✅'
-        elif t in verified_2d:
-            status[t] = '⏳'
-        else:
-            status[t] = '🆕'
+    status, n_dates = _rank_history(today_str).status_3day(today_tickers)
+    if n_dates < 2:
+        log(f"3일 교집합: DB {n_dates}일뿐 — 전부 🆕 처리 (cold start)")
+        return status
 
     v3 = sum(1 for v in status.values() if v == '✅')
     v2 = sum(1 for v in status.values() if v == '⏳')
@@ -2244,32 +2112,7 @@ def get_3day_status(today_tickers, today_str=None):
 
 def get_rank_history(today_tickers, today_str=None):
     """최근 3일간 part2_rank 이력 → {ticker: '3→4→1'} 형태"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    dates = sorted(_get_recent_dates(cursor, 'part2_rank', today_str, 3))
-
-    if len(dates) < 2:
-        conn.close()
-        return {}
-
-    rank_by_date = {}
-    for d in dates:
-        cursor.execute(
-            'SELECT ticker, part2_rank FROM ntm_screening WHERE date=? AND part2_rank IS NOT NULL AND part2_rank <= 30',
-            (d,)
-        )
-        rank_by_date[d] = {r[0]: r[1] for r in cursor.fetchall()}
-    conn.close()
-
-    history = {}
-    for t in today_tickers:
-        parts = []
-        for d in dates:
-            r = rank_by_date.get(d, {}).get(t)
-            parts.append(str(r) if r else '-')
-        history[t] = '→'.join(parts)
-    return history
+    return _rank_history(today_str).rank_trail(today_tickers)
 
 
 def compute_weighted_ranks(today_tickers, today_str=None):
@@ -2279,47 +2122,17 @@ def compute_weighted_ranks(today_tickers, today_str=None):
     Watchlist 표시 순서는 part2_rank(3일 가중), 여기는 추이 표시용
     Returns: {ticker: {'weighted': float, 'r0': int, 'r1': int, 'r2': int}}
     """
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    dates = sorted(_get_recent_dates(cursor, 'composite_rank', today_str, 3))
-
-    if not dates:
-        conn.close()
+    rh = _rank_history(today_str)
+    n_dates = len(rh.rank_dates('composite_rank', 3))
+    if not n_dates:
         return {}
 
-    PENALTY = 50
-
-    rank_by_date = {}
-    for d in dates:
-        cursor.execute(
-            'SELECT ticker, composite_rank FROM ntm_screening WHERE date=? AND composite_rank IS NOT NULL',
-            (d,)
-        )
-        rank_by_date[d] = {r[0]: r[1] for r in cursor.fetchall()}
-    conn.close()
-
-    today = dates[-1]
-    t1 = dates[-2] if len(dates) >= 2 else None
-    t2 = dates[-3] if len(dates) >= 3 else None
-
-    result = {}
-    for t in today_tickers:
-        r0 = rank_by_date.get(today, {}).get(t, PENALTY)
-        r1 = rank_by_date.get(t1, {}).get(t, PENALTY) if t1 else PENALTY
-        r2 = rank_by_date.get(t2, {}).get(t, PENALTY) if t2 else PENALTY
-
-        weighted = r0 * 0.5 + r1 * 0.3 + r2 * 0.2
-        result[t] = {
-            'weighted': round(weighted, 1),
-            'r0': r0, 'r1': r1, 'r2': r2
-        }
-
-    log(f"가중 순위: {len(result)}개 종목 계산 (날짜 {len(dates)}일)")
+    result = rh.weighted_ranks(today_tickers, penalty=50)
+    log(f"가중 순위: {len(result)}개 종목 계산 (날짜 {n_dates}일)")
     return result
 
 
-def get_rank_change_tags(today_tickers, weighted_ranks):
+def get_rank_change_tags(today_tickers, weighted_ranks, today_str=None):
     """순위 변동 원인 태그 — 2축 독립 판정 (v36.4)
 
     가격축(실제 주가 변동%)과 실적축(adj_score 변동)을 독립적으로 판정.
@@ -2328,6 +2141,7 @@ def get_rank_change_tags(today_tickers, weighted_ranks):
 
     3일 궤적(r2 < PENALTY) → T0 vs T2 비교 (2일치 누적 delta)
     2일 궤적(r2 = PENALTY) → T0 vs T1 비교 (1일치 delta)
+    today_str: compute_weighted_ranks와 같은 날짜 기준 (None = DB 최신 3일)
     Returns: {ticker: tag_str}
     """
     RANK_THRESHOLD = 3
@@ -2339,37 +2153,15 @@ def get_rank_change_tags(today_tickers, weighted_ranks):
     if not weighted_ranks:
         return {}
 
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    # 최근 3일 날짜 (T0, T1, T2)
-    cursor.execute(
-        'SELECT DISTINCT date FROM ntm_screening WHERE composite_rank IS NOT NULL ORDER BY date DESC LIMIT 3'
-    )
-    dates = [r[0] for r in cursor.fetchall()]
+    # 최근 3일 날짜 (T0, T1, T2) + 날짜별 메트릭 (price + adj_score) — 순위 이력 패널에서
+    rh = _rank_history(today_str)
+    dates = rh.rank_dates('composite_rank', 3)
     if len(dates) < 2:
-        conn.close()
         return {}
 
-    today_date = dates[0]
-    t1_date = dates[1]
-    t2_date = dates[2] if len(dates) >= 3 else None
-
-    # 각 날짜별 메트릭 조회 (price + adj_score)
-    metric_by_date = {}
-    for d in dates:
-        cursor.execute(
-            'SELECT ticker, price, adj_score FROM ntm_screening '
-            'WHERE date=? AND composite_rank IS NOT NULL',
-            (d,)
-        )
-        metric_by_date[d] = {r[0]: {'price': r[1], 'adj_score': r[2]} for r in cursor.fetchall()}
-
-    conn.close()
-
-    today_data = metric_by_date.get(today_date, {})
-    t1_data = metric_by_date.get(t1_date, {})
-    t2_data = metric_by_date.get(t2_date, {}) if t2_date else {}
+    today_data = rh.metrics(dates[0])
+    t1_data = rh.metrics(dates[1])
+    t2_data = rh.metrics(dates[2]) if len(dates) >= 3 else {}
 
     tags = {}
     for ticker in today_tickers:
@@ -2434,42 +2226,14 @@ def get_rank_change_tags(today_tickers, weighted_ranks):
 
 def get_daily_changes(today_tickers, today_str=None):
     """어제 대비 리스트 변동 — 신규 진입 / 이탈 종목 (단순 set 비교)"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    # 어제 날짜 (part2_rank 있는 가장 최근, today_str 이하)
-    if today_str:
-        cursor.execute(
-            'SELECT DISTINCT date FROM ntm_screening WHERE part2_rank IS NOT NULL AND date <= ? ORDER BY date DESC LIMIT 2',
-            (today_str,)
-        )
-    else:
-        cursor.execute(
-            'SELECT DISTINCT date FROM ntm_screening WHERE part2_rank IS NOT NULL ORDER BY date DESC LIMIT 2'
-        )
-    dates = [r[0] for r in cursor.fetchall()]
-
-    if len(dates) < 2:
-        conn.close()
+    # 어제 = part2_rank 있는 직전 날짜(today_str 이하), 어제 Top 20 vs 오늘 w_gap 순 Top 20 (Watchlist 기준)
+    changes = _rank_history(today_str).daily_changes(today_tickers, top_n=20)
+    if changes is None:
         return [], []
 
-    yesterday = dates[1]
-
-    cursor.execute(
-        'SELECT ticker, part2_rank FROM ntm_screening WHERE date=? AND part2_rank IS NOT NULL AND part2_rank <= 20',
-        (yesterday,)
-    )
-    yesterday_ranks = {r[0]: r[1] for r in cursor.fetchall()}
-    conn.close()
-
-    yesterday_top20 = set(yesterday_ranks.keys())
-    today_top20 = set(today_tickers[:20])  # w_gap 순 Top 20만 비교 (Watchlist 기준)
-    entered = today_top20 - yesterday_top20
-    exited = yesterday_top20 - today_top20
-    exited_with_rank = {t: yesterday_ranks[t] for t in exited}
-
-    log(f"어제 대비: +{len(entered)} 신규, -{len(exited)} 이탈")
-    return sorted(entered), exited_with_rank
+    entered, exited_with_rank = changes
+    log(f"어제 대비: +{len(entered)} 신규, -{len(exited_with_rank)} 이탈")
+    return entered, exited_with_rank
 
 
 _HY_CACHE_PATH = Path(__file__).parent / 'data_cache' / 'hy_spread.parquet'
@@ -3385,6 +3149,16 @@ def get_market_context(hist_all=None):
 # Git 자동 커밋
 # ============================================================
 
+def _checkpoint_db():
+    """WAL 체크포인트 (db_access.checkpoint) — DB 파일이 git에 올라가기 전 당일 기록을 본 파일에 반영."""
+    try:
+        busy, n_wal, n_done = db_checkpoint(DB_PATH)
+        if busy:
+            log(f"WAL 체크포인트 일부만 반영 ({n_done}/{n_wal} 페이지 — 다른 연결 읽기 중)", "WARN")
+    except Exception as e:
+        log(f"WAL 체크포인트 실패: {e}", "WARN")
+
+
 def git_commit_push(config):
     """Git 자동 commit/push (GitHub Actions에서는 워크플로우가 처리)"""
     if not config.get('git_enabled', False):
@@ -3400,6 +3174,8 @@ def git_commit_push(config):
     try:
         today = datetime.now().strftime('%Y-%m-%d')
 
+        # WAL → 본 파일 (git add가 gitignore된 -wal의 당일 기록을 빼먹지 않게 — atexit 체크포인트는 이 뒤)
+        _checkpoint_db()
         subprocess.run(['git', 'add', '-A'], cwd=PROJECT_ROOT, check=True, capture_output=True)
 
         commit_msg = f"Daily update: {today}"
@@ -3484,7 +3260,7 @@ def create_system_log_message(stats, elapsed, config):
 
     # DB 데이터 범위
     try:
-        conn = sqlite3.connect(config.get('db_path', 'eps_momentum_data.db'))
+        conn = db_connect(config.get('db_path', 'eps_momentum_data.db'), readonly=True)
         cur = conn.cursor()
         cur.execute('SELECT DISTINCT date FROM ntm_screening ORDER BY date')
         dates = [r[0] for r in cur.fetchall()]
@@ -3599,7 +3375,7 @@ def analyze_sector_momentum(results_df, today_str=None):
     prev_pcts = {}
     if today_str:
         try:
-            conn = sqlite3.connect(DB_PATH)
+            conn = db_connect(DB_PATH, readonly=True)
             c = conn.cursor()
             dates = [r[0] for r in c.execute(
                 'SELECT DISTINCT date FROM ntm_screening ORDER BY date DESC LIMIT 6'
@@ -3655,25 +3431,9 @@ def _get_cached_industry(ticker):
 
 
 def _get_prev_portfolio(today_str=None):
-    """어제 포트폴리오 보유 종목 조회"""
+    """어제 포트폴리오 보유 종목 조회 (순위 이력 패널이 run당 1회 조회해 보관)"""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
-        if today_str:
-            c.execute('''
-                SELECT ticker FROM portfolio_log
-                WHERE date = (SELECT MAX(date) FROM portfolio_log WHERE date < ?)
-                AND action IN ('enter', 'hold')
-            ''', (today_str,))
-        else:
-            c.execute('''
-                SELECT ticker FROM portfolio_log
-                WHERE date = (SELECT MAX(date) FROM portfolio_log)
-                AND action IN ('enter', 'hold')
-            ''')
-        tickers = [r[0] for r in c.fetchall()]
-        conn.close()
-        return tickers
+        return _rank_history(today_str).prev_portfolio()
     except Exception:
         return []
 
@@ -3686,25 +3446,7 @@ def _recent_held_tickers(today_str=None, lookback=15, rank_thresh=10):
     공용 단일 소스 → 두 메가 메커니즘 영원히 일치. date <= today_str 로 PIT 안전.
     """
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cur = conn.cursor()
-        if today_str:
-            rds = [r[0] for r in cur.execute(
-                'SELECT DISTINCT date FROM ntm_screening WHERE part2_rank IS NOT NULL AND date <= ? ORDER BY date DESC LIMIT ?',
-                (today_str, lookback))]
-        else:
-            rds = [r[0] for r in cur.execute(
-                'SELECT DISTINCT date FROM ntm_screening WHERE part2_rank IS NOT NULL ORDER BY date DESC LIMIT ?',
-                (lookback,))]
-        out = set()
-        if rds:
-            ph = ','.join('?' * len(rds))
-            for (tk,) in cur.execute(
-                f'SELECT DISTINCT ticker FROM ntm_screening WHERE date IN ({ph}) AND part2_rank IS NOT NULL AND part2_rank <= ?',
-                    rds + [rank_thresh]):
-                out.add(tk)
-        conn.close()
-        return out
+        return _rank_history(today_str).recent_held(lookback, rank_thresh)
     except Exception as e:
         log(f"_recent_held_tickers 오류: {e}", "WARN")
         return set()
@@ -3783,18 +3525,8 @@ def _load_trailing_eps():
 
 def _pit_trailing_eps(ticker, date_str=None):
     """PIT TTM EPS. date_str None=최신값(라이브), 있으면 그 날짜 이하 마지막 공시값(BT 정합)."""
-    rec = _load_trailing_eps().get(ticker)
-    if not rec:
-        return None
-    if date_str is None:
-        return rec[-1][1] if rec else None
-    v = None
-    for rd, e in rec:
-        if rd <= date_str:
-            v = e
-        else:
-            break
-    return v
+    from asof import pit_value
+    return pit_value(_load_trailing_eps().get(ticker), date_str)
 
 
 _TRAILING_EPS_FULL_CACHE = None
@@ -3822,18 +3554,10 @@ def _vm_trailing_eps(ticker, date_str=None):
     """VM 게이트용 PIT TTM EPS — 전수검사(full 캐시). VM_GATE_LEGACY=1이면 구 sparse로 폴백."""
     if os.getenv('VM_GATE_LEGACY') == '1':
         return _pit_trailing_eps(ticker, date_str)
-    rec = _load_trailing_eps_full().get(ticker)
-    if not rec or ticker == '_meta':
+    if ticker == '_meta':
         return None
-    if date_str is None:
-        return rec[-1][1] if rec else None
-    v = None
-    for rd, e in rec:
-        if rd <= date_str:
-            v = e
-        else:
-            break
-    return v
+    from asof import pit_value
+    return pit_value(_load_trailing_eps_full().get(ticker), date_str)
 
 
 def _entry_gap_ok(ticker, ntm_current, date_str=None):
@@ -3853,14 +3577,7 @@ def _live_ntm_current(ticker, today_str=None):
     라이브 results_df는 canonical 컬럼이 'ntm_cur'이고 carry-forward 행은 'ntm_current'가 None일 수
     있어(2026-06-26 게이트 무력화 버그) row 대신 DB를 직접 조회해 BT==production 정합 보장."""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cur = conn.cursor()
-        if today_str:
-            r = cur.execute('SELECT ntm_current FROM ntm_screening WHERE ticker=? AND ntm_current IS NOT NULL AND date<=? ORDER BY date DESC LIMIT 1', (ticker, today_str)).fetchone()
-        else:
-            r = cur.execute('SELECT ntm_current FROM ntm_screening WHERE ticker=? AND ntm_current IS NOT NULL ORDER BY date DESC LIMIT 1', (ticker,)).fetchone()
-        conn.close()
-        return r[0] if r else None
+        return _asof(('ntm_current',), [ticker], today_str).get(ticker, {}).get('ntm_current')
     except Exception as e:
         log(f"_live_ntm_current {ticker} 오류: {e}", "WARN")
         return None
@@ -3872,18 +3589,14 @@ def _fwdper_gap_display(ticker):
     DB 권위 price·ntm_current(게이트와 동일 소스) + PIT TTM(trailing_eps_ttm). 데이터 공백이면 gap '-'."""
     ds = os.environ.get('MARKET_DATE', '').strip() or None
     try:
-        conn = sqlite3.connect(DB_PATH); cur = conn.cursor()
-        if ds:
-            r = cur.execute('SELECT price, ntm_current FROM ntm_screening WHERE ticker=? AND ntm_current IS NOT NULL AND price>0 AND date<=? ORDER BY date DESC LIMIT 1', (ticker, ds)).fetchone()
-        else:
-            r = cur.execute('SELECT price, ntm_current FROM ntm_screening WHERE ticker=? AND ntm_current IS NOT NULL AND price>0 ORDER BY date DESC LIMIT 1', (ticker,)).fetchone()
-        conn.close()
+        r = _asof(('price', 'ntm_current'), [ticker], ds, require=('ntm_current', 'price'),
+                  positive=('price',)).get(ticker)
     except Exception as e:
         log(f"_fwdper_gap_display {ticker} 오류: {e}", "WARN")
         return None
     if not r:
         return None
-    px, nc = r
+    px, nc = r['price'], r['ntm_current']
     if not (px and nc and nc > 0):
         return None
     fpe = px / nc
@@ -4007,7 +3720,15 @@ def _vm_industry_ok(ticker):
 def _vm_fund_snapshot(conn, date_str):
     """carry-forward 펀더멘털(OM/FCF/ROE, v76 캐시 시맨틱스: date<=오늘 최근 비결측값).
 
-    구시스템 안전필터 이식용(2026-07-09): 회전 수집이라 당일 row는 20~80%만 채워짐 → 60일 창 전방채움."""
+    구시스템 안전필터 이식용(2026-07-09): 회전 수집이라 당일 row는 20~80%만 채워짐 → 60일 창 전방채움.
+    latest_valid 동기화된 DB면 키 조회(O(유니버스)), 아니면 구 60일 창 스캔."""
+    try:
+        from latest_valid import latest_asof, FUND_FIELDS
+        lv = latest_asof(conn, FUND_FIELDS, date_str, inclusive=True, max_age_days=60)
+    except Exception:
+        lv = None
+    if lv is not None:
+        return {tk: [m.get(f) for f in FUND_FIELDS] for tk, m in lv.items()}
     snap = {}
     for tk, om, fcf, roe in conn.execute(
             "SELECT ticker, operating_margin, free_cashflow, roe FROM ntm_screening "
@@ -4022,13 +3743,86 @@ def _vm_fund_snapshot(conn, date_str):
     return snap
 
 
+def _sync_latest_valid():
+    """latest_valid(종목·필드별 최신 유효값) 증분 동기화 — 당일 ntm_screening 기록이 끝난 뒤 호출.
+
+    소비처: _vm_fund_snapshot · unified_vm_track(carry-forward·OM/FCF/ROE·카드).
+    HISTORICAL MODE(DB write 차단) → 스킵 (소비처는 마커 날짜·지문이 DB와 어긋나면 구 스캔).
+    """
+    if is_historical_mode():
+        return
+    try:
+        from latest_valid import sync_latest
+        with write_txn(DB_PATH) as conn:
+            n = sync_latest(conn, log=log)
+        log(f"latest_valid 동기화: {'전체 재생성' if n < 0 else f'{n}일 반영'}")
+    except Exception as e:
+        log(f"latest_valid 동기화 실패(무시 — 소비처 구 스캔 경로): {e}", "WARN")
+
+
+def _backfill_ntm_signals():
+    """ntm_signals 누락 행 보충 — 최초 실행은 전 이력 일괄 백필, 이후는 수집 경로가 기록하지 않은 행만.
+
+    HISTORICAL MODE → 스킵 (소비처는 신호 행이 없으면 구 재유도 경로).
+    """
+    if is_historical_mode():
+        return
+    try:
+        from ntm_signals import backfill_signals
+        with write_txn(DB_PATH) as conn:
+            n = backfill_signals(conn)
+        if n:
+            log(f"ntm_signals 백필: {n}행")
+    except Exception as e:
+        log(f"ntm_signals 백필 실패(무시 — 소비처 구 재유도 경로): {e}", "WARN")
+
+
+def _archive_cold():
+    """오래된 달(기본 15개월 이전) ntm_screening·ntm_signals → ntm_cold/ntm_YYYY.db 이동 + VACUUM.
+
+    본 DB(매일 git 커밋) 크기·전 이력 스캔을 최근 구간으로 고정. 전 기간 replay·BT는 _history_connect가 ATTACH.
+    월 경계에서만 실제 이동(그 외 날은 cutoff 이전 행 0 → 즉시 반환).
+    옵트인 COLD_ARCHIVE=1일 때만 (research/* 하네스가 본 DB를 직접 여는 동안 기본 꺼짐 — cold_store 소비처 규약).
+    HISTORICAL MODE → 스킵. 복원: python cold_store.py --restore
+    """
+    if is_historical_mode() or os.environ.get('COLD_ARCHIVE') != '1':
+        return
+    try:
+        from cold_store import archive_cold
+        conn = open_db_connection(DB_PATH)
+        try:
+            if archive_cold(conn, log=log):
+                conn.execute('VACUUM')
+        finally:
+            conn.close()
+    except Exception as e:
+        log(f"콜드 이동 실패(무시 — 본 DB 그대로): {e}", "WARN")
+
+
+def _export_changeset():
+    """changeset 모드(DB_CHANGESET=1): 당일 변경 행만 db_changes/에 delta로 기록 — git은 DB 대신 delta를 올림.
+
+    git_commit_push 직전(모든 DB 기록·콜드 이동 이후) 1회. 실패해도 DB는 그대로(다음 실행이 누적 변경을 내보냄).
+    HISTORICAL MODE → 스킵.
+    """
+    if is_historical_mode():
+        return
+    try:
+        from db_changeset import enabled, export_changeset
+        if not enabled():
+            return
+        export_changeset(DB_PATH, log=log)
+    except Exception as e:
+        log(f"changeset 내보내기 실패(무시 — 다음 실행에 합쳐 기록): {e}", "WARN")
+
+
 def _vm_pick(date_str, conn=None):
     """가치게이트+모멘텀 top5 선정 — BT(per_gap_grid_2026_07_04) 산식과 1:1 동일.
 
     반환: [(ticker, rev90%, fwd_PER, gap|None), ...] rev90 내림차순 top N."""
     own = conn is None
     if own:
-        conn = sqlite3.connect(DB_PATH)
+        conn = db_connect(DB_PATH, readonly=True)
     rows = conn.execute(
         'SELECT ticker, price, ntm_current, ntm_7d, ntm_30d, ntm_60d, ntm_90d, dollar_volume_30d, '
         'num_analysts FROM ntm_screening WHERE date=? AND price IS NOT NULL AND ntm_current>0',
@@ -4092,7 +3886,7 @@ def _vm_paper_state(today_str):
 
     리밸일 = VM_PAPER_START부터 VM_REBAL_DAYS 거래일 간격(랭킹 존재 날짜 기준).
     수익 규약(BT 동일): 리밸일 종가 픽 → 다음 거래일부터 적용, 일별 동일가중."""
-    conn = sqlite3.connect(DB_PATH)
+    conn = db_connect(DB_PATH, readonly=True)
     dates = [r[0] for r in conn.execute(
         'SELECT DISTINCT date FROM ntm_screening WHERE part2_rank IS NOT NULL AND date<=? ORDER BY date',
         (today_str,))]
@@ -4140,11 +3934,11 @@ def _vm_paper_state(today_str):
     # 표시 지표는 '오늘' 기준으로 갱신 (2026-07-05): 보유종목은 교체일 고정, 숫자만 매일 최신.
     # 중간 순위경쟁(오늘 5위가 누구냐)은 의도적으로 미표시 — 교체일 전 선행매매 유혹 차단.
     fresh = []
+    _fr = _asof(('price', 'ntm_current', 'ntm_90d'), hold, today_str,
+                require=('price', 'ntm_current'), positive=('ntm_current',))
     for tk in hold:
-        r = conn.execute(
-            'SELECT price, ntm_current, ntm_90d FROM ntm_screening '
-            'WHERE ticker=? AND date<=? AND price IS NOT NULL AND ntm_current>0 '
-            'ORDER BY date DESC LIMIT 1', (tk, today_str)).fetchone()
+        r = _fr.get(tk)
+        r = (r['price'], r['ntm_current'], r['ntm_90d']) if r else None
         if not r or not r[1]:
             base = next((e for e in cur_detail if e[0] == tk), (tk, 0.0, 0.0, None))
             fresh.append(tuple(base[:4]) + (entries.get(tk, (None, None))[0:1] + (None,),))
@@ -4174,7 +3968,7 @@ def _vm_stock_card(ticker, today_str):
 
     반환: 짧은 줄 리스트(텔레그램 모바일 폭 ~35자, 강제 줄바꿈 방지)."""
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = db_connect(DB_PATH, readonly=True)
         r = conn.execute(
             'SELECT num_analysts, rev_up30, rev_down30, rev_growth, roe, free_cashflow, '
             'operating_margin, market_cap, dollar_volume_30d FROM ntm_screening '
@@ -4358,6 +4152,93 @@ def create_vm_signal_message(today_str, risk_status=None):
     return '\n'.join(lines)
 
 
+def _ntm_panel():
+    """ntm_screening 컬럼형 패널 (ntm_panel.py) — DB와 증분 동기화 후 memmap 로드.
+
+    동기화는 날짜별 지문 비교라 같은 run 안의 save_part2_ranks·carry-forward 기록도 즉시 반영.
+    실패 → None (호출측은 구 SQL 경로).
+    """
+    try:
+        from ntm_panel import open_panel
+        return open_panel(DB_PATH)
+    except Exception as e:
+        log(f"ntm 패널 사용 불가 → SQL 경로: {e}", "WARN")
+        return None
+
+
+_ASOF_CACHE = None   # ((연결 id, data_version), AsOfPanel | None)
+
+
+def _asof_view():
+    """as-of 조회용 패널 뷰 (asof.AsOfPanel) — DB가 바뀌었을 때만 패널 재동기화.
+
+    변경 감지 = 읽기 전용 공유 연결의 PRAGMA data_version (다른 연결의 커밋마다 증가) → 종목 1개 조회마다
+    패널 지문 스캔(전 컬럼 ~0.5초)을 하지 않음. 패널 불가 → None (호출측 SQL 경로).
+    """
+    global _ASOF_CACHE
+    conn = db_connect(DB_PATH, readonly=True)
+    try:
+        key = (id(conn), conn.execute('PRAGMA data_version').fetchone()[0])
+    finally:
+        conn.close()
+    if _ASOF_CACHE is not None and _ASOF_CACHE[0] == key:
+        return _ASOF_CACHE[1]
+    pn = _ntm_panel()
+    from asof import AsOfPanel
+    view = AsOfPanel(pn) if pn is not None and pn.dates else None
+    _ASOF_CACHE = (key, view)
+    return view
+
+
+def _asof(fields, tickers, date=None, **kw):
+    """{ticker: {field: 값}} — date(None=최신) 이하 마지막 유효값 (asof.AsOfPanel.asof 계약).
+
+    패널(숫자 컬럼)이 있으면 이진탐색 + 행렬 조회, 없으면 같은 계약의 SQL(종목당 LIMIT 1).
+    """
+    view = _asof_view()
+    if view is not None and view.covers(tuple(fields) + tuple(kw.get('require') or ())):
+        return view.asof(date, fields, tickers, **kw)
+    from asof import asof_sql
+    conn = db_connect(DB_PATH, readonly=True)
+    try:
+        return asof_sql(conn, date, fields, tickers, **kw)
+    finally:
+        conn.close()
+
+
+def _asof_price_nc(ticker, date=None):
+    """(price, ntm_current) — price가 있는 마지막 행 (구 'price IS NOT NULL ORDER BY date DESC LIMIT 1')."""
+    r = _asof(('price', 'ntm_current'), [ticker], date, require=('price',)).get(ticker)
+    return (r['price'], r['ntm_current']) if r else None
+
+
+def _ntm_signals_ready(conn):
+    """ntm_signals(파생 신호 테이블) 조회 가능 여부 — 없으면 소비측 구 재유도."""
+    try:
+        from ntm_signals import has_signals
+        return has_signals(conn)
+    except Exception:
+        return False
+
+
+def _history_connect(since=None):
+    """since(없으면 전 이력)부터 읽는 읽기 전용 연결 → (conn, cold).
+
+    콜드 파티션(cold_store — 본 DB에서 옮긴 오래된 달)이 필요할 때만 비공유 연결에 ATTACH(cold=True).
+    ntm 패널은 본 DB만 미러하므로 cold=True면 호출측은 패널 대신 SQL 경로.
+    라이브(epoch 이후) 조회는 항상 본 DB 공유 연결 그대로.
+    """
+    conn = db_connect(DB_PATH, readonly=True)
+    try:
+        from cold_store import needs_cold, open_history
+        if needs_cold(conn, since):
+            conn.close()
+            return open_history(DB_PATH, since), True
+    except Exception as e:
+        log(f"콜드 파티션 ATTACH 실패 → 본 DB만: {e}", "WARN")
+    return conn, False
+
+
 def _replay_holdings(before_date=None, return_detail=False, apply_epoch=False):
     """forward replay 보유 재구성 (v111 MA12-hold + v115 보험밸브, 무상태, BT==production).
 
@@ -4374,25 +4255,28 @@ def _replay_holdings(before_date=None, return_detail=False, apply_epoch=False):
     return_detail=True 시 {ticker: (entry_date, entry_price)} 반환 (v115 보유 수익률 표시용).
     """
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn, _cold = _history_connect(HOLDINGS_EPOCH if apply_epoch else None)
         cur = conn.cursor()
-        # 전체 가격 캘린더 (MA12용 — 순위 밖 종목도 가격 필요)
-        alld = [r[0] for r in cur.execute('SELECT DISTINCT date FROM ntm_screening WHERE price IS NOT NULL ORDER BY date')]
-        didx = {d: i for i, d in enumerate(alld)}
-        pxh = {}
-        for tk, d, p in cur.execute('SELECT ticker,date,price FROM ntm_screening WHERE price IS NOT NULL'):
-            pxh.setdefault(tk, {})[d] = p
-        # ntm_current 전체(탈락종목 PE veto용 — MA120 탈락 vs 데이터갭 구분)
-        ntmh = {}
-        for tk, d, nc in cur.execute('SELECT ticker,date,ntm_current FROM ntm_screening WHERE ntm_current IS NOT NULL'):
-            ntmh.setdefault(tk, {})[d] = nc
-        def _ma12(tk, d):
-            i = didx.get(d)
-            if i is None or i - 11 < 0:
-                return None
-            v = [pxh.get(tk, {}).get(alld[j]) for j in range(i - 11, i + 1)]
-            v = [x for x in v if x]
-            return sum(v) / len(v) if len(v) >= 6 else None
+        # 전 이력 가격 + ntm_current(탈락종목 PE veto용 — MA120 탈락 vs 데이터갭 구분).
+        #   컬럼형 패널(ntm_panel, memmap)에서 셀 조회 — 호출마다 전 테이블을 {tk: {date: 값}}로
+        #   재구성하던 구 방식(한 run 6회+) 대체. 패널 불가 시 구 SQL dict. (구 _ma12는 v119 이후 미사용 → 제거)
+        _pn = None if _cold else _ntm_panel()
+        if _pn is not None:
+            def _px_at(tk, d):
+                return _pn.value('price', tk, d)
+            def _nc_at(tk, d):
+                return _pn.value('ntm_current', tk, d)
+        else:
+            pxh = {}
+            for tk, d, p in cur.execute('SELECT ticker,date,price FROM ntm_screening WHERE price IS NOT NULL'):
+                pxh.setdefault(tk, {})[d] = p
+            ntmh = {}
+            for tk, d, nc in cur.execute('SELECT ticker,date,ntm_current FROM ntm_screening WHERE ntm_current IS NOT NULL'):
+                ntmh.setdefault(tk, {})[d] = nc
+            def _px_at(tk, d):
+                return pxh.get(tk, {}).get(d)
+            def _nc_at(tk, d):
+                return ntmh.get(tk, {}).get(d)
         if before_date:
             dts = [r[0] for r in cur.execute(
                 'SELECT DISTINCT date FROM ntm_screening WHERE part2_rank IS NOT NULL AND date < ? ORDER BY date',
@@ -4406,17 +4290,25 @@ def _replay_holdings(before_date=None, return_detail=False, apply_epoch=False):
         port = set()
         entry_info = {}   # tk -> (entry_date, entry_price)  v115 보유 수익률 표시용
         grace = set()     # tk -> v115 보험밸브 1일 유예 중
+        # min_seg: ntm_signals.min_seg_legacy(아래 재유도와 같은 구 정의 — 과거 창만 가드, cap 없음)를 조인.
+        #   v120 min_seg(양끝 가드 + cap)는 쓰지 않음 — 글리치 행의 구 이탈이 사라져 과거 보유·prev_held가 소급 변경.
+        #   신호 행이 없으면(백필 전) 같은 식으로 재유도.
+        _sig = _ntm_signals_ready(conn)
+        _ms_sql = ('SELECT n.ticker,n.part2_rank,n.ntm_current,n.ntm_7d,n.ntm_30d,n.ntm_60d,n.ntm_90d,'
+                   'n.dollar_volume_30d,n.high30,' + ('s.min_seg_legacy' if _sig else 'NULL') + ' FROM ntm_screening n' +
+                   (' LEFT JOIN ntm_signals s ON s.date=n.date AND s.ticker=n.ticker' if _sig else '') +
+                   ' WHERE n.date=? AND n.part2_rank IS NOT NULL')
         for d in dts:
-            rows = cur.execute(
-                'SELECT ticker,part2_rank,ntm_current,ntm_7d,ntm_30d,ntm_60d,ntm_90d,dollar_volume_30d,high30 FROM ntm_screening WHERE date=? AND part2_rank IS NOT NULL',
-                (d,)).fetchall()
+            rows = cur.execute(_ms_sql, (d,)).fetchall()
             info = {}
-            for tk, p2, nc, n7, n30, n60, n90, dv, h30 in rows:
-                segs = []
-                for a, b in [(nc, n7), (n7, n30), (n30, n60), (n60, n90)]:
-                    segs.append((a - b) / abs(b) * 100 if b and abs(b) > 0.01 else 0)
-                info[tk] = dict(p2=p2, minseg=min(segs) if segs else 0,
-                                nc=nc, price=pxh.get(tk, {}).get(d), dv=dv, high30=h30)
+            for tk, p2, nc, n7, n30, n60, n90, dv, h30, ms in rows:
+                if ms is None:
+                    segs = []
+                    for a, b in [(nc, n7), (n7, n30), (n30, n60), (n60, n90)]:
+                        segs.append((a - b) / abs(b) * 100 if b and abs(b) > 0.01 else 0)
+                    ms = min(segs) if segs else 0
+                info[tk] = dict(p2=p2, minseg=ms,
+                                nc=nc, price=_px_at(tk, d), dv=dv, high30=h30)
             # v119 (2026-06-11): 제3방안 — fwd_PE<PE_HOLD 저평가 보유 (메가 carryover/MA12 전면 교체)
             #   EPS꺾임(min_seg<-2) 즉시매도 → 10위 안 보유 → 10위 밖이면 PE<PE_HOLD만 보유.
             #   BT(auto_bt_v117_recheck.py): 전기간 +193% / MDD -21.9% / SNDK 끝까지보유.
@@ -4429,7 +4321,7 @@ def _replay_holdings(before_date=None, return_detail=False, apply_epoch=False):
                     # 랭킹 탈락(MA120 이탈 등)과 진짜 데이터갭 구분:
                     #   가격+ntm 있으면 = 탈락(갭 아님) → v119 rank>EXIT veto 적용(비싸면 매도).
                     #   데이터 없으면 = 갭 → carryover (v113 robust).
-                    _dpx = pxh.get(tk, {}).get(d); _dnc = ntmh.get(tk, {}).get(d)
+                    _dpx = _px_at(tk, d); _dnc = _nc_at(tk, d)
                     if _dpx and _dnc and _dnc > 0:
                         if (_dpx / _dnc) >= PE_HOLD:
                             port.discard(tk); entry_info.pop(tk, None); grace.discard(tk)  # 탈락+비쌈 → 매도
@@ -4467,7 +4359,7 @@ def _replay_holdings(before_date=None, return_detail=False, apply_epoch=False):
                     if len(port) >= 2:
                         break
                     port.add(tk)
-                    entry_info[tk] = (d, pxh.get(tk, {}).get(d))
+                    entry_info[tk] = (d, _px_at(tk, d))
         conn.close()
         if return_detail:
             return entry_info
@@ -4481,7 +4373,7 @@ def _above_ma12(ticker, today_str=None, n=12):
     """현재가 > MA12 (상승추세 유지) 여부 — v111 추세홀드 판정.
     데이터 fetch 실패(가격 부족)시 True 반환(carryover, v113 robust 계승)."""
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = db_connect(DB_PATH, readonly=True)
         cur = conn.cursor()
         if today_str:
             rows = [r[0] for r in cur.execute(
@@ -4506,13 +4398,7 @@ def _below_pe_live(ticker, today_str=None):
     """v119 제3방안: fwd_PE = price/ntm_current < PE_HOLD → 저평가(보유).
     데이터 없으면 False(매도쪽 — BT 정합 pe=999 취급)."""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cur = conn.cursor()
-        if today_str:
-            r = cur.execute('SELECT price,ntm_current FROM ntm_screening WHERE ticker=? AND price IS NOT NULL AND date<=? ORDER BY date DESC LIMIT 1', (ticker, today_str)).fetchone()
-        else:
-            r = cur.execute('SELECT price,ntm_current FROM ntm_screening WHERE ticker=? AND price IS NOT NULL ORDER BY date DESC LIMIT 1', (ticker,)).fetchone()
-        conn.close()
+        r = _asof_price_nc(ticker, today_str)
         if not r or not r[0] or not r[1] or r[1] <= 0:
             return False
         return (r[0] / r[1]) < PE_HOLD
@@ -4524,13 +4410,7 @@ def _below_pe_live(ticker, today_str=None):
 def _live_pe(ticker, today_str=None):
     """v119: 최신 fwd_PE 값 (표시/사유용). 데이터 없으면 None."""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cur = conn.cursor()
-        if today_str:
-            r = cur.execute('SELECT price,ntm_current FROM ntm_screening WHERE ticker=? AND price IS NOT NULL AND date<=? ORDER BY date DESC LIMIT 1', (ticker, today_str)).fetchone()
-        else:
-            r = cur.execute('SELECT price,ntm_current FROM ntm_screening WHERE ticker=? AND price IS NOT NULL ORDER BY date DESC LIMIT 1', (ticker,)).fetchone()
-        conn.close()
+        r = _asof_price_nc(ticker, today_str)
         if not r or not r[0] or not r[1] or r[1] <= 0:
             return None
         return r[0] / r[1]
@@ -4542,7 +4422,7 @@ def _today_gap(ticker, today_str=None):
     """오늘(또는 최신) 1거래일 수익률 — v115 보험밸브용. 데이터 부족 시 None.
     하루 -10%+ 패닉 급락(휩쏘 신호) 판정에 사용."""
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = db_connect(DB_PATH, readonly=True)
         cur = conn.cursor()
         if today_str:
             rows = [r[0] for r in cur.execute(
@@ -4614,20 +4494,10 @@ def _get_avg_dollar_volume_M(ticker, hist_all=None, target_date=None):
     if ticker in _volume_dollar_cache:
         return _volume_dollar_cache[ticker]
     try:
-        # 1) DB 조회 — target_date 또는 마지막 가용
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        if target_date:
-            row = cursor.execute(
-                'SELECT dollar_volume_30d FROM ntm_screening WHERE ticker=? AND date<=? AND dollar_volume_30d IS NOT NULL ORDER BY date DESC LIMIT 1',
-                (ticker, target_date)).fetchone()
-        else:
-            row = cursor.execute(
-                'SELECT dollar_volume_30d FROM ntm_screening WHERE ticker=? AND dollar_volume_30d IS NOT NULL ORDER BY date DESC LIMIT 1',
-                (ticker,)).fetchone()
-        conn.close()
-        if row and row[0] is not None:
-            v_M = float(row[0])
+        # 1) DB 조회 — target_date 또는 마지막 가용 (as-of)
+        dv = _asof(('dollar_volume_30d',), [ticker], target_date).get(ticker, {}).get('dollar_volume_30d')
+        if dv is not None:
+            v_M = float(dv)
             _volume_dollar_cache[ticker] = v_M
             return v_M
         # 2) hist_all fallback
@@ -4688,10 +4558,8 @@ def select_display_top5(results_df, status_map=None, weighted_ranks=None,
         return []
 
     # min_seg < -2% 제외 — save_part2_ranks()와 동일 기준 (순위 부여 전 필터)
-    def _calc_min_seg(row):
-        segs = [float(row.get(c) or 0) for c in ('seg1', 'seg2', 'seg3', 'seg4')]
-        return min(segs) if segs else 0
-    all_eligible = all_eligible[all_eligible.apply(_calc_min_seg, axis=1) >= -2].copy()
+    from part2_score import MIN_SEG_CUT, min_seg
+    all_eligible = all_eligible[min_seg(all_eligible) >= MIN_SEG_CUT].copy()
 
     # v117c (2026-06-10): candidates 정렬 — DB의 part2_rank 사용 (BT 정합)
     # 기존 score_100_map 정렬 → BT(DB.part2_rank)와 불일치 → 6/09 VRT(p2=3) 누락 사고
@@ -4699,7 +4567,7 @@ def select_display_top5(results_df, status_map=None, weighted_ranks=None,
     candidates = all_eligible.copy()
     # DB에서 part2_rank 직접 조회 (today_str 기준)
     try:
-        _conn = sqlite3.connect(DB_PATH)
+        _conn = db_connect(DB_PATH, readonly=True)
         _p2_rank_db = dict(_conn.execute(
             'SELECT ticker, part2_rank FROM ntm_screening WHERE date=? AND part2_rank IS NOT NULL',
             (today_str,)).fetchall())
@@ -5064,7 +4932,7 @@ def check_breakout_hold(ticker):
     실제 운영에서는 사용자 참고용으로 표시 (자동 보유 추적은 미구현).
     """
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = db_connect(DB_PATH, readonly=True)
         cursor = conn.cursor()
 
         # 최근 21일 가격 + 오늘 NTM/애널/MA60
@@ -5121,7 +4989,7 @@ def _fetch_last_full_row(ticker, before_date=None):
     Part 2 풀 밖(composite_rank>30)이거나 데이터 누락 시 메가 carryover용 fallback.
     """
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = db_connect(DB_PATH, readonly=True)
         conn.row_factory = sqlite3.Row
         cur = conn.cursor()
         if before_date:
@@ -5188,7 +5056,7 @@ def check_mega_hold(ticker):
     research: research/auto_bt_v90_peg_rev_grid.py, V87_V88_V89_AUTONOMOUS_REPORT_2026_06_02.md
     """
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = db_connect(DB_PATH, readonly=True)
         cursor = conn.cursor()
         cursor.execute('''
             SELECT price, ntm_current, rev_growth
@@ -5246,7 +5114,7 @@ def get_mega_hold_tickers(today_str=None):
         held = _replay_holdings(today_str)
         if not held:
             return []
-        conn = sqlite3.connect(DB_PATH)
+        conn = db_connect(DB_PATH, readonly=True)
         cursor = conn.cursor()
         last = cursor.execute(
             'SELECT MAX(date) FROM ntm_screening WHERE composite_rank IS NOT NULL').fetchone()[0]
@@ -5285,7 +5153,7 @@ def classify_exit_reasons(exited_tickers, results_df):
     # 오늘 순위 (conviction 기반 part2_rank + eligible 체크용 composite_rank)
     composite_map = {}
     part2_map = {}
-    conn = sqlite3.connect(DB_PATH)
+    conn = db_connect(DB_PATH, readonly=True)
     cursor = conn.cursor()
     cursor.execute(
         'SELECT ticker, composite_rank, part2_rank FROM ntm_screening WHERE date=(SELECT MAX(date) FROM ntm_screening WHERE composite_rank IS NOT NULL)'
@@ -5299,7 +5167,7 @@ def classify_exit_reasons(exited_tickers, results_df):
 
     # adj_gap 맵 (괴리율 참조)
     adj_gap_map = {}
-    conn2 = sqlite3.connect(DB_PATH)
+    conn2 = db_connect(DB_PATH, readonly=True)
     cursor2 = conn2.cursor()
     cursor2.execute(
         'SELECT ticker, adj_gap FROM ntm_screening WHERE date=(SELECT MAX(date) FROM ntm_screening WHERE adj_gap IS NOT NULL) AND adj_gap IS NOT NULL'
@@ -5361,7 +5229,7 @@ def _identify_filter_failure(row, ticker):
     if row is None:
         # 오늘 수집 안 된 종목 → DB에서 최근 데이터로 사유 추정
         try:
-            conn = sqlite3.connect(DB_PATH)
+            conn = db_connect(DB_PATH, readonly=True)
             cursor = conn.cursor()
             cursor.execute(
                 'SELECT * FROM ntm_screening WHERE ticker=? ORDER BY date DESC LIMIT 1',
@@ -5839,38 +5707,7 @@ def compute_factor_ranks(results_df, today_tickers):
 
 def _build_top5_streak(today_str=None):
     """Top 30 연속 유지 일수 계산. Returns: {ticker: int(연속 일수)}"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    dates = _get_recent_dates(cursor, 'part2_rank', today_str, 30)
-
-    streak = {}
-    if not dates:
-        conn.close()
-        return streak
-
-    # 최신 날짜의 Top 30 종목
-    latest = dates[0]
-    target_rows = cursor.execute(
-        'SELECT ticker FROM ntm_screening WHERE date=? AND part2_rank IS NOT NULL',
-        (latest,)
-    ).fetchall()
-    target_tickers = [r[0] for r in target_rows]
-
-    for ticker in target_tickers:
-        count = 0
-        for d in dates:
-            row = cursor.execute(
-                'SELECT part2_rank FROM ntm_screening WHERE date=? AND ticker=? AND part2_rank IS NOT NULL',
-                (d, ticker)
-            ).fetchone()
-            if row:
-                count += 1
-            else:
-                break
-        streak[ticker] = count
-
-    conn.close()
-    return streak
+    return _rank_history(today_str).streaks(30)
 
 
 def _build_score_100_map(today_str=None):
@@ -5878,96 +5715,32 @@ def _build_score_100_map(today_str=None):
 
     v71: conviction adj_gap → 일별 z-score 변환 → 가중평균
     빈 날 → carry-forward (직전 가용 점수 이월), 최종 폴백 30점
+    같은 run의 save_part2_ranks가 순위에 쓴 점수(_P2_SCORES)가 있으면 그대로 — 계산은 하루 1회.
     Returns: (w_score_map, score_display_map)
       - w_score_map: 3일 가중 점수 (높을수록 좋음, 순위/정렬용)
       - score_display_map: 고정 스케일 0~100 (v112, 표시용 — 날짜 안정 + 강도 보존)
     """
-    import numpy as np
-    MISSING_PENALTY = 30
-
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    dates = sorted(_get_recent_dates(cursor, 'composite_rank', today_str, 3))
-    if not dates:
-        conn.close()
-        return {}, {}
-
-    score_by_date = {}
-    for d in dates:
-        rows = cursor.execute(
-            'SELECT ticker, adj_gap, rev_up30, num_analysts, ntm_current, ntm_90d, '
-            'rev_growth FROM ntm_screening WHERE date=? AND composite_rank IS NOT NULL',
-            (d,)
-        ).fetchall()
-        conv_gaps = {}
-        for r in rows:
-            tk = r[0]
-            conv_gaps[tk] = _apply_conviction(r[1], r[2], r[3], r[4], r[5], rev_growth=r[6])
-
-        vals = list(conv_gaps.values())
-        if len(vals) >= 2:
-            mean_v = np.mean(vals)
-            std_v = np.std(vals)
-            if std_v > 0:
-                score_by_date[d] = {
-                    tk: max(30.0, 65 + (-(v - mean_v) / std_v) * 15)
-                    for tk, v in conv_gaps.items()
-                }
-            else:
-                score_by_date[d] = {tk: 65 for tk in conv_gaps}
-        else:
-            score_by_date[d] = {tk: 65 for tk in conv_gaps}
-
-    weights = [0.2, 0.3, 0.5]
-    if len(dates) == 2:
-        weights = [0.4, 0.6]
-    elif len(dates) == 1:
-        weights = [1.0]
-
-    all_tickers = set()
-    for d in dates:
-        all_tickers.update(score_by_date.get(d, {}).keys())
-
     # v77 (2026-04-15): carry-forward 제거 — _compute_w_gap_map과 동일 정책.
     # 이전: 두 함수가 carry-forward 가짐 → 🆕 종목이 display Top 3에 표시되는 버그.
     # 이제: 빈 날 = 무조건 30점. display와 매매 순위 일관성 확보.
     # v80.1 (2026-04-24): 빈 날 기준 cr → p2 변경 (궤적 표시와 일관성).
     #   상세: _compute_w_gap_map 주석 참조.
-    p2_by_date = {}
-    for d in dates:
-        rows = cursor.execute(
-            'SELECT ticker FROM ntm_screening WHERE date=? AND part2_rank IS NOT NULL', (d,)
-        ).fetchall()
-        p2_by_date[d] = {r[0] for r in rows}
-
-    # 3일 가중 점수 (순위/정렬용)
-    w_score_map = {}
-    today_key = today_str if today_str else (dates[-1] if dates else None)
-    for tk in all_tickers:
-        ws = 0
-        for i, d in enumerate(dates):
-            is_today = (d == today_key)
-            if not is_today and tk not in p2_by_date.get(d, set()):
-                score = MISSING_PENALTY
-            else:
-                score = score_by_date.get(d, {}).get(tk)
-                if score is None:
-                    score = MISSING_PENALTY
-            ws += score * weights[i]
-        w_score_map[tk] = ws
-
     # v112 (2026-06-04): 고정 스케일 — 날짜 안정 + 강도 보존.
     # 기존 ws/max*100은 분모가 "그날 최댓값"이라 같은 종목도 그날 1등이 누구냐에
     # 따라 점수가 출렁임(15일간 최댓값 83~112 변동, +1.2σ 종목이 74~100점 왔다갔다).
     # 고정 앵커: ws 30(하한/missing)→0, ws 100(+2.3σ)→100. 괴물주(MU급)는 100,
     # 밋밋한 날 1등은 낮게 → 점수가 강도의 절대 정보를 담음. EDA+사용자 승인(B안).
-    score_display_map = {
-        tk: round(max(0.0, min(100.0, (ws - 30) / 70 * 100)), 1)
-        for tk, ws in w_score_map.items()
-    }
-
-    conn.close()
-    return w_score_map, score_display_map
+    scores = _P2_SCORES
+    if scores is None or not today_str or scores.today_str != today_str:
+        from part2_score import Part2Scores
+        conn = db_connect(DB_PATH, readonly=True)
+        try:
+            scores = Part2Scores(conn.cursor(), today_str)
+        finally:
+            conn.close()
+    if not scores.dates:
+        return {}, {}
+    return dict(scores.w_gap), dict(scores.display)
 
 
 def _regime_defense_series(all_dates):
@@ -6071,7 +5844,7 @@ def _get_system_performance(apply_epoch=False):
       BT 검증용은 apply_epoch=False(전체 replay).
     """
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn, _cold = _history_connect(HOLDINGS_EPOCH if apply_epoch else (_BT_DATE_START or None))
         c = conn.cursor()
         all_dates = [r[0] for r in c.execute(
             'SELECT DISTINCT date FROM ntm_screening WHERE part2_rank IS NOT NULL ORDER BY date'
@@ -6090,24 +5863,33 @@ def _get_system_performance(apply_epoch=False):
         #   현재 데이터 전부 boost라 영향 0, 미래 약세장이 쌓이면 자동 반영.
         regime_w, ief_ret = _regime_defense_series(all_dates)
 
-        # 전체 가격 로드
+        # 전체 가격 로드 (패널 있으면 날짜별 유효 셀만 — NULL 가격은 구 dict에서도 .get() None과 동일)
         all_prices = {}
+        _pn = None if _cold else _ntm_panel()
         for d in all_dates:
+            if _pn is not None:
+                all_prices[d] = _pn.row_dict('price', d)
+                continue
             rows = c.execute('SELECT ticker, price FROM ntm_screening WHERE date=?', (d,)).fetchall()
             all_prices[d] = {r[0]: r[1] for r in rows}
 
         # 일별 데이터 로드 (v86e+ 메가 carryover 시뮬에 rev_growth 필요)
         # v117 (2026-06-09): dollar_volume_30d 추가 — 시장 주도주 필터용 (시뮬↔production 정합)
+        # min_seg는 ntm_signals.min_seg_legacy(아래 _min_seg와 같은 구 정의, _replay_holdings와 같은 출처)
+        #   — 없으면 _min_seg 재유도
+        _sig = _ntm_signals_ready(conn)
         daily_data = {}
         for d in all_dates:
-            rows = c.execute('''
-                SELECT ticker, price, part2_rank, ntm_current, ntm_7d, ntm_30d, ntm_60d, ntm_90d, rev_growth, dollar_volume_30d
-                FROM ntm_screening WHERE date=? AND part2_rank IS NOT NULL
-            ''', (d,)).fetchall()
+            rows = c.execute(
+                'SELECT n.ticker, n.price, n.part2_rank, n.ntm_current, n.ntm_7d, n.ntm_30d, n.ntm_60d, n.ntm_90d, '
+                'n.rev_growth, n.dollar_volume_30d, ' + ('s.min_seg_legacy' if _sig else 'NULL') +
+                ' FROM ntm_screening n' +
+                (' LEFT JOIN ntm_signals s ON s.date=n.date AND s.ticker=n.ticker' if _sig else '') +
+                ' WHERE n.date=? AND n.part2_rank IS NOT NULL', (d,)).fetchall()
             daily_data[d] = {
                 r[0]: {'price': r[1], 'part2_rank': r[2],
                        'nc': r[3], 'n7': r[4], 'n30': r[5], 'n60': r[6], 'n90': r[7],
-                       'rg': r[8], 'dv': r[9]}
+                       'rg': r[8], 'dv': r[9], 'ms': r[10]}
                 for r in rows
             }
 
@@ -6120,57 +5902,6 @@ def _get_system_performance(apply_epoch=False):
                     segs.append(0)
             return min(segs)
 
-        def _w_gap(date_str):
-            """v71: 일별 z-score(30~100) → 3일 가중평균, 빈 날→carry-forward"""
-            MISSING_PENALTY = 30
-            di = all_dates.index(date_str)
-            d0 = all_dates[di]
-            d1 = all_dates[di - 1] if di >= 1 else None
-            d2 = all_dates[di - 2] if di >= 2 else None
-            ds = [d for d in [d2, d1, d0] if d]  # 오래된 순
-
-            score_by_d = {}
-            for d in ds:
-                rows = c.execute(
-                    'SELECT ticker, adj_gap, rev_up30, num_analysts, ntm_current, ntm_90d, '
-                    'rev_growth FROM ntm_screening WHERE date=? AND composite_rank IS NOT NULL', (d,)
-                ).fetchall()
-                conv = {r[0]: _apply_conviction(r[1], r[2], r[3], r[4], r[5], rev_growth=r[6]) for r in rows}
-                vals = list(conv.values())
-                if len(vals) >= 2:
-                    mv, sv = sum(vals)/len(vals), (sum((v-sum(vals)/len(vals))**2 for v in vals)/len(vals))**0.5
-                    if sv > 0:
-                        score_by_d[d] = {tk: max(30.0, 65 + (-(v - mv) / sv) * 15) for tk, v in conv.items()}
-                    else:
-                        score_by_d[d] = {tk: 65 for tk in conv}
-                else:
-                    score_by_d[d] = {tk: 65 for tk in conv}
-
-            def _cf(tk, idx):
-                """backward only — forward 탐색 금지 (신규 종목 3일 패널티 우회 방지)"""
-                for j in range(idx - 1, -1, -1):
-                    prev = score_by_d.get(ds[j], {}).get(tk)
-                    if prev is not None:
-                        return prev
-                return MISSING_PENALTY
-
-            result = {}
-            tks = set()
-            for d in ds:
-                if d in score_by_d:
-                    tks.update(score_by_d[d].keys())
-            wts = [0.5, 0.3, 0.2]
-            for tk in tks:
-                wg = 0
-                for i, d in enumerate([d0, d1, d2]):
-                    if d:
-                        score = score_by_d.get(d, {}).get(tk)
-                        if score is None:
-                            score = _cf(tk, ds.index(d) if d in ds else i)
-                        wg += score * wts[i]
-                result[tk] = wg
-            return result
-
         # S&P500 지수 (^GSPC) — 벤치마크 표준, 배당 조정 불필요
         try:
             import yfinance as yf
@@ -6219,7 +5950,8 @@ def _get_system_performance(apply_epoch=False):
 
             ticker_ms = {}
             for tk, info in data.items():
-                ticker_ms[tk] = _min_seg(info['nc'], info['n7'], info['n30'], info['n60'], info['n90'])
+                ticker_ms[tk] = info['ms'] if info['ms'] is not None else \
+                    _min_seg(info['nc'], info['n7'], info['n30'], info['n60'], info['n90'])
 
             # v119: 순위 = DB part2_rank 직접 사용 (BT/replay와 완전 정합 — _w_gap 재계산 제거).
             #   기존엔 perf만 _w_gap을 재계산해 part2_rank와 어긋남 → 시뮬 보유가 BT와 달랐음(BE vs MU).
@@ -6330,7 +6062,7 @@ def _get_alpha_signals(tickers, info_cache=None):
 
     info_cache: fetch_revenue_growth에서 이미 수집한 {ticker: info_dict}
                 공매도 + 어닝 서프라이즈 모두 info_cache에서 읽음 (추가 HTTP 호출 없음)
-                어닝 서프는 전날 Top30 우선 종목에 대해서만 _fetch_one에서 수집됨
+                어닝 서프는 전날 Top30 우선 종목에 대해서만 _fetch_extra에서 수집됨
     """
     if info_cache is None:
         info_cache = {}
@@ -6511,7 +6243,7 @@ def create_signal_message(selected, earnings_map, exit_reasons, biz_day, ai_cont
             # v119 매도 사유: EPS꺾임 / 저평가 해소(PE↑) / 순위 이탈
             _segr = None
             try:
-                _cn = sqlite3.connect(DB_PATH); _cu = _cn.cursor()
+                _cn = db_connect(DB_PATH, readonly=True); _cu = _cn.cursor()
                 _rr = _cu.execute('SELECT seg1,seg2,seg3,seg4 FROM ntm_screening WHERE ticker=? AND date<=? ORDER BY date DESC LIMIT 1', (t, _ts)).fetchone()
                 _cn.close()
                 if _rr:
@@ -7398,7 +7130,7 @@ def main():
             _send_personal_alert(config, f"⚠️ <b>수집 건강성 미달</b>\n{_hreason}\n\n채널 발송 보류, 30분 후 재수집 시도.")
             import time as _time_guard
             _time_guard.sleep(1800)
-            log("재수집 시도...")
+            log("재수집 시도... (체크포인트 성공분 재사용 → 실패·누락 종목만 fetch)")
             try:
                 results_df, turnaround_df, stats, today_str, hist_all = run_ntm_collection(config)
             except Exception as _e_guard:
@@ -7434,8 +7166,7 @@ def main():
             earnings_map = {}
             info_cache = {}
             # DB에서 today_str의 part2_rank 순서대로 today_tickers 로드
-            import sqlite3
-            _conn = sqlite3.connect(DB_PATH)
+            _conn = db_connect(DB_PATH, readonly=True)
             today_tickers = [r[0] for r in _conn.execute(
                 'SELECT ticker FROM ntm_screening WHERE date=? AND part2_rank IS NOT NULL ORDER BY part2_rank',
                 (today_str,)
@@ -7456,11 +7187,15 @@ def main():
         status_map = get_3day_status(today_tickers, today_str)
         rank_history = get_rank_history(today_tickers, today_str)
         weighted_ranks = compute_weighted_ranks(today_tickers, today_str)
-        rank_change_tags = get_rank_change_tags(today_tickers, weighted_ranks)
+        rank_change_tags = get_rank_change_tags(today_tickers, weighted_ranks, today_str)
         _, exited_tickers = get_daily_changes(today_tickers, today_str)
 
     stats['exited_count'] = len(exited_tickers) if exited_tickers else 0
 
+    # 당일 ntm_screening 기록(수집·펀더멘털·part2_rank·거래대금) 완료 → 최신 유효값 테이블 반영
+    _sync_latest_valid()
+    _backfill_ntm_signals()
+
     # HY Spread + VIX 수집 (FRED — yfinance와 별개)
     risk_status = get_market_risk_status()
     hy_data = risk_status['hy']
@@ -7635,9 +7370,29 @@ def main():
             except Exception as _e:
                 log(f"signal_local.txt 저장 실패: {_e}", "WARN")
 
+    # 오래된 달 콜드 파티션 이동 (월 경계에서만 실제 이동 — git push 크기 고정)
+    _archive_cold()
+
+    # 컬럼형 패널 최종 동기화 (research 하네스·bt_engine이 다음 실행까지 memmap으로 바로 읽음)
+    try:
+        from ntm_panel import sync_panel
+        _pconn = db_connect(DB_PATH, readonly=True)
+        try:
+            sync_panel(_pconn, log=log)
+        finally:
+            _pconn.close()
+    except Exception as e:
+        log(f"ntm 패널 동기화 실패(무시): {e}", "WARN")
+
+    # changeset 모드: DB 파일 대신 당일 delta (db_changeset.py)
+    _export_changeset()
+
     # 5. Git commit/push
     git_commit_push(config)
 
+    # WAL 체크포인트 — Actions는 워크플로우가 git 처리(이 프로세스 밖) → 여기서 본 파일에 반영해 둠
+    _checkpoint_db()
+
     # 완료
     elapsed = (datetime.now() - start_time).total_seconds()
     log("=" * 60)
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""DB 접근 공용 모듈 — 프로세스 공유 연결 + WAL/pragma + 읽기 전용 URI + 쓰기 트랜잭션
+
+구 방식: daily_runner가 sqlite3.connect(DB_PATH)를 ~49곳에서 매번 새로 열고 닫음(unified_vm_track·gap_sleeve도
+  각자). 연결마다 기본 pragma(캐시 2MB·rollback journal·synchronous FULL)에 페이지 캐시가 냉시작,
+  쓰기 중에는 파일 잠금으로 다른 연결의 읽기와 경합.
+현 방식:
+  connect(path=None, readonly=False)  스레드별 (경로, 모드) 공유 연결. 호출측 close()는 참조 카운트만
+      내림 — 마지막 close에서 미커밋 트랜잭션 rollback(구 close와 같은 의미) + row_factory 등 초기화,
+      연결 자체는 유지돼 다음 호출이 데운 캐시를 그대로 씀. 읽기 전용은 중첩 호출도 같은 연결.
+      쓰기 연결은 한 번에 한 호출측만 공유 연결을 받음 — 바깥이 들고 있는 동안의 중첩 connect()는
+      자기 연결(구 sqlite3.connect와 같은 의미): 중첩 함수의 bare commit()이 바깥의 반쯤 된
+      트랜잭션을 커밋하지 않게. 중첩 쓰기를 바깥 트랜잭션에 묶으려면 write_txn.
+  readonly=True  file:...?mode=ro URI — 리포트·메시지 경로용(실수 쓰기 차단, 쓰기 잠금 불필요).
+  write_txn()    BEGIN IMMEDIATE … commit / 예외 시 rollback 컨텍스트 매니저 (중첩 시 바깥 트랜잭션에 합류).
+  open_connection()  공유하지 않는 연결(다른 스레드 전용 등)에 같은 pragma만 적용.
+pragma: journal_mode=WAL(읽기·쓰기 비차단) · synchronous=NORMAL(WAL에서 안전) · cache 64MB · mmap 256MB ·
+  temp_store=MEMORY · busy_timeout 30초.
+WAL 파일: 프로세스 종료 시(atexit) 체크포인트(TRUNCATE) 후 닫아 -wal/-shm 없이 본 파일만 남김
+  (워크플로우가 DB를 git 커밋하므로 필수). atexit만으로는 부족 — 같은 프로세스 안의 git add(git_commit_push)는
+  atexit 전이고, 강제 종료(SIGKILL·타임아웃)는 atexit 자체가 없음 → git add 직전 checkpoint() 명시 호출
+  (daily_runner.git_commit_push·main 끝, 워크플로우 커밋 단계의 'python db_access.py --checkpoint' —
+  다른 연결로 열면 남은 -wal을 복구해 본 파일에 반영).
+CLI: python db_access.py [--db PATH] --checkpoint
+"""
+import os
+import atexit
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+DB_PATH = PROJECT_ROOT / 'eps_momentum_data.db'
+
+CACHE_KB = 65536            # cache_size (KiB, 음수로 지정)
+MMAP_BYTES = 256 * 1024 * 1024
+BUSY_TIMEOUT = 30.0
+
+_local = threading.local()
+_all_lock = threading.Lock()
+_all = []  # atexit 정리용 (모든 스레드의 공유 연결)
+
+
+class PooledConnection(sqlite3.Connection):
+    """close()가 참조 카운트만 내리는 공유 연결. 실제 종료는 close_all()."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.refs = 0
+        self.readonly = False
+        self.path = None
+
+    def close(self):
+        self.refs = max(0, self.refs - 1)
+        if self.refs:
+            return
+        if self.in_transaction:
+            self.rollback()
+        self.row_factory = None
+        self.text_factory = str
+        self.isolation_level = ''
+
+    def really_close(self):
+        super().close()
+
+
+def _resolve(path):
+    return Path(path) if path is not None else DB_PATH
+
+
+def _apply_pragmas(conn, readonly):
+    conn.execute(f'PRAGMA cache_size=-{CACHE_KB}')
+    conn.execute(f'PRAGMA mmap_size={MMAP_BYTES}')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    if readonly:
+        return
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+
+
+def open_connection(path=None, readonly=False, factory=sqlite3.Connection, **kwargs):
+    """공유하지 않는 새 연결 + 공용 pragma (check_same_thread=False 기록 스레드 등)."""
+    path = _resolve(path)
+    kwargs.setdefault('timeout', BUSY_TIMEOUT)
+    if readonly:
+        conn = sqlite3.connect(path.resolve().as_uri() + '?mode=ro', uri=True, factory=factory, **kwargs)
+    else:
+        conn = sqlite3.connect(str(path), factory=factory, **kwargs)
+    _apply_pragmas(conn, readonly)
+    return conn
+
+
+def _shared(path, readonly):
+    key = (str(_resolve(path).resolve()), bool(readonly))
+    pool = getattr(_local, 'pool', None)
+    if pool is None:
+        pool = _local.pool = {}
+    conn = pool.get(key)
+    if conn is None:
+        conn = open_connection(path, readonly, factory=PooledConnection, check_same_thread=False)
+        conn.readonly = bool(readonly)
+        conn.path = key[0]
+        pool[key] = conn
+        with _all_lock:
+            _all.append(conn)
+    return conn
+
+
+def connect(path=None, readonly=False):
+    """스레드별 공유 연결 (호출측은 구 sqlite3.connect처럼 쓰고 close()하면 됨).
+
+    쓰기 공유 연결이 이미 다른 호출측에 나가 있으면 공유하지 않는 새 연결 (모듈 docstring).
+    """
+    conn = _shared(path, readonly)
+    if not readonly and conn.refs:
+        return open_connection(path)
+    conn.refs += 1
+    return conn
+
+
+@contextmanager
+def write_txn(path=None):
+    """with write_txn() as conn: ... — BEGIN IMMEDIATE → 정상 종료 commit / 예외 rollback.
+
+    이미 트랜잭션 중인 공유 연결이면 그 트랜잭션에 합류(commit·rollback은 바깥이 결정).
+    """
+    conn = _shared(path, False)
+    conn.refs += 1
+    outer = not conn.in_transaction
+    try:
+        if outer:
+            conn.execute('BEGIN IMMEDIATE')
+        yield conn
+        if outer:
+            conn.commit()
+    except BaseException:
+        if outer and conn.in_transaction:
+            conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def checkpoint(path=None):
+    """WAL 내용을 본 DB 파일에 반영하고 -wal을 비움 (TRUNCATE) — git add 전에 호출.
+
+    Returns: (busy, wal 페이지, 반영 페이지) — busy=1이면 다른 연결의 읽기 중이라 일부만 반영.
+      WAL 모드가 아니면 (0, -1, -1).
+    """
+    conn = _shared(path, False)
+    if conn.in_transaction:
+        conn = open_connection(path)   # 바깥 쓰기 트랜잭션 진행 중 → 커밋된 내용만 별도 연결로
+        try:
+            return tuple(conn.execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchone())
+        finally:
+            conn.close()
+    return tuple(conn.execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchone())
+
+
+def close_all():
+    """모든 공유 연결 종료 — 쓰기 연결은 WAL 체크포인트 후 (본 파일에 반영, -wal 제거)."""
+    with _all_lock:
+        conns, _all[:] = list(_all), []
+    # 읽기 전용 먼저 — 마지막으로 닫히는 쓰기 연결만 -wal/-shm을 지울 수 있음
+    conns.sort(key=lambda c: not c.readonly)
+    for conn in conns:
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            if not conn.readonly:
+                conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        except sqlite3.Error:
+            pass
+        try:
+            conn.really_close()
+        except sqlite3.Error:
+            pass
+    # 읽기 전용만 열었던 DB도 WAL 모드면 -wal/-shm이 생김 → 짧은 쓰기 연결을 닫아 정리
+    for path in {c.path for c in conns if c.readonly and c.path}:
+        if not (os.path.exists(path + '-wal') and os.access(path, os.W_OK)):
+            continue
+        try:
+            tmp = sqlite3.connect(path, timeout=BUSY_TIMEOUT)
+            tmp.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+            tmp.close()
+        except sqlite3.Error:
+            pass
+    pool = getattr(_local, 'pool', None)
+    if pool:
+        pool.clear()
+
+
+atexit.register(close_all)
+
+
+def main(argv=None):
+    import argparse
+    ap = argparse.ArgumentParser(description='DB 접근 공용 모듈 — WAL 체크포인트')
+    ap.add_argument('--db', default=str(DB_PATH))
+    ap.add_argument('--checkpoint', action='store_true', help='WAL → 본 파일 반영 + -wal 비움 (git add 전)')
+    args = ap.parse_args(argv)
+    if args.checkpoint:
+        if not Path(args.db).exists():
+            print(f"DB 없음: {args.db}")
+            return 0
+        busy, n_wal, n_done = checkpoint(args.db)
+        print(f"checkpoint: busy={busy} wal={n_wal} 반영={n_done}")
+        return 1 if busy else 0
+    ap.print_help()
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
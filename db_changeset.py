@@ -0,0 +1,356 @@
+# -*- coding: utf-8 -*-
+"""DB 변경분(changeset) 내보내기·적용·압축 — DB 파일 전체 대신 하루치 변경 행만 git에 올림
+
+배경: 매 수집 후 git_commit_push·워크플로우가 eps_momentum_data.db 전체(수십 MB)를 커밋 → push/pull·clone이
+  매일 메가바이트 단위로 커지고, KR 머신도 git pull로 전체를 다시 받음. 실제 하루 변경은 그날 날짜 행뿐.
+방식 (db_changes/ — git 추적):
+  {hash}.base.gz   기준 스냅샷 (VACUUM한 DB gzip)
+  {hash}.delta.gz  변경분 — gzip JSON {parent, created, drop, ddl, add_columns, tables}
+      tables[t] = {cols, upsert: [행…], delete: [PK…]} (PK 없는 테이블은 replace: 전 행)
+      parent = 직전 delta(없으면 base) 해시 → 해시 체인. 파일명 = created 뺀 내용 sha256 앞 16자리
+      (같은 parent 위의 같은 변경 = 같은 파일 — created는 기록용이라 해시에서 제외).
+  HEAD             {"base": 해시, "head": 마지막 delta 해시}
+  export_changeset(db): 섀도 DB(data_cache/db_changes_shadow.db — git 미추적, = 마지막으로 내보낸 상태)와
+    테이블별 EXCEPT 비교 → 새·변경 행 upsert + 사라진 PK delete. delta를 섀도에도 적용해 다음 비교 기준 갱신.
+    섀도가 없으면(새 clone) base+delta로 재구성 후 비교. base도 없으면 현재 DB로 base 생성(최초 1회).
+  rebuild(target): base 풀기 → 체인 순서대로 delta 적용 = 마지막 내보낸 DB와 행 단위 동일.
+  compact(): delta가 COMPACT_EVERY(기본 30)개 쌓이면 재구성 DB를 새 base로 → 옛 base·delta 삭제 (export가 자동 호출).
+전환(changeset 모드 켜기): DB_CHANGESET=1 + eps_momentum_data.db를 git 추적 해제(.gitignore) +
+  워크플로우·KR 머신은 수집 전 'python db_changeset.py --rebuild'. 끄기 = DB 파일 추적 복원 (db_changes/는 무해).
+CLI: python db_changeset.py [--db PATH] [--export | --rebuild | --compact | --status]
+"""
+import base64
+import gzip
+import hashlib
+import json
+import os
+import re
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+DB_PATH = PROJECT_ROOT / 'eps_momentum_data.db'
+CHANGES_DIR = PROJECT_ROOT / 'db_changes'
+SHADOW_PATH = PROJECT_ROOT / 'data_cache' / 'db_changes_shadow.db'
+COMPACT_EVERY = int(os.environ.get('DB_CHANGESET_COMPACT', '30'))
+
+_DDL_ORDER = {'table': 0, 'index': 1, 'view': 2, 'trigger': 3}
+
+
+def enabled():
+    return os.environ.get('DB_CHANGESET') == '1'
+
+
+def _hash(data):
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def _gzip(data):
+    return gzip.compress(data, compresslevel=9, mtime=0)   # mtime 고정 → 같은 내용 = 같은 바이트
+
+
+def read_head(root=CHANGES_DIR):
+    p = Path(root) / 'HEAD'
+    if not p.exists():
+        return None
+    return json.loads(p.read_text(encoding='utf-8'))
+
+
+def _write_head(root, base, head):
+    (Path(root) / 'HEAD').write_text(json.dumps({'base': base, 'head': head}) + '\n', encoding='utf-8')
+
+
+def _load_delta(root, h):
+    return json.loads(gzip.decompress((Path(root) / f'{h}.delta.gz').read_bytes()))
+
+
+def chain(root=CHANGES_DIR):
+    """base부터 적용 순서의 delta 해시 리스트 (parent 포인터 역추적)."""
+    head = read_head(root)
+    if not head:
+        return []
+    out, h = [], head['head']
+    while h and h != head['base']:
+        out.append(h)
+        h = _load_delta(root, h)['parent']
+    return out[::-1]
+
+
+# ── 비교 ──
+
+def _objects(conn, schema):
+    return {(r[0], r[1]): r[2] for r in conn.execute(
+        f"SELECT type, name, sql FROM {schema}.sqlite_master WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%'")}
+
+
+def _table_info(conn, schema, table):
+    rows = list(conn.execute(f'PRAGMA {schema}.table_info({table})'))
+    cols = [(r[1], r[2]) for r in rows]
+    pk = [r[1] for r in sorted(rows, key=lambda r: r[5]) if r[5]]
+    return cols, pk
+
+
+def _encode(v):
+    if isinstance(v, bytes):
+        return {'$b': base64.b64encode(v).decode('ascii')}
+    return v
+
+
+def _decode(v):
+    if isinstance(v, dict):
+        return base64.b64decode(v['$b'])
+    return v
+
+
+def _rows(cursor):
+    return [[_encode(v) for v in r] for r in cursor]
+
+
+def diff(conn, schema='shadow'):
+    """main(현재) vs schema(마지막 내보낸 상태) → delta dict (parent 제외). 변경 없으면 None."""
+    cur, old = _objects(conn, 'main'), _objects(conn, schema)
+    delta = {'drop': [], 'ddl': [], 'add_columns': {}, 'tables': {}}
+    for (typ, name), sql in old.items():
+        if (typ, name) not in cur:
+            delta['drop'].append([typ, name])
+    for (typ, name), sql in sorted(cur.items(), key=lambda kv: (_DDL_ORDER.get(kv[0][0], 9), kv[0][1])):
+        prev = old.get((typ, name))
+        if prev is None:
+            delta['ddl'].append(sql)
+        elif prev != sql and typ != 'table':
+            delta['drop'].append([typ, name])
+            delta['ddl'].append(sql)
+
+    for (typ, table) in cur:
+        if typ != 'table':
+            continue
+        cols, pk = _table_info(conn, 'main', table)
+        names = [c for c, _ in cols]
+        col_sql = ', '.join(names)
+        if (typ, table) in old:
+            have = {c for c, _ in _table_info(conn, schema, table)[0]}
+            added = [[c, t] for c, t in cols if c not in have]
+            if added:
+                delta['add_columns'][table] = added
+            old_sql = ', '.join(c if c in have else 'NULL' for c in names)
+        else:
+            old_sql = None
+        entry = {'cols': names}
+        if old_sql is None:
+            changed = _rows(conn.execute(f'SELECT {col_sql} FROM main.{table}'))
+            if changed:
+                entry['upsert'] = changed
+        elif pk:
+            order = ', '.join(str(names.index(c) + 1) for c in pk)
+            upsert = _rows(conn.execute(
+                f'SELECT {col_sql} FROM main.{table} EXCEPT SELECT {old_sql} FROM {schema}.{table} ORDER BY {order}'))
+            pk_sql = ', '.join(pk)
+            delete = _rows(conn.execute(
+                f'SELECT {pk_sql} FROM {schema}.{table} EXCEPT SELECT {pk_sql} FROM main.{table} ORDER BY {pk_sql}'))
+            if upsert:
+                entry['upsert'] = upsert
+            if delete:
+                entry['pk'], entry['delete'] = pk, delete
+        else:
+            same = conn.execute(
+                f'SELECT NOT EXISTS (SELECT {col_sql} FROM main.{table} EXCEPT SELECT {old_sql} FROM {schema}.{table}) '
+                f'AND NOT EXISTS (SELECT {old_sql} FROM {schema}.{table} EXCEPT SELECT {col_sql} FROM main.{table})'
+            ).fetchone()[0]
+            if not same:
+                entry['replace'] = _rows(conn.execute(f'SELECT {col_sql} FROM main.{table}'))
+        if len(entry) > 1:
+            delta['tables'][table] = entry
+    if not any(delta.values()):
+        return None
+    return delta
+
+
+def apply_delta(conn, delta, schema='main'):
+    """delta 1개 적용 (트랜잭션·커밋은 호출측)."""
+    for typ, name in delta['drop']:
+        conn.execute(f'DROP {typ.upper()} IF EXISTS {schema}.{name}')
+    ddl = [(re.match(r'\s*CREATE\s+TABLE\b', sql, re.I) is not None, sql) for sql in delta['ddl']]
+    for sql in (sql for is_table, sql in ddl if is_table):
+        conn.execute(_qualify(sql, schema))
+    for table, added in delta['add_columns'].items():
+        for col, col_type in added:
+            conn.execute(f'ALTER TABLE {schema}.{table} ADD COLUMN {col} {col_type}')
+    for sql in (sql for is_table, sql in ddl if not is_table):   # 인덱스 등은 추가 컬럼 이후
+        conn.execute(_qualify(sql, schema))
+    for table, entry in delta['tables'].items():
+        cols = entry['cols']
+        ins = (f'INSERT OR REPLACE INTO {schema}.{table} ({", ".join(cols)}) '
+               f'VALUES ({", ".join("?" * len(cols))})')
+        if 'replace' in entry:
+            conn.execute(f'DELETE FROM {schema}.{table}')
+            conn.executemany(ins, ([_decode(v) for v in r] for r in entry['replace']))
+            continue
+        if entry.get('delete'):
+            where = ' AND '.join(f'{c}=?' for c in entry['pk'])
+            conn.executemany(f'DELETE FROM {schema}.{table} WHERE {where}',
+                             ([_decode(v) for v in r] for r in entry['delete']))
+        if entry.get('upsert'):
+            conn.executemany(ins, ([_decode(v) for v in r] for r in entry['upsert']))
+
+
+def _qualify(sql, schema):
+    """'CREATE TABLE x' / 'CREATE INDEX i ON x' → schema 지정 (main이면 그대로)."""
+    if schema == 'main':
+        return sql
+    return re.sub(r'^(\s*CREATE\s+(?:UNIQUE\s+)?(?:TABLE|INDEX|VIEW|TRIGGER)\s+(?:IF NOT EXISTS\s+)?)',
+                  rf'\g<1>{schema}.', sql, count=1, flags=re.I)
+
+
+# ── 스냅샷 ──
+
+def _write_base(db_path, root):
+    """db_path의 VACUUM 사본을 gzip base로. Returns: 해시."""
+    tmp = Path(root) / '.base.tmp'
+    if tmp.exists():
+        tmp.unlink()
+    src = sqlite3.connect(str(db_path))
+    try:
+        src.execute('VACUUM INTO ?', (str(tmp),))
+    finally:
+        src.close()
+    data = _gzip(tmp.read_bytes())
+    tmp.unlink()
+    h = _hash(data)
+    (Path(root) / f'{h}.base.gz').write_bytes(data)
+    return h
+
+
+def rebuild(target, root=CHANGES_DIR, log=None):
+    """base + delta 체인 → target DB 파일 (덮어씀). Returns: 적용한 delta 수, 체인 없으면 None."""
+    head = read_head(root)
+    if not head:
+        return None
+    target = Path(target)
+    tmp = target.with_name(target.name + '.rebuild')
+    with open(tmp, 'wb') as f:
+        f.write(gzip.decompress((Path(root) / f"{head['base']}.base.gz").read_bytes()))
+    hashes = chain(root)
+    conn = sqlite3.connect(str(tmp))
+    try:
+        for h in hashes:
+            conn.execute('BEGIN IMMEDIATE')
+            apply_delta(conn, _load_delta(root, h))
+            conn.commit()
+    finally:
+        conn.close()
+    for suffix in ('-wal', '-shm'):
+        Path(str(target) + suffix).unlink(missing_ok=True)
+    os.replace(tmp, target)
+    if log:
+        log(f"  DB 재구성: base {head['base']} + delta {len(hashes)}개 → {target.name}")
+    return len(hashes)
+
+
+def export_changeset(db_path=DB_PATH, root=CHANGES_DIR, shadow=SHADOW_PATH, log=None):
+    """현재 DB와 마지막 내보낸 상태의 차이를 delta로 기록. Returns: 새 delta 해시 (변경 없음·base 생성 = None)."""
+    root, shadow = Path(root), Path(shadow)
+    root.mkdir(parents=True, exist_ok=True)
+    head = read_head(root)
+    if not head:
+        base = _write_base(db_path, root)
+        _write_head(root, base, None)
+        shadow.parent.mkdir(parents=True, exist_ok=True)
+        rebuild(shadow, root)
+        if log:
+            log(f"  changeset base 생성: {base}")
+        return None
+    if not shadow.exists():
+        shadow.parent.mkdir(parents=True, exist_ok=True)
+        rebuild(shadow, root)
+
+    conn = sqlite3.connect(str(db_path))
+    try:
+        conn.execute('ATTACH DATABASE ? AS shadow', (str(shadow),))
+        delta = diff(conn, 'shadow')
+        if delta is None:
+            return None
+        delta = {'parent': head['head'] or head['base'], **delta}
+        h = _hash(json.dumps(delta, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        delta['created'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        data = _gzip(json.dumps(delta, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        # 섀도 적용 → 파일·HEAD 기록 → 섀도 커밋 순. 중간 실패 시 섀도가 HEAD보다 뒤 = 다음 export가
+        #   같은 변경을 다시 내보냄(upsert라 무해). 반대(섀도만 앞섬)는 변경 누락이라 허용 안 함.
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            apply_delta(conn, delta, schema='shadow')
+            (root / f'{h}.delta.gz').write_bytes(data)
+            _write_head(root, head['base'], h)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+    finally:
+        conn.close()
+    if log:
+        n = sum(len(e.get('upsert', ())) + len(e.get('delete', ())) + len(e.get('replace', ()))
+                for e in delta['tables'].values())
+        log(f"  changeset {h}: {n}행 · {len(data) / 1024:.1f} KB")
+    if COMPACT_EVERY and len(chain(root)) >= COMPACT_EVERY:
+        compact(root, shadow, log=log)
+    return h
+
+
+def compact(root=CHANGES_DIR, shadow=SHADOW_PATH, log=None):
+    """base + delta 체인 → 새 base 1개 (옛 base·delta 삭제). Returns: 새 base 해시."""
+    root, shadow = Path(root), Path(shadow)
+    head = read_head(root)
+    if not head or not head['head']:
+        return head and head['base']
+    work = root / '.compact.db'
+    rebuild(work, root)
+    base = _write_base(work, root)
+    work.unlink()
+    keep = {f'{base}.base.gz', 'HEAD'}
+    _write_head(root, base, None)
+    for p in root.iterdir():
+        if p.name not in keep and p.name.endswith(('.base.gz', '.delta.gz')):
+            p.unlink()
+    if log:
+        log(f"  changeset 압축: → base {base}")
+    return base
+
+
+def main(argv=None):
+    import argparse
+    ap = argparse.ArgumentParser(description='DB changeset (--export / --rebuild / --compact / --status)')
+    ap.add_argument('--db', default=str(DB_PATH))
+    ap.add_argument('--dir', default=str(CHANGES_DIR))
+    g = ap.add_mutually_exclusive_group()
+    g.add_argument('--export', action='store_true')
+    g.add_argument('--rebuild', action='store_true')
+    g.add_argument('--compact', action='store_true')
+    g.add_argument('--status', action='store_true')
+    args = ap.parse_args(argv)
+    if args.rebuild:
+        n = rebuild(args.db, args.dir, log=print)
+        print('changeset 없음' if n is None else f'{n}개 적용')
+        return 0 if n is not None else 2
+    if args.compact:
+        print(f'base {compact(args.dir, log=print)}')
+        return 0
+    if args.export:
+        if not os.path.exists(args.db):
+            print(f"DB 없음: {args.db}")
+            return 2
+        h = export_changeset(args.db, args.dir, log=print)
+        print(h or '변경 없음')
+        return 0
+    head = read_head(args.dir)
+    if not head:
+        print('changeset 없음')
+        return 0
+    hashes = chain(args.dir)
+    size = sum(p.stat().st_size for p in Path(args.dir).iterdir() if p.name.endswith('.gz'))
+    print(f"base {head['base']} + delta {len(hashes)}개 · {size / 1e6:.2f} MB")
+    return 0
+
+
+if __name__ == '__main__':
+    import sys
+    sys.exit(main())
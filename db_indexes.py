@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""ntm_screening 관리 인덱스 + EXPLAIN QUERY PLAN 감사 도구
+
+배경: ntm_screening은 PK(date, ticker) 하나뿐 → 종목 축 조회(_get_avg_dollar_volume_M, carry-forward,
+  종목 이력)와 'part2_rank IS NOT NULL' / 'composite_rank IS NOT NULL' 필터(_replay_holdings,
+  bt_engine.load_data, _compute_w_gap_map, _build_score_100_map ...)가 전 테이블 스캔.
+관리 인덱스 (MANAGED_INDEXES — init_ntm_database가 매 실행 ensure_indexes로 동기화):
+  ix_ntm_ticker_date   (ticker, date)                       종목 축 조회·종목별 최근 N일
+  ix_ntm_part2         (date, part2_rank, ticker)  WHERE part2_rank IS NOT NULL      Top30 이력 (부분)
+  ix_ntm_composite     (date, composite_rank, ticker) WHERE composite_rank IS NOT NULL  eligible 이력 (부분)
+  ix_ntm_dv            (date, ticker, dollar_volume_30d) WHERE dollar_volume_30d IS NOT NULL (부분)
+  부분 인덱스는 해당 행만 담아 작음(Top30 ≈ 전체의 2%). 컬럼이 아직 없는 DB는 그 인덱스만 건너뜀.
+  목록에서 빠진 ix_ntm_* 는 자동 DROP (관리 대상 접두사만 — 수동 인덱스는 건드리지 않음).
+  전 행 커버링 인덱스는 두지 않음: 구 ix_ntm_price_panel(date, ticker, price, ntm_current)은 PriceWindow에서
+    PK 대신 선택되지만 이득 252일 창 ~0.2초·31일 창 ~0.05초 vs 커밋 DB +12% (1500종목 × 180일 합성 DB
+    11 MB / 91 MB) → 삭제. PK(date, ticker) 구간 탐색 + 행 접근으로 충분.
+
+감사: python db_indexes.py [--db PATH] [--strict] [파일 ...]
+  기본 대상 daily_runner.py · unified_vm_track.py 의 SQL 문자열 리터럴(f-string은 {..} → ?)을
+  EXPLAIN QUERY PLAN → 'SCAN <table>' 줄 표시: [FULL] 전 테이블 / [idx] 커버링 인덱스 전체(행 접근 없음).
+  --strict: 전 테이블 스캔이 있으면 exit 1.
+"""
+import os
+import re
+import sys
+import ast
+import sqlite3
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+DB_PATH = PROJECT_ROOT / 'eps_momentum_data.db'
+AUDIT_FILES = ('daily_runner.py', 'unified_vm_track.py')
+
+INDEX_PREFIX = 'ix_ntm_'
+# (이름, 테이블, 컬럼, 부분 인덱스 WHERE 또는 None)
+MANAGED_INDEXES = (
+    ('ix_ntm_ticker_date', 'ntm_screening', ('ticker', 'date'), None),
+    ('ix_ntm_part2', 'ntm_screening', ('date', 'part2_rank', 'ticker'), 'part2_rank IS NOT NULL'),
+    ('ix_ntm_composite', 'ntm_screening', ('date', 'composite_rank', 'ticker'), 'composite_rank IS NOT NULL'),
+    ('ix_ntm_dv', 'ntm_screening', ('date', 'ticker', 'dollar_volume_30d'), 'dollar_volume_30d IS NOT NULL'),
+)
+
+
+def _columns(conn, table):
+    return {r[1] for r in conn.execute(f'PRAGMA table_info({table})')}
+
+
+def ensure_indexes(conn, log=None):
+    """MANAGED_INDEXES와 DB 동기화 (생성·구 관리 인덱스 삭제). Returns: 새로 만든 인덱스 이름 리스트."""
+    existing = {r[0] for r in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type='index' AND name LIKE ?", (INDEX_PREFIX + '%',))}
+    wanted = {name for name, *_ in MANAGED_INDEXES}
+    for name in sorted(existing - wanted):
+        conn.execute(f'DROP INDEX IF EXISTS {name}')
+    created = []
+    cols_cache = {}
+    for name, table, cols, where in MANAGED_INDEXES:
+        if name in existing:
+            continue
+        have = cols_cache.setdefault(table, _columns(conn, table))
+        need = set(cols) | set(re.findall(r'\b([a-z_0-9]+)\s+IS\s+NOT\s+NULL', where or ''))
+        if not need <= have:
+            continue  # 컬럼 마이그레이션 전 DB
+        conn.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {table} ({", ".join(cols)})'
+                     + (f' WHERE {where}' if where else ''))
+        created.append(name)
+    if created:
+        conn.execute('ANALYZE')  # 새 인덱스 통계 — 플래너가 PK 대신 고르도록
+        if log:
+            log(f"인덱스 생성: {', '.join(created)}")
+    conn.commit()
+    return created
+
+
+# ============================================================
+# EXPLAIN QUERY PLAN 감사
+# ============================================================
+
+_SQL_HEAD = re.compile(r'^\s*(SELECT|WITH|UPDATE|DELETE|INSERT)\b', re.I)
+
+
+def extract_sql(path):
+    """파일의 SQL 문자열 리터럴 → [(줄번호, sql)]. f-string의 {식}은 ? 로 치환."""
+    tree = ast.parse(Path(path).read_text(encoding='utf-8'))
+    inner = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.JoinedStr):
+            inner.update(id(v) for v in node.values)
+    out = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Constant) and isinstance(node.value, str) and id(node) not in inner:
+            sql = node.value
+        elif isinstance(node, ast.JoinedStr):
+            sql = ''.join(v.value if isinstance(v, ast.Constant) else '?' for v in node.values)
+        else:
+            continue
+        if _SQL_HEAD.match(sql) and re.search(r'\b(FROM|INTO|UPDATE)\b', sql, re.I):
+            out.append((node.lineno, ' '.join(sql.split())))
+    return sorted(out)
+
+
+def explain(conn, sql):
+    """EXPLAIN QUERY PLAN 상세 줄 리스트. 바인딩은 전부 NULL."""
+    named = re.findall(r'[:@$]([A-Za-z_]\w*)', sql)
+    params = {n: None for n in named} if named else [None] * sql.count('?')
+    return [r[3] for r in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params)]
+
+
+def scan_kind(detail, tables):
+    """'table' = 전 테이블 스캔, 'index' = 커버링 인덱스 전체 스캔(행 접근 없음 — 훨씬 쌈), None = 탐색."""
+    m = re.match(r'SCAN (\w+)', detail)
+    if not m or m.group(1) not in tables:
+        return None
+    return 'index' if 'COVERING INDEX' in detail else 'table'
+
+
+def audit(conn, files=AUDIT_FILES, out=print):
+    """파일별 SQL 감사 → {'checked', 'table_scan', 'index_scan', 'skipped'} 개수."""
+    tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    counts = {'checked': 0, 'table_scan': 0, 'index_scan': 0, 'skipped': 0}
+    for f in files:
+        for line, sql in extract_sql(PROJECT_ROOT / f if not os.path.isabs(f) else f):
+            try:
+                plan = explain(conn, sql)
+            except sqlite3.Error:
+                counts['skipped'] += 1  # 동적 SQL(컬럼명·연산자 치환) 또는 다른 DB의 테이블
+                continue
+            counts['checked'] += 1
+            kinds = [(scan_kind(d, tables), d) for d in plan]
+            scans = [(k, d) for k, d in kinds if k]
+            if not scans:
+                continue
+            worst = 'table' if any(k == 'table' for k, _ in scans) else 'index'
+            counts[f'{worst}_scan'] += 1
+            out(f"{f}:{line}: [{'FULL' if worst == 'table' else 'idx '}] {' | '.join(d for _, d in scans)}")
+            out(f"    {sql[:160]}")
+    return counts
+
+
+def main(argv=None):
+    import argparse
+    ap = argparse.ArgumentParser(description='ntm_screening 인덱스 동기화 + EXPLAIN QUERY PLAN 감사')
+    ap.add_argument('files', nargs='*', default=list(AUDIT_FILES))
+    ap.add_argument('--db', default=str(DB_PATH))
+    ap.add_argument('--ensure', action='store_true', help='감사 전에 관리 인덱스 생성')
+    ap.add_argument('--strict', action='store_true', help='전 테이블 스캔이 있으면 exit 1')
+    args = ap.parse_args(argv)
+    if not os.path.exists(args.db):
+        print(f"DB 없음: {args.db}")
+        return 2
+    conn = sqlite3.connect(args.db)
+    if args.ensure:
+        print(f"생성: {ensure_indexes(conn) or '없음(이미 최신)'}")
+    c = audit(conn, args.files)
+    conn.close()
+    print(f"\nSQL {c['checked']}개 검사 · 전 테이블 스캔 {c['table_scan']}개 · "
+          f"커버링 인덱스 스캔 {c['index_scan']}개 · 해석 불가(동적) {c['skipped']}개")
+    return 1 if (args.strict and c['table_scan']) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
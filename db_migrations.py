@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+"""스키마 버전 관리 — schema_version 테이블 + 순서 고정 마이그레이션(1회 실행) + 일괄 재순위 경로
+
+구 방식: init_ntm_database가 매 실행 ALTER TABLE ADD COLUMN ~30회를 try/except로 찔러봄(이미 있으면 예외).
+  데이터 마이그레이션은 migrate/ 일회성 스크립트 9개가 각자 날짜·종목 Python 루프로 전 이력 재스캔.
+현 방식:
+  MIGRATIONS = [(버전, 이름, 함수)] 오름차순. migrate(conn)이 schema_version 최댓값 이후만 차례로 실행 —
+    마이그레이션마다 BEGIN IMMEDIATE … 버전 행 기록 … commit (실패 시 그 마이그레이션만 rollback, 이후 중단).
+  ensure_schema(conn): 시작 경로 — 'SELECT MAX(version)' 1회, 최신이면 즉시 반환.
+  001 baseline: 구 init_ntm_database 스키마 전체. 기존 DB는 PRAGMA table_info로 빠진 컬럼만 추가 후
+    버전 1로 스탬프(예외 구동 X). dollar_volume_30d(구 research/migrate_add_dollar_volume.py 수동)도 포함.
+  002·003 결번 (002 tickers·dates 사전 · 003 part2_scores — 배포 전 철회. 개발 DB에 스탬프가 남았을 수
+    있어 재사용 금지 → 다음 마이그레이션은 004). 사전은 콜드 이동(opt-in)이 처음 필요할 때 직접 만듦 (ntm_dict).
+  새 스키마 변경 = 함수 하나 + MIGRATIONS 끝에 (다음 번호, 이름, 함수) 추가. 번호 재사용·순서 변경 금지.
+일괄 재순위 (데이터 마이그레이션용): rerank_history(conn, ...) — 날짜 윈도우 함수(ROW_NUMBER·날짜 인덱스 조인)로
+  전 이력 composite_rank + w_gap(T0·T1·T2 가중) part2_rank를 SQL 몇 문장에 재계산 (migrate_v58b 등 구
+  '날짜마다 SELECT → 정렬 → 종목마다 UPDATE' 루프 대체). min_seg_sql()은 구 calc_min_seg와 같은 식.
+  ⚠️라이브 part2_rank(v71+ conviction z-score w_gap)와는 다른 구 공식용 — 현 운영 순위 재계산 도구가 아님.
+CLI: python db_migrations.py [--db PATH] [--status] [--target N]
+"""
+import os
+import sqlite3
+from datetime import datetime
+
+SCHEMA_TABLE = 'schema_version'
+
+NTM_BASE_DDL = '''
+    CREATE TABLE IF NOT EXISTS ntm_screening (
+        date        TEXT,
+        ticker      TEXT,
+        rank        INTEGER,
+        score       REAL,
+        ntm_current REAL,
+        ntm_7d      REAL,
+        ntm_30d     REAL,
+        ntm_60d     REAL,
+        ntm_90d     REAL,
+        is_turnaround INTEGER DEFAULT 0,
+        adj_score   REAL,
+        adj_gap     REAL,
+        price       REAL,
+        ma60        REAL,
+        part2_rank  INTEGER,
+        PRIMARY KEY (date, ticker)
+    )
+'''
+
+# CREATE 이후 추가된 컬럼 (구 init_ntm_database ALTER 목록 순서 그대로)
+NTM_ADDED_COLUMNS = (
+    ('adj_score', 'REAL'), ('adj_gap', 'REAL'), ('price', 'REAL'), ('ma60', 'REAL'), ('ma120', 'REAL'),
+    ('part2_rank', 'INTEGER'), ('rev_up30', 'INTEGER'), ('rev_down30', 'INTEGER'), ('num_analysts', 'INTEGER'),
+    ('high30', 'REAL'), ('vol_ratio', 'REAL'),
+    ('composite_rank', 'INTEGER'),      # 당일 composite 순위 (가중순위 계산 원본)
+    ('eps_chg_weighted', 'REAL'),       # v54: EPS 품질 보정용
+    # v33: 재무 품질 + rev_growth
+    ('rev_growth', 'REAL'), ('market_cap', 'REAL'), ('free_cashflow', 'REAL'), ('roe', 'REAL'),
+    ('debt_to_equity', 'REAL'), ('operating_margin', 'REAL'), ('gross_margin', 'REAL'),
+    ('current_ratio', 'REAL'), ('total_debt', 'REAL'), ('total_cash', 'REAL'), ('ev', 'REAL'),
+    ('ebitda', 'REAL'), ('beta', 'REAL'),
+    ('dollar_volume_30d', 'REAL'),      # v117: 시장 주도주 필터 (구 research 스크립트로만 추가)
+)
+
+
+def _add_missing_columns(conn, table, columns):
+    have = {r[1] for r in conn.execute(f'PRAGMA table_info({table})')}
+    for col, col_type in columns:
+        if col not in have:
+            conn.execute(f'ALTER TABLE {table} ADD COLUMN {col} {col_type}')
+
+
+def _m001_baseline(conn):
+    conn.execute(NTM_BASE_DDL)
+    _add_missing_columns(conn, 'ntm_screening', NTM_ADDED_COLUMNS)
+    # 기존 eps_snapshots 테이블 삭제
+    conn.execute('DROP TABLE IF EXISTS eps_snapshots')
+    # Forward Test 트래커: 포트폴리오 이력 테이블
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS portfolio_log (
+            date        TEXT,
+            ticker      TEXT,
+            action      TEXT,
+            price       REAL,
+            weight      REAL,
+            entry_date  TEXT,
+            entry_price REAL,
+            exit_price  REAL,
+            return_pct  REAL,
+            PRIMARY KEY (date, ticker)
+        )
+    ''')
+    # AI 분석 저장 테이블 (대시보드용)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS ai_analysis (
+            date           TEXT NOT NULL,
+            analysis_type  TEXT NOT NULL,
+            ticker         TEXT DEFAULT '__ALL__',
+            content        TEXT NOT NULL,
+            created_at     TEXT DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (date, analysis_type, ticker)
+        )
+    ''')
+
+
+# (버전, 이름, 함수) — 오름차순 고정. 추가만 (기존 항목 수정·재번호 금지)
+MIGRATIONS = (
+    (1, 'baseline', _m001_baseline),
+)
+LATEST = MIGRATIONS[-1][0]
+
+
+def init_schema_table(conn):
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {SCHEMA_TABLE} (
+            version     INTEGER PRIMARY KEY,
+            name        TEXT NOT NULL,
+            applied_at  TEXT NOT NULL
+        )
+    ''')
+
+
+def current_version(conn):
+    """적용된 최신 버전 (테이블 없음 = 0)."""
+    try:
+        v = conn.execute(f'SELECT MAX(version) FROM {SCHEMA_TABLE}').fetchone()[0]
+    except sqlite3.OperationalError:
+        return 0
+    return v or 0
+
+
+def migrate(conn, target=None, log=None):
+    """미적용 마이그레이션을 버전 순으로 1회씩 실행. Returns: 적용한 (버전, 이름) 리스트."""
+    if conn.in_transaction:
+        conn.commit()
+    init_schema_table(conn)
+    conn.commit()
+    cur = current_version(conn)
+    applied = []
+    for version, name, fn in MIGRATIONS:
+        if version <= cur or (target is not None and version > target):
+            continue
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            fn(conn)
+            conn.execute(f'INSERT INTO {SCHEMA_TABLE} (version, name, applied_at) VALUES (?, ?, ?)',
+                         (version, name, datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        applied.append((version, name))
+        if log:
+            log(f"  스키마 마이그레이션 {version:03d} {name} 적용")
+    return applied
+
+
+def ensure_schema(conn, log=None):
+    """시작 경로 — 최신이면 버전 조회 1회로 끝. Returns: 현재 버전."""
+    if current_version(conn) >= LATEST:
+        return LATEST
+    migrate(conn, log=log)
+    return current_version(conn)
+
+
+# ── 일괄 재순위 (데이터 마이그레이션 경로) ──
+
+def min_seg_sql(alias=''):
+    """구 calc_min_seg(nc, n7, n30, n60, n90) SQL 식 — |b|<=0.01·NULL 구간은 0, cap 없음."""
+    a = alias
+    cols = (f'{a}ntm_current', f'{a}ntm_7d', f'{a}ntm_30d', f'{a}ntm_60d', f'{a}ntm_90d')
+    segs = [f'(CASE WHEN {b} IS NOT NULL AND ABS({b}) > 0.01 THEN ({x} - {b}) / ABS({b}) * 100 ELSE 0 END)'
+            for x, b in zip(cols, cols[1:])]
+    return f'MIN({", ".join(segs)})'
+
+
+def rerank_history(conn, eligible_sql='1', scope_sql='composite_rank IS NOT NULL',
+                   gap_col='adj_gap', weights=(0.5, 0.3, 0.2), top_n=30, dates=None,
+                   tie_sql='composite_rank, ticker'):
+    """전 이력(또는 dates) composite_rank·part2_rank 일괄 재계산 — 커밋은 호출측 책임.
+
+    대상 행 = scope_sql (날짜별 기존 순위 부여 행), 그중 eligible_sql 통과 행만 순위 부여. gap_col = 순위 컬럼.
+    composite_rank = gap 오름차순(NULL은 999) · 동점은 tie_sql 순 (기본 = 기존 composite 순서 — 구 루프가
+      ix_ntm_composite 순서로 읽어 안정 정렬한 것과 동일).
+    part2_rank = w_gap = Σ weights[k] × (gap이 있는 날짜 목록 기준 k일 전 같은 종목 gap, 없으면 0)
+      오름차순 Top top_n · 동점은 composite 순서.
+    Returns: {'dates', 'comp_changed', 'p2_changed'}.
+    """
+    conn.execute('DROP TABLE IF EXISTS temp._rr')
+    date_filter = ''
+    params = []
+    if dates is not None:
+        dates = list(dates)
+        date_filter = f' AND date IN ({",".join("?" * len(dates))})'
+        params = dates
+    # gap 날짜 인덱스 (구 all_dates.index) — k일 전 = di-k, 같은 종목 gap은 PK 조회
+    conn.execute('DROP TABLE IF EXISTS temp._rr_gd')
+    conn.execute('CREATE TEMP TABLE _rr_gd (date TEXT PRIMARY KEY, di INTEGER UNIQUE)')
+    conn.execute(f'INSERT INTO _rr_gd SELECT date, ROW_NUMBER() OVER (ORDER BY date) FROM '
+                 f'(SELECT DISTINCT date FROM ntm_screening WHERE {gap_col} IS NOT NULL)')
+    lag_join = ''.join(
+        f' LEFT JOIN _rr_gd gd{k} ON gd{k}.di = gd0.di - {k}'
+        f' LEFT JOIN ntm_screening g{k} ON g{k}.date = gd{k}.date AND g{k}.ticker = e.ticker'
+        for k in range(1, len(weights)))
+    wgap = ' + '.join(f'{w!r} * COALESCE({f"g{k}." if k else "e."}{gap_col}, 0)'
+                      for k, w in enumerate(weights))
+    conn.execute(f'''
+        CREATE TEMP TABLE _rr AS
+        WITH e AS (SELECT date, ticker, {gap_col},
+                          ROW_NUMBER() OVER (PARTITION BY date ORDER BY COALESCE({gap_col}, 999), {tie_sql}) AS comp
+                   FROM ntm_screening WHERE {scope_sql} AND ({eligible_sql}){date_filter}),
+             w AS (SELECT e.date, e.ticker, e.comp, {wgap} AS wgap
+                   FROM e JOIN _rr_gd gd0 ON gd0.date = e.date{lag_join})
+        SELECT date, ticker, comp,
+               ROW_NUMBER() OVER (PARTITION BY date ORDER BY wgap, comp) AS p2
+        FROM w
+    ''', params)
+    conn.execute('CREATE INDEX temp._rr_pk ON _rr (date, ticker)')
+    conn.execute('DROP TABLE IF EXISTS temp._rr_dates')
+    conn.execute(f'CREATE TEMP TABLE _rr_dates AS SELECT DISTINCT date FROM ntm_screening '
+                 f'WHERE {scope_sql}{date_filter}', params)
+
+    # 바뀌는 행만 기록 (구 루프는 날짜마다 NULL 초기화 후 전부 재기록)
+    conn.execute('DROP TABLE IF EXISTS temp._rr_chg')
+    conn.execute('''
+        CREATE TEMP TABLE _rr_chg AS
+        SELECT n.date, n.ticker, r.comp, CASE WHEN r.p2 <= ? THEN r.p2 END AS p2,
+               n.composite_rank IS NOT r.comp AS dc,
+               n.part2_rank IS NOT (CASE WHEN r.p2 <= ? THEN r.p2 END) AS dp
+        FROM ntm_screening n LEFT JOIN _rr r ON r.date = n.date AND r.ticker = n.ticker
+        WHERE n.date IN (SELECT date FROM temp._rr_dates)
+          AND (n.composite_rank IS NOT r.comp OR n.part2_rank IS NOT (CASE WHEN r.p2 <= ? THEN r.p2 END))
+    ''', (top_n, top_n, top_n))
+    conn.execute('CREATE INDEX temp._rr_chg_pk ON _rr_chg (date, ticker)')
+    comp_changed, p2_changed = conn.execute('SELECT TOTAL(dc), TOTAL(dp) FROM _rr_chg').fetchone()
+    match = 'c.date = ntm_screening.date AND c.ticker = ntm_screening.ticker'
+    conn.execute(f'''
+        UPDATE ntm_screening SET
+            composite_rank = (SELECT c.comp FROM _rr_chg c WHERE {match}),
+            part2_rank = (SELECT c.p2 FROM _rr_chg c WHERE {match})
+        WHERE (date, ticker) IN (SELECT date, ticker FROM _rr_chg)
+    ''')
+    n_dates = conn.execute('SELECT COUNT(*) FROM temp._rr_dates').fetchone()[0]
+    conn.execute('DROP TABLE temp._rr')
+    conn.execute('DROP TABLE temp._rr_dates')
+    conn.execute('DROP TABLE temp._rr_gd')
+    conn.execute('DROP TABLE temp._rr_chg')
+    return {'dates': n_dates, 'comp_changed': int(comp_changed), 'p2_changed': int(p2_changed)}
+
+
+def main(argv=None):
+    import argparse
+    ap = argparse.ArgumentParser(description='스키마 마이그레이션 (미적용분 실행 / --status 조회)')
+    ap.add_argument('--db', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'eps_momentum_data.db'))
+    ap.add_argument('--status', action='store_true')
+    ap.add_argument('--target', type=int)
+    args = ap.parse_args(argv)
+    if not os.path.exists(args.db):
+        print(f"DB 없음: {args.db}")
+        return 2
+    conn = sqlite3.connect(args.db)
+    v = current_version(conn)
+    if args.status:
+        print(f'현재 버전 {v} / 최신 {LATEST}')
+        for version, name, _ in MIGRATIONS:
+            print(f"  {'✓' if version <= v else ' '} {version:03d} {name}")
+    else:
+        applied = migrate(conn, target=args.target, log=print)
+        print(f'적용 {len(applied)}개 → 버전 {current_version(conn)}')
+    conn.close()
+    return 0
+
+
+if __name__ == '__main__':
+    import sys
+    sys.exit(main())
@@ -0,0 +1,644 @@
+# -*- coding: utf-8 -*-
+"""EPS 수집 엔진 — 단일 큐 + 토큰버킷 + AIMD 적응형 동시성 (run_ntm_collection Step 3)
+
+구 방식: 30종목 배치 × ThreadPoolExecutor(2) × 배치간 sleep(1.5) 고정 → 좋은 날에도 ~1,290종목에
+  수 분, 나쁜 날(429)에는 속도를 못 줄여 에러가 쌓이고 별도 재시도 루프 2개가 뒷수습.
+현 방식: 종목 큐 하나를 토큰버킷으로 흘려보내고, 응답 상태로 속도·동시성을 스스로 조절.
+  - 깨끗한 응답이 이어지면 가산 증가(rate += RATE_STEP, 동시성 +1) — 좋은 날은 상한까지 올라감
+  - 429/YFRateLimitError가 오면 곱셈 감소(rate ×0.5, 동시성 ÷2) + 쿨다운 — 나쁜 날은 즉시 감속
+  - 감속은 쿨다운 창당 1회만(동시에 돌던 요청들의 429가 연쇄로 rate를 바닥까지 깎는 것 방지)
+  - 실패 종목은 같은 큐 뒤로 재투입(최대 max_attempts회) → 별도 재시도 패스 불필요
+  - 우선순위 힙: 보유·전일 Top30(carry-forward 후보)을 rate 예산이 신선할 때 먼저 수집,
+    실패·데이터없음은 지연 재투입(priority_attempts회) → 구 Top20 재시도 루프 3개 통합
+  - FetchCheckpoint: 마켓 날짜별 결과를 파일에 즉시 기록 → 재수집·크래시 재실행은 실패분만 fetch
+  - stream(): 확정 결과를 즉시 yield → run_pipeline(수집 → 스코어 → 기록, 유계 큐)으로
+    CPU/SQLite 작업이 네트워크 대기와 겹침
+트랜스포트는 교체 가능: transport(ticker) → {'ntm': ..., 'raw_trend': ...} (예외 = 실패).
+  YFinanceTransport = 운영(yf.Ticker) / HTTPTransport = quoteSummary 호환 서버(오프라인 벤치).
+
+env: EPS_FETCH_WORKERS(최대 동시성, 기본 12) · EPS_FETCH_RATE(시작 req/s, 기본 4)
+     EPS_FETCH_MAX_RATE(상한, 기본 30) · EPS_FETCH_MAX_SECONDS(전체 상한, 기본 1500)
+
+벤치: python eps_fetch.py --bench [N]   (로컬 가짜 야후 서버 + 429 주입, 네트워크 0)
+"""
+import os
+import sys
+import json
+import time
+import heapq
+import threading
+from collections import deque
+from itertools import count
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+
+
+def _default_log(message, level="INFO"):
+    print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] [{level}] {message}")
+
+
+def is_rate_limited(err):
+    """예외(또는 메시지)가 야후 rate limit(429)인지 판별."""
+    if type(err).__name__ in ('YFRateLimitError', 'RateLimited'):
+        return True
+    msg = str(err).lower()
+    return '429' in msg or 'too many requests' in msg or 'rate limit' in msg
+
+
+class RateLimited(Exception):
+    """트랜스포트가 HTTP 429를 받았을 때 (yfinance 밖 경로용)."""
+
+
+class TokenBucket:
+    """초당 rate개 토큰, 버스트 상한 burst. take()는 대기 없이 즉시 판정 (0 = 획득, >0 = 기다릴 초)."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.burst = float(burst) if burst else max(1.0, self.rate)
+        self._tokens = 1.0
+        self._t = time.monotonic()
+        self._lock = threading.Lock()
+
+    def set_rate(self, rate, burst=None):
+        with self._lock:
+            self._refill()
+            self.rate = float(rate)
+            self.burst = float(burst) if burst else max(1.0, self.rate)
+            self._tokens = min(self._tokens, self.burst)
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._t) * self.rate)
+        self._t = now
+
+    def take(self):
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return 0.0
+            return (1.0 - self._tokens) / self.rate
+
+
+class AIMDController:
+    """가산 증가 / 곱셈 감소 — rate(req/s)와 동시성(in-flight 상한)을 함께 조절."""
+
+    RATE_STEP = 1.0     # 깨끗한 창 하나당 +1 req/s
+    DECREASE = 0.5      # 429 시 ×0.5
+
+    def __init__(self, rate, min_rate, max_rate, concurrency, max_concurrency, cooldown=10.0):
+        self.rate = float(rate)
+        self.min_rate = float(min_rate)
+        self.max_rate = float(max_rate)
+        self.concurrency = int(concurrency)
+        self.max_concurrency = int(max_concurrency)
+        self.cooldown = float(cooldown)
+        self.pause_until = 0.0
+        self._ok = 0
+        self._last_cut = -1e9
+        self.throttle_events = 0
+
+    def on_success(self):
+        """성공 1건. 현재 동시성만큼 연속 성공(=한 '창')이면 가산 증가. 바뀌면 True."""
+        self._ok += 1
+        if self._ok < max(1, self.concurrency):
+            return False
+        self._ok = 0
+        new_rate = min(self.max_rate, self.rate + self.RATE_STEP)
+        new_conc = min(self.max_concurrency, self.concurrency + 1)
+        changed = (new_rate, new_conc) != (self.rate, self.concurrency)
+        self.rate, self.concurrency = new_rate, new_conc
+        return changed
+
+    def on_throttle(self):
+        """429 1건. 쿨다운 창당 1회만 곱셈 감소 + 일시정지. 감속이 일어났으면 True."""
+        now = time.monotonic()
+        self._ok = 0
+        if now - self._last_cut < self.cooldown:
+            return False
+        self._last_cut = now
+        self.throttle_events += 1
+        self.rate = max(self.min_rate, self.rate * self.DECREASE)
+        self.concurrency = max(1, self.concurrency // 2)
+        self.pause_until = now + self.cooldown
+        return True
+
+
+class FetchEngine:
+    """종목 큐 → 트랜스포트 병렬 호출. run(tickers, priority) → {ticker: result dict}.
+
+    result는 구 _prefetch_eps와 같은 모양: {'ntm': dict|None, 'raw_trend': ...} 또는 {'error': str}.
+    큐는 (티어, 준비시각) 우선순위 힙 — 보유/전일 Top30 등 매매 결정 종목(티어 0, 1...)이
+    rate 예산이 남아 있는 처음에 먼저 나가고, 나머지 유니버스(DEFAULT_TIER)가 뒤따름.
+    우선 종목은 실패·데이터없음(is_valid False) 모두 priority_attempts회까지 재시도하되
+    retry_delay×회차만큼 늦춰서 재투입(구 Top20 재시도 루프의 sleep(5) 대체, 다른 종목은 계속 흐름).
+    """
+
+    DEFAULT_TIER = 9
+
+    def __init__(self, transport, max_workers=12, rate=4.0, min_rate=0.5, max_rate=30.0,
+                 concurrency=2, max_attempts=3, priority_attempts=4, retry_delay=5.0,
+                 cooldown=10.0, max_seconds=None, log=None, progress_every=200):
+        self.transport = transport
+        self.max_workers = max(1, int(max_workers))
+        self.ctl = AIMDController(rate, min_rate, max_rate,
+                                  min(concurrency, self.max_workers), self.max_workers, cooldown)
+        self.bucket = TokenBucket(rate)
+        self.max_attempts = max(1, int(max_attempts))
+        self.priority_attempts = max(self.max_attempts, int(priority_attempts))
+        self.retry_delay = retry_delay
+        self.max_seconds = max_seconds
+        self.log = log or _default_log
+        self.progress_every = progress_every
+        self.stats = {}
+
+    def _call(self, ticker):
+        try:
+            return self.transport(ticker), None
+        except Exception as e:
+            return None, e
+
+    def run(self, tickers, priority=None, is_valid=None):
+        """stream()을 끝까지 소비해 {ticker: result} dict로 반환 (배리어형 호출측용)."""
+        return dict(self.stream(tickers, priority, is_valid))
+
+    def stream(self, tickers, priority=None, is_valid=None):
+        """확정된 결과를 (ticker, result)로 즉시 yield — 파이프라인 후단(스코어·기록)이 수집과 겹쳐 돎.
+
+        priority: {ticker: tier} (낮을수록 먼저, 없으면 DEFAULT_TIER).
+        is_valid: 우선 종목 결과 검증 (False면 재시도 대상 — 예: ntm None).
+        yield한 결과는 엔진에 남기지 않음(raw_trend 전량 상주 X). self.stats는 소비 완료 후 채워짐.
+        """
+        ctl, bucket = self.ctl, self.bucket
+        priority = priority or {}
+        tickers = list(dict.fromkeys(tickers))
+        prio_set = {t for t in tickers if priority.get(t, self.DEFAULT_TIER) < self.DEFAULT_TIER}
+        seq = count()
+        # 힙 원소: (tier, ready_at, seq, ticker, attempt) — 같은 티어 안에서는 입력 순서 유지
+        heap = [(priority.get(t, self.DEFAULT_TIER), 0.0, next(seq), t, 1) for t in tickers]
+        heapq.heapify(heap)
+        delayed = []  # 재시도 대기 (ready_at 도래 전까지 힙 밖에 보관 → 뒤 티어를 막지 않음)
+        in_flight = {}
+        pending_data = {}  # 우선 종목 재시도 중 보관 결과 (재시도도 비면 이 결과로 확정)
+        ready = []         # 이번 회차 확정 (ticker, result)
+        n_req = n_retry = n_throttled = n_done = n_err = 0
+        prio_bad = []
+        peak_rate, peak_conc = ctl.rate, ctl.concurrency
+        t0 = time.monotonic()
+        prio_open = len(prio_set)
+        prio_done_at = t0 if not prio_set else None
+        deadline = t0 + self.max_seconds if self.max_seconds else None
+        next_progress = self.progress_every
+
+        def _requeue(t, attempt, tier, now):
+            if tier < self.DEFAULT_TIER:
+                delayed.append((tier, now + self.retry_delay * attempt, next(seq), t, attempt + 1))
+            else:
+                heapq.heappush(heap, (tier, now, next(seq), t, attempt + 1))
+
+        def _finalize(t, result):
+            nonlocal n_done, n_err, prio_open, prio_done_at
+            pending_data.pop(t, None)
+            n_done += 1
+            bad = 'error' in result
+            n_err += bad
+            if t in prio_set:
+                if bad or (is_valid is not None and not is_valid(result)):
+                    prio_bad.append(t)
+                prio_open -= 1
+                if prio_open == 0:
+                    prio_done_at = time.monotonic()
+            ready.append((t, result))
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as ex:
+            while heap or delayed or in_flight:
+                now = time.monotonic()
+                if delayed:
+                    due = [d for d in delayed if d[1] <= now]
+                    if due:
+                        delayed = [d for d in delayed if d[1] > now]
+                        for d in due:
+                            heapq.heappush(heap, d)
+                if deadline and now > deadline and (heap or delayed):
+                    left = heap + delayed
+                    for _, _, _, t, _ in left:
+                        _finalize(t, pending_data.get(t) or {'error': 'fetch deadline exceeded'})
+                    self.log(f"  EPS 수집 시간 상한({self.max_seconds:.0f}초) 초과 — 미수집 {len(left)}종목 에러 처리", "WARN")
+                    heap, delayed = [], []
+
+                # 디스패치: 쿨다운 아님 + 동시성 여유 + 토큰 있음
+                wait_s = 0.05
+                if delayed and not heap:
+                    wait_s = max(min(d[1] for d in delayed) - now, 0.01)
+                if now < ctl.pause_until:
+                    wait_s = ctl.pause_until - now
+                else:
+                    while heap and len(in_flight) < ctl.concurrency:
+                        w = bucket.take()
+                        if w > 0:
+                            wait_s = w
+                            break
+                        tier, _, _, t, attempt = heapq.heappop(heap)
+                        in_flight[ex.submit(self._call, t)] = (t, attempt, tier)
+                        n_req += 1
+
+                if in_flight:
+                    done, _ = wait(list(in_flight), timeout=min(max(wait_s, 0.01), 1.0),
+                                   return_when=FIRST_COMPLETED)
+                elif heap or delayed:
+                    time.sleep(min(max(wait_s, 0.01), 1.0))
+                    done = ()
+                else:
+                    done = ()
+                now = time.monotonic()
+                for fut in done:
+                    t, attempt, tier = in_flight.pop(fut)
+                    data, err = fut.result()
+                    limit = self.priority_attempts if t in prio_set else self.max_attempts
+                    if err is None:
+                        if ctl.on_success():
+                            bucket.set_rate(ctl.rate)
+                            peak_rate = max(peak_rate, ctl.rate)
+                            peak_conc = max(peak_conc, ctl.concurrency)
+                        if t in prio_set and is_valid is not None and not is_valid(data) and attempt < limit:
+                            pending_data[t] = data  # 재시도도 비면 이 결과 유지
+                            _requeue(t, attempt, tier, now)
+                            n_retry += 1
+                            continue
+                        _finalize(t, data)
+                    else:
+                        throttled = is_rate_limited(err)
+                        if throttled:
+                            n_throttled += 1
+                            if ctl.on_throttle():
+                                bucket.set_rate(ctl.rate)
+                                self.log(f"  429 감지 — 감속: {ctl.rate:.1f} req/s · 동시성 {ctl.concurrency} · "
+                                         f"{ctl.cooldown:.0f}초 쿨다운", "WARN")
+                        if attempt < limit:
+                            _requeue(t, attempt, tier, now)
+                            n_retry += 1
+                            continue
+                        result = pending_data.get(t) or {'error': str(err)}
+                        if throttled and 'error' in result:
+                            result['rate_limited'] = True
+                        _finalize(t, result)
+                    if n_done >= next_progress:
+                        self.log(f"  수집: {n_done}/{len(tickers)} "
+                                 f"({ctl.rate:.1f} req/s · 동시성 {ctl.concurrency})")
+                        next_progress += self.progress_every
+
+                # 확정분 방출 — 소비측(유계 큐)이 막히면 여기서 자연스럽게 배압
+                while ready:
+                    yield ready.pop(0)
+
+        self.stats = {
+            'tickers': len(tickers), 'requests': n_req, 'retried': n_retry,
+            'throttled': n_throttled, 'throttle_events': ctl.throttle_events,
+            'errors': n_err,
+            'elapsed': time.monotonic() - t0,
+            'final_rate': ctl.rate, 'peak_rate': peak_rate, 'peak_concurrency': peak_conc,
+            'priority': len(prio_set), 'priority_failed': sorted(prio_bad),
+            'priority_elapsed': (prio_done_at or time.monotonic()) - t0,
+        }
+
+
+def run_pipeline(source, score, write, batch_size=200, maxsize=256):
+    """수집 → 스코어 → 기록 3단 파이프라인 (유계 큐 2개).
+
+    source: (ticker, result) iterable — 호출 스레드에서 소비 (FetchEngine.stream)
+    score(ticker, result) → 기록 행 (ticker, row) 또는 None — 스코어 스레드
+    write([(ticker, row), ...]) — batch_size 단위 배치 기록 — 기록 스레드 (자기 DB 연결 사용)
+    큐가 차면 앞 단계가 대기(배압) → 메모리 상한 = 큐 크기.
+    어느 단계든 예외가 나면 나머지를 멈추고 호출측에 다시 raise.
+    """
+    import queue
+    _END = object()
+    score_q = queue.Queue(maxsize=maxsize)
+    write_q = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+    failure = []
+
+    def _put(q, item):
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _get(q):
+        while not stop.is_set():
+            try:
+                return q.get(timeout=0.2)
+            except queue.Empty:
+                pass
+        return _END
+
+    def _fail(e):
+        failure.append(e)
+        stop.set()
+
+    def _score_stage():
+        try:
+            while True:
+                item = _get(score_q)
+                if item is _END:
+                    break
+                row = score(*item)
+                if row is not None:
+                    _put(write_q, row)
+        except BaseException as e:
+            _fail(e)
+        finally:
+            _put(write_q, _END)
+
+    def _write_stage():
+        buf = []
+        try:
+            while True:
+                item = _get(write_q)
+                if item is _END:
+                    break
+                buf.append(item)
+                if len(buf) >= batch_size:
+                    write(buf)
+                    buf = []
+            if buf and not stop.is_set():
+                write(buf)
+        except BaseException as e:
+            _fail(e)
+
+    scorer = threading.Thread(target=_score_stage, name='pipe-score', daemon=True)
+    writer = threading.Thread(target=_write_stage, name='pipe-write', daemon=True)
+    scorer.start()
+    writer.start()
+    try:
+        for item in source:
+            if not _put(score_q, item):
+                break
+    except BaseException as e:
+        _fail(e)
+    finally:
+        _put(score_q, _END)
+        scorer.join()
+        writer.join()
+        if failure and hasattr(source, 'close'):
+            source.close()
+    if failure:
+        raise failure[0]
+
+
+class FetchCheckpoint:
+    """마켓 날짜별 수집 결과 체크포인트 (SQLite 파일) — 재수집 시 성공분 재사용.
+
+    행: (market_date, ticker, status, fetched_at, payload JSON{'ntm','raw_trend'} 또는 {'error'}).
+    status: ok(ntm 있음) / empty(데이터없음) / error. 재수집은 ok만 재사용하고 나머지만 다시 fetch.
+    쓰기는 commit_every건마다 커밋(WAL) → 프로세스가 죽어도 그 전까지는 보존.
+    """
+
+    KEEP_DATES = 3  # 최근 마켓 날짜만 보관 (오래된 날짜 자동 정리)
+
+    def __init__(self, path, market_date, commit_every=50):
+        import sqlite3
+        self.market_date = market_date
+        self.commit_every = commit_every
+        self._n = 0
+        self.conn = sqlite3.connect(str(path))
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS fetch_checkpoint (
+                market_date TEXT, ticker TEXT, status TEXT, fetched_at TEXT, payload TEXT,
+                PRIMARY KEY (market_date, ticker)
+            )''')
+        self.conn.execute(
+            'DELETE FROM fetch_checkpoint WHERE market_date NOT IN '
+            '(SELECT DISTINCT market_date FROM fetch_checkpoint ORDER BY market_date DESC LIMIT ?)',
+            (self.KEEP_DATES,))
+        self.conn.commit()
+
+    def load(self):
+        """이 마켓 날짜의 성공(ok) 결과 → {ticker: {'ntm', 'raw_trend'}}."""
+        out = {}
+        for tk, payload in self.conn.execute(
+                "SELECT ticker, payload FROM fetch_checkpoint WHERE market_date=? AND status='ok'",
+                (self.market_date,)):
+            try:
+                out[tk] = json.loads(payload)
+            except ValueError:
+                pass
+        return out
+
+    def record(self, ticker, result):
+        if 'error' in result:
+            status = 'error'
+        elif result.get('ntm') is None:
+            status = 'empty'
+        else:
+            status = 'ok'
+        self.conn.execute(
+            'INSERT OR REPLACE INTO fetch_checkpoint VALUES (?, ?, ?, ?, ?)',
+            (self.market_date, ticker, status, datetime.now().isoformat(timespec='seconds'),
+             json.dumps(result, default=str)))
+        self._n += 1
+        if self._n % self.commit_every == 0:
+            self.conn.commit()
+
+    def wrap(self, stream):
+        """(ticker, result) 스트림을 그대로 흘리며 체크포인트에 기록."""
+        for t, res in stream:
+            self.record(t, res)
+            yield t, res
+        self.conn.commit()
+
+    def close(self):
+        try:
+            self.conn.commit()
+        finally:
+            self.conn.close()
+
+
+def checkpointed_stream(engine, tickers, checkpoint=None, log=None, **kw):
+    """체크포인트 성공분은 즉시 방출 + 나머지(누락·실패·데이터없음)만 engine.stream으로 수집."""
+    log = log or _default_log
+    cached = checkpoint.load() if checkpoint is not None else {}
+    cached = {t: cached[t] for t in tickers if t in cached}
+    todo = [t for t in tickers if t not in cached]
+    if cached:
+        log(f"  체크포인트 재사용: {len(cached)}종목 (재수집 {len(todo)}종목)")
+    for t, res in cached.items():
+        yield t, res
+    live = engine.stream(todo, **kw)
+    if checkpoint is not None:
+        live = checkpoint.wrap(live)
+    yield from live
+
+
+def engine_from_env(transport, log=None):
+    """운영 설정 (env 오버라이드)."""
+    workers = int(os.environ.get('EPS_FETCH_WORKERS', '12'))
+    return FetchEngine(
+        transport,
+        max_workers=workers,
+        rate=float(os.environ.get('EPS_FETCH_RATE', '4')),
+        max_rate=float(os.environ.get('EPS_FETCH_MAX_RATE', '30')),
+        max_seconds=float(os.environ.get('EPS_FETCH_MAX_SECONDS', '1500')),
+        log=log,
+    )
+
+
+# ============================================================
+# 트랜스포트
+# ============================================================
+
+class YFinanceTransport:
+    """운영 트랜스포트 — yf.Ticker → calculate_ntm_eps (HTTP 1회, eps_trend만).
+    .info는 fetch_revenue_growth()에서 별도 수집하므로 여기서 생략."""
+
+    def __init__(self, today=None):
+        self.today = today
+
+    def __call__(self, ticker):
+        import yfinance as yf
+        from eps_momentum_system import calculate_ntm_eps
+        stock = yf.Ticker(ticker)
+        ntm = calculate_ntm_eps(stock, self.today)
+        if ntm is None:
+            return {'ntm': None}
+        # _earnings_trend (calculate_ntm_eps 내부에서 이미 로드 → 캐시 히트)
+        raw_trend = None
+        try:
+            raw_trend = stock._analysis._earnings_trend
+        except Exception:
+            pass
+        return {'ntm': ntm, 'raw_trend': raw_trend}
+
+
+class HTTPTransport:
+    """quoteSummary(earningsTrend) 호환 엔드포인트 직접 호출 — 가짜 야후 서버 벤치/대체 소스용."""
+
+    def __init__(self, base_url, today=None, timeout=15):
+        self.base_url = base_url.rstrip('/')
+        self.today = today
+        self.timeout = timeout
+
+    def __call__(self, ticker):
+        import urllib.request
+        import urllib.error
+        from eps_momentum_system import calculate_ntm_eps_from_trend
+        url = f"{self.base_url}/v10/finance/quoteSummary/{ticker}?modules=earningsTrend"
+        try:
+            with urllib.request.urlopen(url, timeout=self.timeout) as resp:
+                payload = json.loads(resp.read().decode('utf-8'))
+        except urllib.error.HTTPError as e:
+            if e.code == 429:
+                raise RateLimited(f'429 Too Many Requests ({ticker})')
+            raise
+        try:
+            trend = payload['quoteSummary']['result'][0]['earningsTrend']['trend']
+        except (TypeError, KeyError, IndexError):
+            return {'ntm': None}
+        ntm = calculate_ntm_eps_from_trend(trend, self.today)
+        if ntm is None:
+            return {'ntm': None}
+        return {'ntm': ntm, 'raw_trend': trend}
+
+
+# ============================================================
+# 오프라인 벤치 — 로컬 가짜 야후 서버
+# ============================================================
+
+def _fake_trend(ticker, today):
+    """종목명 해시로 결정적인 earningsTrend payload 생성 (0q/+1q/0y/+1y)."""
+    import random
+    rnd = random.Random(ticker)
+    base = rnd.uniform(1.5, 12.0)
+    fy_end = datetime(today.year, 12, 31)
+    trend = []
+    for period, end, mult in (('0q', None, 0.25), ('+1q', None, 0.26),
+                              ('0y', fy_end, 1.0), ('+1y', fy_end.replace(year=fy_end.year + 1), 1.15)):
+        v = base * mult
+        drift = rnd.uniform(-0.02, 0.06)
+        et = {col: {'raw': round(v / (1 + drift * k), 4)}
+              for k, col in enumerate(('current', '7daysAgo', '30daysAgo', '60daysAgo', '90daysAgo'))}
+        trend.append({
+            'period': period, 'endDate': end.strftime('%Y-%m-%d') if end else None,
+            'epsTrend': et,
+            'epsRevisions': {'upLast30days': {'raw': rnd.randint(0, 8)},
+                             'downLast30days': {'raw': rnd.randint(0, 3)}},
+            'earningsEstimate': {'numberOfAnalysts': {'raw': rnd.randint(3, 30)}},
+        })
+    return trend
+
+
+def serve_fake_yahoo(port=0, rps_limit=20.0, latency=0.05):
+    """가짜 야후 서버 기동 → (server, base_url). 최근 1초 요청 수가 rps_limit 초과 시 429."""
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+    hits = deque()
+    lock = threading.Lock()
+    today = datetime.now()
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            now = time.monotonic()
+            with lock:
+                while hits and now - hits[0] > 1.0:
+                    hits.popleft()
+                hits.append(now)
+                over = len(hits) > rps_limit
+            time.sleep(latency)
+            if over:
+                self.send_response(429)
+                self.end_headers()
+                self.wfile.write(b'Too Many Requests')
+                return
+            ticker = self.path.split('/quoteSummary/')[-1].split('?')[0]
+            body = json.dumps({'quoteSummary': {'result': [
+                {'earningsTrend': {'trend': _fake_trend(ticker, today)}}]}}).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
+
+
+def _legacy_engine(transport, log=None):
+    """벤치 기준선 — 구 배치 처리량 고정(적응 없음): 30종목/배치 · 2스레드 · 배치간 1.5초 ≈ 1.3 req/s 상당."""
+    return FetchEngine(transport, max_workers=2, rate=1.3, min_rate=1.3, max_rate=1.3,
+                       concurrency=2, max_attempts=2, log=log)
+
+
+def _bench(n=1290, rps_limit=20.0):
+    server, base = serve_fake_yahoo(rps_limit=rps_limit)
+    tickers = [f'T{i:04d}' for i in range(n)]
+    # 운영 모양: 우선 종목(보유 0 / 전일 Top30 1)이 유니버스 뒤쪽(알파벳 순)에 흩어져 있음
+    prio = {t: (0 if i % 3 == 0 else 1) for i, t in enumerate(tickers[-90::3])}
+    try:
+        for label, make in (('적응형', engine_from_env), ('구 배치 등가', _legacy_engine)):
+            eng = make(HTTPTransport(base), log=_default_log)
+            eng.ctl.cooldown = 2.0
+            res = eng.run(tickers, priority=prio, is_valid=lambda d: d.get('ntm') is not None)
+            ok = sum(1 for d in res.values() if d.get('ntm'))
+            s = eng.stats
+            print(f"[{label}] {ok}/{n} 성공 · {s['elapsed']:.1f}초 · 요청 {s['requests']} · "
+                  f"429 {s['throttled']}건(감속 {s['throttle_events']}회) · "
+                  f"최고 {s['peak_rate']:.1f} req/s · 종료 {s['final_rate']:.1f} req/s · "
+                  f"우선 {s['priority']}종목 {s['priority_elapsed']:.1f}초 완료")
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    if '--bench' in sys.argv:
+        _i = sys.argv.index('--bench')
+        _n = int(sys.argv[_i + 1]) if len(sys.argv) > _i + 1 and sys.argv[_i + 1].isdigit() else 1290
+        _bench(_n, rps_limit=float(os.environ.get('BENCH_RPS_LIMIT', '20')))
+    else:
+        print(__doc__)
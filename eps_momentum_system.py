@@ -296,9 +296,6 @@ def calculate_ntm_eps(stock, today=None):
         dict {'current': float, '7d': float, '30d': float, '60d': float, '90d': float}
         or None if data unavailable
     """
-    if today is None:
-        today = datetime.now()
-
     eps_trend = stock.eps_trend
     if eps_trend is None or len(eps_trend) == 0:
         return None
@@ -312,6 +309,36 @@ def calculate_ntm_eps(stock, today=None):
     except (AttributeError, Exception):
         return None
 
+    return _blend_ntm(lambda p, col: eps_trend.loc[p, col], raw_trend, today)
+
+
+def calculate_ntm_eps_from_trend(raw_trend, today=None):
+    """NTM EPS 계산 — raw earningsTrend payload(quoteSummary trend 리스트)에서 직접
+
+    yf.Ticker 없이 같은 결과를 내는 경로 (eps_fetch HTTP 트랜스포트·오프라인 벤치용).
+    yfinance eps_trend와 동일하게 앞 4개 period의 epsTrend.*.raw만 사용한다.
+
+    Returns:
+        dict {'current', '7d', '30d', '60d', '90d'} or None
+    """
+    vals = {}
+    for item in (raw_trend or [])[:4]:
+        et = item.get('epsTrend') or {}
+        vals[item.get('period')] = {k: v.get('raw') for k, v in et.items()
+                                    if isinstance(v, dict) and v}
+    if '0y' not in vals or '+1y' not in vals:
+        return None
+    return _blend_ntm(lambda p, col: vals[p].get(col, float('nan')), raw_trend, today)
+
+
+def _blend_ntm(get_value, raw_trend, today=None):
+    """0y/+1y 추정치를 스냅샷별 forward 12개월 윈도우로 시간가중 블렌딩 (공통 본체)
+
+    get_value(period, col) → 해당 스냅샷 EPS 추정치 (결측은 NaN/None)
+    """
+    if today is None:
+        today = datetime.now()
+
     periods = {}
     for item in raw_trend:
         p = item.get('period')
@@ -350,8 +377,8 @@ def calculate_ntm_eps(stock, today=None):
         if total_overlap == 0:
             return None
 
-        v0 = eps_trend.loc['0y', col]
-        v1 = eps_trend.loc['+1y', col]
+        v0 = get_value('0y', col)
+        v1 = get_value('+1y', col)
 
         if pd.isna(v0) or pd.isna(v1):
             return None
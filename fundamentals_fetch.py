@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""펀더멘털 수집 — 다종목 quote 배치 + 종목별 quoteSummary(필요 모듈만) (fetch_revenue_growth · gap_sleeve)
+
+구 방식: 종목마다 yf.Ticker(t).info → 내부적으로 quoteSummary(5모듈) + v7 quote(1종목) = HTTP 2회.
+  fetch_revenue_growth ~1,300종목 × 2 ≈ 2,600회 (5스레드·배치 50·sleep 0.5),
+  gap_sleeve.build_trailing_eps_cache도 financialCurrency/trailingEps 두 값 때문에 종목마다 .info.
+현 방식:
+  - v7/finance/quote 다종목 배치(100개/요청, ~13회) → marketCap·trailingEps·financialCurrency·
+    shortName/longName·earningsTimestamp*. gap_sleeve는 이것만으로 충분 → .info 0회.
+  - quote에 없는 재무 필드(financialData 마진·ROE·FCF·부채, defaultKeyStatistics EV·beta·공매도,
+    assetProfile industry)만 종목별 quoteSummary 1회(3모듈) — .info 대비 요청 절반.
+    eps_fetch.FetchEngine(토큰버킷 + AIMD)으로 흘려 429 나는 날은 스스로 감속.
+  - v71.2 교정(quarterly_income_stmt)·어닝서프(earnings_history)는 extra 훅으로 해당 종목만 추가 호출.
+info dict 키는 yfinance .info와 동일(모듈 평탄화·raw 값) → 기존 소비 코드(_get_alpha_signals 등) 그대로.
+quote 배치가 통째로 실패하면(crumb/엔드포인트 변경) 종목별 .info로 자동 폴백.
+"""
+import time
+import threading
+
+QUOTE_URL = 'https://query1.finance.yahoo.com/v7/finance/quote'
+SUMMARY_URL = 'https://query2.finance.yahoo.com/v10/finance/quoteSummary'
+SUMMARY_MODULES = ('financialData', 'defaultKeyStatistics', 'assetProfile')
+QUOTE_BATCH = 100
+
+# v7 quote 키 → .info 키 (이름이 다른 것만)
+_QUOTE_ALIASES = {'epsTrailingTwelveMonths': 'trailingEps', 'epsForward': 'forwardEps'}
+
+
+def _raw_value(v):
+    if isinstance(v, dict):
+        return v.get('raw') if 'raw' in v else None
+    return v
+
+
+def flatten_quote_summary(result):
+    """quoteSummary result[0] {module: {key: 값|{raw,fmt}}} → 평탄 dict (yfinance .info와 같은 규칙)."""
+    info = {}
+    for mod in (result or {}).values():
+        if not isinstance(mod, dict):
+            continue
+        for k, v in mod.items():
+            v = _raw_value(v)
+            if v is not None and not isinstance(v, (dict, list)):
+                info[k] = v
+    return info
+
+
+def info_from_quote(q):
+    """v7 quote 1건 → .info 키 이름 dict."""
+    info = {k: v for k, v in q.items() if v is not None and not isinstance(v, (dict, list))}
+    for src, dst in _QUOTE_ALIASES.items():
+        if src in info and dst not in info:
+            info[dst] = info[src]
+    return info
+
+
+class YahooFundamentals:
+    """야후 quote/quoteSummary 직접 호출 (yfinance 세션·crumb 재사용). get_json 교체 가능(테스트·대체 소스)."""
+
+    def __init__(self, get_json=None, quote_batch=QUOTE_BATCH, pause=0.3):
+        self._get_json = get_json
+        self.quote_batch = quote_batch
+        self.pause = pause
+        self.n_requests = 0
+        self._lock = threading.Lock()
+
+    def _get(self, url, params):
+        if self._get_json is None:
+            from yfinance.data import YfData
+            self._get_json = YfData().get_raw_json
+        with self._lock:
+            self.n_requests += 1
+        return self._get_json(url, params=params)
+
+    def quotes(self, symbols, log=None):
+        """→ {symbol: info dict}. 배치 실패는 1회 재시도 후 건너뜀(해당 종목은 결과에 없음)."""
+        symbols = list(dict.fromkeys(symbols))
+        out = {}
+        for i in range(0, len(symbols), self.quote_batch):
+            batch = symbols[i:i + self.quote_batch]
+            for attempt in range(2):
+                try:
+                    payload = self._get(QUOTE_URL, {'symbols': ','.join(batch), 'formatted': 'false'})
+                    for q in ((payload or {}).get('quoteResponse') or {}).get('result') or []:
+                        if q.get('symbol'):
+                            out[q['symbol']] = info_from_quote(q)
+                    break
+                except Exception as e:
+                    if attempt == 1 and log:
+                        log(f"  quote 배치 실패 ({batch[0]}..{batch[-1]}, {len(batch)}종목): {e}", "WARN")
+                    time.sleep(self.pause * 10)
+            if i + self.quote_batch < len(symbols):
+                time.sleep(self.pause)
+        return out
+
+    def summary_modules(self, symbol, modules=SUMMARY_MODULES):
+        """종목 1개 quoteSummary(지정 모듈만) → {모듈: 평탄 dict} (결과 없음 = {})."""
+        payload = self._get(f'{SUMMARY_URL}/{symbol}',
+                            {'modules': ','.join(modules), 'formatted': 'false', 'symbol': symbol})
+        res = ((payload or {}).get('quoteSummary') or {}).get('result') or []
+        if not res:
+            return {}
+        return {m: flatten_quote_summary({m: res[0].get(m)}) for m in modules if m in res[0]}
+
+    def summary(self, symbol, modules=SUMMARY_MODULES):
+        """종목 1개 quoteSummary(지정 모듈만) → 평탄 dict (결과 없음 = {})."""
+        info = {}
+        for flat in self.summary_modules(symbol, modules).values():
+            info.update(flat)
+        return info
+
+
+def fetch_fundamentals(tickers, extra=None, log=None, source=None, max_workers=5,
+                       quotes=None, modules=None, cached=None):
+    """tickers → ({ticker: info dict | None}, {ticker: {모듈: 평탄 dict}}, stats).
+
+    extra(ticker, info): 종목별 추가 수집 훅 (info를 제자리 수정 — v71.2 교정·어닝서프).
+        quoteSummary를 실제로 호출한 종목에만 실행.
+    quotes: 미리 받은 quote 배치 결과 (None이면 여기서 수집).
+    modules: {ticker: 모듈 튜플} — 종목별 quoteSummary 대상 (None = 전 종목 SUMMARY_MODULES).
+        빠진 종목은 요청 없이 quote + cached 값만 (refresh_schedule 회전 갱신).
+    cached: {ticker: info dict} — 요청 안 한 필드 자리의 직전 수집값. 우선순위: 오늘 quoteSummary > 오늘 quote > cached.
+    """
+    from eps_fetch import FetchEngine, _default_log
+    log = log or _default_log
+    tickers = list(dict.fromkeys(tickers))
+    src = source or YahooFundamentals()
+    cached = cached or {}
+
+    n_quote_req = 0
+    if quotes is None:
+        quotes = {}
+        try:
+            quotes = src.quotes(tickers, log)
+        except Exception as e:
+            log(f"  quote 배치 경로 실패 → 종목별 .info 폴백: {e}", "WARN")
+        n_quote_req = src.n_requests
+    batched = bool(quotes)
+    if not batched:
+        log("  quote 배치 결과 없음 → 종목별 .info 폴백", "WARN")
+        modules = None  # .info는 모듈 선택 불가 → 전 종목 호출
+
+    def _base(ticker):
+        info = dict(cached.get(ticker) or {})
+        info.update(quotes.get(ticker) or {})
+        return info
+
+    def _transport(ticker):
+        info = _base(ticker)
+        fetched = {}
+        if batched:
+            fetched = src.summary_modules(ticker, (modules or {}).get(ticker, SUMMARY_MODULES))
+            for flat in fetched.values():
+                info.update(flat)
+        else:
+            import yfinance as yf
+            info.update(yf.Ticker(ticker).info or {})
+            fetched = {'info': dict(info)}
+        if extra is not None:
+            extra(ticker, info)
+        return {'info': info, 'modules': fetched}
+
+    targets = tickers if modules is None else [t for t in tickers if t in modules]
+    engine = FetchEngine(_transport, max_workers=max_workers, rate=4.0, max_rate=15.0,
+                         concurrency=max_workers, max_attempts=2, log=log)
+    fetched = engine.run(targets) if targets else {}
+
+    results, fetched_modules = {}, {}
+    for t in tickers:
+        r = fetched.get(t)
+        if r is not None and 'info' in r:
+            results[t] = r['info'] or None
+            fetched_modules[t] = r['modules']
+        else:
+            # 회전 갱신 제외·호출 실패 종목: quote + 직전값 (둘 다 없으면 None — 호출측 DB fallback)
+            results[t] = _base(t) or None
+    stats = {'batched': batched, 'quote_requests': n_quote_req, 'quotes': len(quotes),
+             'per_ticker_requests': engine.stats.get('requests', 0) if targets else 0,
+             'carried': len(tickers) - len(targets),
+             'throttled': engine.stats.get('throttled', 0) if targets else 0}
+    return results, fetched_modules, stats
@@ -16,9 +16,9 @@ gap = NTM EPS / TTM 실적 EPS = trailing PER / forward PER = 시장이 기대
 import os
 import sys
 import json
-import sqlite3
 from pathlib import Path
 from datetime import datetime, timedelta
+from db_access import connect as db_connect  # 공유 연결 + pragma (읽기 전용 URI)
 
 PROJECT_ROOT = Path(__file__).resolve().parent
 DB_PATH = PROJECT_ROOT / 'eps_momentum_data.db'
@@ -34,7 +34,8 @@ MIN_TRAILING_EPS = 0.5    # 턴어라운드(저베이스 gap 폭발) 제외
 MAX_GAP = 10.0            # speculative tail 제외
 MIN_DOLLAR_VOL = float(os.environ.get('SLEEVE_MIN_DV', '1000'))  # $M. $1B+ 유동성 필터(검증: +47→+67%·MDD-20→-18%, 얇은종목 제외)
 REPORT_LAG_DAYS = 45      # 분기말 → 공시 지연(PIT)
-TEPS_CACHE_STALE_DAYS = 7  # 트레일링 EPS 캐시 갱신 주기
+TEPS_CACHE_STALE_DAYS = 7  # 트레일링 EPS 캐시 나이 상한 (이상이면 예산 무관 갱신)
+TEPS_REFRESH_BUDGET = float(os.environ.get('SLEEVE_TEPS_BUDGET', '0.15'))  # 하루 회전 갱신 비율(≈1/상한)
 
 
 def log(msg):
@@ -65,31 +66,44 @@ def build_trailing_eps_cache(tickers, force=False):
     CACHE_DIR.mkdir(exist_ok=True)
     cache = _load_teps_cache()
     meta = cache.get('_meta', {})
-    today = datetime.now().strftime('%Y-%m-%d')
-
-    def _stale(tk):
-        fetched = meta.get(tk)
-        if not fetched:
-            return True
+    # 수집일(meta)·나이 계산은 UTC 날짜 (refresh_schedule.utc_today) — 실행 머신 TZ 무관
+    from refresh_schedule import plan_refresh, utc_today
+    today = utc_today()
+
+    # 회전 갱신 (refresh_schedule.plan_refresh): 구 '7일 지나면 전 종목 한꺼번에'(같은 날 수집된 종목이
+    #   7일마다 동시에 만료 → 그날만 ~1,000회 몰림) 대신 하루 예산만큼 오래된 순. 미수집·상한 도달은 예산 무관.
+    ages = {}
+    for tk, fetched in meta.items():
         try:
-            age = (datetime.strptime(today, '%Y-%m-%d') - datetime.strptime(fetched, '%Y-%m-%d')).days
-            return age >= TEPS_CACHE_STALE_DAYS
+            ages[tk] = (datetime.strptime(today, '%Y-%m-%d') - datetime.strptime(fetched, '%Y-%m-%d')).days
         except Exception:
-            return True
-
-    to_fetch = [t for t in tickers if force or t not in cache or _stale(t)]
+            pass
+    if force:
+        to_fetch = list(tickers)
+    else:
+        to_fetch, _ = plan_refresh(tickers, ages, TEPS_REFRESH_BUDGET, TEPS_CACHE_STALE_DAYS)
     if not to_fetch:
         log(f"trailing EPS 캐시 최신 ({len(cache)-1 if '_meta' in cache else len(cache)}종목)")
         return cache
     log(f"trailing EPS 캐시 갱신: {len(to_fetch)}종목 fetch")
+    # financialCurrency/trailingEps는 다종목 quote 배치(100개/요청)로 선조회 → 종목별 .info(HTTP 2회) 생략.
+    #   배치에서 빠진 종목만 .info 폴백.
+    quotes = {}
+    try:
+        from fundamentals_fetch import YahooFundamentals
+        quotes = YahooFundamentals().quotes(to_fetch, log=lambda m, level='INFO': log(m))
+    except Exception as e:
+        log(f"quote 배치 실패 → 종목별 .info: {e}")
     ok = 0
     for tk in to_fetch:
         try:
             t = yf.Ticker(tk)
-            try:
-                inf = t.info or {}
-            except Exception:
-                inf = {}
+            inf = quotes.get(tk)
+            if inf is None:
+                try:
+                    inf = t.info or {}
+                except Exception:
+                    inf = {}
             # 재무 통화가 USD가 아니면(외국 ADR: TSM=TWD, SKHY=KRW 등) TTM이 현지통화라
             # USD 추정치와 나눗셈 시 gap이 엉터리 → 캐시 제외(missing=pass)
             fc = inf.get('financialCurrency')
@@ -141,16 +155,8 @@ def build_trailing_eps_cache(tickers, force=False):
 
 def pit_trailing_eps(cache, ticker, date_str):
     """date_str 시점 PIT trailing TTM EPS (보고지연 반영). 없으면 None."""
-    rec = cache.get(ticker)
-    if not rec:
-        return None
-    val = None
-    for rdate, ttm in rec:
-        if rdate <= date_str:
-            val = ttm
-        else:
-            break
-    return val
+    from asof import pit_value
+    return pit_value(cache.get(ticker), date_str)
 
 
 # ════════════════════════════════════════════════════════════
@@ -158,7 +164,7 @@ def pit_trailing_eps(cache, ticker, date_str):
 # ════════════════════════════════════════════════════════════
 def get_eligible_universe(today_str):
     """그날 EPS-screen eligible (composite_rank not null) + ntm_current + dollar_volume."""
-    conn = sqlite3.connect(DB_PATH)
+    conn = db_connect(DB_PATH, readonly=True)
     cur = conn.cursor()
     rows = cur.execute(
         "SELECT ticker, ntm_current, dollar_volume_30d, price FROM ntm_screening "
@@ -171,7 +177,7 @@ def get_eligible_universe(today_str):
 def _dollar_volumes(tickers, today_str):
     """후보 종목 30일 평균 거래대금($M). DB(top30) 우선, 없으면 yfinance(Close×Volume)."""
     out = {}
-    conn = sqlite3.connect(DB_PATH)
+    conn = db_connect(DB_PATH, readonly=True)
     cur = conn.cursor()
     for tk in tickers:
         r = cur.execute("SELECT dollar_volume_30d FROM ntm_screening WHERE date=? AND ticker=?",
@@ -264,7 +270,7 @@ def fetch_prices(tickers, today_str):
     """held/후보 종목의 today_str 종가 (DB 우선, 없으면 yfinance)."""
     prices = {}
     # DB 우선 (당일 eligible이면 있음)
-    conn = sqlite3.connect(DB_PATH)
+    conn = db_connect(DB_PATH, readonly=True)
     cur = conn.cursor()
     for tk in tickers:
         r = cur.execute("SELECT price FROM ntm_screening WHERE date=? AND ticker=?",
@@ -303,7 +309,7 @@ def run_sleeve(today_str=None, test_mode=True, private=True):
         return None
     if today_str is None:
         # DB 최신일
-        conn = sqlite3.connect(DB_PATH)
+        conn = db_connect(DB_PATH, readonly=True)
         today_str = conn.execute(
             "SELECT MAX(date) FROM ntm_screening WHERE composite_rank IS NOT NULL").fetchone()[0]
         conn.close()
@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+"""종목·필드별 '최신 유효값' 물질화 테이블 + as-of 조회 (글리치 carry-forward · 회전수집 60일 창)
+
+배경: 매 실행마다 전 이력을 훑어 종목별 마지막 유효값을 다시 구함 — 날짜가 쌓일수록 계속 느려짐.
+  unified_vm_track._carry_forward_windows   ntm_current..ntm_90d  (date < 오늘 전 행 ORDER BY date)
+  us_candidates · daily_runner._vm_fund_snapshot   OM/FCF/ROE 60일 창 (회전수집 — 당일 20~80%만 채워짐)
+  unified_vm_track._us_cards   카드 9필드 60일 창 (종목마다 쿼리)
+방식: latest_valid(ticker, field) = 마지막 유효 관측 (date, value) + 그 직전 유효 관측 (prev_date, prev_value).
+  update_latest(conn, date): 그날 행 중 유효값만 SQL 한 문장/필드로 upsert (무효값은 기존 값 보존).
+    같은 날 재실행으로 유효→무효가 된 종목은 이력에서 그 종목만 재계산.
+  sync_latest(conn): 동기화 마커(latest_valid_sync.through) 이후 날짜를 차례로 반영. 마커 없음·필드 목록
+    변경 → 윈도우 함수 1회로 전체 재생성. 과거 날짜를 고친 백필 스크립트 뒤에는 --rebuild.
+    마커에 through 날짜 행의 지문(fp — 추적 필드 값 해시)도 기록 → 동기화 뒤 같은 날 행이 바뀌면(회전수집
+    재기록·재실행) 날짜 비교만으론 못 잡는 불일치를 감지.
+  latest_asof(conn, fields, date, inclusive, max_age_days, tickers):
+    '날짜 date 이전(inclusive면 이하) 최신 유효값' — 오늘 기준 조회는 (date, prev) 두 칸으로 항상 해결
+    = O(유니버스) 키 조회. 과거 날짜(replay)라 두 칸 모두 date 이후인 종목만 이력 창 스캔 1회로 보충.
+    마커가 DB 최신 날짜와 다르거나(동기화 안 된 DB — KR DB 등) 그날 행 지문이 달라졌으면(동기화 뒤 같은 날
+    갱신) None → 호출측 구 스캔 경로. 지문 확인 = 최신 날짜 행만 읽음 (O(유니버스)).
+유효 규칙: EPS 창(ntm_*) = 양수 (0/None 글리치 제외, 구 `v and v > 0`), 나머지 = NOT NULL.
+커밋은 호출측 책임 (ntm_store·refresh_schedule과 동일).
+CLI: python latest_valid.py [--db PATH] [--rebuild]
+"""
+import os
+import json
+import sqlite3
+import hashlib
+from datetime import datetime, timedelta
+
+TABLE = 'latest_valid'
+SYNC_TABLE = 'latest_valid_sync'
+
+NTM_WINDOWS = ('ntm_current', 'ntm_7d', 'ntm_30d', 'ntm_60d', 'ntm_90d')
+FUND_FIELDS = ('operating_margin', 'free_cashflow', 'roe')
+CARD_FIELDS = ('num_analysts', 'rev_up30', 'rev_down30', 'rev_growth', 'market_cap',
+               'dollar_volume_30d', 'roe', 'free_cashflow', 'operating_margin')
+FIELDS = tuple(dict.fromkeys(NTM_WINDOWS + FUND_FIELDS + CARD_FIELDS))
+POSITIVE_FIELDS = frozenset(NTM_WINDOWS)
+
+
+def _valid_sql(field, alias=''):
+    col = f'{alias}{field}'
+    return f'{col} > 0' if field in POSITIVE_FIELDS else f'{col} IS NOT NULL'
+
+
+def _is_valid(field, v):
+    if field in POSITIVE_FIELDS:
+        return bool(v) and v > 0
+    return v is not None
+
+
+def init_latest_table(conn):
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {TABLE} (
+            ticker      TEXT NOT NULL,
+            field       TEXT NOT NULL,
+            date        TEXT NOT NULL,
+            value,                  -- 타입 없음(원 컬럼 값 그대로 — INTEGER가 float로 안 바뀜)
+            prev_date   TEXT,
+            prev_value,
+            PRIMARY KEY (ticker, field)
+        )
+    ''')
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {SYNC_TABLE} (
+            id       INTEGER PRIMARY KEY CHECK (id = 1),
+            through  TEXT,
+            fields   TEXT,
+            fp       TEXT
+        )
+    ''')
+    if 'fp' not in {r[1] for r in conn.execute(f'PRAGMA table_info({SYNC_TABLE})')}:
+        conn.execute(f'ALTER TABLE {SYNC_TABLE} ADD COLUMN fp TEXT')
+
+
+def tracked_fields(conn):
+    """FIELDS 중 ntm_screening에 실제로 있는 컬럼 (마이그레이션 전 DB 대응)."""
+    have = {r[1] for r in conn.execute('PRAGMA table_info(ntm_screening)')}
+    return [f for f in FIELDS if f in have]
+
+
+def _history_sql(field, ticker_filter=''):
+    """필드 1개의 종목별 마지막·직전 유효 관측 → latest_valid 행 (윈도우 함수)."""
+    return f'''
+        INSERT OR REPLACE INTO {TABLE} (ticker, field, date, value, prev_date, prev_value)
+        SELECT ticker, '{field}', date, v, pd, pv FROM (
+            SELECT ticker, date, {field} AS v,
+                   LAG(date) OVER w AS pd, LAG({field}) OVER w AS pv,
+                   ROW_NUMBER() OVER (PARTITION BY ticker ORDER BY date DESC) AS rn
+            FROM ntm_screening WHERE {_valid_sql(field)}{ticker_filter}
+            WINDOW w AS (PARTITION BY ticker ORDER BY date)
+        ) WHERE rn = 1
+    '''
+
+
+def _day_fp(conn, date, fields):
+    """date 하루치 행의 추적 필드 지문 (종목순 값 해시) — 값 하나만 바뀌어도 달라짐."""
+    h = hashlib.blake2b(digest_size=16)
+    for row in conn.execute(f'SELECT ticker, {", ".join(fields)} FROM ntm_screening WHERE date=? ORDER BY ticker',
+                            (date,)):
+        h.update(repr(row).encode())
+    return h.hexdigest()
+
+
+def _set_marker(conn, through, fields):
+    conn.execute(f'INSERT OR REPLACE INTO {SYNC_TABLE} (id, through, fields, fp) VALUES (1, ?, ?, ?)',
+                 (through, json.dumps(fields), _day_fp(conn, through, fields) if through else None))
+
+
+def rebuild_latest(conn, fields=None):
+    """이력 전체에서 재생성. Returns: 동기화 기준 날짜."""
+    init_latest_table(conn)
+    fields = fields or tracked_fields(conn)
+    conn.execute(f'DELETE FROM {TABLE}')
+    for f in fields:
+        conn.execute(_history_sql(f))
+    through = conn.execute('SELECT MAX(date) FROM ntm_screening').fetchone()[0]
+    _set_marker(conn, through, fields)
+    return through
+
+
+def update_latest(conn, date, fields=None):
+    """date 하루치 유효값 반영 (SQL upsert — 더 새 날짜가 들어오면 기존 값은 prev로 밀림)."""
+    fields = fields or tracked_fields(conn)
+    for f in fields:
+        # 같은 날 재실행으로 유효값이 사라진 종목 → 그 종목만 이력에서 재계산
+        gone = [r[0] for r in conn.execute(
+            f'SELECT l.ticker FROM {TABLE} l WHERE l.field=? AND l.date=? AND NOT EXISTS '
+            f'(SELECT 1 FROM ntm_screening s WHERE s.date=l.date AND s.ticker=l.ticker AND {_valid_sql(f, "s.")})',
+            (f, date))]
+        if gone:
+            conn.executemany(f'DELETE FROM {TABLE} WHERE field=? AND ticker=?', [(f, t) for t in gone])
+            conn.execute(_history_sql(f, f" AND ticker IN ({','.join('?' * len(gone))})"), gone)
+        conn.execute(f'''
+            INSERT INTO {TABLE} (ticker, field, date, value)
+            SELECT ticker, ?, date, {f} FROM ntm_screening WHERE date=? AND {_valid_sql(f)}
+            ON CONFLICT(ticker, field) DO UPDATE SET
+                prev_date  = CASE WHEN excluded.date > {TABLE}.date THEN {TABLE}.date ELSE {TABLE}.prev_date END,
+                prev_value = CASE WHEN excluded.date > {TABLE}.date THEN {TABLE}.value ELSE {TABLE}.prev_value END,
+                date = excluded.date, value = excluded.value
+            WHERE excluded.date >= {TABLE}.date
+        ''', (f, date))
+
+
+def _marker(conn):
+    """(through, fields, fp) — 테이블·fp 컬럼 없음(구 DB) = (None, None, None)."""
+    try:
+        r = conn.execute(f'SELECT through, fields, fp FROM {SYNC_TABLE} WHERE id=1').fetchone()
+    except sqlite3.OperationalError:
+        return None, None, None
+    return (r[0], json.loads(r[1] or '[]'), r[2]) if r else (None, None, None)
+
+
+def sync_latest(conn, rebuild=False, log=None):
+    """마커 이후(마커 날짜 포함 — 지문이 바뀐 당일 후속 기록 반영) 날짜 반영. Returns: 반영한 날짜 수 (재생성 = -1)."""
+    init_latest_table(conn)
+    fields = tracked_fields(conn)
+    through, synced_fields, fp = _marker(conn)
+    if rebuild or through is None or synced_fields != fields:
+        through = rebuild_latest(conn, fields)
+        if log:
+            log(f"  latest_valid 재생성: {len(fields)}필드 (기준 {through})")
+        return -1
+    dates = [r[0] for r in conn.execute(
+        'SELECT DISTINCT date FROM ntm_screening WHERE date >= ? ORDER BY date', (through,))]
+    if dates and dates[0] == through and fp == _day_fp(conn, through, fields):
+        dates = dates[1:]  # 마커 날짜 그대로 — 재반영 불필요
+    for d in dates:
+        update_latest(conn, d, fields)
+    if dates:
+        _set_marker(conn, dates[-1], fields)
+    return len(dates)
+
+
+def _cutoff(date, max_age_days):
+    return (datetime.strptime(date, '%Y-%m-%d') - timedelta(days=max_age_days)).strftime('%Y-%m-%d')
+
+
+def latest_asof(conn, fields, date, inclusive=False, max_age_days=None, tickers=None):
+    """{ticker: {field: 값}} — date 이전(inclusive=True면 이하) 마지막 유효값, max_age_days 창 안만.
+
+    구 'SELECT ... WHERE date<(=)? [AND date>=date(?, -N day)] ORDER BY date' 전방채움과 동일한 결과.
+    테이블이 없거나 마커가 DB 최신 날짜·그날 행 지문과 어긋나면 None (호출측 구 경로).
+    """
+    through, synced, fp = _marker(conn)
+    if through is None or fp is None or not set(fields) <= set(synced):
+        return None
+    if through != conn.execute('SELECT MAX(date) FROM ntm_screening').fetchone()[0]:
+        return None
+    if fp != _day_fp(conn, through, synced):
+        return None  # 동기화 뒤 같은 날 행이 바뀜
+    fields = list(fields)
+    want = set(tickers) if tickers is not None else None
+    cut = _cutoff(date, max_age_days) if max_age_days is not None else None
+
+    def _ok(d):
+        return d is not None and (d <= date if inclusive else d < date)
+
+    out, deep = {}, {}
+    for tk, f, d, v, pd, pv in conn.execute(
+            f'SELECT ticker, field, date, value, prev_date, prev_value FROM {TABLE} '
+            f'WHERE field IN ({",".join("?" * len(fields))})', fields):
+        if want is not None and tk not in want:
+            continue
+        if _ok(d):
+            hit = (d, v)
+        elif _ok(pd):
+            hit = (pd, pv)
+        elif pd is not None:
+            deep.setdefault(f, set()).add(tk)  # 두 칸 모두 date 이후 — 더 과거 이력 필요
+            continue
+        else:
+            continue
+        if cut is None or hit[0] >= cut:
+            out.setdefault(tk, {})[f] = hit[1]
+
+    if deep:
+        # 과거 날짜 as-of: 필요한 필드·종목만 이력 창 1회 스캔
+        dfields = list(deep)
+        sql = (f'SELECT ticker, {", ".join(dfields)} FROM ntm_screening '
+               f'WHERE date {"<=" if inclusive else "<"} ?' + (' AND date >= ?' if cut else '') + ' ORDER BY date')
+        for row in conn.execute(sql, (date, cut) if cut else (date,)):
+            tk = row[0]
+            for i, f in enumerate(dfields, start=1):
+                if tk in deep[f] and _is_valid(f, row[i]):
+                    out.setdefault(tk, {})[f] = row[i]
+    return out
+
+
+def main(argv=None):
+    import argparse
+    ap = argparse.ArgumentParser(description='latest_valid 동기화 (증분 / --rebuild 전체)')
+    ap.add_argument('--db', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'eps_momentum_data.db'))
+    ap.add_argument('--rebuild', action='store_true')
+    args = ap.parse_args(argv)
+    if not os.path.exists(args.db):
+        print(f"DB 없음: {args.db}")
+        return 2
+    conn = sqlite3.connect(args.db)
+    n = sync_latest(conn, rebuild=args.rebuild, log=print)
+    conn.commit()
+    conn.close()
+    print('재생성' if n < 0 else f'{n}일 반영')
+    return 0
+
+
+if __name__ == '__main__':
+    import sys
+    sys.exit(main())
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""종목·날짜 사전 인코딩 — tickers(id, symbol, market) · dates(id, date) + 정수 키 팩트 테이블 + 호환 뷰
+
+배경: ntm_screening·ntm_signals 등은 행마다 TEXT ticker('NVDA')·TEXT date('2026-06-11', 10바이트)를 반복 저장하고
+  PK 인덱스에도 한 번 더 저장. 날짜×종목 조인도 문자열 비교.
+방식:
+  본 DB: tickers·dates 사전 — 콜드 이동(cold_store.archive_cold, COLD_ARCHIVE=1 opt-in)이 매번 sync_dict로
+    생성·증분(새 종목·날짜만 INSERT OR IGNORE). 이동이 꺼진 기본 구성에선 만들지 않음 (마이그레이션 없음 —
+    안 쓰이는 사전 테이블이 매일 커밋되는 DB에 동기화 없이 남지 않게).
+    id는 추가만 (재사용·재번호 X) → 어느 파일에서든 같은 종목 = 같은 id.
+  인코딩 저장: create_encoded(conn, schema, table, col_types) — {table}_enc(date_id, ticker_id, …) WITHOUT ROWID
+    (PK가 곧 테이블 — 별도 인덱스 없음) + 같은 이름의 뷰 {table}(사전 조인으로 date·ticker 복원)
+    → 기존 SELECT SQL 무변경. 사전은 같은 파일에 사본 (뷰는 자기 DB 객체만 참조 가능).
+    행 채우기 = insert_encoded(conn, schema, table, cols, where_sql) (본 DB 사전으로 id 치환),
+    새 컬럼 = add_encoded_columns.
+  적용 대상 = 콜드 파티션(cold_store — 쓰기 1회·이후 읽기 전용). 본 DB 라이브 테이블은 TEXT 키 유지:
+    SQLite는 뷰에 UPSERT(ON CONFLICT) 불가 → ntm_store·연구 스크립트의 기록 경로가 깨짐.
+    라이브 구간은 15개월로 고정(cold_store)이라 증가분은 전부 인코딩 파티션으로 감.
+  정수 키 조인: {table}_enc끼리 (date_id, ticker_id) 직접 조인 (ntm_screening_enc ⋈ ntm_signals_enc).
+인코딩 이전에 만든 TEXT 콜드 파티션은 그대로 읽고 이어 씀 (변환은 python cold_store.py --restore 후 재이동).
+커밋은 호출측 책임.
+CLI: python ntm_dict.py [--db PATH] — 사전 동기화 + 크기 요약
+"""
+import os
+import sqlite3
+from pathlib import Path
+
+TICKERS = 'tickers'
+DATES = 'dates'
+ENC_SUFFIX = '_enc'
+KEY_COLS = ('date', 'ticker')
+
+
+def market_of(conn):
+    """본 DB 파일명으로 시장 구분 (eps_momentum_data_kr.db = KR, 그 외 US)."""
+    main_file = conn.execute('PRAGMA database_list').fetchone()[2] or ''
+    return 'KR' if Path(main_file).stem.endswith('_kr') else 'US'
+
+
+def init_dict_tables(conn, schema='main'):
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {schema}.{TICKERS} (
+            id      INTEGER PRIMARY KEY,
+            symbol  TEXT NOT NULL,
+            market  TEXT NOT NULL,
+            UNIQUE (symbol, market)
+        )
+    ''')
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {schema}.{DATES} (
+            id      INTEGER PRIMARY KEY,
+            date    TEXT NOT NULL UNIQUE
+        )
+    ''')
+
+
+def sync_dict(conn, tables=('ntm_screening',), market=None):
+    """본 DB 사전에 tables의 새 종목·날짜 추가. Returns: (추가 종목 수, 추가 날짜 수)."""
+    init_dict_tables(conn)
+    market = market or market_of(conn)
+    nt = nd = 0
+    for table in tables:
+        nt += conn.execute(
+            f'INSERT OR IGNORE INTO main.{TICKERS} (symbol, market) '
+            f'SELECT DISTINCT ticker, ? FROM main.{table} WHERE ticker IS NOT NULL ORDER BY ticker',
+            (market,)).rowcount
+        nd += conn.execute(
+            f'INSERT OR IGNORE INTO main.{DATES} (date) '
+            f'SELECT DISTINCT date FROM main.{table} WHERE date IS NOT NULL ORDER BY date').rowcount
+    return nt, nd
+
+
+def is_encoded(conn, schema, table):
+    return conn.execute(f"SELECT 1 FROM {schema}.sqlite_master WHERE type='table' AND name=?",
+                        (table + ENC_SUFFIX,)).fetchone() is not None
+
+
+def _copy_dict(conn, schema):
+    """본 DB 사전 → schema 사본 (id 그대로 — 추가분만)."""
+    init_dict_tables(conn, schema)
+    conn.execute(f'INSERT OR IGNORE INTO {schema}.{TICKERS} SELECT id, symbol, market FROM main.{TICKERS}')
+    conn.execute(f'INSERT OR IGNORE INTO {schema}.{DATES} SELECT id, date FROM main.{DATES}')
+
+
+def _create_view(conn, schema, table, cols):
+    """cols(본 DB 컬럼 순서, date·ticker 포함) 그대로 복원하는 호환 뷰."""
+    sel = ', '.join('d.date AS date' if c == 'date' else 't.symbol AS ticker' if c == 'ticker' else f'e.{c}'
+                    for c in cols)
+    conn.execute(f'DROP VIEW IF EXISTS {schema}.{table}')
+    conn.execute(f'CREATE VIEW {schema}.{table} AS SELECT {sel} FROM {table}{ENC_SUFFIX} e '
+                 f'JOIN {DATES} d ON d.id = e.date_id JOIN {TICKERS} t ON t.id = e.ticker_id')
+
+
+def create_encoded(conn, schema, table, col_types):
+    """schema에 인코딩 테이블 + 호환 뷰 생성. col_types: [(컬럼, 타입)] 본 DB 순서 (date·ticker 포함)."""
+    _copy_dict(conn, schema)
+    body = ', '.join(f'{c} {t}' for c, t in col_types if c not in KEY_COLS)
+    conn.execute(f'CREATE TABLE {schema}.{table}{ENC_SUFFIX} (date_id INTEGER NOT NULL, '
+                 f'ticker_id INTEGER NOT NULL{", " + body if body else ""}, '
+                 f'PRIMARY KEY (date_id, ticker_id)) WITHOUT ROWID')
+    _create_view(conn, schema, table, [c for c, _ in col_types])
+
+
+def add_encoded_columns(conn, schema, table, col_types):
+    """본 DB에 새로 생긴 컬럼을 인코딩 테이블에 추가 + 뷰 재생성."""
+    have = {r[1] for r in conn.execute(f'PRAGMA {schema}.table_info({table}{ENC_SUFFIX})')}
+    added = False
+    for c, t in col_types:
+        if c not in KEY_COLS and c not in have:
+            conn.execute(f'ALTER TABLE {schema}.{table}{ENC_SUFFIX} ADD COLUMN {c} {t}')
+            added = True
+    if added:
+        _create_view(conn, schema, table, [c for c, _ in col_types])
+
+
+def insert_encoded(conn, schema, table, cols, where_sql, params=(), market=None):
+    """main.{table} 행(where_sql) → schema.{table}_enc (본 DB 사전으로 id 치환). Returns: 행 수.
+
+    호출 전 sync_dict로 본 DB 사전에 해당 종목·날짜가 있어야 함.
+    """
+    _copy_dict(conn, schema)
+    vals = [c for c in cols if c not in KEY_COLS]
+    col_sql = ''.join(f', {c}' for c in vals)
+    return conn.execute(
+        f'INSERT OR REPLACE INTO {schema}.{table}{ENC_SUFFIX} (date_id, ticker_id{col_sql}) '
+        f'SELECT d.id, t.id{"".join(f", n.{c}" for c in vals)} FROM main.{table} n '
+        f'JOIN main.{DATES} d ON d.date = n.date '
+        f'JOIN main.{TICKERS} t ON t.symbol = n.ticker AND t.market = ? '
+        f'WHERE {where_sql}', (market or market_of(conn), *params)).rowcount
+
+
+def main(argv=None):
+    import argparse
+    ap = argparse.ArgumentParser(description='종목·날짜 사전 동기화')
+    ap.add_argument('--db', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'eps_momentum_data.db'))
+    args = ap.parse_args(argv)
+    if not os.path.exists(args.db):
+        print(f"DB 없음: {args.db}")
+        return 2
+    conn = sqlite3.connect(args.db)
+    nt, nd = sync_dict(conn)
+    conn.commit()
+    total_t = conn.execute(f'SELECT COUNT(*) FROM {TICKERS}').fetchone()[0]
+    total_d = conn.execute(f'SELECT COUNT(*) FROM {DATES}').fetchone()[0]
+    conn.close()
+    print(f'종목 {total_t} (+{nt}) · 날짜 {total_d} (+{nd})')
+    return 0
+
+
+if __name__ == '__main__':
+    import sys
+    sys.exit(main())
@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+"""ntm_screening 컬럼형 미러 — 필드별 날짜 × 종목 .npy 행렬 (memmap) + 증분 append
+
+배경: _replay_holdings·_get_system_performance·bt_engine.load_data·research 하네스
+  (vm_canonical_bt._load, _prod_faithful_bt load())가 매번 SQLite 전 행(~1,500종목 × 전 날짜)을
+  돌며 {date: {ticker: dict}} / {ticker: {date: 값}}를 새로 만듦 — 호출당 수십만 개 dict·튜플.
+  _replay_holdings는 한 run에서 6회 이상 호출됨 (패널 셀 조회로 전환 — 1,500×180일 기준 3.7배).
+  중첩 dict 자체가 반환 계약인 로더(bt_engine.load_data 등)는 패널로 바꿔도 dict 생성이 지배해
+  이득 없음 → 새 분석 코드는 NtmPanel.field()/frame()을 직접 쓸 것.
+저장 (PANEL_DIR, 기본 data_cache/ntm_panel — DB에서 언제든 재생성되는 캐시라 git 제외):
+  {field}.npy   float64 (날짜 × 종목 용량) C-order. 결측(행 없음·NULL) = NaN. INTEGER 컬럼도 float.
+  index.json    dates(오름차순) · tickers(열 순서) · fields · capacity · 날짜별 지문(fingerprint)
+  종목 축은 여유 용량(capacity)을 두어 신규 종목은 빈 열에 배정 → 기존 행 재작성 없음.
+증분 동기화 sync_panel(conn):
+  - 날짜별 지문 = COUNT + 미러하는 숫자 컬럼 전부의 TOTAL + 순위 컬럼의 TOTAL(값 × rowid)
+    GROUP BY date 1회 (전 행 스캔 ~0.5초 / 1,500종목 × 156일). 전 컬럼이라 UPDATE만 하는 백필
+    (rev_growth 등 재무·ntm_90d·high30·ma60/ma120)도 잡힘. 순위는 날마다 1..N이라 TOTAL이 불변
+    → 종목 간 순위 교환(recompute_ranks)은 rowid 가중합으로 잡음 (정수라 합이 정확). 새 날짜 → 각 .npy 끝에 1행 append(헤더 shape만 갱신 —
+    numpy가 첫 축 자릿수 여유를 헤더에 남겨 둠), 지문이 바뀐 기존 날짜(당일 재실행·part2_rank
+    저장·recompute_ranks 등) → memmap으로 해당 행만 덮어씀.
+  - 컬럼 추가(마이그레이션)·중간 날짜 삽입·용량 초과·파일 손상 → 전체 재생성 (1회 풀스캔).
+  - index.json은 마지막에 원자적 교체 → 중간에 죽으면 다음 sync가 index 기준으로 파일 길이 정리.
+읽기 load_panel() → NtmPanel: .dates / .tickers / .field(name) (memmap 뷰, 복사 없음) /
+  .frame(name) (pandas) / .value(name, ticker, date) / .series(name, ticker).
+  open_panel(db_path) = sync 후 load (호출측 한 줄).
+CLI: python ntm_panel.py [--db PATH] [--rebuild]
+env: NTM_PANEL_DIR (저장 위치). 패널 불가(동기화 실패 등)일 때만 daily_runner 소비처가 구 SQL 경로 사용.
+"""
+import os
+import json
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+DB_PATH = PROJECT_ROOT / 'eps_momentum_data.db'
+DEFAULT_DIR = PROJECT_ROOT / 'data_cache' / 'ntm_panel'
+INDEX_FILE = 'index.json'
+FORMAT_VERSION = 2   # 2: 지문 = 전 컬럼 (1의 6컬럼 지문은 재생성)
+CAPACITY_SLACK = 256   # 종목 축 여유 열 (신규 종목 배정용)
+
+# 날짜별 지문에서 rowid 가중합도 쓰는 컬럼 (날마다 같은 값 집합의 순열 — TOTAL만으로는 교환을 못 잡음)
+_PERMUTED_COLUMNS = ('rank', 'part2_rank', 'composite_rank')
+_NUMERIC_TYPES = ('REAL', 'INTEGER', 'INT', 'FLOAT', 'DOUBLE', 'NUMERIC')
+
+
+def panel_dir():
+    return Path(os.environ.get('NTM_PANEL_DIR') or DEFAULT_DIR)
+
+
+def numeric_columns(conn):
+    """ntm_screening 숫자 컬럼 (date·ticker 제외, 스키마 순서)."""
+    return [r[1] for r in conn.execute('PRAGMA table_info(ntm_screening)')
+            if r[1] not in ('date', 'ticker') and (r[2] or '').upper() in _NUMERIC_TYPES]
+
+
+def date_fingerprints(conn, columns=None):
+    """{date: 지문 문자열} — 1회 GROUP BY. columns = 미러하는 컬럼 (기본 숫자 컬럼 전부)."""
+    cols = list(columns if columns is not None else numeric_columns(conn))
+    sel = ', '.join(['COUNT(*)'] + [f'TOTAL({c})' for c in cols]
+                    + [f'TOTAL({c} * rowid)' for c in _PERMUTED_COLUMNS if c in cols])
+    return {r[0]: '|'.join(repr(v) for v in r[1:])
+            for r in conn.execute(f'SELECT date, {sel} FROM ntm_screening GROUP BY date')}
+
+
+# ============================================================
+# .npy 파일 조작 (헤더 shape 갱신 + 끝에 행 추가)
+# ============================================================
+
+def _read_header(f):
+    version = np.lib.format.read_magic(f)
+    if version == (1, 0):
+        shape, fortran, dtype = np.lib.format.read_array_header_1_0(f)
+    else:
+        shape, fortran, dtype = np.lib.format.read_array_header_2_0(f)
+    return version, shape, fortran, dtype, f.tell()
+
+
+def _resize_rows(path, n_rows):
+    """첫 축을 n_rows로 (헤더 갱신 + 파일 길이 맞춤). 헤더 길이가 바뀌면 False (→ 재생성)."""
+    with open(path, 'r+b') as f:
+        version, shape, fortran, dtype, offset = _read_header(f)
+        if fortran or len(shape) != 2:
+            return False
+        f.seek(0)
+        hdr = {'descr': np.lib.format.dtype_to_descr(dtype), 'fortran_order': False,
+               'shape': (n_rows, shape[1])}
+        if version == (1, 0):
+            np.lib.format.write_array_header_1_0(f, hdr)
+        else:
+            np.lib.format.write_array_header_2_0(f, hdr)
+        if f.tell() != offset:
+            return False
+        f.truncate(offset + n_rows * shape[1] * dtype.itemsize)
+    return True
+
+
+def _append_rows(path, n_keep, rows):
+    """파일을 n_keep행으로 자른 뒤 rows (k × capacity)를 끝에 추가."""
+    if not _resize_rows(path, n_keep + len(rows)):
+        return False
+    with open(path, 'r+b') as f:
+        _, _, _, _, offset = _read_header(f)
+        f.seek(offset + n_keep * rows.shape[1] * rows.dtype.itemsize)
+        f.write(np.ascontiguousarray(rows, dtype=np.float64).tobytes())
+    return True
+
+
+def _write_index(root, idx):
+    tmp = root / (INDEX_FILE + '.tmp')
+    tmp.write_text(json.dumps(idx, ensure_ascii=False), encoding='utf-8')
+    os.replace(tmp, root / INDEX_FILE)
+
+
+def read_index(root=None):
+    root = Path(root) if root else panel_dir()
+    try:
+        idx = json.loads((root / INDEX_FILE).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+    return idx if idx.get('version') == FORMAT_VERSION else None
+
+
+# ============================================================
+# 동기화
+# ============================================================
+
+def _fetch_dates(conn, fields, dates):
+    """dates의 전 행 → [(date, ticker, v1, v2, ...)]."""
+    sel = ', '.join(['date', 'ticker'] + fields)
+    if len(dates) > 400:
+        return conn.execute(f'SELECT {sel} FROM ntm_screening').fetchall()
+    out = []
+    for i in range(0, len(dates), 200):
+        chunk = dates[i:i + 200]
+        out += conn.execute(f'SELECT {sel} FROM ntm_screening WHERE date IN ({",".join("?" * len(chunk))})',
+                            chunk).fetchall()
+    return out
+
+
+def _rows_to_blocks(rows, fields, dates, tick_col, capacity):
+    """rows → {field: (len(dates) × capacity) 행렬} (행 없음 = NaN)."""
+    d_pos = {d: i for i, d in enumerate(dates)}
+    rows = [r for r in rows if r[0] in d_pos]
+    blocks = {f: np.full((len(dates), capacity), np.nan) for f in fields}
+    if not rows:
+        return blocks
+    ri = np.fromiter((d_pos[r[0]] for r in rows), dtype=np.int64, count=len(rows))
+    ci = np.fromiter((tick_col[r[1]] for r in rows), dtype=np.int64, count=len(rows))
+    for k, f in enumerate(fields, start=2):
+        blocks[f][ri, ci] = np.array([r[k] for r in rows], dtype=np.float64)
+    return blocks
+
+
+def _rebuild(conn, root, fields, fps, log):
+    rows = conn.execute(f'SELECT {", ".join(["date", "ticker"] + fields)} FROM ntm_screening').fetchall()
+    dates = sorted(fps)
+    tickers = sorted({r[1] for r in rows})
+    capacity = len(tickers) + CAPACITY_SLACK
+    blocks = _rows_to_blocks(rows, fields, dates, {t: i for i, t in enumerate(tickers)}, capacity)
+    root.mkdir(parents=True, exist_ok=True)
+    for stale in root.glob('*.npy'):
+        if stale.stem not in blocks:
+            stale.unlink()
+    for f, arr in blocks.items():
+        tmp = root / f'{f}.npy.tmp'
+        with open(tmp, 'wb') as fh:
+            np.save(fh, arr)
+        os.replace(tmp, root / f'{f}.npy')
+    idx = {'version': FORMAT_VERSION, 'fields': fields, 'capacity': capacity,
+           'dates': dates, 'tickers': tickers, 'fingerprints': {d: fps[d] for d in dates}}
+    _write_index(root, idx)
+    if log:
+        log(f"  패널 재생성: {len(fields)}필드 × {len(dates)}일 × {len(tickers)}종목")
+    return {'rebuilt': True, 'appended': len(dates), 'rewritten': 0}
+
+
+def sync_panel(conn, root=None, rebuild=False, log=None):
+    """DB → 패널 증분 반영. Returns: {'rebuilt', 'appended', 'rewritten'} 개수."""
+    root = Path(root) if root else panel_dir()
+    fields = numeric_columns(conn)
+    fps = date_fingerprints(conn, fields)
+    idx = None if rebuild else read_index(root)
+    if (idx is None or idx['fields'] != fields
+            or not all((root / f'{f}.npy').exists() for f in fields)):
+        return _rebuild(conn, root, fields, fps, log)
+
+    old_dates = idx['dates']
+    db_dates = sorted(fps)
+    if db_dates[:len(old_dates)] != old_dates:
+        return _rebuild(conn, root, fields, fps, log)  # 과거 날짜 삽입·삭제
+    new_dates = db_dates[len(old_dates):]
+    dirty = [d for d in old_dates if idx['fingerprints'].get(d) != fps[d]]
+    if not new_dates and not dirty:
+        return {'rebuilt': False, 'appended': 0, 'rewritten': 0}
+
+    rows = _fetch_dates(conn, fields, dirty + new_dates)
+    tickers = list(idx['tickers'])
+    tick_col = {t: i for i, t in enumerate(tickers)}
+    for t in sorted({r[1] for r in rows} - set(tick_col)):
+        tick_col[t] = len(tickers)
+        tickers.append(t)
+    capacity = idx['capacity']
+    if len(tickers) > capacity:
+        return _rebuild(conn, root, fields, fps, log)
+
+    n_old = len(old_dates)
+    d_row = {d: i for i, d in enumerate(old_dates)}
+    add = _rows_to_blocks(rows, fields, new_dates, tick_col, capacity) if new_dates else {}
+    fix = _rows_to_blocks(rows, fields, dirty, tick_col, capacity) if dirty else {}
+    for f in fields:
+        path = root / f'{f}.npy'
+        if new_dates and not _append_rows(path, n_old, add[f]):
+            return _rebuild(conn, root, fields, fps, log)
+        if dirty:
+            mm = np.load(path, mmap_mode='r+')
+            mm[[d_row[d] for d in dirty]] = fix[f]
+            mm.flush()
+            del mm
+    idx.update({'tickers': tickers, 'dates': db_dates,
+                'fingerprints': {d: fps[d] for d in db_dates}})
+    _write_index(root, idx)
+    if log:
+        log(f"  패널 동기화: +{len(new_dates)}일 append · {len(dirty)}일 재기록 · 종목 {len(tickers)}")
+    return {'rebuilt': False, 'appended': len(new_dates), 'rewritten': len(dirty)}
+
+
+# ============================================================
+# 읽기
+# ============================================================
+
+class NtmPanel:
+    """memmap 패널. field()는 (날짜 × 종목) 읽기 전용 뷰 — 값 복사 없음."""
+
+    def __init__(self, root, idx):
+        self.root = Path(root)
+        self.dates = idx['dates']
+        self.tickers = idx['tickers']
+        self.fields = idx['fields']
+        self.date_index = {d: i for i, d in enumerate(self.dates)}
+        self.ticker_index = {t: i for i, t in enumerate(self.tickers)}
+        self._arrays = {}
+
+    def field(self, name):
+        arr = self._arrays.get(name)
+        if arr is None:
+            mm = np.load(self.root / f'{name}.npy', mmap_mode='r')
+            arr = self._arrays[name] = mm[:len(self.dates), :len(self.tickers)]
+        return arr
+
+    def frame(self, name):
+        import pandas as pd
+        return pd.DataFrame(self.field(name), index=self.dates, columns=self.tickers, copy=False)
+
+    def value(self, name, ticker, date):
+        """단일 셀 → float | None (행 없음·NULL)."""
+        i, j = self.date_index.get(date), self.ticker_index.get(ticker)
+        if i is None or j is None:
+            return None
+        v = self.field(name)[i, j]
+        return None if v != v else float(v)
+
+    def series(self, name, ticker):
+        """종목 1개의 날짜축 벡터 (없는 종목 = 전부 NaN)."""
+        j = self.ticker_index.get(ticker)
+        if j is None:
+            return np.full(len(self.dates), np.nan)
+        return self.field(name)[:, j]
+
+    def row_dict(self, name, date):
+        """{ticker: 값} — 해당 날짜 유효 셀만 (구 'SELECT ticker, x WHERE date=?' 대체)."""
+        i = self.date_index.get(date)
+        if i is None:
+            return {}
+        row = self.field(name)[i]
+        cols = np.flatnonzero(~np.isnan(row))
+        return dict(zip((self.tickers[j] for j in cols), row[cols].tolist()))
+
+
+def load_panel(root=None):
+    """저장된 패널 로드 (동기화 없음). 없으면 None."""
+    root = Path(root) if root else panel_dir()
+    idx = read_index(root)
+    return NtmPanel(root, idx) if idx else None
+
+
+def open_panel(db_path=None, root=None, log=None):
+    """DB와 동기화한 뒤 로드 — 소비처 진입점."""
+    from db_access import connect
+    conn = connect(db_path or DB_PATH, readonly=True)
+    try:
+        sync_panel(conn, root, log=log)
+    finally:
+        conn.close()
+    return load_panel(root)
+
+
+def main(argv=None):
+    import argparse
+    ap = argparse.ArgumentParser(description='ntm_screening → 컬럼형 .npy 패널 동기화')
+    ap.add_argument('--db', default=str(DB_PATH))
+    ap.add_argument('--dir', default=None, help='저장 위치 (기본 NTM_PANEL_DIR 또는 data_cache/ntm_panel)')
+    ap.add_argument('--rebuild', action='store_true', help='증분 대신 전체 재생성')
+    args = ap.parse_args(argv)
+    if not os.path.exists(args.db):
+        print(f"DB 없음: {args.db}")
+        return 2
+    conn = sqlite3.connect(args.db)
+    stats = sync_panel(conn, args.dir, rebuild=args.rebuild, log=print)
+    conn.close()
+    print(stats)
+    return 0
+
+
+if __name__ == '__main__':
+    import sys
+    sys.exit(main())
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""ntm_screening 파생 신호 테이블 — fwd_pe · fwd_pe_chg · seg1~4 · min_seg · direction
+
+배경: run_ntm_collection이 위 값을 계산해 adj_gap만 남기고 버림(⚠️"fwd_pe_chg는 DB에 저장되지 않으므로").
+  그래서 unified_vm_track._overlap_fpc_map/_fpc_map은 보조승수 비율을 얻으려고 전 테이블을 재로드해
+  fwd_pe_chg를 재구성하고, _replay_holdings·_get_system_performance·bt_engine은 날짜·종목마다
+  Python 루프로 min_seg를 다시 유도(가드 없는 구식 공식 — v120 양끝 가드와 어긋남).
+현 방식: ntm_signals(date, ticker) 1행 = 수집 시점 값 그대로.
+  기록: run_ntm_collection 기록 스레드가 ntm_screening upsert와 같은 트랜잭션(커밋 전)에 upsert_signals.
+    carry-forward 행도 같은 커밋. 커밋은 호출측 책임 (ntm_store와 동일).
+  백필: backfill_signals(conn) — 신호 행이 없는 ntm_screening 행 전부를 numpy로 일괄 계산 (최초 1회 전 이력,
+    이후 매일 0행에 가까움 — 연구 스크립트의 과거 행 복원도 다음 실행에 자동 보충).
+    seg/min_seg/direction/fwd_pe = calculate_ntm_score와 같은 식 (현행 v120 가드 기준).
+    fwd_pe_chg = 저장된 adj_gap ÷ (1+dir_factor)×eps_q 역산 — 수집 시점 가격 룩백(가격 패널 달력 기준)을
+      DB만으로는 재현할 수 없어서. 보조승수 두 개 모두 양수라 부호 보존 → opt4 분기까지 정확히 복원.
+      v80.4 이전 공식으로 기록된 날짜는 근사(당시 adj_gap 승수가 현행과 다름).
+  min_seg = min(seg1~4) — save_part2_ranks·시그널 게이트(-2/0)와 같은 정의.
+    (adj_gap의 eps_q는 ±100 cap 구간을 뺀 min — 별개. 필요하면 seg1~4로 직접.)
+  min_seg_legacy = 구 재유도 정의 (legacy_min_seg — 과거 창만 가드, cap 없음) — replay·BT 전용.
+    _replay_holdings·_get_system_performance·bt_engine(±100 clip 후)은 v120 가드 이전 정의로 보유를 재구성해 옴.
+    min_seg(양끝 가드 + cap)를 조인하면 최신 창 ~0 글리치 행에서 구 이탈(≈-100% → < -2)이 0으로 바뀌어
+    과거 보유·paper ledger·prev_held가 소급 변경 → 정의를 바꾸려면 별도 epoch로 (VM_GATE_FULL_FROM 방식).
+    신호 행이 없으면 소비측이 같은 legacy_min_seg로 재유도 → 한 replay 안에서 정의가 섞이지 않음.
+테이블이 없는 DB(백필 전·KR DB)만 소비측 재유도 — 끄는 스위치 없음 (재유도는 같은 식이라 결과 동일).
+CLI: python ntm_signals.py [--db PATH] [--rebuild]
+"""
+import os
+import sqlite3
+
+import numpy as np
+
+TABLE = 'ntm_signals'
+SIGNAL_COLS = ('fwd_pe', 'fwd_pe_chg', 'seg1', 'seg2', 'seg3', 'seg4', 'min_seg', 'direction', 'min_seg_legacy')
+SEG_CAP = 100
+
+
+def init_signals_table(conn):
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {TABLE} (
+            date        TEXT NOT NULL,
+            ticker      TEXT NOT NULL,
+            fwd_pe      REAL,
+            fwd_pe_chg  REAL,
+            seg1        REAL,
+            seg2        REAL,
+            seg3        REAL,
+            seg4        REAL,
+            min_seg     REAL,
+            direction   REAL,
+            min_seg_legacy REAL,
+            PRIMARY KEY (date, ticker)
+        )
+    ''')
+    if 'min_seg_legacy' not in {r[1] for r in conn.execute(f'PRAGMA table_info({TABLE})')}:
+        conn.execute(f'ALTER TABLE {TABLE} ADD COLUMN min_seg_legacy REAL')   # 기존 행은 backfill_signals가 채움
+
+
+def has_signals(conn):
+    """소비측 판별 — 테이블 존재 여부 (읽기 전용 연결에서도 안전)."""
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?",
+                        (TABLE,)).fetchone() is not None
+
+
+def legacy_min_seg(nc, n7, n30, n60, n90):
+    """구 replay·BT min_seg — 인접 창 변화율(%)의 min. 과거 창 결측·|값| ≤ 0.01만 0, ±100 cap 없음.
+    bt_engine은 여기에 ±100 clip (구 코드: 구간별 cap 후 min = min 후 clip)."""
+    segs = []
+    for a, b in ((nc, n7), (n7, n30), (n30, n60), (n60, n90)):
+        segs.append(((a or 0) - b) / abs(b) * 100 if b and abs(b) > 0.01 else 0)
+    return min(segs)
+
+
+def signal_row(seg1, seg2, seg3, seg4, direction, fwd_pe, fwd_pe_chg, ntm=None):
+    """수집 경로의 계산값 → 신호 행 dict. ntm = DB에 기록하는 (ntm_current, 7d, 30d, 60d, 90d)."""
+    return {'fwd_pe': fwd_pe, 'fwd_pe_chg': fwd_pe_chg,
+            'seg1': seg1, 'seg2': seg2, 'seg3': seg3, 'seg4': seg4,
+            'min_seg': min(seg1, seg2, seg3, seg4), 'direction': direction,
+            'min_seg_legacy': legacy_min_seg(*ntm) if ntm else None}
+
+
+def upsert_signals(cursor, date, rows):
+    """rows: {ticker: signal_row(...)} → (date, ticker) upsert. Returns: 기록 행 수."""
+    if not rows:
+        return 0
+    from ntm_store import upsert_screening
+    init_signals_table(cursor.connection)
+    return upsert_screening(cursor, date, rows, table=TABLE)
+
+
+def _col(rows, i):
+    return np.array([np.nan if r[i] is None else r[i] for r in rows], dtype=float)
+
+
+def compute_signals(rows):
+    """rows: [(date, ticker, price, nc, n7, n30, n60, n90, adj_gap)] → 신호 컬럼 dict (numpy 벡터)."""
+    price = _col(rows, 2)
+    ntm = [np.nan_to_num(_col(rows, i)) for i in range(3, 8)]   # 수집 경로는 결측을 0으로 받음
+    adj_gap = _col(rows, 8)
+
+    def _seg(new, old):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            s = np.clip((new - old) / np.abs(old) * 100, -SEG_CAP, SEG_CAP)
+        return np.where((np.abs(new) < 0.01) | (np.abs(old) < 0.01), 0.0, s)
+
+    segs = np.vstack([_seg(ntm[i], ntm[i + 1]) for i in range(4)])
+    with np.errstate(divide='ignore', invalid='ignore'):   # legacy_min_seg 벡터판 (과거 창만 가드, cap 없음)
+        legacy = np.vstack([np.where(np.abs(ntm[i + 1]) > 0.01,
+                                     (ntm[i] - ntm[i + 1]) / np.abs(ntm[i + 1]) * 100, 0.0) for i in range(4)])
+    cap_hit = (np.abs(segs) >= SEG_CAP).any(axis=0)
+    direction = np.where(cap_hit, 9.0, (segs[0] + segs[1]) / 2 - (segs[2] + segs[3]) / 2)
+
+    nc = ntm[0]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fwd_pe = np.where((nc > 0) & (np.nan_to_num(price) != 0), price / nc, np.nan)
+
+    # adj_gap = fwd_pe_chg × (1+dir_factor) × eps_q 역산 (daily_runner adj_gap 블록과 같은 분기)
+    df_raw = np.clip(direction / 30, -0.3, 0.3)
+    dir_factor = np.where(~cap_hit & (adj_gap > 0) & (direction < 0), -df_raw, df_raw)
+    masked = np.where(np.abs(segs) < SEG_CAP, segs, np.inf).min(axis=0)
+    q_seg = np.where(np.isinf(masked), 0.0, masked)
+    eps_q = 1.0 + 0.3 * np.clip(q_seg / 2, -1, 1)
+    fwd_pe_chg = adj_gap / ((1 + dir_factor) * eps_q)
+
+    return {'fwd_pe': fwd_pe, 'fwd_pe_chg': fwd_pe_chg,
+            'seg1': segs[0], 'seg2': segs[1], 'seg3': segs[2], 'seg4': segs[3],
+            'min_seg': segs.min(axis=0), 'direction': direction, 'min_seg_legacy': legacy.min(axis=0)}
+
+
+def backfill_signals(conn, rebuild=False, log=None, chunk=50000):
+    """신호 행이 없는 ntm_screening 행(rebuild=True면 전부) 일괄 계산·기록. Returns: 기록 행 수."""
+    init_signals_table(conn)
+    if rebuild:
+        conn.execute(f'DELETE FROM {TABLE}')
+    cur = conn.execute(f'''
+        SELECT n.date, n.ticker, n.price, n.ntm_current, n.ntm_7d, n.ntm_30d, n.ntm_60d, n.ntm_90d, n.adj_gap
+        FROM ntm_screening n LEFT JOIN {TABLE} s ON s.date = n.date AND s.ticker = n.ticker
+        WHERE s.ticker IS NULL AND n.ntm_current IS NOT NULL
+    ''')
+    cols = ', '.join(SIGNAL_COLS)
+    sql = f'INSERT OR REPLACE INTO {TABLE} (date, ticker, {cols}) VALUES (?, ?{", ?" * len(SIGNAL_COLS)})'
+    n = 0
+    while True:
+        rows = cur.fetchmany(chunk)
+        if not rows:
+            break
+        sig = compute_signals(rows)
+        mat = np.vstack([sig[c] for c in SIGNAL_COLS]).T
+        mat = np.where(np.isnan(mat), None, mat).tolist()   # NaN → NULL, numpy → float
+        conn.executemany(sql, [(r[0], r[1], *vals) for r, vals in zip(rows, mat)])
+        n += len(rows)
+    # min_seg_legacy 컬럼 추가 전 행 — 그 컬럼만 채움 (수집 시점 fwd_pe_chg 등은 그대로)
+    cur = conn.execute(f'''
+        SELECT n.date, n.ticker, n.price, n.ntm_current, n.ntm_7d, n.ntm_30d, n.ntm_60d, n.ntm_90d, n.adj_gap
+        FROM {TABLE} s JOIN ntm_screening n ON n.date = s.date AND n.ticker = s.ticker
+        WHERE s.min_seg_legacy IS NULL AND n.ntm_current IS NOT NULL
+    ''')
+    while True:
+        rows = cur.fetchmany(chunk)
+        if not rows:
+            break
+        legacy = compute_signals(rows)['min_seg_legacy'].tolist()
+        conn.executemany(f'UPDATE {TABLE} SET min_seg_legacy=? WHERE date=? AND ticker=?',
+                         [(v, r[0], r[1]) for r, v in zip(rows, legacy)])
+        n += len(rows)
+    if log and n:
+        log(f"  ntm_signals 백필: {n}행")
+    return n
+
+
+def signals_for_date(conn, date, cols=SIGNAL_COLS):
+    """{ticker: {col: 값}} — 해당 날짜 신호 (NULL 값 제외)."""
+    cols = [c for c in cols if c in SIGNAL_COLS]
+    out = {}
+    for row in conn.execute(f'SELECT ticker, {", ".join(cols)} FROM {TABLE} WHERE date=?', (date,)):
+        out[row[0]] = {c: v for c, v in zip(cols, row[1:]) if v is not None}
+    return out
+
+
+def main(argv=None):
+    import argparse
+    ap = argparse.ArgumentParser(description='ntm_signals 백필 (누락 행 / --rebuild 전체)')
+    ap.add_argument('--db', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'eps_momentum_data.db'))
+    ap.add_argument('--rebuild', action='store_true')
+    args = ap.parse_args(argv)
+    if not os.path.exists(args.db):
+        print(f"DB 없음: {args.db}")
+        return 2
+    conn = sqlite3.connect(args.db)
+    n = backfill_signals(conn, rebuild=args.rebuild, log=print)
+    conn.commit()
+    conn.close()
+    print(f'{n}행 기록')
+    return 0
+
+
+if __name__ == '__main__':
+    import sys
+    sys.exit(main())
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""ntm_screening 일괄 기록기 — 종목별 INSERT/UPDATE 수천 회 → executemany 몇 회
+
+구 방식: run_ntm_collection이 종목마다 INSERT ON CONFLICT + 파생 컬럼 UPDATE + rank UPDATE,
+  save_part2_ranks가 composite_rank/part2_rank 종목별 UPDATE, update_dollar_volumes가 dv 종목별 UPDATE
+  → 하루 ~4,000+ 문장.
+현 방식: 하루치 행을 메모리에 모은 뒤 컬럼 조합별로 executemany 1회 (행당 upsert 1회).
+  - upsert_screening: 행 생성/갱신 (주어진 컬럼만 덮어씀 — part2_rank 등 나머지 컬럼 보존)
+  - update_screening: 기존 행의 부분 컬럼만 갱신 (행 생성 X) — composite_rank/part2_rank/dv 등
+커밋은 호출측 책임(한 트랜잭션으로 묶기 위해 commit 하지 않음).
+"""
+
+SCREENING_TABLE = 'ntm_screening'
+
+
+def _check_cols(cols):
+    for c in cols:
+        if not c.isidentifier():
+            raise ValueError(f'잘못된 컬럼명: {c!r}')
+
+
+def _group_by_columns(items):
+    """[(ticker, {col: val})] → {컬럼 튜플: [(ticker, {col: val})]} — 같은 조합끼리 executemany."""
+    groups = {}
+    for ticker, vals in items:
+        groups.setdefault(tuple(sorted(vals)), []).append((ticker, vals))
+    return groups
+
+
+def upsert_screening(cursor, date, rows, table=SCREENING_TABLE):
+    """rows: {ticker: {col: val}} → INSERT ... ON CONFLICT(date, ticker) DO UPDATE (주어진 컬럼만).
+
+    Returns: 기록 행 수.
+    """
+    n = 0
+    for cols, items in _group_by_columns(rows.items()).items():
+        _check_cols(cols)
+        col_sql = ', '.join(cols)
+        ph = ', '.join('?' * (len(cols) + 2))
+        upd = ', '.join(f'{c}=excluded.{c}' for c in cols) or 'ticker=excluded.ticker'
+        cursor.executemany(
+            f'INSERT INTO {table} (date, ticker{", " if cols else ""}{col_sql}) VALUES ({ph}) '
+            f'ON CONFLICT(date, ticker) DO UPDATE SET {upd}',
+            [(date, tk, *(vals[c] for c in cols)) for tk, vals in items])
+        n += len(items)
+    return n
+
+
+def update_screening(cursor, date, values, reset=(), table=SCREENING_TABLE):
+    """values: {ticker: {col: val}} → 기존 (date, ticker) 행의 부분 컬럼 UPDATE.
+
+    reset: 먼저 해당 date 전체를 NULL로 지울 컬럼 (구 'UPDATE ... SET x=NULL WHERE date=?' 패턴).
+    Returns: 갱신 대상 행 수.
+    """
+    if reset:
+        _check_cols(reset)
+        cursor.execute(f'UPDATE {table} SET {", ".join(f"{c}=NULL" for c in reset)} WHERE date=?',
+                       (date,))
+    n = 0
+    for cols, items in _group_by_columns(values.items()).items():
+        if not cols:
+            continue
+        _check_cols(cols)
+        cursor.executemany(
+            f'UPDATE {table} SET {", ".join(f"{c}=?" for c in cols)} WHERE date=? AND ticker=?',
+            [(*(vals[c] for c in cols), date, tk) for tk, vals in items])
+        n += len(items)
+    return n
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""Part 2 점수 — conviction adj_gap · 일별 z-score · 3일 가중 w_gap · 0~100 표시 점수 (NumPy 열 배열)
+
+배경: 같은 계산이 한 run에 세 번 Python 루프로 돌았음.
+  save_part2_ranks — min_seg 게이트·_conv_gap을 DataFrame.apply(axis=1) 행 단위로.
+  _compute_w_gap_map — 최근 3일 × 행마다 _apply_conviction → z-score → 종목마다 3일 루프.
+  _build_score_100_map — 표시용으로 위를 그대로 한 번 더 (DB 재조회 포함).
+방식:
+  conviction(...) — _apply_conviction과 같은 식을 열 배열로 (NaN = None). 연산 순서 동일 → 값 비트 동일.
+  day_scores(conv) — 일별 z-score(30~100): max(30, 65 - z×15), 표준편차 0·2종목 미만 → 65.
+    평균·표준편차는 구 코드와 같은 행 순서의 배열에 np.mean/np.std (합산 순서까지 동일).
+  Part2Scores(cursor, today_str) — 최근 3일(composite_rank 기준) 행을 날짜당 1쿼리로 읽어 위를 한 번에:
+    .conv · .score_by_date · .w_gap(3일 가중, 빈 날 = 30점) · .display(고정 스케일 0~100).
+    .weighted(tickers) = 임의 종목 목록의 w_gap (구 _compute_w_gap_map 계약).
+  빈 날 규칙(v80.1): 과거 날짜는 당시 part2_rank 밖이면 30점, 오늘(today_key)은 composite_rank 기준.
+소비: daily_runner.save_part2_ranks(순위) → 같은 run의 _build_score_100_map(표시)이 결과 재사용,
+  _compute_w_gap_map(recompute_ranks·백테스트 replay)도 이 모듈.
+"""
+from functools import cached_property
+
+import numpy as np
+
+MISSING_PENALTY = 30   # 빈 날 점수
+Z_CENTER = 65
+Z_SCALE = 15
+Z_FLOOR = 30.0
+DAY_WEIGHTS = {3: (0.2, 0.3, 0.5), 2: (0.4, 0.6), 1: (1.0,)}   # 오래된 순
+SEG_COLS = ('seg1', 'seg2', 'seg3', 'seg4')
+MIN_SEG_CUT = -2
+
+
+def _arr(vals):
+    return np.array([np.nan if v is None else v for v in vals], dtype=float)
+
+
+def conviction(adj_gap, rev_up, num_analysts, ntm_current, ntm_90d, rev_growth):
+    """conviction adj_gap 배열 = adj_gap × (1 + max(rev_up/N, eps_floor) + rev_bonus). 인자는 같은 길이 배열.
+
+    NaN = None (구 _apply_conviction의 None 분기): N 결측/0 → ratio 0, ntm 결측·|ntm_90d| ≤ 0.01 → eps_floor 0,
+    rev_growth 결측 → bonus 0.
+    """
+    adj_gap, rev_up, na, nc, n90, rg = (np.asarray(a, dtype=float) for a in
+                                        (adj_gap, rev_up, num_analysts, ntm_current, ntm_90d, rev_growth))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        has_r = (na > 0) & ~np.isnan(rev_up)
+        ratio = np.where(has_r, rev_up / np.where(has_r, na, 1.0), 0.0)
+        has_e = ~np.isnan(nc) & (np.abs(n90) > 0.01)
+        eps_floor = np.where(has_e, np.minimum(np.abs((nc - n90) / np.where(has_e, n90, 1.0)), 3.0), 0.0)
+        bonus = np.where(np.isnan(rg), 0.0, np.minimum(np.minimum(rg, 0.5) * 0.6, 0.3))
+    return adj_gap * (1 + (np.maximum(ratio, eps_floor) + bonus))
+
+
+def min_seg(frame):
+    """DataFrame seg1~4 행별 최솟값 (결측 = 0) — save_part2_ranks·표시 후보의 min_seg 게이트 입력."""
+    import pandas as pd
+    cols = [pd.to_numeric(frame[c], errors='coerce').fillna(0).to_numpy(float) if c in frame else
+            np.zeros(len(frame)) for c in SEG_COLS]
+    return np.min(np.column_stack(cols), axis=1) if len(frame) else np.zeros(0)
+
+
+def frame_conviction(frame):
+    """results_df 후보 → conviction 배열. 결측 = 0 (구 float(x or 0)), rev_growth만 결측 유지.
+    results_df의 ntm_current 키는 'ntm_cur'."""
+    import pandas as pd
+
+    def col(c, fill=0.0):
+        if c not in frame:
+            return np.full(len(frame), fill)
+        v = pd.to_numeric(frame[c], errors='coerce')
+        return (v if fill is None else v.fillna(fill)).to_numpy(float)
+    return conviction(col('adj_gap'), col('rev_up30'), col('num_analysts'), col('ntm_cur'), col('ntm_90d'),
+                      col('rev_growth', None))
+
+
+def day_scores(conv):
+    """conviction 배열(구 dict 순서) → 일별 z-score 배열. 2종목 미만·표준편차 0 → 전부 65."""
+    conv = np.asarray(conv, dtype=float)
+    if len(conv) >= 2:
+        mean_v = np.mean(conv)
+        std_v = np.std(conv)
+        if std_v > 0:
+            return np.maximum(Z_FLOOR, Z_CENTER + (-(conv - mean_v) / std_v) * Z_SCALE)
+    return np.full(len(conv), float(Z_CENTER))
+
+
+def display_score(ws):
+    """3일 가중 점수 → 고정 스케일 0~100 (v112: ws 30→0, 100→100, 소수 1자리)."""
+    return round(max(0.0, min(100.0, (ws - 30) / 70 * 100)), 1)
+
+
+def recent_dates(cursor, today_str=None, limit=3):
+    """composite_rank가 있는 최근 limit개 날짜 (오래된 순). today_str None = 최신까지."""
+    if today_str:
+        rows = cursor.execute(
+            'SELECT DISTINCT date FROM ntm_screening WHERE composite_rank IS NOT NULL AND date <= ? '
+            'ORDER BY date DESC LIMIT ?', (today_str, limit)).fetchall()
+    else:
+        rows = cursor.execute(
+            'SELECT DISTINCT date FROM ntm_screening WHERE composite_rank IS NOT NULL '
+            'ORDER BY date DESC LIMIT ?', (limit,)).fetchall()
+    return sorted(r[0] for r in rows)
+
+
+class Part2Scores:
+    """최근 3일 conviction·z-score·w_gap·표시 점수를 한 번에 (계약은 모듈 docstring).
+
+    today_key: '오늘'로 볼 날짜 (빈 날 규칙에서 part2_rank 검사 면제). None → today_str, 그것도 None → 최근 날짜.
+    """
+
+    def __init__(self, cursor, today_str=None, today_key=None):
+        self.today_str = today_str
+        self.dates = recent_dates(cursor, today_str)
+        self.today_key = today_key or today_str or (self.dates[-1] if self.dates else None)
+        self.conv, self.score_by_date, self._p2 = {}, {}, {}
+        for d in self.dates:
+            rows = cursor.execute(
+                'SELECT ticker, adj_gap, rev_up30, num_analysts, ntm_current, ntm_90d, '
+                'rev_growth FROM ntm_screening WHERE date=? AND composite_rank IS NOT NULL', (d,)).fetchall()
+            tks = [r[0] for r in rows]
+            conv = conviction(*(_arr(r[k] for r in rows) for k in range(1, 7)))
+            self.conv[d] = dict(zip(tks, conv.tolist()))
+            self.score_by_date[d] = dict(zip(tks, day_scores(conv).tolist()))
+            self._p2[d] = {r[0] for r in cursor.execute(
+                'SELECT ticker FROM ntm_screening WHERE date=? AND part2_rank IS NOT NULL', (d,))}
+        self.weights = DAY_WEIGHTS.get(len(self.dates), ())
+
+    @cached_property
+    def w_gap(self):
+        """{ticker: w_gap} — 3일 중 하루라도 composite_rank가 있는 종목 전체."""
+        seen = {}
+        for d in self.dates:
+            seen.update(dict.fromkeys(self.score_by_date[d]))
+        return self.weighted(seen)
+
+    @cached_property
+    def display(self):
+        """{ticker: 0~100 표시 점수}."""
+        return {tk: display_score(ws) for tk, ws in self.w_gap.items()}
+
+    def weighted(self, tickers):
+        """{ticker: w_gap} — 날짜별 점수(빈 날 30점) × DAY_WEIGHTS, 오래된 날부터 누적 (구 루프와 같은 순서)."""
+        tickers = list(tickers)
+        wg = np.zeros(len(tickers))
+        for i, d in enumerate(self.dates):
+            sc = self.score_by_date[d]
+            p2 = self._p2[d]
+            is_today = d == self.today_key
+            col = np.array([sc.get(tk, MISSING_PENALTY) if (is_today or tk in p2) else MISSING_PENALTY
+                            for tk in tickers], dtype=float)
+            wg = wg + col * self.weights[i]
+        return dict(zip(tickers, wg.tolist()))
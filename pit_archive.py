@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""PIT(Point-In-Time) earningsTrend 아카이브 — 일별 Parquet 파티션 (추가 HTTP 0회)
+
+설계: research/PIT_ARCHIVE_DESIGN_2026_07_09.md (초안 research/pit_archive_draft_2026_07_09.py).
+run_ntm_collection이 이미 받은 raw_trend(stock._analysis._earnings_trend)에는 4기간(0q/+1q/0y/+1y) ×
+earningsEstimate/revenueEstimate/epsTrend/epsRevisions ~90필드가 있는데, NTM 블렌딩과 up30/down30
+max()만 뽑고 버려왔다. 스코어 단계에서 평탄화해 모았다가 run 끝에 하루 1파일로 기록한다.
+
+  저장: {PIT_ARCHIVE_DIR}/{YYYY-MM-DD}.parquet (종목 = row, 고정 스키마 ARROW_SCHEMA — 6기간 전부 컬럼,
+    그날 없는 기간은 null → 파일마다 같은 컬럼·타입. 원자적 교체 — 재수집 시 덮어씀)
+  읽기: read_archive(start, end, columns, tickers) — 파일명으로 날짜 선택 + 컬럼 projection
+원칙(설계서 2-2): raw 필드만 저장, dispersion/agreement 같은 파생 지표는 다운스트림에서 계산.
+env: PIT_ARCHIVE_DISABLE=1 (기록 끔 — 워크플로우가 pit-archive 브랜치 체크아웃 실패 시 설정) · PIT_ARCHIVE_DIR (기본 data_cache/pit_archive — 별도 repo 체크아웃 지정 가능)
+보관: 기본 경로는 본 브랜치 git 미추적(.gitignore) — git add -A(워크플로우·git_commit_push)가 매일 새 Parquet을
+  본 이력에 커밋하지 않게. 재수집 불가 데이터라 영구본 = pit-archive 데이터 브랜치: 워크플로우가 이 경로에
+  worktree로 체크아웃 → run 끝에 그날 파일 커밋·push. 브랜치가 없으면 빈 폴더로 새로 시작하지 않고
+  기록을 끈 채 job을 실패로 표시 (최초 생성만 workflow_dispatch pit_bootstrap=true).
+  research/pit_archive/2026-07-09.parquet = 초안 샘플 (read_archive(root=...)로 읽힘).
+"""
+import os
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent
+DEFAULT_DIR = PROJECT_ROOT / 'data_cache' / 'pit_archive'
+
+# raw_trend 기간 코드 → 컬럼 접미사 ('+'/'-'는 컬럼명 불가). 앞 4개 = 핵심 기간, 뒤 2개 = 희귀 기간(대개 null).
+PERIOD_SUFFIX = {'0q': '0q', '+1q': 'p1q', '0y': '0y', '+1y': 'p1y',
+                 '-1q': 'm1q', '-1y': 'm1y'}
+CORE_PERIODS = ('0q', 'p1q', '0y', 'p1y')
+
+# (컬럼 필드명, raw 블록, 블록 내 키)
+_FIELDS = (
+    ('eps_avg', 'earningsEstimate', 'avg'), ('eps_low', 'earningsEstimate', 'low'),
+    ('eps_high', 'earningsEstimate', 'high'), ('eps_year_ago', 'earningsEstimate', 'yearAgoEps'),
+    ('eps_n_analysts', 'earningsEstimate', 'numberOfAnalysts'), ('eps_growth', 'earningsEstimate', 'growth'),
+    ('rev_avg', 'revenueEstimate', 'avg'), ('rev_low', 'revenueEstimate', 'low'),
+    ('rev_high', 'revenueEstimate', 'high'), ('rev_n_analysts', 'revenueEstimate', 'numberOfAnalysts'),
+    ('rev_year_ago', 'revenueEstimate', 'yearAgoRevenue'), ('rev_growth', 'revenueEstimate', 'growth'),
+    ('epstrend_cur', 'epsTrend', 'current'), ('epstrend_7d', 'epsTrend', '7daysAgo'),
+    ('epstrend_30d', 'epsTrend', '30daysAgo'), ('epstrend_60d', 'epsTrend', '60daysAgo'),
+    ('epstrend_90d', 'epsTrend', '90daysAgo'),
+    ('rev_up7', 'epsRevisions', 'upLast7days'), ('rev_up30', 'epsRevisions', 'upLast30days'),
+    ('rev_down7', 'epsRevisions', 'downLast7Days'), ('rev_down30', 'epsRevisions', 'downLast30days'),
+    ('rev_down90', 'epsRevisions', 'downLast90days'),
+)
+
+
+def _period_columns(suf):
+    return [f'{suf}_end_date', f'{suf}_growth'] + [f'{suf}_{name}' for name, _, _ in _FIELDS]
+
+
+SCHEMA_COLUMNS = ['date', 'ticker'] + [c for suf in PERIOD_SUFFIX.values() for c in _period_columns(suf)]
+
+
+def _is_text(col):
+    return col in ('date', 'ticker') or col.endswith('_end_date')
+
+
+def arrow_schema():
+    """고정 pyarrow 스키마 — 문자열(date·ticker·*_end_date) + 나머지 float64."""
+    import pyarrow as pa
+    return pa.schema([(c, pa.string() if _is_text(c) else pa.float64()) for c in SCHEMA_COLUMNS])
+
+
+def archive_dir():
+    return Path(os.environ.get('PIT_ARCHIVE_DIR') or DEFAULT_DIR)
+
+
+def _raw(v):
+    """{'raw':..,'fmt':..} → raw (HTTP 원본) / 숫자 그대로 (이미 평탄한 값)."""
+    if isinstance(v, dict):
+        return v.get('raw')
+    return v
+
+
+def flatten_earnings_trend(raw_trend):
+    """raw_trend (list[dict]) → 1행 dict. 알 수 없는 기간 코드는 스킵(스키마 안정성 우선)."""
+    row = {}
+    for item in raw_trend or ():
+        suf = PERIOD_SUFFIX.get(item.get('period'))
+        if suf is None:
+            continue
+        row[f'{suf}_end_date'] = item.get('endDate')
+        row[f'{suf}_growth'] = _raw(item.get('growth'))
+        for name, block, key in _FIELDS:
+            blk = item.get(block) or {}
+            row[f'{suf}_{name}'] = _raw(blk.get(key)) if isinstance(blk, dict) else None
+    return row
+
+
+class PitArchiveWriter:
+    """스코어 단계에서 add(ticker, raw_trend) → run 끝 flush() 1회 (하루 1파일)."""
+
+    def __init__(self, date, root=None):
+        import threading
+        self.date = date
+        self.root = Path(root) if root else archive_dir()
+        self.rows = []
+        self._lock = threading.Lock()
+
+    def add(self, ticker, raw_trend):
+        if not raw_trend:
+            return
+        row = flatten_earnings_trend(raw_trend)
+        if not row:
+            return
+        row['date'] = self.date
+        row['ticker'] = ticker
+        with self._lock:
+            self.rows.append(row)
+
+    def flush(self):
+        """Parquet 기록 (임시파일 → os.replace). Returns: (경로, 행 수) 또는 (None, 0)."""
+        import pandas as pd
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        if not self.rows:
+            return None, 0
+        df = pd.DataFrame(self.rows).reindex(columns=SCHEMA_COLUMNS)
+        for c in df.columns:
+            if _is_text(c):
+                df[c] = df[c].astype('string')
+            else:
+                df[c] = pd.to_numeric(df[c], errors='coerce').astype('float64')
+        df = df.sort_values('ticker').reset_index(drop=True)
+        table = pa.Table.from_pandas(df, schema=arrow_schema(), preserve_index=False)
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.root / f'{self.date}.parquet'
+        tmp = path.with_suffix('.parquet.tmp')
+        pq.write_table(table, tmp, compression='snappy')
+        os.replace(tmp, path)
+        return path, table.num_rows
+
+
+def list_dates(root=None):
+    """아카이브에 있는 날짜 (오름차순)."""
+    root = Path(root) if root else archive_dir()
+    if not root.exists():
+        return []
+    return sorted(p.stem for p in root.glob('????-??-??.parquet'))
+
+
+def read_archive(start=None, end=None, columns=None, tickers=None, root=None):
+    """날짜 구간 [start, end] 파일만 골라 필요한 컬럼만 읽음 → DataFrame (date, ticker, ...).
+
+    columns: None이면 전체. tickers: 지정 시 해당 종목 행만 (pyarrow 필터 → 필요한 row group만 디코드).
+    """
+    import pandas as pd
+    import pyarrow.dataset as ds
+    root = Path(root) if root else archive_dir()
+    dates = [d for d in list_dates(root)
+             if (start is None or d >= start) and (end is None or d <= end)]
+    if not dates:
+        return pd.DataFrame(columns=['date', 'ticker'] + list(columns or []))
+    # 고정 스키마로 읽음 → 구 파일(4기간·int 컬럼)도 같은 컬럼·타입 (없는 컬럼 = null)
+    dset = ds.dataset([str(root / f'{d}.parquet') for d in dates], format='parquet', schema=arrow_schema())
+    cols = None
+    if columns is not None:
+        have = set(dset.schema.names)
+        cols = ['date', 'ticker'] + [c for c in columns if c not in ('date', 'ticker') and c in have]
+    flt = ds.field('ticker').isin(list(tickers)) if tickers else None
+    return dset.to_table(columns=cols, filter=flt).to_pandas()
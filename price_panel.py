@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""가격 피처 패널 — hist_all(yf.download MultiIndex) 1회 → 종목별 가격 피처 DataFrame
+
+구 방식: run_ntm_collection 종목 루프(+carry-forward 경로)에서 종목마다
+  hist_all['Close'][t].dropna() → rolling(60/120).mean() · Volume 20일 평균 ·
+  (hist_dt - target).map(lambda x: abs(x.days)).argmin() ×4 → ~1,300 × 10회 pandas 호출.
+현 방식: Close/Volume 전체 프레임을 NumPy 배열로 한 번에 처리.
+  - "종목별 dropna 후 마지막 N개" = 뒤에서 센 유효 관측 순번(rev_cnt) ≤ N 마스크 → 합/개수
+  - 룩백 가격 = 날짜축 |floor((날짜 - target)/1일)| 키를 유효 셀만 남겨 argmin (구 argmin과 동일한
+    '첫 최소' tie 규칙). searchsorted로 target 위치를 잡으면 tie 규칙이 달라져 쓰지 않음.
+  수치는 구 per-ticker 계산과 동일(rolling 누적합 vs 직접 합의 부동소수 1e-12 수준 차이만).
+
+출력 컬럼 (index=ticker, 없으면 NaN):
+  n_obs        유효 종가 개수 (구 len(hist) — 호출측 60/120/30 게이트용)
+  price        마지막 유효 종가
+  ma60/ma120   마지막 60/120개 유효 종가 평균 (개수 부족 시 NaN)
+  high30_hist  마지막 30개 유효 종가 최고 (DB 30일 고점 cold start fallback)
+  vol_ratio    마지막 유효 거래량 / 직전 20개 유효 거래량 평균 (21개 미만·평균 0 → NaN)
+  px_7d/px_30d/px_60d/px_90d  today - N일에 가장 가까운 유효 종가
+
+PriceWindow — DB(ntm_screening) 최근 N거래일 가격 창 (쿼리 1회 → 날짜 × 종목 행렬)
+  구: run_ntm_collection high30이 종목마다 'LIMIT 29' 쿼리(메인+carry-forward ~1,300회),
+      us_candidates가 HI30 30회 + PX20/PX5/PX1/PX21 날짜별 쿼리.
+  현: 두 모듈이 같은 창에서 high / at / chg / crash 벡터 조회.
+"""
+import numpy as np
+import pandas as pd
+
+LOOKBACK_DAYS = {'7d': 7, '30d': 30, '60d': 60, '90d': 90}
+
+
+def _field_frame(hist_all, field, tickers=None):
+    """hist_all[field] → (날짜 × 종목) float 프레임. 필드 없으면 None."""
+    try:
+        df = hist_all[field]
+    except (KeyError, TypeError):
+        return None
+    if isinstance(df, pd.Series):  # 단일 종목 다운로드
+        df = df.to_frame()
+    if tickers is not None:
+        df = df.reindex(columns=[t for t in tickers if t in df.columns])
+    return df.astype(float)
+
+
+def _tail_mask(valid, n):
+    """종목별 유효 관측 중 마지막 n개 위치 마스크 (+ 유효 개수)."""
+    rev_cnt = np.cumsum(valid[::-1], axis=0)[::-1]
+    return valid & (rev_cnt <= n), valid.sum(axis=0)
+
+
+def _tail_mean(vals, valid, n):
+    mask, cnt = _tail_mask(valid, n)
+    s = np.where(mask, vals, 0.0).sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(cnt >= n, s / n, np.nan)
+
+
+def build_price_features(hist_all, today, tickers=None):
+    """hist_all → 종목별 가격 피처 DataFrame (모듈 docstring 컬럼 참고)."""
+    close = _field_frame(hist_all, 'Close', tickers) if hist_all is not None else None
+    if close is None or close.empty:
+        return pd.DataFrame(columns=['n_obs', 'price', 'ma60', 'ma120', 'high30_hist', 'vol_ratio']
+                            + [f'px_{k}' for k in LOOKBACK_DAYS])
+    cols = close.columns
+    c = close.to_numpy()
+    valid = ~np.isnan(c)
+    n_obs = valid.sum(axis=0)
+
+    # 마지막 유효 종가: 유효 위치의 최대 행 인덱스
+    rows = np.arange(len(c))[:, None]
+    last_idx = np.where(valid, rows, -1).max(axis=0)
+    price = np.where(last_idx >= 0, c[np.clip(last_idx, 0, None), np.arange(c.shape[1])], np.nan)
+
+    m30, _ = _tail_mask(valid, 30)
+    high30 = np.where(m30, c, -np.inf).max(axis=0) if len(c) else np.full(len(cols), np.nan)
+    high30 = np.where(n_obs >= 30, high30, np.nan)
+
+    out = {
+        'n_obs': n_obs,
+        'price': price,
+        'ma60': _tail_mean(c, valid, 60),
+        'ma120': _tail_mean(c, valid, 120),
+        'high30_hist': high30,
+    }
+
+    # vol_ratio: 마지막 유효 거래량 / 직전 20개 평균 (거래량 결측은 종가와 별도로 dropna)
+    vol_ratio = np.full(len(cols), np.nan)
+    volume = _field_frame(hist_all, 'Volume')
+    if volume is not None:
+        v = volume.reindex(columns=cols).to_numpy(dtype=float)
+        vvalid = ~np.isnan(v)
+        rev_cnt = np.cumsum(vvalid[::-1], axis=0)[::-1]
+        v_last = np.where(vvalid & (rev_cnt == 1), v, 0.0).sum(axis=0)
+        v_prev = np.where(vvalid & (rev_cnt >= 2) & (rev_cnt <= 21), v, 0.0).sum(axis=0) / 20
+        with np.errstate(invalid='ignore', divide='ignore'):
+            vol_ratio = np.where((vvalid.sum(axis=0) >= 21) & (v_prev > 0), v_last / v_prev, np.nan)
+    out['vol_ratio'] = vol_ratio
+
+    # 룩백 가격: 날짜 키는 전 종목 공통 → 유효 셀만 남겨 축 argmin
+    idx = close.index
+    if getattr(idx, 'tz', None) is not None:
+        idx = idx.tz_localize(None)
+    idx_ns = idx.to_numpy(dtype='datetime64[ns]')
+    day = np.timedelta64(1, 'D')
+    any_valid = n_obs > 0
+    for key, days in LOOKBACK_DAYS.items():
+        target = np.datetime64(pd.Timestamp(today - pd.Timedelta(days=days)).to_datetime64(), 'ns')
+        dist = np.abs(np.floor((idx_ns - target) / day))
+        keyed = np.where(valid, dist[:, None], np.inf)
+        pos = keyed.argmin(axis=0)
+        out[f'px_{key}'] = np.where(any_valid, c[pos, np.arange(c.shape[1])], np.nan)
+
+    return pd.DataFrame(out, index=cols)
+
+
+def price_feature_rows(hist_all, today, tickers=None):
+    """build_price_features → {ticker: {컬럼: 값|None}} (종목 루프용, NaN → None)."""
+    feats = build_price_features(hist_all, today, tickers)
+    if feats.empty:
+        return {}
+    feats['n_obs'] = feats['n_obs'].astype(int)
+    rows = feats.to_dict('index')
+    for r in rows.values():
+        for k, v in r.items():
+            if isinstance(v, float) and np.isnan(v):
+                r[k] = None
+    return rows
+
+
+# ============================================================
+# DB 가격 창
+# ============================================================
+
+class PriceWindow:
+    """ntm_screening 최근 n_dates 거래일(asof 포함 여부 선택) → 날짜(최신순) × 종목 행렬.
+
+    조회 결과는 pandas Series(index=ticker, 결측 제외) — dict(...)로 바로 구 dict 자리에 대체 가능.
+    """
+
+    def __init__(self, conn, asof, n_dates, inclusive=True, fields=('price', 'ntm_current')):
+        op = '<=' if inclusive else '<'
+        self.asof = asof
+        self.fields = tuple(fields)
+        self.dates = [r[0] for r in conn.execute(
+            f'SELECT DISTINCT date FROM ntm_screening WHERE date {op} ? ORDER BY date DESC LIMIT ?',
+            (asof, n_dates))]
+        self._frames = {}
+        if not self.dates:
+            for f in self.fields:
+                self._frames[f] = pd.DataFrame(dtype=float)
+            return
+        df = pd.DataFrame(conn.execute(
+            f'SELECT date, ticker, {", ".join(self.fields)} FROM ntm_screening '
+            f'WHERE date {op} ? AND date >= ?', (asof, self.dates[-1])).fetchall(),
+            columns=['date', 'ticker', *self.fields])
+        for f in self.fields:
+            self._frames[f] = (df.pivot(index='date', columns='ticker', values=f)
+                               .reindex(self.dates).astype(float))
+
+    def frame(self, field='price'):
+        """날짜(최신순) × 종목 DataFrame (결측 NaN)."""
+        return self._frames[field]
+
+    def at(self, k, field='price'):
+        """k거래일 전(0 = 창의 최신일) 값 — 결측 제외. 창 밖이면 빈 Series."""
+        fr = self._frames[field]
+        if k >= len(self.dates) or fr.empty:
+            return pd.Series(dtype=float)
+        return fr.iloc[k].dropna()
+
+    def high(self, n, field='price'):
+        """최근 n개 날짜의 양수 최고값 (v84 HI30: 오늘 포함 30개 날짜)."""
+        fr = self._frames[field].iloc[:n]
+        return fr.where(fr > 0).max(axis=0).dropna()
+
+    def high_last_valid(self, n, field='price'):
+        """종목별 마지막 n개 유효값(결측 건너뜀)의 최고값 — 유효값 n개 미만 종목은 제외.
+        구 'WHERE ticker=? AND price IS NOT NULL ORDER BY date DESC LIMIT n' 와 동일(창 범위 내)."""
+        fr = self._frames[field]
+        if fr.empty:
+            return pd.Series(dtype=float)
+        vals = fr.to_numpy()  # 최신순 → 앞에서부터 센 유효 순번
+        valid = ~np.isnan(vals)
+        cnt = np.cumsum(valid, axis=0)
+        hi = np.where(valid & (cnt <= n), vals, -np.inf).max(axis=0)
+        return pd.Series(hi, index=fr.columns)[valid.sum(axis=0) >= n]
+
+    def chg(self, k, at=0, field='price'):
+        """(값[at] / 값[at+k] − 1) × 100 — 양쪽 유효·분모 ≠ 0 종목만 (px_chg20 = chg(20))."""
+        a, b = self.at(at, field), self.at(at + k, field)
+        b = b[b != 0]
+        idx = a.index.intersection(b.index)
+        return (a[idx] / b[idx] - 1) * 100
+
+    def crash(self, k=5, drop=-0.18, eps_floor=-0.02):
+        """k거래일 주가 drop 이하 급락 & 추정(ntm_current) eps_floor 이내 유지 → 0/1 (crash5)."""
+        p0, pk = self.at(0), self.at(k)
+        n0, nk = self.at(0, 'ntm_current'), self.at(k, 'ntm_current')
+        pk, nk = pk[pk != 0], nk[nk > 0]
+        idx = p0.index.intersection(pk.index).intersection(n0.index).intersection(nk.index)
+        return (((p0[idx] / pk[idx] - 1) <= drop) & ((n0[idx] / nk[idx] - 1) >= eps_floor)).astype(int)
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""순위 이력 패널 — 최근 순위 날짜의 part2_rank·composite_rank(+ price·adj_score)를 쿼리 1회로
+
+배경: 메시지 조립 함수들(get_3day_status · get_rank_history · compute_weighted_ranks · get_rank_change_tags ·
+  get_daily_changes · _build_top5_streak · _recent_held_tickers)이 각자 연결을 열고 겹치는 최근 구간을
+  날짜마다·종목마다 다시 조회 (_build_top5_streak은 종목 × 날짜 단건 쿼리 최대 900회).
+방식:
+  RankHistory(conn, today_str, window=30): today_str 이하 순위 행을 쿼리 1회로 로드
+    → 날짜별 dict + part2_rank 행렬(날짜 × 종목, 없음 = NaN).
+    part2_rank = 최근 window개 날짜, composite_rank(+price·adj_score) = 최근 3개 날짜
+    (가중 순위·변동 태그가 T0~T2만 씀 — 종목 수가 part2의 수 배라 30일치는 낭비).
+    질문별 메서드 = 구 함수의 SQL 의미 그대로:
+      rank_dates(col, limit)  — col이 있는 최근 날짜 (최신 순, 구 _get_recent_dates)
+      ranks(date, col)        — {ticker: 순위}
+      status_3day · rank_trail · weighted_ranks · metrics · daily_changes · streaks · recent_held
+  범위 밖 질문(limit > window, composite는 > 3)은 창 안 날짜까지만 — 기본 30 = _build_top5_streak의 최대 조회 폭.
+  prev_portfolio()만 다른 테이블(portfolio_log) — 생성 때 같은 연결로 함께 조회 (연결은 보관 안 함 —
+    호출측이 생성 직후 close해도 됨).
+소비: daily_runner._rank_history(today_str) — 읽기 전용 공유 연결의 data_version이 같으면 같은 패널 재사용
+  (save_part2_ranks 커밋 뒤 첫 호출에서 1회 로드).
+"""
+import sqlite3
+
+import numpy as np
+
+WINDOW = 30
+COMPOSITE_DAYS = 3
+RANK_COLS = ('composite_rank', 'part2_rank')
+
+
+class RankHistory:
+    """최근 순위 이력 (계약은 모듈 docstring). dates·tickers = p2 행렬의 축 (part2 날짜 오래된 순·종목 정렬)."""
+
+    def __init__(self, conn, today_str=None, window=WINDOW, composite_days=COMPOSITE_DAYS):
+        self.today_str = today_str
+        self.window = window
+        upper = ' AND date <= ?' if today_str else ''
+        head = [today_str] if today_str else []
+
+        def since(col):
+            return (f"date >= (SELECT COALESCE(MIN(date), '') FROM (SELECT DISTINCT date FROM ntm_screening "
+                    f'WHERE {col} IS NOT NULL{upper} ORDER BY date DESC LIMIT ?))')
+
+        # 컬럼별 부분 인덱스(ix_ntm_composite·ix_ntm_part2) 구간 탐색 2개를 한 문장으로
+        rows = conn.execute(
+            'SELECT date, ticker, composite_rank, NULL, price, adj_score FROM ntm_screening '
+            f'WHERE composite_rank IS NOT NULL{upper} AND {since("composite_rank")} UNION ALL '
+            'SELECT date, ticker, NULL, part2_rank, NULL, NULL FROM ntm_screening '
+            f'WHERE part2_rank IS NOT NULL{upper} AND {since("part2_rank")}',
+            head + head + [composite_days] + head + head + [window]).fetchall()
+        self._rank = {c: {} for c in RANK_COLS}
+        self._metric = {}
+        for d, tk, cr, p2, price, score in rows:
+            if cr is not None:
+                self._rank['composite_rank'].setdefault(d, {})[tk] = cr
+                self._metric.setdefault(d, {})[tk] = {'price': price, 'adj_score': score}
+            if p2 is not None:
+                self._rank['part2_rank'].setdefault(d, {})[tk] = p2
+        held = self._rank['part2_rank']
+        self.dates = sorted(held)
+        self.tickers = sorted({tk for m in held.values() for tk in m})
+        ti = {tk: j for j, tk in enumerate(self.tickers)}
+        di = {d: i for i, d in enumerate(self.dates)}
+        self.p2 = np.full((len(self.dates), len(self.tickers)), np.nan)
+        for d, m in held.items():
+            self.p2[di[d], [ti[tk] for tk in m]] = list(m.values())
+        self._ti, self._di = ti, di
+        self._prev_portfolio = self._load_prev_portfolio(conn)
+
+    def rank_dates(self, col='part2_rank', limit=3):
+        """col이 있는 최근 limit개 날짜 (최신 순)."""
+        return sorted(self._rank[col], reverse=True)[:limit]
+
+    def ranks(self, date, col='part2_rank'):
+        """{ticker: 순위} — 그날 col이 있는 종목."""
+        return self._rank[col].get(date, {})
+
+    def status_3day(self, today_tickers):
+        """{ticker: '✅'|'⏳'|'🆕'}, 최근 part2 날짜 수 — 3일·최근 2일 연속 Top 30 (날짜 2개 미만이면 전부 🆕)."""
+        dates = self.rank_dates('part2_rank', 3)
+        if len(dates) < 2:
+            return {t: '🆕' for t in today_tickers}, len(dates)
+        top = [set(self.ranks(d)) for d in dates]
+        verified_3d = top[0] & top[1] & top[2] if len(dates) >= 3 else set()
+        verified_2d = top[0] & top[1]
+        return {t: '✅' if t in verified_3d else '⏳' if t in verified_2d else '🆕' for t in today_tickers}, len(dates)
+
+    def rank_trail(self, today_tickers):
+        """{ticker: '3→4→1'} — 최근 3개 part2 날짜(오래된 순), Top 30 밖·없음은 '-'. 날짜 2개 미만 → {}."""
+        dates = sorted(self.rank_dates('part2_rank', 3))
+        if len(dates) < 2:
+            return {}
+        by_date = [{tk: r for tk, r in self.ranks(d).items() if r <= 30} for d in dates]
+        return {t: '→'.join(str(m[t]) if m.get(t) else '-' for m in by_date) for t in today_tickers}
+
+    def weighted_ranks(self, today_tickers, penalty=50):
+        """composite 3일 궤적 {ticker: {'weighted', 'r0', 'r1', 'r2'}} — T0×0.5 + T1×0.3 + T2×0.2, 없음 = penalty."""
+        dates = sorted(self.rank_dates('composite_rank', 3))
+        if not dates:
+            return {}
+        m0 = self.ranks(dates[-1], 'composite_rank')
+        m1 = self.ranks(dates[-2], 'composite_rank') if len(dates) >= 2 else {}
+        m2 = self.ranks(dates[-3], 'composite_rank') if len(dates) >= 3 else {}
+        out = {}
+        for t in today_tickers:
+            r0, r1, r2 = m0.get(t, penalty), m1.get(t, penalty), m2.get(t, penalty)
+            out[t] = {'weighted': round(r0 * 0.5 + r1 * 0.3 + r2 * 0.2, 1), 'r0': r0, 'r1': r1, 'r2': r2}
+        return out
+
+    def metrics(self, date):
+        """{ticker: {'price', 'adj_score'}} — 그날 composite 종목."""
+        return self._metric.get(date, {})
+
+    def daily_changes(self, today_tickers, top_n=20):
+        """(신규 진입 정렬 리스트, {이탈 종목: 어제 순위}) — 직전 part2 날짜 Top top_n vs 오늘 목록 앞 top_n.
+        part2 날짜 2개 미만 → None."""
+        dates = self.rank_dates('part2_rank', 2)
+        if len(dates) < 2:
+            return None
+        y_ranks = {tk: r for tk, r in self.ranks(dates[1]).items() if r <= top_n}
+        today_top = set(today_tickers[:top_n])
+        entered = today_top - set(y_ranks)
+        exited = set(y_ranks) - today_top
+        return sorted(entered), {t: y_ranks[t] for t in exited}
+
+    def streaks(self, limit=WINDOW):
+        """{ticker: 연속 Top 30 일수} — 최신 part2 날짜의 종목(순위 순), 최근 limit개 part2 날짜에서 끊길 때까지."""
+        dates = self.rank_dates('part2_rank', limit)
+        if not dates:
+            return {}
+        latest = self.ranks(dates[0])
+        cols = [self._ti[tk] for tk in sorted(latest, key=latest.get)]
+        held = ~np.isnan(self.p2[[self._di[d] for d in dates]][:, cols])   # 최신 → 과거
+        run = np.where(held.all(axis=0), len(dates), np.argmin(held, axis=0))
+        return {self.tickers[j]: int(n) for j, n in zip(cols, run)}
+
+    def recent_held(self, lookback=15, rank_thresh=10):
+        """최근 lookback개 part2 날짜 중 한 번이라도 part2_rank ≤ rank_thresh였던 종목 집합."""
+        dates = self.rank_dates('part2_rank', lookback)
+        if not dates:
+            return set()
+        with np.errstate(invalid='ignore'):
+            hit = (self.p2[[self._di[d] for d in dates]] <= rank_thresh).any(axis=0)
+        return {self.tickers[j] for j in np.flatnonzero(hit)}
+
+    def _load_prev_portfolio(self, conn):
+        try:
+            if self.today_str:
+                rows = conn.execute(
+                    "SELECT ticker FROM portfolio_log WHERE date = (SELECT MAX(date) FROM portfolio_log "
+                    "WHERE date < ?) AND action IN ('enter', 'hold')", (self.today_str,)).fetchall()
+            else:
+                rows = conn.execute(
+                    "SELECT ticker FROM portfolio_log WHERE date = (SELECT MAX(date) FROM portfolio_log) "
+                    "AND action IN ('enter', 'hold')").fetchall()
+        except sqlite3.OperationalError:   # portfolio_log 없음 (구 _get_prev_portfolio 예외 → [])
+            return []
+        return [r[0] for r in rows]
+
+    def prev_portfolio(self):
+        """portfolio_log의 today_str 직전(없으면 최신) 날짜 enter·hold 종목 — 생성 때 조회한 값."""
+        return list(self._prev_portfolio)
@@ -2,6 +2,9 @@
 Case 1 보너스 반영 — 전체 기간 part2_rank 재계산
 기존 composite_rank, adj_gap 등 원본 데이터 기반으로
 w_gap(보너스 포함) 재계산 → part2_rank Top 30 재할당
+
+본 DB를 직접 재작성 → 콜드 파티션(cold_store)이 있으면 거부 (이동한 달은 뷰로만 보여 UPDATE 불가).
+  먼저 python cold_store.py --restore.
 """
 import sqlite3
 import sys
@@ -15,6 +18,10 @@ from daily_runner import _compute_w_gap_map, _get_recent_dates
 
 def recompute_all():
     conn = sqlite3.connect(DB_PATH)
+    from cold_store import needs_cold
+    if needs_cold(conn):
+        conn.close()
+        raise SystemExit("콜드 파티션 있음 — python cold_store.py --restore 후 재실행")
     cursor = conn.cursor()
 
     # 모든 날짜 (composite_rank 존재하는)
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""느린 필드 회전 갱신 스케줄러 — 필드 그룹별 종목 최종 수집일 + 일일 예산 슬라이스
+
+배경: 마진·ROE·FCF·부채(분기 공시), trailing EPS(분기), 업종·종목명(거의 불변)은 하루에 안 바뀌는데
+  fetch_revenue_growth가 매일 전 유니버스 quoteSummary를 다시 받음. us_candidates는 이미 OM/FCF/ROE를
+  '회전수집'으로 보고 60일 carry-forward 중.
+방식: refresh_state(grp, ticker, fetched_at, payload) 테이블(메인 DB — 워크플로우 커밋으로 유지)에
+  그룹별 마지막 수집일과 그때 받은 값을 저장. 매일 plan()이 예산만큼만 고름:
+    1) 이벤트 우선(priority) — 어닝 발표 전후·Top30 등 호출측 지정. 예산에서 먼저 확보
+       (상한 도달 종목이 많은 날에도 밀리지 않음 — 구: 2)의 남은 예산만 받아 밀린 날 0개)
+    2) 미수집·나이 ≥ max_age  — 예산 초과라도 전부 (모든 필드의 나이 상한 보장)
+    3) 나머지 예산은 가장 오래된 순
+  날짜·시각은 전부 UTC (utc_today·utc_date) — 실행 머신 TZ(KR 로컬·Actions)에 따라 나이가 하루 밀리지 않게.
+  갱신 안 한 종목은 load()의 저장값으로 채움 → 하류 코드는 매일 전 종목 값이 있는 것처럼 동작.
+커밋은 호출측 책임 (ntm_store와 동일).
+"""
+import json
+from datetime import datetime, timezone
+
+TABLE = 'refresh_state'
+
+
+def init_refresh_table(conn):
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {TABLE} (
+            grp         TEXT NOT NULL,
+            ticker      TEXT NOT NULL,
+            fetched_at  TEXT NOT NULL,
+            payload     TEXT,
+            PRIMARY KEY (grp, ticker)
+        )
+    ''')
+
+
+def utc_today():
+    """오늘 날짜 (UTC) 'YYYY-MM-DD'."""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d')
+
+
+def utc_date(ts):
+    """epoch 초 → UTC date (어닝 timestamp 등 — 로컬 TZ 무관)."""
+    return datetime.fromtimestamp(ts, tz=timezone.utc).date()
+
+
+def _days_between(a, b):
+    return (datetime.strptime(b, '%Y-%m-%d') - datetime.strptime(a, '%Y-%m-%d')).days
+
+
+def budget_count(budget, n_universe):
+    """예산 → 종목 수. 0 < float < 1 이면 유니버스 비율."""
+    if isinstance(budget, float) and 0 < budget < 1:
+        return max(1, int(round(n_universe * budget)))
+    return max(0, int(budget))
+
+
+def plan_refresh(tickers, ages, budget, max_age_days, priority=()):
+    """ages {ticker: 경과일}(없음 = 미수집) → (갱신 종목 리스트(입력 순서), 사유별 개수).
+
+    이벤트 우선을 예산에서 먼저 확보 → 미수집·max_age 도달은 예산과 무관하게 전부 → 남은 예산은 가장 오래된 순.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    n_budget = budget_count(budget, len(tickers))
+    due = [t for t in tickers if ages.get(t) is None or ages[t] >= max_age_days]
+    chosen = set(due)
+    universe = set(tickers)
+    prio = [t for t in dict.fromkeys(priority) if t in universe and t not in chosen][:n_budget]
+    chosen.update(prio)
+    rest = sorted((t for t in tickers if t not in chosen), key=lambda t: -ages[t])
+    stale = rest[:max(0, n_budget - len(chosen))]
+    chosen.update(stale)
+    reasons = {'due': len(due), 'priority': len(prio), 'stalest': len(stale),
+               'skipped': len(tickers) - len(chosen)}
+    return [t for t in tickers if t in chosen], reasons
+
+
+class RefreshScheduler:
+    """필드 그룹 하나(예: 'fundamentals')의 회전 갱신 계획·기록.
+
+    budget: 하루 갱신 종목 수 (int) 또는 유니버스 비율 (0 < float < 1).
+    """
+
+    def __init__(self, conn, group, today, max_age_days=7, budget=0.2):
+        self.conn = conn
+        self.group = group
+        self.today = today
+        self.max_age_days = max_age_days
+        self.budget = budget
+        init_refresh_table(conn)
+
+    def ages(self, tickers=None):
+        """{ticker: 마지막 수집 후 경과 일수} (기록 없는 종목은 빠짐)."""
+        rows = self.conn.execute(f'SELECT ticker, fetched_at FROM {TABLE} WHERE grp=?', (self.group,))
+        want = set(tickers) if tickers is not None else None
+        return {tk: _days_between(at[:10], self.today) for tk, at in rows
+                if want is None or tk in want}
+
+    def plan(self, tickers, priority=()):
+        """오늘 갱신할 종목 리스트 (입력 순서 유지) + 사유별 개수 dict."""
+        return plan_refresh(tickers, self.ages(tickers), self.budget, self.max_age_days, priority)
+
+    def load(self, tickers=None):
+        """{ticker: 마지막 수집 payload dict} — 갱신 안 한 종목 carry-forward용."""
+        want = set(tickers) if tickers is not None else None
+        out = {}
+        for tk, payload in self.conn.execute(
+                f'SELECT ticker, payload FROM {TABLE} WHERE grp=? AND payload IS NOT NULL', (self.group,)):
+            if want is None or tk in want:
+                try:
+                    out[tk] = json.loads(payload)
+                except ValueError:
+                    pass
+        return out
+
+    def record(self, payloads):
+        """{ticker: payload dict|None} → 오늘 수집 완료로 기록 (성공한 종목만 넘길 것)."""
+        self.conn.executemany(
+            f'INSERT INTO {TABLE} (grp, ticker, fetched_at, payload) VALUES (?, ?, ?, ?) '
+            f'ON CONFLICT(grp, ticker) DO UPDATE SET fetched_at=excluded.fetched_at, payload=excluded.payload',
+            [(self.group, tk, self.today, json.dumps(p, default=str) if p is not None else None)
+             for tk, p in payloads.items()])
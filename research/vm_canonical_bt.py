@@ -87,12 +87,8 @@ def _industry_ok(tk, tc):
 
 
 def _pit_te(te, tk, d):
-    r = te.get(tk); v = None
-    if not r: return None
-    for rd, e in r:
-        if rd <= d: v = e
-        else: break
-    return v
+    from asof import pit_value  # bisect (구 선형 순회와 동일 결과)
+    return pit_value(te.get(tk), d)
 
 
 def _ms(v):
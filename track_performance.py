@@ -10,7 +10,6 @@ Usage:
     python track_performance.py detail   # 일별 상세 (종목명 포함)
 """
 import math
-import sqlite3
 import sys
 from pathlib import Path
 
@@ -18,6 +17,7 @@ import yfinance as yf
 
 sys.stdout.reconfigure(encoding='utf-8')
 DB_PATH = Path(__file__).parent / 'eps_momentum_data.db'
+from cold_store import open_history  # 콜드 파티션(오래된 달) 포함 전 이력 — 없으면 그냥 읽기 전용
 
 
 def calc_min_seg(nc, n7, n30, n60, n90):
@@ -62,7 +62,7 @@ def compute_w_gap(cursor, date_str, all_dates):
 
 
 def run_tracker():
-    conn = sqlite3.connect(DB_PATH)
+    conn = open_history(DB_PATH)
     cursor = conn.cursor()
 
     all_dates = [r[0] for r in cursor.execute(
@@ -19,8 +19,9 @@
 연구 근거: research/_prod_faithful_bt_2026_07_31.py(정직 하네스)·_gate_sweep_lag1_*(게이트)
           ·_slots_sweep_*(슬롯)·_lookahead_audit_*(look-ahead 감사)·_robustness_lag1_*(견고성)
 """
-import os, sys, json, csv, sqlite3
+import os, sys, json, csv
 from datetime import datetime
+from db_access import connect as db_connect  # 공유 연결 + pragma (읽기 전용 URI)
 
 sys.stdout.reconfigure(encoding='utf-8')
 HERE = os.path.dirname(os.path.abspath(__file__))
@@ -336,6 +337,7 @@ _SEG_LAG = {'ntm_7d': 5, 'ntm_30d': 21, 'ntm_60d': 42, 'ntm_90d': 63}
 #     꼭대기 0.90 대신 0.85를 쓰는 이유 = 꼭대기는 노이즈일 수 있고 0.85가 LOWO 최고.
 #   ⚠️변화는 작다 — top5 겹침 4.7/5, 교체당 0.3종목. 성과 급변을 기대할 값이 아니다.
 #   킬스위치 VM_DECAY_R=0.80 (구값 복원) 또는 VM_DECAY_EPOCH='9999-12-31'.
+#   r 재스윕은 fpc_sweep(conn, rs=…) — r 벡터 × 전 날짜 × 종목 텐서를 한 번에 (프로덕션 _fpc_map과 비트 동일).
 DECAY_R = float(os.environ.get('VM_DECAY_R', '0.85'))
 DECAY_EPOCH = os.environ.get('VM_DECAY_EPOCH', '2026-08-03')
 _LEGACY_W = {'ntm_7d': .30, 'ntm_30d': .10, 'ntm_60d': .10, 'ntm_90d': .50}
@@ -349,11 +351,13 @@ def _decay_weights(r):
 
 def _decayed_gap_map(conn, date):
     """창 가중치만 r 감쇠형으로 바꾼 괴리율. 구조(중첩)·보조승수는 현행 그대로.
-    보조승수는 DB에 중간값이 없으므로 기존 가중치로 fwd_pe_chg를 재계산해 비율로 보존한다."""
+    보조승수는 기존 가중치 fwd_pe_chg를 같은 기준(DB 거래일 룩백)으로 재계산해 비율로 보존한다.
+    (ntm_signals의 수집 시점 fwd_pe_chg는 가격 룩백 기준이 달라 분모로 쓰면 new/old 비가 섞임.)
+    두 가중치는 _fpc_variants 한 번(래그 패널 1회 로드)으로 같이 계산."""
     base = {tk: float(v) for tk, v in conn.execute(
         'SELECT ticker, adj_gap FROM ntm_screening WHERE date=? AND adj_gap IS NOT NULL', (date,))}
-    new = _fpc_map(conn, date, _decay_weights(DECAY_R))
-    old = _fpc_map(conn, date, _LEGACY_W)
+    var = _fpc_variants(conn, date, {'new': _decay_weights(DECAY_R), 'old': _LEGACY_W})
+    new, old = var.get('new'), var.get('old')
     if not new or not old:
         print('[경고] 감쇠 가중치 계산 실패 → 기존 가중치 사용')
         return base
@@ -365,6 +369,114 @@ def _decayed_gap_map(conn, date):
     return out
 
 
+def _lag_panel(conn, date):
+    """괴리율 재계산 입력 (numpy) — (종목 리스트, 현재 가격, 현재 ntm_current, 과거 PE 행렬, 과거 PE 유효 마스크).
+    과거 PE[:, k] = _SEG_KEYS[k] 거래일 전 가격 / 현재 행의 해당 NTM 창 (가격·창 값이 0/NULL이거나
+    창 ≤ 0이거나 이력이 그만큼 없으면 무효 — 구 dict 루프의 조건 그대로).
+    필요한 날짜(당일 + _SEG_LAG 거래일 전 4개)의 행만 로드. 당일 price IS NOT NULL 행만 대상.
+    date가 DB에 없으면 None."""
+    import numpy as np
+    dates = [r[0] for r in conn.execute(
+        'SELECT DISTINCT date FROM ntm_screening WHERE date<=? ORDER BY date', (date,))]
+    if not dates or dates[-1] != date:
+        return None
+    i_now = len(dates) - 1
+    lag_dates = [dates[i_now - _SEG_LAG[k]] if i_now - _SEG_LAG[k] >= 0 else None for k in _SEG_KEYS]
+    need = [date] + [d for d in lag_dates if d]
+    now, then = {}, {}
+    for d, tk, p, nc, n7, n30, n60, n90 in conn.execute(
+            'SELECT date,ticker,price,ntm_current,ntm_7d,ntm_30d,ntm_60d,ntm_90d '
+            f'FROM ntm_screening WHERE price IS NOT NULL AND date IN ({",".join("?" * len(need))})', need):
+        if d == date:
+            now[tk] = (p, nc, n7, n30, n60, n90)
+        then.setdefault(d, {})[tk] = p
+    tks = list(now)
+
+    def _arr(vals):
+        return np.array([np.nan if v is None else v for v in vals], dtype=float)
+
+    p_now = _arr(now[tk][0] for tk in tks)
+    nc_now = _arr(now[tk][1] for tk in tks)
+    eps_then = np.column_stack([_arr(now[tk][k + 2] for tk in tks) for k in range(4)]) if tks else np.empty((0, 4))
+    p_then = np.column_stack([_arr(then.get(d, {}).get(tk) for tk in tks) if d else np.full(len(tks), np.nan)
+                              for d in lag_dates]) if tks else np.empty((0, 4))
+    pe_then, ok = _pe_then(p_then, eps_then)
+    return tks, p_now, nc_now, pe_then, ok
+
+
+def _pe_then(p_then, eps_then):
+    """과거 PE·유효 마스크 (배열 모양 무관, 마지막 축 = _SEG_KEYS 창)."""
+    import numpy as np
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ok = (p_then != 0) & ~np.isnan(p_then) & (eps_then > 0)
+        pe_then = np.where(ok, p_then / np.where(ok, eps_then, 1.0), np.nan)
+    return pe_then, ok
+
+
+def _pe_now(p_now, nc_now):
+    """현재 PE·유효 마스크 (ntm_current > 0, 가격 0/결측 아님)."""
+    import numpy as np
+    with np.errstate(invalid='ignore', divide='ignore'):
+        live = (nc_now > 0) & (p_now != 0) & ~np.isnan(p_now)
+        pe_now = np.where(live, p_now / np.where(live, nc_now, 1.0), np.nan)
+    return pe_now, live
+
+
+def _fpc_weighted(pe_now, live, pe_then, ok, w):
+    """중첩 fwd_pe_chg 배열 연산 — 프로덕션·스윕 공용 유일 구현.
+
+    pe_now·live: 임의 모양 X (종목, 또는 날짜×종목). pe_then·ok: X + (4,).
+    w: (4,) 또는 (S, 4) 창 가중치 (_SEG_KEYS 순서, ≤ 0 창은 제외). Returns: w.shape[:-1] + X, 산출 불가 = NaN.
+    """
+    import numpy as np
+    w = np.asarray(w, dtype=float)
+    lead = w.shape[:-1]
+    w = w.reshape(lead + (1,) * pe_now.ndim + (4,))
+    pos = ok & (pe_then > 0)
+    s = np.zeros(lead + pe_now.shape)
+    ws = np.zeros(lead + pe_now.shape)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for k in range(4):   # 창 순서대로 누적 (구 dict 루프와 같은 합산·연산 순서 → 비트 동일)
+            wk = w[..., k]
+            use = pos[..., k] & (wk > 0)
+            s = np.where(use, s + wk * (pe_now - pe_then[..., k]) / pe_then[..., k] * 100.0, s)
+            ws = np.where(use, ws + wk, ws)
+        return np.where(live & (ws != 0), s / np.where(ws != 0, ws, 1.0), np.nan)
+
+
+def _fpc_variants(conn, date, weights=None, seg=False):
+    """선행PER 변화율 여러 변형을 래그 패널 1회 로드 + 배열 연산으로 — {이름: {ticker: 값}}.
+
+    weights: {이름: W} — 중첩 fwd_pe_chg, W 키는 ntm_7d/30d/60d/90d (가중치 ≤ 0 창은 제외,
+      유효 창만으로 가중평균). seg=True → 'seg': 비중첩 구간 괴리율(_seg_gap_map 정의).
+    구 _fpc_map·_seg_gap_map은 호출마다 패널을 다시 읽고 종목×창 Python 루프 — 값은 동일(같은 연산 순서).
+    date가 DB에 없으면 {}."""
+    import numpy as np
+    lp = _lag_panel(conn, date)
+    if lp is None:
+        return {}
+    tks, p_now, nc_now, pe_then, ok = lp
+    pe_now, live = _pe_now(p_now, nc_now)
+    out = {}
+    for name, W in (weights or {}).items():
+        v = _fpc_weighted(pe_now, live, pe_then, ok, [W.get(k, 0.0) for k in _SEG_KEYS])
+        out[name] = {tks[i]: float(v[i]) for i in np.flatnonzero(~np.isnan(v))}
+    if seg:
+        # 구간 (90→60), (60→30), (30→7), (7→현재). a 시점 PE > 0, b 시점 PE 유효일 때만.
+        pe_all = np.column_stack([pe_then, pe_now]) if len(tks) else np.empty((0, 5))
+        ok_all = np.column_stack([ok, live]) if len(tks) else np.empty((0, 5), dtype=bool)
+        s = np.zeros(len(tks))
+        n = np.zeros(len(tks))
+        for a, b in ((3, 2), (2, 1), (1, 0), (0, 4)):
+            with np.errstate(invalid='ignore', divide='ignore'):
+                use = ok_all[:, a] & ok_all[:, b] & (pe_all[:, a] > 0)
+                s = np.where(use, s + (pe_all[:, b] - pe_all[:, a]) / pe_all[:, a] * 100.0, s)
+            n = n + use
+        keep = live & (n > 0)
+        out['seg'] = {tks[i]: float(s[i] / n[i]) for i in np.flatnonzero(keep)}
+    return out
+
+
 def _seg_gap_map(conn, date):
     """비중첩 구간 괴리율 {ticker: 값}. 낮을수록 좋음(기존 adj_gap과 부호 규약 동일).
 
@@ -372,134 +484,81 @@ def _seg_gap_map(conn, date):
     구간 = (90일전→60일전), (60일전→30일전), (30일전→7일전), (7일전→현재).
     네 구간 등가중 평균. 계산 불가 구간은 제외하고 남은 구간으로 평균.
     """
-    dates = [r[0] for r in conn.execute(
-        'SELECT DISTINCT date FROM ntm_screening WHERE date<=? ORDER BY date', (date,))]
-    di = {d: i for i, d in enumerate(dates)}
-    if date not in di:
-        return {}
-    i_now = di[date]
-    px, ntm = {}, {}
-    for d, tk, p, nc, n7, n30, n60, n90 in conn.execute(
-            'SELECT date,ticker,price,ntm_current,ntm_7d,ntm_30d,ntm_60d,ntm_90d '
-            'FROM ntm_screening WHERE price IS NOT NULL'):
-        px.setdefault(tk, {})[d] = p
-        ntm.setdefault(tk, {})[d] = (nc, n7, n30, n60, n90)
-    out = {}
-    for tk, v in ntm.items():
-        cur = v.get(date)
-        if not cur or not cur[0] or cur[0] <= 0:
-            continue
-        p_now = px.get(tk, {}).get(date)
-        if not p_now:
-            continue
-
-        def pe(idx):
-            """idx=None → 현재. 아니면 _SEG_KEYS[idx] 시점."""
-            if idx is None:
-                return p_now / cur[0]
-            k = _SEG_KEYS[idx]
-            j = i_now - _SEG_LAG[k]
-            if j < 0:
-                return None
-            p_then = px.get(tk, {}).get(dates[j])
-            e_then = cur[idx + 1]
-            if not p_then or not e_then or e_then <= 0:
-                return None
-            return p_then / e_then
-
-        s = n = 0.0
-        for a, b in ((3, 2), (2, 1), (1, 0), (0, None)):   # 90→60, 60→30, 30→7, 7→현재
-            pa, pb = pe(a), pe(b)
-            if pa is None or pb is None or pa <= 0:
-                continue
-            s += (pb - pa) / pa * 100.0
-            n += 1
-        if n:
-            out[tk] = s / n
-    return out
+    return _fpc_variants(conn, date, seg=True).get('seg', {})
 
 
 def _fpc_map(conn, date, W):
     """임의 창 가중치 W로 중첩 fwd_pe_chg 계산. W 키는 ntm_7d/30d/60d/90d."""
-    dates = [r[0] for r in conn.execute(
-        'SELECT DISTINCT date FROM ntm_screening WHERE date<=? ORDER BY date', (date,))]
-    di = {d: i for i, d in enumerate(dates)}
-    if date not in di:
-        return {}
-    i_now = di[date]
-    px, ntm = {}, {}
-    for d, tk, p, nc, n7, n30, n60, n90 in conn.execute(
-            'SELECT date,ticker,price,ntm_current,ntm_7d,ntm_30d,ntm_60d,ntm_90d '
-            'FROM ntm_screening WHERE price IS NOT NULL'):
-        px.setdefault(tk, {})[d] = p
-        ntm.setdefault(tk, {})[d] = (nc, n7, n30, n60, n90)
-    out = {}
-    for tk, v in ntm.items():
-        cur = v.get(date)
-        p_now = px.get(tk, {}).get(date)
-        if not cur or not cur[0] or cur[0] <= 0 or not p_now:
-            continue
-        pe_now = p_now / cur[0]
-        s = w = 0.0
-        for idx, k in enumerate(_SEG_KEYS):
-            ww = W.get(k, 0.0)
-            if ww <= 0:
-                continue
-            j = i_now - _SEG_LAG[k]
-            if j < 0:
-                continue
-            p_then, e_then = px.get(tk, {}).get(dates[j]), cur[idx + 1]
-            if not p_then or not e_then or e_then <= 0:
-                continue
-            pe_then = p_then / e_then
-            if pe_then <= 0:
-                continue
-            s += ww * (pe_now - pe_then) / pe_then * 100.0
-            w += ww
-        if w:
-            out[tk] = s / w
-    return out
+    return _fpc_variants(conn, date, {'w': W}).get('w', {})
 
 
-def _overlap_fpc_map(conn, date):
-    """기존(중첩) fwd_pe_chg 재계산 — 보조 승수 비율 M = adj_gap/fwd_pe_chg 산출용.
-    가중치는 v80.10 운영값 7d .30 / 30d .10 / 60d .10 / 90d .50."""
-    W = {'ntm_7d': .30, 'ntm_30d': .10, 'ntm_60d': .10, 'ntm_90d': .50}
-    dates = [r[0] for r in conn.execute(
-        'SELECT DISTINCT date FROM ntm_screening WHERE date<=? ORDER BY date', (date,))]
-    di = {d: i for i, d in enumerate(dates)}
-    if date not in di:
-        return {}
-    i_now = di[date]
-    px, ntm = {}, {}
-    for d, tk, p, nc, n7, n30, n60, n90 in conn.execute(
-            'SELECT date,ticker,price,ntm_current,ntm_7d,ntm_30d,ntm_60d,ntm_90d '
-            'FROM ntm_screening WHERE price IS NOT NULL'):
-        px.setdefault(tk, {})[d] = p
-        ntm.setdefault(tk, {})[d] = (nc, n7, n30, n60, n90)
-    out = {}
-    for tk, v in ntm.items():
-        cur = v.get(date)
-        p_now = px.get(tk, {}).get(date)
-        if not cur or not cur[0] or cur[0] <= 0 or not p_now:
+def decay_weight_matrix(rs):
+    """r 벡터 → (len(rs), 4) 창 가중치 행렬 (_SEG_KEYS 순서, 행마다 _decay_weights(r))."""
+    import numpy as np
+    return np.array([[_decay_weights(r)[k] for k in _SEG_KEYS] for r in rs], dtype=float).reshape(-1, 4)
+
+
+def fpc_sweep(conn, rs=None, weights=None, start=None, end=None, chunk=64):
+    """창 가중치 스윕 — (가중치 세트 × 날짜 × 종목) 중첩 fwd_pe_chg 텐서를 한 번의 로드 + 배열 연산으로.
+
+    rs: 감쇠 r 벡터 (→ decay_weight_matrix) / weights: (S, 4) 행렬(_SEG_KEYS 순서) 또는 [W dict].
+      둘 다 주면 rs 행이 앞. start·end: 날짜 범위 (None = 처음·끝까지).
+    값 = 각 날짜에 _fpc_map(conn, 날짜, W)와 비트 동일 (같은 _pe_then·_pe_now·_fpc_weighted 경로,
+      래그 = conn의 ntm_screening 거래일 목록 기준 — start 이전 63거래일은 과거 가격용으로만 읽음).
+    전 이력 스윕은 콜드 파티션이 붙은 연결로: cold_store.open_history().
+    chunk: 한 번에 계산할 날짜 수 (중간 배열 메모리 상한).
+    Returns: (dates, tickers, W (S×4), fpc (S×날짜×종목, 산출 불가 = NaN)).
+      종목 축 = 범위 안에서 price가 있는 종목 전체. 날짜 범위가 비면 빈 축.
+    """
+    import numpy as np
+    W = [] if rs is None else [decay_weight_matrix(rs)]
+    if weights is not None:
+        if len(weights) and isinstance(weights[0], dict):
+            weights = [[Wd.get(k, 0.0) for k in _SEG_KEYS] for Wd in weights]
+        W.append(np.asarray(weights, dtype=float).reshape(-1, 4))
+    W = np.vstack(W) if W else np.empty((0, 4))
+    all_dates = [r[0] for r in conn.execute(
+        'SELECT DISTINCT date FROM ntm_screening WHERE date<=? ORDER BY date', (end or '9999-12-31',))]
+    i0 = next((i for i, d in enumerate(all_dates) if start is None or d >= start), len(all_dates))
+    dates = all_dates[i0:]
+    if not dates:
+        return [], [], W, np.empty((len(W), 0, 0))
+    lo = max(0, i0 - max(_SEG_LAG.values()))
+    di = {d: i for i, d in enumerate(all_dates[lo:])}
+    rows = conn.execute(
+        'SELECT date,ticker,price,ntm_current,ntm_7d,ntm_30d,ntm_60d,ntm_90d '
+        'FROM ntm_screening WHERE price IS NOT NULL AND date>=? AND date<=?',
+        (all_dates[lo], dates[-1])).fetchall()
+    tks = sorted({r[1] for r in rows if r[0] >= dates[0]})
+    ti = {tk: j for j, tk in enumerate(tks)}
+    nl, nd, nt = len(di), len(dates), len(tks)
+    px = np.full((nl, nt), np.nan)             # 로드 구간 전체 가격 (과거 가격 조회용)
+    nc_now = np.full((nd, nt), np.nan)
+    eps_then = np.full((nd, nt, 4), np.nan)    # 현재 행의 NTM 창 값 (구 루프 그대로)
+    off = i0 - lo
+    for d, tk, p, nc, n7, n30, n60, n90 in rows:
+        j = ti.get(tk)
+        if j is None:
             continue
-        pe_now = p_now / cur[0]
-        s = w = 0.0
-        for idx, k in enumerate(_SEG_KEYS):
-            j = i_now - _SEG_LAG[k]
-            if j < 0:
-                continue
-            p_then, e_then = px.get(tk, {}).get(dates[j]), cur[idx + 1]
-            if not p_then or not e_then or e_then <= 0:
-                continue
-            pe_then = p_then / e_then
-            if pe_then <= 0:
-                continue
-            s += W[k] * (pe_now - pe_then) / pe_then * 100.0
-            w += W[k]
-        if w:
-            out[tk] = s / w
-    return out
+        i = di[d]
+        px[i, j] = p
+        if i >= off:
+            nc_now[i - off, j] = np.nan if nc is None else nc
+            eps_then[i - off, j] = [np.nan if v is None else v for v in (n7, n30, n60, n90)]
+    p_now = px[off:]
+    # 날짜 i의 창 k 과거 가격 = 전체 거래일 목록에서 _SEG_LAG[k] 앞 행 (이력 부족이면 NaN)
+    p_then = np.full((nd, nt, 4), np.nan)
+    for k, key in enumerate(_SEG_KEYS):
+        src = np.arange(off, off + nd) - _SEG_LAG[key]
+        has = src >= 0
+        p_then[has, :, k] = px[src[has]]
+    out = np.full((len(W), nd, nt), np.nan)
+    for a in range(0, nd, max(1, chunk)):
+        b = min(nd, a + max(1, chunk))
+        pe_then, ok = _pe_then(p_then[a:b], eps_then[a:b])
+        pe_now, live = _pe_now(p_now[a:b], nc_now[a:b])
+        out[:, a:b] = _fpc_weighted(pe_now, live, pe_then, ok, W)
+    return dates, tks, W, out
 
 
 def _adj_gap_map(conn, date):
@@ -511,15 +570,19 @@ def _adj_gap_map(conn, date):
         if DECAY_R != 0.80 and date >= DECAY_EPOCH:
             return _decayed_gap_map(conn, date)
         return base
-    seg = _seg_gap_map(conn, date)
+    # 기존(중첩) fwd_pe_chg — 보조 승수 비율 M = adj_gap/fwd_pe_chg 산출용. v80.10 가중치(.30/.10/.10/.50)로
+    #   비중첩과 같은 패스에서 재계산 (DB 거래일 룩백). ntm_signals의 수집 시점 값(달력 룩백)은 쓰지 않음 —
+    #   M이 달라져 VM_SEG_GAP_ENABLE 결과가 소급 변경됨.
+    var = _fpc_variants(conn, date, {'legacy': _LEGACY_W}, seg=True)
+    seg = var.get('seg')
     if not seg:
         print('[경고] 비중첩 구간 괴리율 계산 실패 → 기존 중첩 방식 사용')
         return base
     # 보조 승수 보존: 기존 adj_gap 대비 fwd_pe_chg 비율만큼 스케일.
     #   adj_gap = fwd_pe_chg x M  →  M = adj_gap / fwd_pe_chg. 새 값 = seg x M.
     #   fwd_pe_chg가 DB에 없거나 0이면 승수 없이 seg 그대로(보수적).
-    #   ⚠️fwd_pe_chg는 DB에 저장되지 않으므로(컬럼 없음) 기존 가중치로 직접 재계산해 비율을 얻는다.
-    fpc = _overlap_fpc_map(conn, date)
+    #   ⚠️fwd_pe_chg는 기존 가중치로 직접 재계산해 비율을 얻는다.
+    fpc = var.get('legacy', {})
     out = {}
     for tk, sv in seg.items():
         f, a = fpc.get(tk), base.get(tk)
@@ -549,8 +612,16 @@ def _carry_forward_windows(conn, today):
     """오늘 0/None으로 글리치된 EPS 창을 종목별 '직전 유효값'으로 대체하기 위한 맵.
     야후 순간 수집 실패(2026-07-14 KR 34·US 12종목 관측)가 재발해도 정상 종목이
     min_seg/rev90에서 탈락하지 않도록 — 하이닉스 n60=0 부당탈락 재발 방지.
-    반환: {ticker: {col: 오늘 이전 최신 유효값}}."""
+    반환: {ticker: {col: 오늘 이전 최신 유효값}}.
+    latest_valid 동기화된 DB면 키 조회(O(유니버스)), 아니면(KR DB 등) 구 전 이력 스캔."""
     cols = ('ntm_current', 'ntm_7d', 'ntm_30d', 'ntm_60d', 'ntm_90d')
+    try:
+        from latest_valid import latest_asof
+        m = latest_asof(conn, cols, today)
+    except Exception:
+        m = None
+    if m is not None:
+        return m
     m = {}
     for row in conn.execute(
             'SELECT ticker,' + ','.join(cols) + ' FROM ntm_screening WHERE date < ? ORDER BY date',
@@ -563,6 +634,31 @@ def _carry_forward_windows(conn, today):
     return m
 
 
+def _fund_carry_forward(conn, last, max_age_days=None):
+    """OM/FCF/ROE 전방채움 {ticker: [om, fcf, roe]} — last 이하 최신 비결측값 (max_age_days 창 안).
+    latest_valid 동기화된 DB면 키 조회, 아니면 구 스캔 (창 없으면 전 이력)."""
+    cols = ('operating_margin', 'free_cashflow', 'roe')
+    try:
+        from latest_valid import latest_asof
+        lv = latest_asof(conn, cols, last, inclusive=True, max_age_days=max_age_days)
+    except Exception:
+        lv = None
+    if lv is not None:
+        return {tk: [m.get(c) for c in cols] for tk, m in lv.items()}
+    fund = {}
+    sql = 'SELECT ticker, ' + ', '.join(cols) + ' FROM ntm_screening WHERE date<=?'
+    args = (last,)
+    if max_age_days is not None:
+        sql += f" AND date>=date(?, '-{int(max_age_days)} day')"
+        args = (last, last)
+    for tk, om, fcf, roe in conn.execute(sql + ' ORDER BY date', args):
+        e = fund.setdefault(tk, [None, None, None])
+        if om is not None: e[0] = om
+        if fcf is not None: e[1] = fcf
+        if roe is not None: e[2] = roe
+    return fund
+
+
 def _cf(v, tk, col, cf):
     """v가 0/None 글리치면 carry-forward 맵의 직전 유효값으로 대체(없으면 원값 유지)."""
     if v and v > 0:
@@ -620,49 +716,28 @@ def us_candidates():
     _te_full = os.path.join(HERE, 'data_cache', 'trailing_eps_ttm_full.json')
     _te_path = _te_full if os.path.exists(_te_full) else os.path.join(HERE, 'data_cache', 'trailing_eps_ttm.json')
     TE = json.load(open(_te_path, encoding='utf-8'))
-    conn = sqlite3.connect(os.path.join(HERE, 'eps_momentum_data.db'))
+    conn = db_connect(os.path.join(HERE, 'eps_momentum_data.db'), readonly=True)
     c = conn.cursor()
     last = c.execute('SELECT MAX(date) FROM ntm_screening').fetchone()[0]
     # 안전필터 패리티 (2026-07-09 production A군): OM/FCF/ROE는 회전수집이라 60일 carry-forward
-    fund = {}
-    for tk, om, fcf, roe in c.execute(
-            "SELECT ticker, operating_margin, free_cashflow, roe FROM ntm_screening "
-            "WHERE date<=? AND date>=date(?, '-60 day') ORDER BY date", (last, last)):
-        e = fund.setdefault(tk, [None, None, None])
-        if om is not None: e[0] = om
-        if fcf is not None: e[1] = fcf
-        if roe is not None: e[2] = roe
+    fund = _fund_carry_forward(conn, last, max_age_days=60)
     cf = _carry_forward_windows(conn, last)  # 글리치 0값 → 직전 유효값 대체 (재발 방지)
     AGM = _adj_gap_map(conn, last)           # 괴리율(gap 모드 순위 기준)
     # ★2026-08-01 관찰컬럼용 이력 (매매 개입 0, REDESIGN_DEBATE_2026_08_01.md):
     #   px_chg20 = 20거래일 주가 변화% (약형 괴리 '주가 하락산' 판별)
     #   crash5   = 5거래일 −18%+ 급락 & 추정 유지(−2% 이내) 플래그 (크래시셀 라이브 forward 추적)
     #   07-13 stale/below_ma120 컬럼과 같은 선례 — 게이트 아님, 판정일 판단용 기록.
-    _hd = [r[0] for r in conn.execute(
-        'SELECT DISTINCT date FROM ntm_screening WHERE date<=? ORDER BY date DESC LIMIT 31', (last,))]
-    _d20 = _hd[20] if len(_hd) >= 21 else None
-    _d5 = _hd[5] if len(_hd) >= 6 else None
+    #   가격 이력 = price_panel.PriceWindow (최근 31거래일 창 쿼리 1회, daily_runner high30과 공용).
+    from price_panel import PriceWindow
+    _pw = PriceWindow(conn, last, 31)
     # dd_30_25용 30세션 고점 (오늘 포함 30개 날짜의 최고가 — v84 high30 정의)
-    HI30 = {}
-    for _dd_ in _hd[:30]:
-        for _t, _p in conn.execute('SELECT ticker, price FROM ntm_screening WHERE date=? AND price IS NOT NULL', (_dd_,)):
-            if _p and _p > HI30.get(_t, 0):
-                HI30[_t] = _p
-    PX20 = {t: p for t, p in conn.execute(
-        'SELECT ticker, price FROM ntm_screening WHERE date=? AND price IS NOT NULL', (_d20,))} if _d20 else {}
-    # ★2026-08-05 급락컷 진입 확인 2일용 — 어제 기준 20일 변화율을 재려면 어제 종가(_d1)와
-    #   21거래일 전 종가(_d21)가 필요하다. 없으면 빈 dict → 확인 조건이 자동 무효(=현행 동작).
-    _d1 = _hd[1] if len(_hd) > 1 else None
-    _d21 = _hd[21] if len(_hd) > 21 else None
-    PX1 = {t: p for t, p in conn.execute(
-        'SELECT ticker, price FROM ntm_screening WHERE date=? AND price IS NOT NULL', (_d1,))} if _d1 else {}
-    PX21 = {t: p for t, p in conn.execute(
-        'SELECT ticker, price FROM ntm_screening WHERE date=? AND price IS NOT NULL', (_d21,))} if _d21 else {}
-    PX5, NC5 = {}, {}
-    if _d5:
-        for _t, _p, _n in conn.execute('SELECT ticker, price, ntm_current FROM ntm_screening WHERE date=?', (_d5,)):
-            if _p: PX5[_t] = _p
-            if _n: NC5[_t] = _n
+    HI30 = dict(_pw.high(30))
+    PX20 = dict(_pw.at(20))
+    # ★2026-08-05 급락컷 진입 확인 2일용 — 어제 기준 20일 변화율을 재려면 어제 종가(at(1))와
+    #   21거래일 전 종가(at(21))가 필요하다. 창 밖이면 빈 dict → 확인 조건이 자동 무효(=현행 동작).
+    PX1, PX21 = dict(_pw.at(1)), dict(_pw.at(21))
+    PXCHG20 = dict(_pw.chg(20))
+    CRASH5 = {t: int(v) for t, v in _pw.crash(5, drop=-0.18, eps_floor=-0.02).items()}
     out = []
     for tk, p, nc, n7, n30, n60, n90, dv, na, m120, ru30, rg in c.execute(
             'SELECT ticker,price,ntm_current,ntm_7d,ntm_30d,ntm_60d,ntm_90d,dollar_volume_30d,'
@@ -728,7 +803,7 @@ def us_candidates():
         if rg is not None and rg < REVG_MIN:
             continue
         # rev30/below_ma120/px_chg20/crash5/na/up30 = 관찰 전용 원장 컬럼 (매매 개입 0)
-        _p20, _p5, _n5 = PX20.get(tk), PX5.get(tk), NC5.get(tk)
+        _p20 = PX20.get(tk)
         # 가치함정 게이트 (상단 TRAP_* 주석 참조): 괴리가 '주가 하락만'으로 만들어진 후보 컷.
         if (_GAP_MODE and TRAP_GATE_ON and last >= TRAP_EPOCH
                 and _seg(nc, n30) <= TRAP_REV30 and _p20 is not None and p < _p20):
@@ -792,9 +867,7 @@ def us_candidates():
                         gap=g, dv_musd=dv, price=p, rev30=_seg(nc, n30),
                         adj_gap=AGM.get(tk),
                         below_ma120=(int(p < m120) if m120 else None),
-                        px_chg20=((p / _p20 - 1) * 100 if _p20 else None),
-                        crash5=(int((p / _p5 - 1) <= -0.18 and (nc / _n5 - 1) >= -0.02)
-                                if (_p5 and _n5 and _n5 > 0) else None),
+                        px_chg20=PXCHG20.get(tk), crash5=CRASH5.get(tk),
                         na=na, up30=(ru30 or 0), rev_growth=rg,
                         dd30=((p / HI30[tk] - 1) * 100 if HI30.get(tk) else None)))
     conn.close()
@@ -807,7 +880,7 @@ def kr_candidates(fx):
     """반환: (last_date, 후보리스트, health). health = 수집/게이트 건강성 (2026-07-10 감사수리:
     ①7/9 GH Actions 샘플 실행에서 fs_dart parquet 부재 → gap 전원 None → missing=pass로
     KR 가치게이트가 조용히 전멸했던 사고 감지 ②KR yf 수집 붕괴(210→73) 감시)."""
-    conn = sqlite3.connect(KR_DB)
+    conn = db_connect(KR_DB, readonly=True)
     c = conn.cursor()
     last = c.execute('SELECT MAX(date) FROM ntm_screening').fetchone()[0]
     rows = c.execute(
@@ -820,14 +893,8 @@ def kr_candidates(fx):
     if not os.path.isdir(KR_FS_DIR):
         health['warnings'].append(f'KR 재무 폴더 없음({KR_FS_DIR}) — 가치게이트(gap) 전면 미작동')
     # 안전필터 패리티 (KR도 동일): OM/FCF/ROE carry-forward
-    kconn = sqlite3.connect(KR_DB)
-    kfund = {}
-    for tk_, om_, fcf_, roe_ in kconn.execute(
-            'SELECT ticker, operating_margin, free_cashflow, roe FROM ntm_screening ORDER BY date'):
-        e = kfund.setdefault(tk_, [None, None, None])
-        if om_ is not None: e[0] = om_
-        if fcf_ is not None: e[1] = fcf_
-        if roe_ is not None: e[2] = roe_
+    kconn = db_connect(KR_DB, readonly=True)
+    kfund = _fund_carry_forward(kconn, last)
     KAGM = _adj_gap_map(kconn, last)  # 괴리율(gap 모드 순위 기준)
     kconn.close()
     pre = []
@@ -916,7 +983,7 @@ def _universe_rev90(db, dv_min=None, n90_floor=0.1, window_days=30):
     n90_floor: 저분모 rev90 폭발 가드 — 구현이 0.1을 양국 동일 적용해 원화(KR)엔 사실상
     무가드였음 → KR 호출부는 100(원)을 넘길 것.
     """
-    c = sqlite3.connect(db)
+    c = db_connect(db, readonly=True)
     dt = c.execute('SELECT MAX(date) FROM ntm_screening').fetchone()[0]
     has_dv = any(r[1] == 'dollar_volume_30d' for r in c.execute("PRAGMA table_info(ntm_screening)"))
     dv_col = ', dollar_volume_30d' if has_dv else ', NULL'
@@ -1141,7 +1208,7 @@ def _us_grid():
     """리밸 시계의 단일 기준 = US 거래일 그리드(앵커 GRID_ANCHOR, R5).
     2026-07-10 감사수리: 표시(is_rebal)는 이 그리드, NAV 리플레이는 '로그 실행일 인덱스 i%5'로
     서로 다른 시계였음(지시한 매매와 표시한 누적 성과가 다른 날 리밸) → 전부 이 그리드로 통일."""
-    c = sqlite3.connect(os.path.join(HERE, 'eps_momentum_data.db'))
+    c = db_connect(os.path.join(HERE, 'eps_momentum_data.db'), readonly=True)
     usd = [x[0] for x in c.execute(
         "SELECT DISTINCT date FROM ntm_screening WHERE part2_rank IS NOT NULL AND date>=? ORDER BY date",
         (GRID_ANCHOR,))]
@@ -1324,7 +1391,7 @@ def _log_state_vector(us_date, merged, target, held):
         med = lambda a: sorted(a)[len(a) // 2] if a else None
         cand = [abs(d['adj_gap']) for d in merged if d.get('adj_gap') is not None]
         top = [abs(d['adj_gap']) for d in merged[:N_TOP] if d.get('adj_gap') is not None]
-        c = sqlite3.connect(os.path.join(HERE, 'eps_momentum_data.db'))
+        c = db_connect(os.path.join(HERE, 'eps_momentum_data.db'), readonly=True)
         uni = [abs(v) for (v,) in c.execute(
             'SELECT adj_gap FROM ntm_screening WHERE date=? AND adj_gap IS NOT NULL', (us_date,))]
         c.close()
@@ -1661,18 +1728,30 @@ def _us_cards(tickers):
     """US 종목 건강성 카드 (US DB carry-forward 최신값). {tk: [줄,...]}"""
     out = {}
     try:
-        conn = sqlite3.connect(os.path.join(HERE, 'eps_momentum_data.db'))
+        conn = db_connect(os.path.join(HERE, 'eps_momentum_data.db'), readonly=True)
+        # latest_valid 동기화된 DB면 종목 루프 쿼리 대신 키 조회 1회
+        _card_cols = ('num_analysts', 'rev_up30', 'rev_down30', 'rev_growth', 'market_cap',
+                      'dollar_volume_30d', 'roe', 'free_cashflow', 'operating_margin')
+        try:
+            from latest_valid import latest_asof
+            _last = conn.execute('SELECT MAX(date) FROM ntm_screening').fetchone()[0]
+            lv = latest_asof(conn, _card_cols, _last, inclusive=True, max_age_days=60, tickers=tickers)
+        except Exception:
+            lv = None
         for tk in tickers:
-            r = conn.execute(
-                "SELECT num_analysts, rev_up30, rev_down30, rev_growth, market_cap, "
-                "dollar_volume_30d, roe, free_cashflow, operating_margin FROM ntm_screening "
-                "WHERE ticker=? AND date>=date((SELECT MAX(date) FROM ntm_screening), '-60 day') "
-                "ORDER BY date", (tk,)).fetchall()
-            f = [None] * 9
-            for row in r:
-                for k, v in enumerate(row):
-                    if v is not None:
-                        f[k] = v
+            if lv is not None:
+                f = [lv.get(tk, {}).get(c) for c in _card_cols]
+            else:
+                r = conn.execute(
+                    "SELECT num_analysts, rev_up30, rev_down30, rev_growth, market_cap, "
+                    "dollar_volume_30d, roe, free_cashflow, operating_margin FROM ntm_screening "
+                    "WHERE ticker=? AND date>=date((SELECT MAX(date) FROM ntm_screening), '-60 day') "
+                    "ORDER BY date", (tk,)).fetchall()
+                f = [None] * 9
+                for row in r:
+                    for k, v in enumerate(row):
+                        if v is not None:
+                            f[k] = v
             na, up, dn, rg, mc, dv, roe, fcf, om = f
             l1, l2 = [], []
             if na:
@@ -2059,7 +2138,7 @@ def cmd_run():
         if _extra:
             _pr = {}
             try:
-                _c = sqlite3.connect(os.path.join(HERE, 'eps_momentum_data.db'))
+                _c = db_connect(os.path.join(HERE, 'eps_momentum_data.db'), readonly=True)
                 _q = ','.join('?' * len(_extra))
                 _pr = dict(_c.execute(
                     'SELECT ticker, price FROM ntm_screening WHERE date=? AND price IS NOT NULL '